@@ -0,0 +1,9 @@
+import os
+from data_service.asgi import create_asgi_app
+app = create_asgi_app()
+
+# ASGI serving mode, the routes run the async view variants, see data_service.asgi
+if __name__ == '__main__':
+    import uvicorn
+    uvicorn.run(app, host='0.0.0.0', port=int(os.environ.get('PORT', 8081)),
+                limit_concurrency=int(os.environ.get('LIMIT_CONCURRENCY', 1000)))
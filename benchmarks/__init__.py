@@ -0,0 +1,28 @@
+"""
+    benchmarks for the data-service, run each module with python -m benchmarks.<module>
+
+    benchmarks run against a local datastore stand-in, the environment variables the
+    service expects are given placeholder values when not set
+"""
+import os
+
+LOCAL_ENVIRONMENT: dict = {
+    'PROJECT': 'local-benchmarks',
+    'APP_NAME': 'data-service',
+    'ADMIN_EMAIL': 'admin@localhost',
+    'PUBSUB_VERIFICATION_TOKEN': 'local',
+    'BINANCE_API_KEY': 'local',
+    'BINANCE_SECRET_KEY': 'local',
+    'EOD_HISTORICAL_API_KEY': 'local',
+    # ndb skips credential loading and opens an insecure channel when pointed at the emulator
+    'DATASTORE_EMULATOR_HOST': 'localhost:8081',
+    # no credentials either, google.auth gives up on them without probing the metadata server
+    'NO_GCE_CHECK': 'true',
+    # RPCs no benchmark answers itself go to the in-memory datastore of data_service.store.memory
+    'DATASTORE_BACKEND': 'memory',
+}
+
+
+def set_local_environment() -> None:
+    for name, value in LOCAL_ENVIRONMENT.items():
+        os.environ.setdefault(name, value)
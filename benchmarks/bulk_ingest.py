@@ -0,0 +1,118 @@
+"""
+    measures volume ingestion throughput, one put per row against the bulk path
+
+    per-row: StockView.create_buy_model for every row,
+        as each /task/stock/create-buy-volume task does
+    bulk: BulkVolumeView.create_volumes_bulk,
+        one validation pass and put_multi_async in chunks of 500
+
+    writes go to an in-memory stand-in for the datastore which charges --rpc-latency per RPC, so the
+    numbers reflect how many round trips each path makes rather than the speed of a real datastore.
+
+    python -m benchmarks.bulk_ingest --rows 5000 --rpc-latency 5
+"""
+import argparse
+import contextlib
+import datetime
+import random
+import time
+import typing
+from unittest import mock
+from benchmarks import set_local_environment
+
+set_local_environment()
+
+from google.cloud import ndb
+from data_service.config import Config
+from data_service.main import create_app
+from data_service.views.stocks import StockView
+from data_service.views.bulk_volumes import BulkVolumeView
+
+
+class LocalDatastore:
+    """
+        keeps written entities in memory, every call is one RPC and sleeps rpc_latency seconds
+    """
+
+    def __init__(self, rpc_latency: float):
+        self.rpc_latency: float = rpc_latency
+        self.entities: typing.List[ndb.Model] = []
+        self.rpcs: int = 0
+
+    def _rpc(self) -> None:
+        self.rpcs += 1
+        time.sleep(self.rpc_latency)
+
+    def put(self, entity: ndb.Model, *args, **kwargs) -> str:
+        self._rpc()
+        self.entities.append(entity)
+        return 'key'
+
+    def put_multi_async(self, entities: typing.List[ndb.Model], *args,
+                        **kwargs) -> typing.List[ndb.Future]:
+        self._rpc()
+        futures: typing.List[ndb.Future] = []
+        for entity in entities:
+            self.entities.append(entity)
+            future: ndb.Future = ndb.Future()
+            future.set_result('key')
+            futures.append(future)
+        return futures
+
+
+def buy_rows(rows: int) -> typing.List[dict]:
+    day: datetime.date = datetime.date(2021, 3, 15)
+    return [{'stock_id': 'stock-{}'.format(random.randint(0, 300)),
+             'date_created': day.strftime('%Y-%m-%d'),
+             'buy_volume': random.randint(0, 10 ** 6), 'buy_value': random.randint(0, 10 ** 8),
+             'buy_ave_price': random.randint(0, 10 ** 4),
+             'buy_market_val_percent': random.randint(0, 100),
+             'buy_trade_count': random.randint(0, 10 ** 3)} for _ in range(rows)]
+
+
+@contextlib.contextmanager
+def local_datastore(rpc_latency: float) -> typing.Iterator[LocalDatastore]:
+    datastore: LocalDatastore = LocalDatastore(rpc_latency=rpc_latency)
+    # the history rebuilds and market summaries the writes queue run after the request
+    with mock.patch('google.cloud.ndb.Model.put', autospec=True, side_effect=datastore.put), \
+            mock.patch('google.cloud.ndb.put_multi_async', side_effect=datastore.put_multi_async), \
+            mock.patch('data_service.views.history.create_task', return_value='queued'), \
+            mock.patch('data_service.views.market.create_task', return_value='queued'):
+        yield datastore
+
+
+def per_row(rows: typing.List[dict]) -> None:
+    stock_view: StockView = StockView()
+    for row in rows:
+        stock_view.create_buy_model(buy_data=row)
+
+
+def bulk(rows: typing.List[dict]) -> None:
+    BulkVolumeView().create_volumes_bulk(path='buy-volumes', rows=rows)
+
+
+def report(name: str, rows: int, seconds: float, datastore: LocalDatastore) -> None:
+    print("{:<8} rows: {:6d}  seconds: {:8.3f}  rows/sec: {:10.1f}  rpcs: {:6d}".format(
+        name, rows, seconds, rows / seconds, datastore.rpcs))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=2000)
+    parser.add_argument('--rpc-latency', type=float, default=5.0,
+                        help='milliseconds per datastore RPC')
+    args = parser.parse_args()
+
+    app = create_app(config_class=Config)
+    app.config['BULK_INGEST_LIMIT'] = max(args.rows, Config.BULK_INGEST_LIMIT)
+    rows: typing.List[dict] = buy_rows(rows=args.rows)
+    with app.app_context():
+        for name, ingest in (('per-row', per_row), ('bulk', bulk)):
+            with local_datastore(rpc_latency=args.rpc_latency / 1000) as datastore:
+                start: float = time.perf_counter()
+                ingest(rows)
+                report(name, len(rows), time.perf_counter() - start, datastore)
+
+
+if __name__ == '__main__':
+    main()
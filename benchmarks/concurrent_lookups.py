@@ -0,0 +1,132 @@
+"""
+    measures how long multi-lookup stock model writes
+    take when the lookups are sequential or concurrent
+
+    sequential: create_stock_model and update_stock_model, each get waits for the one before it
+    concurrent: create_stock_model_async and update_stock_model_async, the independent lookups are
+    issued together from one tasklet so they share a round trip
+
+    every datastore RPC is answered by an in-memory stand-in after --rpc-latency, the event loop of
+    ndb keeps waiting on all the RPCs in flight so overlapping lookups cost one latency instead of
+    several.
+
+    python -m benchmarks.concurrent_lookups --calls 200 --rpc-latency 5
+"""
+import argparse
+import asyncio
+import contextlib
+import statistics
+import time
+import typing
+from unittest import mock
+from benchmarks import set_local_environment
+
+set_local_environment()
+
+from google.cloud import ndb
+from google.cloud.ndb import _eventloop
+from data_service.config import Config
+from data_service.main import create_app
+from data_service.store.stocks import Stock, Broker, StockModel
+from data_service.views.stocks import StockView
+
+
+class LatencyDatastore:
+    """
+        answers gets, queries and puts from memory,
+        every RPC resolves rpc_latency seconds after it was issued
+    """
+
+    def __init__(self, rpc_latency: float):
+        self.rpc_latency: float = rpc_latency
+        self.rpcs: int = 0
+        self.stock: Stock = Stock(stock_id='stock-1', stock_code='TSLA', stock_name='Tesla',
+                                  symbol='TSLA')
+        self.broker: Broker = Broker(broker_id='broker-1', broker_code='BRK', broker_name='Broker')
+        self.stock_model: StockModel = StockModel(exchange_id='exchange-1',
+                                                  transaction_id='transaction-1',
+                                                  stock=self.stock, broker=self.broker)
+
+    def _rpc(self, result: typing.Any) -> ndb.Future:
+        self.rpcs += 1
+        future: ndb.Future = ndb.Future()
+        _eventloop.queue_call(self.rpc_latency, future.set_result, result)
+        return future
+
+    def get_async(self, key: ndb.Key, *args, **kwargs) -> ndb.Future:
+        return self._rpc({'Stock': self.stock, 'Broker': self.broker,
+                          'StockModel': self.stock_model}[key.kind()])
+
+    def query_get_async(self, query: ndb.Query, *args, **kwargs) -> ndb.Future:
+        return self._rpc({'Stock': self.stock, 'Broker': self.broker}[query.kind])
+
+    def put_async(self, entity: ndb.Model, *args, **kwargs) -> ndb.Future:
+        return self._rpc('key')
+
+
+@contextlib.contextmanager
+def latency_datastore(rpc_latency: float) -> typing.Iterator[LatencyDatastore]:
+    datastore: LatencyDatastore = LatencyDatastore(rpc_latency=rpc_latency)
+    with mock.patch.object(ndb.Key, 'get_async', autospec=True, side_effect=datastore.get_async), \
+            mock.patch.object(ndb.Query, 'get_async', autospec=True,
+                              side_effect=datastore.query_get_async), \
+            mock.patch.object(ndb.Model, '_put_async', autospec=True,
+                              side_effect=datastore.put_async), \
+            mock.patch.object(ndb.Model, 'put_async', autospec=True,
+                              side_effect=datastore.put_async):
+        yield datastore
+
+
+def stock_model_data() -> dict:
+    return {'transaction_id': 'transaction-1', 'exchange_id': 'exchange-1',
+            'stock': {'stock_code': 'TSLA'}, 'broker': {'broker_code': 'BRK'}}
+
+
+def operations(stock_view: StockView) -> typing.Dict[str, typing.Callable[[], tuple]]:
+    create: dict = dict(exchange_id='exchange-1', sid='sid-1', stock_id='stock-1',
+                        broker_id='broker-1')
+    return {
+        'create sequential': lambda: stock_view.create_stock_model(**create),
+        'create concurrent': lambda: asyncio.run(stock_view.create_stock_model_async(**create)),
+        'update sequential': lambda: stock_view.update_stock_model(stock_model=stock_model_data()),
+        'update concurrent': lambda: asyncio.run(
+            stock_view.update_stock_model_async(stock_model=stock_model_data())),
+    }
+
+
+def time_calls(func: typing.Callable, calls: int) -> typing.List[float]:
+    timings: typing.List[float] = []
+    for _ in range(calls):
+        start: float = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def report(name: str, timings: typing.List[float], rpcs: int) -> None:
+    timings = sorted(timings)
+    p99: float = timings[int(len(timings) * 0.99) - 1]
+    print("{:<18} mean: {:8.3f} ms  p50: {:8.3f} ms  p99: {:8.3f} ms  rpcs/call: {:4.1f}".format(
+        name, statistics.mean(timings), statistics.median(timings), p99, rpcs / len(timings)))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--calls', type=int, default=100)
+    parser.add_argument('--rpc-latency', type=float, default=5.0,
+                        help='milliseconds per datastore RPC')
+    args = parser.parse_args()
+
+    app = create_app(config_class=Config)
+    with app.app_context():
+        stock_view: StockView = StockView()
+        for name, operation in operations(stock_view=stock_view).items():
+            with latency_datastore(rpc_latency=args.rpc_latency / 1000) as datastore:
+                response, status = operation()
+                assert status == 200, "{} failed: {}".format(name, response.get_json())
+                datastore.rpcs = 0
+                report(name, time_calls(operation, args.calls), datastore.rpcs)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,264 @@
+"""
+    benchmarks of the stock, user and cron hot paths on a production sized synthetic dataset
+
+    the in-memory datastore of data_service.store.memory is loaded with benchmarks.synthetic, 300
+    stocks, 130 brokers, 5 years of daily volumes and 100k users by default, and every RPC is
+    answered after --rpc-latency. each case is timed over --calls calls, crons over --cron-runs
+    runs:
+
+    daily-*-by-stock: get_daily_*_volumes_by_stock of a random stock, every row of its history, read
+        from the volume history unless --volume-entities
+    day-*: get_day_*_volumes of a random trading day, every stock on that day
+    create-*: create_* of one new volume row, as each create volume task does, the history rebuild
+        it queues is accepted by a stand-in for Cloud Tasks, it runs after the request
+    broker-flows: get_top_brokers of a random stock over its whole volume history
+    cron-close-data: cron_call_close_data_apis,
+        the EOD api answered by a stand-in with one row a ticker
+    cron-membership-invoices: cron_create_membership_invoices over every unpaid membership
+    cron-affiliate-payments: cron_finalize_affiliate_payments,
+        the earnings are written again before each run
+
+    views are called past their cache, the numbers are the cost of the datastore work behind a cache
+    miss. each case reports p50, p99, calls/sec and the peak RSS of the process after it ran.
+    --save-baseline writes the results as json, --baseline compares against such a file and exits 1
+    when a case got slower than --tolerance allows.
+
+    python -m benchmarks.hot_paths --years 1 --users 20000 --baseline benchmarks/baseline.json
+"""
+import argparse
+import datetime
+import json
+import math
+import random
+import resource
+import statistics
+import sys
+import time
+import typing
+from unittest import mock
+from benchmarks import set_local_environment
+
+set_local_environment()
+
+import pandas as pd
+from data_service.config import Config
+from data_service.config.use_context import datastore_context
+from data_service.cron.eod_close_data import exchange_close_data_calls
+from data_service.cron.eod_close_data.exchange_close_data_calls import cron_call_close_data_apis
+from data_service.cron.operational_jobs.operational_jobs import (cron_create_membership_invoices,
+                                                                 cron_finalize_affiliate_payments)
+from data_service.main import cache_stocks, create_app
+from data_service.store.memory import memory_datastore
+from data_service.views.broker_flows import BrokerFlowView
+from data_service.views.stocks import StockView
+from benchmarks import synthetic
+
+case_type = typing.Callable[[int], typing.Any]
+run_type = typing.Tuple[case_type, int, typing.Union[typing.Callable, None]]
+
+
+def percentile(timings: typing.List[float], q: float) -> float:
+    """
+        nearest rank percentile of sorted timings
+    """
+    return timings[min(len(timings) - 1, max(0, math.ceil(q * len(timings)) - 1))]
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is in kilobytes on linux and in bytes on macOS
+    peak: int = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+class EODStandIn:
+    """
+        answers get_eod_data_async with one row of prices a ticker,
+        each run of the cron is a new trading day
+    """
+
+    def __init__(self):
+        self.day: datetime.date = synthetic.LAST_DAY
+
+    def next_day(self) -> None:
+        self.day += datetime.timedelta(days=1)
+
+    async def get_eod_data_async(self, symbol: str, exchange: str, *args, **kwargs) -> pd.DataFrame:
+        return pd.DataFrame({'Open': [10.5], 'High': [11.0], 'Low': [10.0], 'Close': [10.75],
+                             'Adjusted_close': [10.75], 'Volume': [150000.0]},
+                            index=pd.DatetimeIndex([self.day]))
+
+
+def volume_row(kind: str, n: int, day: datetime.date, scale: synthetic.Scale) -> dict:
+    row: dict = {'stock_id': synthetic.stock_id(n % scale.stocks), 'date_created': str(day),
+                 'transaction_id': 'bench-{}-{}'.format(kind, n),
+                 'broker_id': synthetic.broker_id(n % scale.brokers)}
+    if kind == 'net':
+        return dict(row, net_volume=-500, net_value=-5000, total_volume=1500, total_value=15000)
+    return dict(row, **{'{}_volume'.format(kind): 1000, '{}_value'.format(kind): 10000,
+                        '{}_ave_price'.format(kind): 10, '{}_market_val_percent'.format(kind): 5,
+                        '{}_trade_count'.format(kind): 20})
+
+
+def stock_cases(stock_view: StockView, scale: synthetic.Scale,
+                days: typing.List[datetime.date]) -> typing.Dict[str, case_type]:
+    cases: typing.Dict[str, case_type] = {}
+    rng: random.Random = scale.rng('calls')
+    for kind in ('buy', 'sell', 'net'):
+        by_stock: typing.Callable = getattr(StockView,
+                                            'get_daily_{}_volumes_by_stock'.format(kind)).uncached
+        by_day: typing.Callable = getattr(StockView, 'get_day_{}_volumes'.format(kind)).uncached
+        cases['daily-{}-by-stock'.format(kind)] = lambda n, by_stock=by_stock: by_stock(
+            stock_view, stock_id=synthetic.stock_id(rng.randrange(scale.stocks)))
+        cases['day-{}'.format(kind)] = lambda n, by_day=by_day: by_day(
+            stock_view, date_created=rng.choice(days))
+
+    new_day: datetime.date = synthetic.LAST_DAY + datetime.timedelta(days=1)
+    cases['create-buy'] = lambda n: stock_view.create_buy_model(
+        buy_data=volume_row('buy', n, new_day, scale))
+    cases['create-sell'] = lambda n: stock_view.create_sell_volume(
+        sell_data=volume_row('sell', n, new_day, scale))
+    cases['create-net'] = lambda n: stock_view.create_net_volume(
+        net_volume_data=volume_row('net', n, new_day, scale))
+    cases['broker-flows'] = lambda n: BrokerFlowView.get_top_brokers.uncached(
+        BrokerFlowView(), stock_id=synthetic.stock_id(rng.randrange(scale.stocks)))
+    return cases
+
+
+def run_case(case: case_type, calls: int,
+             setup: typing.Union[typing.Callable[[], None], None] = None,
+             warm_up: bool = True) -> dict:
+    """
+        the first call warms up, it builds the datastore
+        indexes the case queries, unless warm_up is off
+    """
+    if warm_up:
+        case(calls)
+    timings: typing.List[float] = []
+    for n in range(calls):
+        if setup is not None:
+            setup()
+        start: float = time.perf_counter()
+        result: typing.Any = case(n)
+        timings.append((time.perf_counter() - start) * 1000)
+        if isinstance(result, tuple) and result[1] != 200:
+            raise RuntimeError("call {} failed: {}".format(n, result[0].get_json()))
+    timings.sort()
+    return {'calls': calls, 'p50_ms': round(statistics.median(timings), 3),
+            'p99_ms': round(percentile(timings, 0.99), 3),
+            'calls_per_sec': round(calls / (sum(timings) / 1000), 3),
+            'peak_rss_mb': round(peak_rss_mb(), 1)}
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> typing.List[str]:
+    """
+        the cases slower than baseline by more than tolerance,
+        a fraction, cases one of them lacks are skipped
+    """
+    if baseline.get('scale') != results['scale'] or \
+            baseline.get('rpc_latency_ms') != results['rpc_latency_ms']:
+        print("baseline was taken at {} with {} ms rpcs, not compared".format(
+            baseline.get('scale'), baseline.get('rpc_latency_ms')))
+        return []
+    regressions: typing.List[str] = []
+    for name, after in results['cases'].items():
+        before: typing.Union[dict, None] = baseline['cases'].get(name)
+        if before is None:
+            continue
+        for metric in ('p50_ms', 'p99_ms'):
+            change: float = ((after[metric] - before[metric]) / before[metric]
+                             if before[metric] else 0.0)
+            print("{:<26} {:<7} {:10.3f} -> {:10.3f} ms  {:+7.1%}".format(
+                name, metric, before[metric], after[metric], change))
+            if change > tolerance:
+                regressions.append("{} {} {:+.1%}".format(name, metric, change))
+    return regressions
+
+
+def report(name: str, stats: dict) -> None:
+    print("{:<26} calls: {:5d}  p50: {:10.3f} ms  p99: {:10.3f} ms  calls/sec: {:9.1f}  "
+          "peak rss: {:8.1f} MB".format(name, stats['calls'], stats['p50_ms'], stats['p99_ms'],
+                                        stats['calls_per_sec'], stats['peak_rss_mb']))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--stocks', type=int, default=300)
+    parser.add_argument('--brokers', type=int, default=130)
+    parser.add_argument('--years', type=float, default=5)
+    parser.add_argument('--users', type=int, default=100000)
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--calls', type=int, default=50)
+    parser.add_argument('--cron-runs', type=int, default=3)
+    parser.add_argument('--rpc-latency', type=float, default=5.0,
+                        help='milliseconds per datastore RPC')
+    parser.add_argument('--cases', default='', help='comma separated case names, all when empty')
+    parser.add_argument('--volume-entities', action='store_true',
+                        help='read daily volumes by stock from the volume entities, '
+                             'not the volume history')
+    parser.add_argument('--baseline', help='json results to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='slowdown a case may show, 0.25 is 25%%')
+    parser.add_argument('--save-baseline', help='write the results as json to this file')
+    args = parser.parse_args()
+
+    scale: synthetic.Scale = synthetic.Scale(stocks=args.stocks, brokers=args.brokers,
+                                             years=args.years, users=args.users, seed=args.seed)
+    app = create_app(config_class=Config)
+    app.config['VOLUME_HISTORY_READS'] = not args.volume_entities
+    results: dict = {'scale': scale.as_dict(), 'rpc_latency_ms': args.rpc_latency, 'cases': {}}
+    with app.app_context():
+        memory_datastore.latency = 0
+        memory_datastore.clear()
+        start: float = time.perf_counter()
+        with datastore_context():
+            written: typing.Dict[str, int] = synthetic.load(datastore=memory_datastore, scale=scale)
+        results['load'] = {'entities': written, 'seconds': round(time.perf_counter() - start, 3),
+                           'peak_rss_mb': round(peak_rss_mb(), 1)}
+        print("loaded {} in {:.1f} s, peak rss: {:.1f} MB".format(
+            written, results['load']['seconds'], results['load']['peak_rss_mb']))
+        memory_datastore.latency = args.rpc_latency / 1000
+
+        eod: EODStandIn = EODStandIn()
+
+        def reset_earnings() -> None:
+            with datastore_context():
+                synthetic.write(memory_datastore,
+                                synthetic.affiliates(scale, scale.rng('affiliates')))
+
+        days: typing.List[datetime.date] = synthetic.trading_days(scale.years)
+        cases: typing.Dict[str, run_type] = {name: (case, args.calls, None) for name, case
+                                             in stock_cases(StockView(), scale, days).items()}
+        cases['cron-close-data'] = (lambda n: cron_call_close_data_apis(), args.cron_runs,
+                                    lambda: (eod.next_day(), cache_stocks.clear()))
+        cases['cron-membership-invoices'] = (lambda n: cron_create_membership_invoices(),
+                                             args.cron_runs, None)
+        cases['cron-affiliate-payments'] = (lambda n: cron_finalize_affiliate_payments(),
+                                            args.cron_runs, reset_earnings)
+
+        selected: typing.List[str] = [name for name in args.cases.split(',') if name] or list(cases)
+        with mock.patch.object(exchange_close_data_calls, 'get_eod_data_async',
+                               side_effect=eod.get_eod_data_async), \
+                mock.patch('data_service.views.history.create_task', return_value='queued'):
+            for name in selected:
+                case, calls, setup = cases[name]
+                # a cron run is too long to repeat only to warm up
+                results['cases'][name] = run_case(case=case, calls=calls, setup=setup,
+                                                  warm_up=not name.startswith('cron-'))
+                report(name, results['cases'][name])
+
+    if args.save_baseline:
+        with open(args.save_baseline, 'w') as baseline_file:
+            json.dump(results, baseline_file, indent=2, sort_keys=True)
+            baseline_file.write('\n')
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            regressions: typing.List[str] = compare(results, json.load(baseline_file),
+                                                    tolerance=args.tolerance)
+        if regressions:
+            print("slower than the baseline: {}".format(", ".join(regressions)))
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
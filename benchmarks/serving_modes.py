@@ -0,0 +1,219 @@
+"""
+    load test of the two serving modes, the same requests against each server
+
+    wsgi: gunicorn --workers 1 --threads 8,
+        the routes run the sync views, as the Dockerfile serves the app
+    asgi: uvicorn with data_service.asgi,
+        the routes run the *_async view variants on --threads worker threads
+
+    each server runs in its own process on the memory backend, seeded before it listens, every
+    datastore RPC is answered after --rpc-latency. the load is --connections clients each sending
+    requests one after another, see request_bodies, by ids no earlier request used so no read is a
+    cache hit.
+
+    python -m benchmarks.serving_modes --requests 1000 --connections 32 --rpc-latency 5
+"""
+import argparse
+import asyncio
+import collections
+import datetime
+import itertools
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import typing
+from benchmarks import set_local_environment
+
+set_local_environment()
+os.environ.setdefault('AUTH_PROJECTS', 'local-benchmarks')
+os.environ.setdefault('SECRET', 'local')
+
+import aiohttp
+
+HEADERS: dict = {'X-PROJECT-NAME': 'local-benchmarks', 'x-auth-token': 'local',
+                 'Content-Type': 'application/json'}
+
+
+def seed(entities: int) -> None:
+    """
+        stocks, brokers, stock models and users 0 to entities - 1,
+        the ids request_bodies reads and writes
+    """
+    from google.cloud import ndb
+    from data_service.config.use_context import datastore_context
+    from data_service.main import create_app
+    from data_service.store.stocks import Stock, Broker, StockModel
+    from data_service.store.users import UserModel
+
+    with create_app().app_context(), datastore_context():
+        for first in range(0, entities, 500):
+            batch: typing.List[ndb.Model] = []
+            for n in range(first, min(first + 500, entities)):
+                stock: Stock = Stock(stock_id='stock-{}'.format(n), stock_code='S{}'.format(n),
+                                     stock_name='stock {}'.format(n), symbol='S{}'.format(n))
+                broker: Broker = Broker(broker_id='broker-{}'.format(n),
+                                        broker_code='B{}'.format(n),
+                                        broker_name='broker {}'.format(n))
+                batch += [stock, broker,
+                          StockModel(exchange_id='exchange',
+                                     transaction_id='transaction-{}'.format(n),
+                                     stock=stock, broker=broker),
+                          UserModel(uid='uid-{}'.format(n), names='user', surname='benchmark',
+                                    email='user-{}@example.com'.format(n), cell='0{}'.format(n),
+                                    password='hash')]
+            ndb.put_multi(batch)
+
+
+def serve(mode: str, port: int, threads: int, rpc_latency: float, entities: int) -> None:
+    """
+        seeds the memory datastore then runs the server
+        of mode in this process until it is terminated,
+        every datastore RPC made while serving is answered rpc_latency seconds after it was made
+    """
+    from data_service.store.memory import memory_datastore
+    memory_datastore.latency = 0
+    seed(entities=entities)
+    memory_datastore.latency = rpc_latency
+    if mode == 'asgi':
+        import uvicorn
+        from data_service.asgi import create_asgi_app
+        uvicorn.run(create_asgi_app(threads=threads), host='127.0.0.1', port=port,
+                    log_level='warning', limit_concurrency=1000)
+    else:
+        gunicorn_server(port=port, threads=threads).run()
+
+
+def gunicorn_server(port: int, threads: int):
+    from gunicorn.app.base import BaseApplication
+    from data_service.main import create_app
+
+    class Gunicorn(BaseApplication):
+        def load_config(self) -> None:
+            for name, value in {'bind': '127.0.0.1:{}'.format(port), 'workers': 1,
+                                'threads': threads, 'timeout': 0, 'loglevel': 'warning'}.items():
+                self.cfg.set(name, value)
+
+        def load(self) -> typing.Callable:
+            return create_app()
+
+    return Gunicorn()
+
+
+def wait_for_port(port: int, seconds: float = 30) -> None:
+    deadline: float = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        with socket.socket() as connection:
+            if connection.connect_ex(('127.0.0.1', port)) == 0:
+                return
+        time.sleep(0.1)
+    raise TimeoutError("server on port {} did not start".format(port))
+
+
+def request_bodies() -> typing.Iterator[typing.Tuple[str, dict]]:
+    """
+        the requests each client sends in turn,
+        by path and json body, n picks ids no earlier request used
+        - stock and stock model reads, views without an async variant, one lookup each
+        - memberships and stock models created, their async variants look the user, plan and
+          membership or the stock and broker up together
+    """
+    plan_start_date: str = (datetime.date.today() + datetime.timedelta(days=30)).isoformat()
+    for n in itertools.count():
+        if n % 4 == 0:
+            yield '/api/v1/stocks/item/stock', {'stock_id': 'stock-{}'.format(n)}
+        elif n % 4 == 1:
+            yield '/api/v1/stocks/item/stock-model', {'transaction_id': 'transaction-{}'.format(n)}
+        elif n % 4 == 2:
+            yield '/api/v1/member', {'uid': 'uid-{}'.format(n), 'plan_id': 'plan-{}'.format(n),
+                                     'plan_start_date': plan_start_date}
+        else:
+            yield '/task/stock/create-stock-model', {'exchange_id': 'exchange',
+                                                     'sid': 'created-{}'.format(n),
+                                                     'stock_id': 'stock-{}'.format(n),
+                                                     'broker_id': 'broker-{}'.format(n)}
+
+
+async def load(port: int, requests: int, connections: int,
+               bodies: typing.Iterator[typing.Tuple[str, dict]]
+               ) -> typing.Tuple[typing.Dict[str, typing.List[float]], float, int]:
+    timings: typing.Dict[str, typing.List[float]] = collections.defaultdict(list)
+    errors: typing.List[int] = []
+    remaining: typing.Iterator[int] = iter(range(requests))
+
+    async def client(session: aiohttp.ClientSession) -> None:
+        for _ in remaining:
+            path, body = next(bodies)
+            start: float = time.perf_counter()
+            async with session.post('http://127.0.0.1:{}{}'.format(port, path), json=body,
+                                    headers=HEADERS) as response:
+                await response.read()
+                if response.status != 200:
+                    errors.append(response.status)
+            timings[path].append((time.perf_counter() - start) * 1000)
+
+    connector: aiohttp.TCPConnector = aiohttp.TCPConnector(limit=connections)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        start: float = time.perf_counter()
+        await asyncio.gather(*(client(session) for _ in range(connections)))
+        return timings, time.perf_counter() - start, len(errors)
+
+
+def percentiles(timings: typing.List[float]) -> str:
+    timings = sorted(timings)
+    p99: float = timings[max(int(len(timings) * 0.99) - 1, 0)]
+    return "p50: {:8.3f} ms  p99: {:8.3f} ms".format(statistics.median(timings), p99)
+
+
+def report(mode: str, timings: typing.Dict[str, typing.List[float]], seconds: float,
+           errors: int) -> None:
+    every: typing.List[float] = list(itertools.chain.from_iterable(timings.values()))
+    print("{:<5} requests: {:6d}  req/sec: {:8.1f}  {}  errors: {:4d}".format(
+        mode, len(every), len(every) / seconds, percentiles(every), errors))
+    for path, path_timings in sorted(timings.items()):
+        print("      {:<32} {}".format(path, percentiles(path_timings)))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--requests', type=int, default=1000)
+    parser.add_argument('--connections', type=int, default=32)
+    parser.add_argument('--threads', type=int, default=8, help='worker threads of either server')
+    parser.add_argument('--rpc-latency', type=float, default=5.0,
+                        help='milliseconds per datastore RPC')
+    parser.add_argument('--modes', default='wsgi,asgi')
+    parser.add_argument('--serve', choices=('wsgi', 'asgi'), help=argparse.SUPPRESS)
+    parser.add_argument('--entities', type=int, help=argparse.SUPPRESS)
+    parser.add_argument('--port', type=int, default=8091)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(mode=args.serve, port=args.port, threads=args.threads,
+              rpc_latency=args.rpc_latency / 1000, entities=args.entities)
+        return
+
+    warm_up: int = args.threads * 4
+    for mode in args.modes.split(','):
+        bodies: typing.Iterator[typing.Tuple[str, dict]] = request_bodies()
+        server = subprocess.Popen(
+            [sys.executable, '-m', 'benchmarks.serving_modes', '--serve', mode,
+             '--port', str(args.port), '--threads', str(args.threads),
+             '--rpc-latency', str(args.rpc_latency),
+             '--entities', str(warm_up + args.requests)])
+        try:
+            wait_for_port(port=args.port, seconds=300)
+            # warm up the datastore client and the first requests of every worker thread
+            asyncio.run(
+                load(port=args.port, requests=warm_up, connections=args.threads, bodies=bodies))
+            report(mode, *asyncio.run(
+                load(port=args.port, requests=args.requests, connections=args.connections,
+                     bodies=bodies)))
+        finally:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,268 @@
+"""
+    synthetic data for the benchmarks,
+    written to the in-memory datastore of data_service.store.memory
+
+    a market of --stocks stocks traded by --brokers brokers with --years years of daily buy, sell
+    and net volumes, one exchange listing every stock, and --users users each with a membership, one
+    in AFFILIATE_EVERY of them an affiliate with a wallet and earnings to be paid.
+
+    volumes are one row of each kind per stock per trading day, the broker of the row taken in turn,
+    rather than one row per broker per stock per day. 300 stocks and 5 years are then ~1.1M entities
+    instead of ~150M, the same rows a daily volume query of one stock reads, without every broker
+    repeating them. the volume history of data_service.store.history is written with the same rows.
+
+    rows are generated from --seed so the same arguments always write the same data.
+"""
+import datetime
+import random
+import typing
+from google.cloud import ndb
+from google.cloud.ndb import model
+from data_service.config import Config
+from data_service.store.affiliates import Affiliates, EarningsData
+from data_service.store.history import VolumeHistory, history_key
+from data_service.store.memory import Entity, MemoryDatastore
+from data_service.store.memberships import Memberships, MembershipPlans
+from data_service.store.mixins import AmountMixin
+from data_service.store.settings import ExchangeDataModel
+from data_service.store.stocks import Stock, Broker, BuyVolumeModel, SellVolumeModel, NetVolumeModel
+from data_service.store.users import UserModel
+from data_service.store.wallet import WalletModel
+
+LAST_DAY: datetime.date = datetime.date(2021, 12, 31)
+EXCHANGE_ID: str = 'exchange-pse'
+PLAN_IDS: typing.Tuple[str, ...] = ('plan-basic', 'plan-pro', 'plan-premium')
+AFFILIATE_EVERY: int = 20
+
+row_type = typing.Tuple[typing.Type[ndb.Model], dict]
+
+
+class Scale:
+    """
+        # NOTES: how much data to generate, defaults are the production sized market
+    """
+
+    def __init__(self, stocks: int = 300, brokers: int = 130, years: float = 5, users: int = 100000,
+                 seed: int = 7):
+        self.stocks: int = stocks
+        self.brokers: int = brokers
+        self.years: float = years
+        self.users: int = users
+        self.seed: int = seed
+
+    def rng(self, group: str) -> random.Random:
+        """
+            random numbers of one group of data,
+            the same whatever other groups were generated before it
+        """
+        return random.Random('{}-{}'.format(self.seed, group))
+
+    def as_dict(self) -> dict:
+        return dict(stocks=self.stocks, brokers=self.brokers, years=self.years, users=self.users,
+                    seed=self.seed)
+
+
+def stock_id(n: int) -> str:
+    return 'stock-{:04d}'.format(n)
+
+
+def broker_id(n: int) -> str:
+    return 'broker-{:04d}'.format(n)
+
+
+def user_id(n: int) -> str:
+    return 'user-{:06d}'.format(n)
+
+
+def trading_days(years: float, last_day: datetime.date = LAST_DAY) -> typing.List[datetime.date]:
+    """
+        every weekday of the years up to last_day, oldest first
+    """
+    first_day: datetime.date = last_day - datetime.timedelta(days=int(years * 365))
+    days: typing.List[datetime.date] = []
+    day: datetime.date = first_day
+    while day <= last_day:
+        if day.weekday() < 5:
+            days.append(day)
+        day += datetime.timedelta(days=1)
+    return days
+
+
+def stocks(scale: Scale) -> typing.List[Stock]:
+    return [Stock(stock_id=stock_id(n), stock_code='S{:04d}'.format(n),
+                  stock_name='Stock {}'.format(n),
+                  symbol='SYM{}'.format(n), is_crypto=False) for n in range(scale.stocks)]
+
+
+def brokers(scale: Scale) -> typing.List[Broker]:
+    return [Broker(broker_id=broker_id(n), broker_code='B{:04d}'.format(n),
+                   broker_name='Broker {}'.format(n))
+            for n in range(scale.brokers)]
+
+
+def exchange(scale: Scale) -> ExchangeDataModel:
+    tickers: typing.List[dict] = [{'stock_id': stock_id(n), 'symbol': 'SYM{}'.format(n),
+                                   'stock_name': 'stock {}'.format(n)} for n in range(scale.stocks)]
+    return ExchangeDataModel(exchange_id=EXCHANGE_ID, exchange_country='philippines',
+                             exchange_name='pse',
+                             exchange_type='fiat', exchange_tickers_list=tickers)
+
+
+def volumes(scale: Scale, rng: random.Random) -> typing.Iterator[row_type]:
+    """
+        the buy, sell and net volume of every stock on every trading day
+    """
+    rows: int = 0
+    for day in trading_days(years=scale.years):
+        for n in range(scale.stocks):
+            common: dict = dict(stock_id=stock_id(n), broker_id=broker_id(rows % scale.brokers),
+                                date_created=day)
+            transaction_id: str = '{}-{}'.format(stock_id(n), day.strftime('%Y%m%d'))
+            buy_volume: int = rng.randint(1000, 10 ** 6)
+            sell_volume: int = rng.randint(1000, 10 ** 6)
+            price: int = rng.randint(100, 10 ** 4)
+            yield BuyVolumeModel, dict(common, transaction_id=transaction_id + '-buy',
+                                       buy_volume=buy_volume,
+                                       buy_value=buy_volume * price, buy_ave_price=price,
+                                       buy_market_val_percent=rng.randint(0, 100),
+                                       buy_trade_count=rng.randint(1, 1000))
+            yield SellVolumeModel, dict(common, transaction_id=transaction_id + '-sell',
+                                        sell_volume=sell_volume,
+                                        sell_value=sell_volume * price, sell_ave_price=price,
+                                        sell_market_val_percent=rng.randint(0, 100),
+                                        sell_trade_count=rng.randint(1, 1000))
+            yield NetVolumeModel, dict(common, transaction_id=transaction_id + '-net',
+                                       net_volume=buy_volume - sell_volume,
+                                       net_value=(buy_volume - sell_volume) * price,
+                                       total_volume=buy_volume + sell_volume,
+                                       total_value=(buy_volume + sell_volume) * price)
+            rows += 1
+
+
+def histories(scale: Scale, rng: random.Random) -> typing.Iterator[VolumeHistory]:
+    """
+        the volume history of the rows of volumes, given the same rng, a month of buckets at a time
+    """
+    month: typing.Dict[ndb.Key, typing.List[dict]] = {}
+    for model_class, values in volumes(scale, rng):
+        key: ndb.Key = history_key(side=model_class.side, stock_id=values['stock_id'],
+                                   date_created=values['date_created'])
+        if key not in month and month and next(iter(month)).id() != key.id():
+            yield from merged(month)
+            month = {}
+        month.setdefault(key, []).append(
+            dict(values, exchange_id=Config.EXCHANGE_ID, currency=Config.CURRENCY))
+    yield from merged(month)
+
+
+def merged(buckets: typing.Dict[ndb.Key, typing.List[dict]]) -> typing.Iterator[VolumeHistory]:
+    for key, rows in buckets.items():
+        bucket: VolumeHistory = VolumeHistory(key=key)
+        bucket.merge(volumes=rows, removed=set())
+        yield bucket
+
+
+def plans() -> typing.List[MembershipPlans]:
+    return [MembershipPlans(plan_id=plan_id, plan_name=plan_id,
+                            description='{} membership'.format(plan_id),
+                            total_members=0, schedule_day=1, schedule_term='monthly',
+                            term_payment_amount=AmountMixin(amount=(n + 1) * 500, currency='PHP'),
+                            registration_amount=AmountMixin(amount=100, currency='PHP'),
+                            is_active=True)
+            for n, plan_id in enumerate(PLAN_IDS)]
+
+
+def users(scale: Scale, rng: random.Random) -> typing.Iterator[row_type]:
+    """
+        every user with a membership
+    """
+    for n in range(scale.users):
+        uid: str = user_id(n)
+        yield UserModel, dict(uid=uid, names='Name{}'.format(n), surname='Surname{}'.format(n),
+                              cell='0917{:07d}'.format(n), email='{}@example.com'.format(uid),
+                              is_active=True)
+        start: datetime.date = LAST_DAY - datetime.timedelta(days=rng.randint(-30, 700))
+        yield Memberships, dict(uid=uid, plan_id=rng.choice(PLAN_IDS),
+                                status=rng.choice(('paid', 'unpaid')), plan_start_date=start,
+                                payment_method=rng.choice(('eft', 'paypal')))
+
+
+def affiliates(scale: Scale, rng: random.Random) -> typing.Iterator[ndb.Model]:
+    """
+        one in AFFILIATE_EVERY users with a wallet and the earnings to be paid into it
+    """
+    for n in range(0, scale.users, AFFILIATE_EVERY):
+        uid: str = user_id(n)
+        affiliate_id: str = 'affiliate-{:06d}'.format(n)
+        yield Affiliates(affiliate_id=affiliate_id, uid=uid, total_recruits=rng.randint(0, 50))
+        funds: AmountMixin = AmountMixin(amount=rng.randint(0, 10 ** 5), currency='PHP')
+        yield WalletModel(uid=uid, available_funds=funds,
+                          paypal_address='{}@example.com'.format(uid))
+        earned: AmountMixin = AmountMixin(amount=rng.randint(0, 10 ** 4), currency='PHP')
+        earnings: EarningsData = EarningsData(affiliate_id=affiliate_id, is_paid=rng.random() < 0.5,
+                                              total_earned=earned, on_hold=rng.random() < 0.1)
+        # keyed by the affiliate so writing the affiliates
+        # again resets their earnings instead of adding more
+        earnings.key = ndb.Key(EarningsData, affiliate_id)
+        yield earnings
+
+
+def write(datastore: MemoryDatastore, entities: typing.Iterable[ndb.Model]) -> int:
+    """
+        stores entities straight into datastore without going through RPCs,
+        ndb spends ~1ms a put on tasklets
+        and batching which would make loading a million rows take longer than the benchmarks
+    """
+    written: int = 0
+    for written, entity in enumerate(entities, 1):
+        entity._pre_put_hook()
+        datastore.write(entity=model._entity_to_protobuf(entity)._pb, version=written)
+    return written
+
+
+def set_value(value_pb: typing.Any, value: typing.Any) -> None:
+    if isinstance(value, str):
+        value_pb.string_value = value
+    elif isinstance(value, bool):
+        value_pb.boolean_value = value
+    elif isinstance(value, int):
+        value_pb.integer_value = value
+    else:
+        value_pb.timestamp_value.FromDatetime(datetime.datetime.combine(value, datetime.time()))
+
+
+def write_rows(datastore: MemoryDatastore, rows: typing.Iterable[row_type]) -> int:
+    """
+        stores rows of flat models keyed by their natural id,
+        the first row of each model is written by ndb and
+        the protobuf it makes is the template the values
+        of the rows after it are copied into, 20x faster
+    """
+    templates: typing.Dict[type, typing.Any] = {}
+    written: int = 0
+    for written, (model_class, values) in enumerate(rows, 1):
+        template: typing.Any = templates.get(model_class)
+        if template is None:
+            template = templates[model_class] = model._entity_to_protobuf(model_class(**values))._pb
+        entity: typing.Any = Entity()
+        entity.CopyFrom(template)
+        entity.key.path[-1].name = values[model_class.natural_id]
+        for name, value in values.items():
+            set_value(entity.properties[name], value)
+        datastore.write(entity=entity, version=written)
+    return written
+
+
+def load(datastore: MemoryDatastore, scale: Scale) -> typing.Dict[str, int]:
+    """
+        writes the data of scale to datastore,
+        inside the open context of a client of datastore so keys get its
+        project and namespace, returns the entities written by group
+    """
+    return {
+        'market': write(datastore, stocks(scale) + brokers(scale) + [exchange(scale)] + plans()),
+        'volumes': write_rows(datastore, volumes(scale, scale.rng('volumes'))),
+        'history': write(datastore, histories(scale, scale.rng('volumes'))),
+        'users': write_rows(datastore, users(scale, scale.rng('users'))),
+        'affiliates': write(datastore, affiliates(scale, scale.rng('affiliates'))),
+    }
@@ -0,0 +1,79 @@
+"""
+    measures the per request overhead of opening an ndb context through use_context
+
+    legacy: a new ndb.Client for every call, as use_context did before the client registry, the
+    client builds its gRPC channel to DATASTORE_EMULATOR_HOST each time
+    registry: the process wide ndb.Client from use_context.get_client both run on the datastore
+    backend, opening a context makes no RPC so no emulator has to be listening
+
+    python -m benchmarks.use_context_overhead --calls 2000
+"""
+import argparse
+import os
+import statistics
+import time
+import typing
+from benchmarks import set_local_environment
+
+set_local_environment()
+# the memory backend builds no channel, it would hide the cost the registry saves
+os.environ['DATASTORE_BACKEND'] = 'datastore'
+
+from google.cloud import ndb
+from data_service.config.use_context import use_context, get_client, DEFAULT_NAMESPACE, _get_app
+
+
+def legacy_use_context(func):
+    def wrapper(*args, **kwargs):
+        app = _get_app()
+        client = ndb.Client(namespace=DEFAULT_NAMESPACE, project=app.config.get('PROJECT'))
+        with app.app_context(), client.context():
+            return func(*args, **kwargs)
+    return wrapper
+
+
+@legacy_use_context
+def legacy_view() -> bool:
+    return True
+
+
+@use_context
+def registry_view() -> bool:
+    return True
+
+
+@use_context
+def nested_view() -> bool:
+    return registry_view()
+
+
+def time_calls(func: typing.Callable, calls: int) -> typing.List[float]:
+    timings: typing.List[float] = []
+    for _ in range(calls):
+        start: float = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def report(name: str, timings: typing.List[float]) -> None:
+    timings = sorted(timings)
+    p99: float = timings[int(len(timings) * 0.99) - 1]
+    print("{:<10} mean: {:8.3f} ms  p50: {:8.3f} ms  p99: {:8.3f} ms".format(
+        name, statistics.mean(timings), statistics.median(timings), p99))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--calls', type=int, default=1000)
+    args = parser.parse_args()
+
+    # warm up the registry so the first client creation is not counted
+    get_client(project=_get_app().config.get('PROJECT'))
+    report('legacy', time_calls(legacy_view, args.calls))
+    report('registry', time_calls(registry_view, args.calls))
+    report('nested', time_calls(nested_view, args.calls))
+
+
+if __name__ == '__main__':
+    main()
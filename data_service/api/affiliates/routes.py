@@ -1,6 +1,7 @@
 from flask import Blueprint, request
 from data_service.api.api_authenticator import handle_auth
 from data_service.views.affiliates import AffiliatesView, RecruitsView
+from data_service.utils.pagination import page_arguments
 affiliates_bp = Blueprint('affiliates', __name__)
 
 
@@ -13,7 +14,7 @@ def affiliate(path: str) -> tuple:
     if path == "get":
         return affiliate_view_instance.get_affiliate(affiliate_data=affiliate_data)
     elif path == "get-all":
-        return affiliate_view_instance.get_all_affiliates()
+        return affiliate_view_instance.get_all_affiliates(**page_arguments(affiliate_data))
     elif path == "get-active":
         return affiliate_view_instance.get_active_affiliates()
     elif path == "get-not-active":
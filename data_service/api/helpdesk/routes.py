@@ -1,6 +1,7 @@
 import typing
 from flask import Blueprint, request, jsonify
 from data_service.views.helpdesk import TicketView
+from data_service.utils.pagination import page_arguments
 helpdesk_bp = Blueprint('helpdesk', __name__)
 
 
@@ -12,7 +13,8 @@ def helpdesk_messages() -> tuple:
 @helpdesk_bp.route('/api/v1/helpdesk-tickets', methods=["GET", "POST"])
 def helpdesk_tickets() -> tuple:
     ticket_view_instance: TicketView = TicketView()
-    return ticket_view_instance.get_all_tickets()
+    return ticket_view_instance.get_all_tickets(
+        **page_arguments(request.get_json(silent=True) or request.args))
 
 
 @helpdesk_bp.route('/api/v1/helpdesk-unresolved', methods=["POST", "GET"])
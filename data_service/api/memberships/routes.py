@@ -4,6 +4,7 @@ from datetime import datetime, date
 from data_service.api.api_authenticator import handle_auth
 from data_service.config.exceptions import InputError
 from data_service.utils.utils import date_string_to_date
+from data_service.utils.async_views import async_views
 from data_service.views.memberships import MembershipsView, MembershipPlansView
 memberships_bp = Blueprint('memberships', __name__)
 
@@ -11,7 +12,7 @@ memberships_bp = Blueprint('memberships', __name__)
 @memberships_bp.route("/api/v1/members/<path:plan_id>", methods=['POST'])
 @handle_auth
 def get_members(plan_id: str) -> tuple:
-    members_instance: MembershipsView = MembershipsView()
+    members_instance: MembershipsView = async_views(MembershipsView())
     return members_instance.return_plan_members(plan_id=plan_id)
 
 
@@ -41,7 +42,7 @@ def create_member() -> tuple:
     except ValueError as e:
         raise InputError(str(e))
 
-    members_view_instance: MembershipsView = MembershipsView()
+    members_view_instance: MembershipsView = async_views(MembershipsView())
     return members_view_instance.add_membership(uid=uid, plan_id=plan_id, plan_start_date=plan_start_date)
 
 
@@ -58,13 +59,13 @@ def get_update_status(uid: str) -> tuple:
         else:
             message: str = "status is required and should be paid or unpaid"
             return jsonify({'status': True, 'message': message}), 500
-        membership_view_instance: MembershipsView = MembershipsView()
+        membership_view_instance: MembershipsView = async_views(MembershipsView())
         return membership_view_instance.set_membership_status(uid=uid, status=status)
     elif request.method == "GET":
         """
             return membership record    
         """
-        membership_view_instance: MembershipsView = MembershipsView()
+        membership_view_instance: MembershipsView = async_views(MembershipsView())
         return membership_view_instance.is_member_off(uid=uid)
 
 
@@ -72,7 +73,7 @@ def get_update_status(uid: str) -> tuple:
 @handle_auth
 def get_plan_members_by_payment_status(plan_id: str, status: str) -> tuple:
     if (plan_id != "") and (status != ""):
-        membership_view_instance: MembershipsView = MembershipsView()
+        membership_view_instance: MembershipsView = async_views(MembershipsView())
         return membership_view_instance.return_plan_members_by_payment_status(plan_id=plan_id, status=status)
 
 
@@ -91,26 +92,26 @@ def change_membership_plan(plan_id: str) -> tuple:
         else:
             return jsonify({"status": False, "message": "destination plan id is required"}), 500
 
-        member_ship_instance_view: MembershipsView = MembershipsView()
+        member_ship_instance_view: MembershipsView = async_views(MembershipsView())
         return member_ship_instance_view.change_membership(uid=uid, origin_plan_id=plan_id, dest_plan_id=dest_plan_id)
 
 
 @memberships_bp.route('/api/v1/membership-plan', methods=["POST"])
 def create_membership_plan() -> tuple:
     membership_plan_data: dict = request.get_json()
-    member_ship_instance_view: MembershipPlansView = MembershipPlansView()
+    member_ship_instance_view: MembershipPlansView = async_views(MembershipPlansView())
     return member_ship_instance_view.add_plan(membership_plan_data=membership_plan_data)
 
 
 @memberships_bp.route('/api/v1/membership-plans', methods=["GET"])
 def get_membership_plans() -> tuple:
-    member_ship_instance_view: MembershipPlansView = MembershipPlansView()
+    member_ship_instance_view: MembershipPlansView = async_views(MembershipPlansView())
     return member_ship_instance_view.return_all_plans()
 
 
 @memberships_bp.route('/api/v1/update-membership-plan', methods=["POST"])
 def update_membership_plan() -> tuple:
-    member_ship_instance_view: MembershipPlansView = MembershipPlansView()
+    member_ship_instance_view: MembershipPlansView = async_views(MembershipPlansView())
     membership_plan: dict = request.get_json()
     if ("plan_id" in membership_plan) and (membership_plan["plan_id"] != ""):
         plan_id: typing.Union[str, None] = membership_plan.get("plan_id")
@@ -163,7 +164,7 @@ def is_member_off(uid: str) -> tuple:
     """
         for a specific user returns membership
     """
-    membership_instance: MembershipsView = MembershipsView()
+    membership_instance: MembershipsView = async_views(MembershipsView())
     return membership_instance.is_member_off(uid=uid)
 
 
@@ -172,13 +173,13 @@ def payment_amount(uid: str) -> tuple:
     """
         for a specific member return payment amounts
     """
-    membership_instance: MembershipsView = MembershipsView()
+    membership_instance: MembershipsView = async_views(MembershipsView())
     return membership_instance.payment_amount(uid=uid)
 
 
 @memberships_bp.route('/api/v1/memberships-set-payment-status/<path:uid>/<path:status>', methods=["GET"])
 def set_payment_status(uid: str, status: str) -> tuple:
-    membership_instance: MembershipsView = MembershipsView()
+    membership_instance: MembershipsView = async_views(MembershipsView())
     return membership_instance.set_payment_status(uid=uid, status=status)
 
 
@@ -3,6 +3,7 @@ import typing
 from flask import Blueprint, request, jsonify
 from data_service.api.api_authenticator import handle_auth
 from data_service.views.settings import ExchangeDataView, ScrappingPagesView
+from data_service.utils.pagination import page_arguments
 settings_bp = Blueprint('settings_bp', __name__)
 
 
@@ -96,7 +97,8 @@ def exchange_data(path: str) -> tuple:
             return exchange_data_instance.get_exchange(exchange_id=exchange_id)
 
         elif path == "get-all-exchanges":
-            return exchange_data_instance.return_all_exchanges()
+            return exchange_data_instance.return_all_exchanges(
+                **page_arguments(request.get_json(silent=True)))
 
         elif path == "exchange-errors":
             json_data: dict = request.get_json()
@@ -1,11 +1,18 @@
 import typing
 from datetime import date as date_class, date
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from data_service.api.api_authenticator import handle_auth
+from data_service.config import Config
 from data_service.config.exceptions import InputError
 from data_service.utils.utils import date_string_to_date, task_counter
+from data_service.utils.pagination import page_arguments
+from data_service.utils.export import is_compressed
+from data_service.utils.async_views import async_views
 from data_service.views.stock_price import StockPriceDataView
 from data_service.views.stocks import StockView
+from data_service.views.bulk_volumes import volume_specs
+from data_service.views.market import MarketSummaryView
+from data_service.views.broker_flows import BrokerFlowView
 from data_service.tasks.tasks import create_task
 from functools import lru_cache
 stocks_bp = Blueprint('stocks_bp', __name__)
@@ -16,7 +23,7 @@ gen = task_counter()
 @handle_auth
 @lru_cache(maxsize=4096)
 def stocks(path: str) -> tuple:
-    stock_view_instance: StockView = StockView()
+    stock_view_instance: StockView = async_views(StockView())
     try:
         json_data: dict = request.get_json()
         assert isinstance(json_data, dict)
@@ -64,36 +71,85 @@ def stocks(path: str) -> tuple:
         pass
 
 
+@stocks_bp.route('/api/v1/stocks/bulk/<path:path>', methods=['POST'])
+@handle_auth
+def stocks_bulk(path: str) -> tuple:
+    """
+        queues volume rows for writing, path is buy-volumes, sell-volumes or net-volumes
+        rows are split into tasks of at most BULK_INGEST_LIMIT rows
+    """
+    try:
+        json_data: dict = request.get_json()
+        assert isinstance(json_data, dict)
+        rows: list = json_data.get('rows')
+        assert isinstance(rows, list)
+    except AssertionError:
+        message: str = "cannot read json data, rows should be a list of volume rows"
+        raise InputError(description=message)
+    if path not in volume_specs:
+        return jsonify({'status': False, 'message': 'unknown volume type: {}'.format(path)}), 500
+
+    limit: int = current_app.config.get('BULK_INGEST_LIMIT', Config.BULK_INGEST_LIMIT)
+    tasks: int = 0
+    for start in range(0, len(rows), limit):
+        task = create_task(uri='/task/stock/bulk/{}'.format(path),
+                           payload={'rows': rows[start:start + limit]}, in_seconds=next(gen))
+        if task is None:
+            message: str = 'Unable to create task, {} of {} rows were queued'.format(
+                start, len(rows))
+            return jsonify({'status': False, 'message': message}), 500
+        tasks += 1
+    message: str = 'Successfully added {} bulk volume tasks'.format(tasks)
+    return jsonify({'status': True, 'message': message}), 200
+
+
 @stocks_bp.route('/api/v1/stocks/all/<path:path>', methods=['POST'])
 @handle_auth
 def stocks_all(path: str) -> tuple:
-    stock_view_instance: StockView = StockView()
+    stock_view_instance: StockView = async_views(StockView())
+    page: dict = page_arguments(request.get_json(silent=True))
     if path == "stocks":
-        return stock_view_instance.get_all_stocks()
+        return stock_view_instance.get_all_stocks(**page)
     elif path == "brokers":
-        return stock_view_instance.get_all_brokers()
+        return stock_view_instance.get_all_brokers(**page)
     elif path == "stock-models":
-        return stock_view_instance.get_all_stock_models()
+        return stock_view_instance.get_all_stock_models(**page)
     else:
         pass
 
 
+@stocks_bp.route('/api/v1/stocks/export/<path:path>', methods=['GET', 'POST'])
+@handle_auth
+def stocks_export(path: str) -> tuple:
+    """
+        streams a whole kind as newline delimited json, path is one of export_models in views.stocks
+        {"gzip": true} or ?gzip=true compresses the stream
+    """
+    json_data: dict = request.get_json(silent=True) or request.args
+    return StockView().export(path=path, compress=is_compressed(json_data.get('gzip')))
+
+
 @stocks_bp.route('/api/v1/stocks/daily/<path:path>', methods=['POST'])
 @handle_auth
 def daily_stocks(path: str) -> tuple:
-    stock_view_instance: StockView = StockView()
+    stock_view_instance: StockView = async_views(StockView())
     try:
         json_data: dict = request.get_json()
         assert isinstance(json_data, dict)
     except AssertionError:
         message: str = "cannot read json data"
         raise InputError(message)
+    # from and to bound the window of days returned,
+    # limit the rows, each window is cached on its own
+    window: dict = dict(stock_id=json_data['stock_id'], fields=json_data.get('fields'),
+                        date_from=json_data.get('from'), date_to=json_data.get('to'),
+                        limit=json_data.get('limit'))
     if path == "buy-volumes":
-        return stock_view_instance.get_daily_buy_volumes_by_stock(stock_id=json_data['stock_id'])
+        return stock_view_instance.get_daily_buy_volumes_by_stock(**window)
     elif path == "sell-volumes":
-        return stock_view_instance.get_daily_sell_volumes_by_stock(stock_id=json_data['stock_id'])
+        return stock_view_instance.get_daily_sell_volumes_by_stock(**window)
     elif path == "net-volumes":
-        return stock_view_instance.get_daily_net_volumes_by_stock(stock_id=json_data['stock_id'])
+        return stock_view_instance.get_daily_net_volumes_by_stock(**window)
     else:
         pass
 
@@ -101,7 +157,7 @@ def daily_stocks(path: str) -> tuple:
 @stocks_bp.route('/api/v1/stocks/item/<path:path>', methods=['POST'])
 @handle_auth
 def stock_item(path: str) -> tuple:
-    stock_view_instance: StockView = StockView()
+    stock_view_instance: StockView = async_views(StockView())
     try:
         json_data: dict = request.get_json()
         assert isinstance(json_data, dict)
@@ -145,10 +201,29 @@ def stock_item(path: str) -> tuple:
         pass
 
 
+@stocks_bp.route('/api/v1/stocks/batch/<path:path>', methods=['POST'])
+@handle_auth
+def stock_batch(path: str) -> tuple:
+    stock_view_instance: StockView = async_views(StockView())
+    try:
+        json_data: dict = request.get_json()
+        assert isinstance(json_data, dict)
+    except AssertionError:
+        message: str = "cannot read json data"
+        raise InputError(message)
+
+    if path == "stocks":
+        return stock_view_instance.get_stocks_batch(stock_ids=json_data.get('stock_ids'))
+    elif path == "brokers":
+        return stock_view_instance.get_brokers_batch(broker_ids=json_data.get('broker_ids'))
+    else:
+        pass
+
+
 @stocks_bp.route('/api/v1/stocks/day-volumes/<path:path>', methods=['POST'])
 @handle_auth
 def day_volumes(path: str) -> tuple:
-    stock_view_instance: StockView = StockView()
+    stock_view_instance: StockView = async_views(StockView())
     try:
         message: str = "cannot read json data"
         content_type = request.headers.get('Content-Type')
@@ -163,13 +238,60 @@ def day_volumes(path: str) -> tuple:
 
     if path == "buy-volumes":
         date_created: date_class = date_string_to_date(json_data.get('date'))
-        return stock_view_instance.get_day_buy_volumes(date_created=date_created)
+        return stock_view_instance.get_day_buy_volumes(date_created=date_created,
+                                                       fields=json_data.get('fields'))
     elif path == "sell-volumes":
         date_created: date_class = date_string_to_date(json_data.get('date'))
-        return stock_view_instance.get_day_sell_volumes(date_created=date_created)
+        return stock_view_instance.get_day_sell_volumes(date_created=date_created,
+                                                        fields=json_data.get('fields'))
     elif path == "net-volumes":
         date_created: date_class = date_string_to_date(json_data.get('date'))
-        return stock_view_instance.get_day_net_volumes(date_created=date_created)
+        return stock_view_instance.get_day_net_volumes(date_created=date_created,
+                                                       fields=json_data.get('fields'))
+    else:
+        pass
+
+
+@stocks_bp.route('/api/v1/stocks/market-summary', methods=['GET', 'POST'])
+@handle_auth
+def market_summary() -> tuple:
+    """
+        totals, breadth and top net buying and selling
+        stocks of the market on {"date": "yyyy-mm-dd"}
+    """
+    json_data: dict = request.get_json(silent=True) or request.args
+    return MarketSummaryView().get_market_summary(date_created=json_data.get('date'))
+
+
+@stocks_bp.route('/api/v1/stocks/net-totals', methods=['GET', 'POST'])
+@handle_auth
+def net_totals() -> tuple:
+    """
+        net volume of every stock on {"date": "yyyy-mm-dd"}, every broker together
+    """
+    json_data: dict = request.get_json(silent=True) or request.args
+    return MarketSummaryView().get_net_totals(date_created=json_data.get('date'))
+
+
+@stocks_bp.route('/api/v1/stocks/broker-flows/<path:path>', methods=['POST'])
+@handle_auth
+def broker_flows(path: str) -> tuple:
+    broker_flow_view: BrokerFlowView = BrokerFlowView()
+    try:
+        json_data: dict = request.get_json()
+        assert isinstance(json_data, dict)
+    except AssertionError:
+        message: str = "cannot read json data"
+        raise InputError(message)
+    # from and to bound the window of days, yyyy-mm-dd, each stock and window is cached on its own
+    window: dict = dict(stock_id=json_data.get('stock_id'), date_from=json_data.get('from'),
+                        date_to=json_data.get('to'))
+    if path == "brokers":
+        return broker_flow_view.get_broker_flows(**window)
+    elif path == "top":
+        return broker_flow_view.get_top_brokers(top=json_data.get('top'), **window)
+    elif path == "concentration":
+        return broker_flow_view.get_broker_concentration(**window)
     else:
         pass
 
@@ -177,7 +299,7 @@ def day_volumes(path: str) -> tuple:
 @stocks_bp.route('/api/v1/eod/<path:path>', methods=['POST'])
 @handle_auth
 def eod_price_data(path: str) -> tuple:
-    eod_instance: StockPriceDataView = StockPriceDataView()
+    eod_instance: StockPriceDataView = async_views(StockPriceDataView())
     request_data: dict = request.get_json()
     if path == "create-eod":
         return eod_instance.add_stock_price_data(stock_price_data=request_data)
@@ -2,6 +2,9 @@ import typing
 from flask import Blueprint, request, jsonify
 from data_service.api.api_authenticator import handle_auth
 from data_service.views.users import UserView
+from data_service.utils.pagination import page_arguments
+from data_service.utils.export import is_compressed
+from data_service.utils.async_views import async_views
 users_bp = Blueprint("users", __name__)
 
 
@@ -31,7 +34,7 @@ def create_user() -> tuple:
     """
     # created new user
     user_data: dict = request.get_json()
-    users_view_instance: UserView = UserView()
+    users_view_instance: UserView = async_views(UserView())
     names: str = user_data.get("names")
     surname: str = user_data.get("surname")
     cell: str = user_data.get("cell")
@@ -42,6 +45,18 @@ def create_user() -> tuple:
                                         email=email, password=password, uid=uid)
 
 
+@users_bp.route("/api/v1/users/batch", methods=["POST"])
+@handle_auth
+def users_batch() -> tuple:
+    """
+        return many users by uid in one request
+        :return: json response as tuple, payload holds found users and missing uids
+    """
+    user_data: dict = request.get_json()
+    users_view_instance: UserView = async_views(UserView())
+    return users_view_instance.get_users_batch(uids=user_data.get("uids"))
+
+
 @users_bp.route("/api/v1/user/<path:path>", methods=["GET", "POST"])
 @handle_auth
 def user(path: str) -> tuple:
@@ -51,7 +66,7 @@ def user(path: str) -> tuple:
         :return: json response as tuple
     """
 
-    users_view_instance: UserView = UserView()
+    users_view_instance: UserView = async_views(UserView())
     if request.method == "GET":
         # get a specific user
         return users_view_instance.get_user(uid=path)
@@ -88,14 +103,20 @@ def get_all(path: str) -> tuple:
         :return: json response as tuple
     """
     if path == "all":
-        users_view_instance: UserView = UserView()
-        return users_view_instance.get_all_users()
+        users_view_instance: UserView = async_views(UserView())
+        json_data: dict = request.get_json(silent=True) or request.args
+        return users_view_instance.get_all_users(fields=json_data.get('fields'),
+                                                 **page_arguments(json_data))
     if path == "active":
-        users_view_instance: UserView = UserView()
+        users_view_instance: UserView = async_views(UserView())
         return users_view_instance.get_active_users()
     if path == "in-active":
-        users_view_instance: UserView = UserView()
+        users_view_instance: UserView = async_views(UserView())
         return users_view_instance.get_in_active_users()
+    if path == "export":
+        users_view_instance: UserView = async_views(UserView())
+        json_data: dict = request.get_json(silent=True) or request.args
+        return users_view_instance.export_users(compress=is_compressed(json_data.get('gzip')))
 
     return jsonify({"status": False, "message": "general error fetching users"}), 500
 
@@ -110,7 +131,7 @@ def check_password() -> tuple:
     user_data: dict = request.get_json()
     uid: str = user_data.get("uid")
     password: str = user_data.get("password")
-    user_view_instance: UserView = UserView()
+    user_view_instance: UserView = async_views(UserView())
     return user_view_instance.check_password(uid=uid, password=password)
 
 
@@ -123,14 +144,14 @@ def de_activate_user() -> tuple:
     """
     user_data: dict = request.get_json()
     uid: str = user_data.get("uid")
-    user_view_instance: UserView = UserView()
+    user_view_instance: UserView = async_views(UserView())
     return user_view_instance.deactivate_user(uid=uid)
 
 
 @users_bp.route("/api/v1/auth/login", methods=["POST"])
 @handle_auth
 def login() -> tuple:
-    user_view_instance: UserView = UserView()
+    user_view_instance: UserView = async_views(UserView())
     user_data: dict = request.get_json()
     if ("email" in user_data) and (user_data["email"] != ""):
         email = user_data.get("email")
@@ -147,7 +168,7 @@ def login() -> tuple:
 @users_bp.route("/api/v1/auth/logout", methods=["POST"])
 @handle_auth
 def logout() -> tuple:
-    user_view_instance: UserView = UserView()
+    user_view_instance: UserView = async_views(UserView())
     user_data: dict = request.get_json()
     return "OK", 200
 
@@ -155,7 +176,7 @@ def logout() -> tuple:
 @users_bp.route("/api/v1/auth/register", methods=["POST"])
 @handle_auth
 def register() -> tuple:
-    user_view_instance: UserView = UserView()
+    user_view_instance: UserView = async_views(UserView())
     user_data: dict = request.get_json()
     if ("email" in user_data) and (user_data["email"] != ""):
         email: str = user_data.get("email")
@@ -1,12 +1,14 @@
 from flask import Blueprint, request, jsonify
 from data_service.api.api_authenticator import handle_auth
 from data_service.views.wallet import WalletView
+from data_service.utils.export import is_compressed
+from data_service.utils.async_views import async_views
 wallet_bp = Blueprint("wallet", __name__)
 
 
 @wallet_bp.route('/api/v1/wallet', methods=["GET", "POST", "DELETE", "PUT"])
 def wallet() -> tuple:
-    wallet_instance: WalletView = WalletView()
+    wallet_instance: WalletView = async_views(WalletView())
 
     if request.method == "GET":
         json_data: dict = request.get_json()
@@ -27,4 +29,12 @@ def wallet() -> tuple:
         return jsonify({'status': False, 'message': 'Unable to process this request please check your parameters'}), 500
 
 
-
+@wallet_bp.route('/api/v1/wallets/export', methods=["GET", "POST"])
+@handle_auth
+def wallets_export() -> tuple:
+    """
+        streams every wallet as newline delimited json,
+        {"gzip": true} or ?gzip=true compresses the stream
+    """
+    json_data: dict = request.get_json(silent=True) or request.args
+    return WalletView().export_wallets(compress=is_compressed(json_data.get('gzip')))
@@ -0,0 +1,167 @@
+"""
+    ASGI serving mode, a thread pool adapter running the Flask app under uvicorn
+
+    requests are read on the event loop of the server and handed to a pool of ASGI_THREADS worker
+    threads, the views run on those threads as they would on gunicorn threads, ndb waits on its RPCs
+    and keeps its context per thread so they are not awaited on the event loop. the routes run the
+    *_async view variants, which issue the independent lookups of a view together, see
+    data_service.utils.async_views. at most ASGI_BACKLOG more requests wait for a free thread, past
+    that requests are answered with 503 and a Retry-After straight from the event loop so a load
+    spike queues in front of the service, not inside it. uvicorn --limit-concurrency bounds the open
+    connections on top of that.
+
+    uvicorn asgi:app --host 0.0.0.0 --port 8081
+"""
+import asyncio
+import io
+import json
+import sys
+import typing
+from concurrent.futures import ThreadPoolExecutor
+from flask import Flask
+from data_service.config import Config
+from data_service.main import create_app
+
+send_type = typing.Callable[[typing.List[dict]], typing.Any]
+
+
+def wsgi_environ(scope: dict, body: bytes) -> dict:
+    """
+        WSGI environ of an ASGI http request
+    """
+    script_name: str = scope.get('root_path', '').encode('utf-8').decode('latin-1')
+    path_info: str = scope['path'].encode('utf-8').decode('latin-1')
+    if path_info.startswith(script_name):
+        path_info = path_info[len(script_name):]
+    server: typing.Tuple[str, int] = scope.get('server') or ('localhost', 80)
+    environ: dict = {
+        'REQUEST_METHOD': scope['method'], 'SCRIPT_NAME': script_name, 'PATH_INFO': path_info,
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_NAME': server[0], 'SERVER_PORT': str(server[1]),
+        'SERVER_PROTOCOL': 'HTTP/{}'.format(scope.get('http_version', '1.1')),
+        'wsgi.version': (1, 0), 'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(body), 'wsgi.errors': sys.stderr, 'wsgi.multithread': True,
+        'wsgi.multiprocess': False, 'wsgi.run_once': False}
+    if scope.get('client'):
+        environ['REMOTE_ADDR'] = scope['client'][0]
+    for name, value in scope.get('headers', []):
+        name, value = name.decode('latin-1'), value.decode('latin-1')
+        key: str = {'content-length': 'CONTENT_LENGTH', 'content-type': 'CONTENT_TYPE'}.get(
+            name, 'HTTP_{}'.format(name.upper().replace('-', '_')))
+        environ[key] = '{},{}'.format(environ[key], value) if key in environ else value
+    return environ
+
+
+def run_wsgi(wsgi_app: typing.Callable, environ: dict, send: send_type) -> None:
+    """
+        runs wsgi_app in a worker thread, send passes a list of ASGI messages back to the event loop
+        the response starts with its first non empty chunk so errors before it can still change the
+        status, a chunk is held back until the next one is read so the last is sent as the end of
+        the body, a response of one chunk crosses over to the event loop once
+    """
+    response: dict = {}
+
+    def start_response(status: str, headers: typing.List[typing.Tuple[str, str]], exc_info=None):
+        if exc_info and response.get('started'):
+            raise exc_info[1].with_traceback(exc_info[2])
+        response['start'] = {'type': 'http.response.start', 'status': int(status.split(' ', 1)[0]),
+                             'headers': [(name.lower().encode('latin-1'), value.encode('latin-1'))
+                                         for name, value in headers]}
+
+    def messages(body: bytes, more_body: bool) -> typing.List[dict]:
+        message: dict = {'type': 'http.response.body', 'body': body, 'more_body': more_body}
+        if response.get('started'):
+            return [message]
+        response['started'] = True
+        return [response['start'], message]
+
+    chunks: typing.Iterable[bytes] = wsgi_app(environ, start_response)
+    try:
+        held: typing.Union[bytes, None] = None
+        for chunk in chunks:
+            if not chunk:
+                continue
+            if held is not None:
+                send(messages(body=held, more_body=True))
+            held = chunk
+        send(messages(body=held or b'', more_body=False))
+    finally:
+        if hasattr(chunks, 'close'):
+            chunks.close()
+
+
+class ASGIApp:
+    """
+        # NOTES: ASGI application serving a WSGI app from a bounded pool of worker threads
+            pending counts the requests running or waiting for a thread
+    """
+
+    def __init__(self, wsgi_app: typing.Callable, threads: int, backlog: int):
+        self.wsgi_app: typing.Callable = wsgi_app
+        self.threads: int = threads
+        self.backlog: int = backlog
+        self.pending: int = 0
+        self.executor: ThreadPoolExecutor = ThreadPoolExecutor(max_workers=threads,
+                                                               thread_name_prefix='asgi')
+
+    async def __call__(self, scope: dict, receive: typing.Callable, send: typing.Callable) -> None:
+        if scope['type'] == 'lifespan':
+            await self.lifespan(receive=receive, send=send)
+            return
+        if scope['type'] != 'http':
+            raise ValueError("only http requests are served, got {}".format(scope['type']))
+        if self.pending >= self.threads + self.backlog:
+            await self.busy(send=send)
+            return
+        self.pending += 1
+        try:
+            body: bytes = await self.read_body(receive=receive)
+            loop: asyncio.AbstractEventLoop = asyncio.get_running_loop()
+
+            async def send_all(messages: typing.List[dict]) -> None:
+                for message in messages:
+                    await send(message)
+
+            def send_from_thread(messages: typing.List[dict]) -> None:
+                asyncio.run_coroutine_threadsafe(send_all(messages), loop).result()
+
+            await loop.run_in_executor(self.executor, run_wsgi, self.wsgi_app,
+                                       wsgi_environ(scope=scope, body=body), send_from_thread)
+        finally:
+            self.pending -= 1
+
+    @staticmethod
+    async def read_body(receive: typing.Callable) -> bytes:
+        body: bytearray = bytearray()
+        while True:
+            message: dict = await receive()
+            body.extend(message.get('body', b''))
+            if not message.get('more_body'):
+                return bytes(body)
+
+    @staticmethod
+    async def busy(send: typing.Callable) -> None:
+        payload: bytes = json.dumps(
+            {'status': False, 'message': 'server is busy, please try again later'}).encode()
+        await send({'type': 'http.response.start', 'status': 503,
+                    'headers': [(b'content-type', b'application/json'), (b'retry-after', b'1'),
+                                (b'content-length', str(len(payload)).encode())]})
+        await send({'type': 'http.response.body', 'body': payload})
+
+    async def lifespan(self, receive: typing.Callable, send: typing.Callable) -> None:
+        while True:
+            message: dict = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self.executor.shutdown(wait=True)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+
+def create_asgi_app(config_class=Config, threads: typing.Union[int, None] = None,
+                    backlog: typing.Union[int, None] = None) -> ASGIApp:
+    app: Flask = create_app(config_class=config_class)
+    app.config['ASYNC_VIEWS'] = True
+    return ASGIApp(wsgi_app=app, threads=threads or app.config['ASGI_THREADS'],
+                   backlog=app.config['ASGI_BACKLOG'] if backlog is None else backlog)
@@ -0,0 +1,246 @@
+"""
+    two tier cache backend for flask-caching
+
+    L1 is a small bounded in-process LRU, L2 is shared by every worker and instance and speaks the
+    redis protocol. with CACHE_REDIS_URL unset L2 is the in-process LocalRedis, which is what
+    development and tests run against.
+
+    every cache (cache_stocks, cache_users, ...) gets its own key prefix in L2 and its own
+    invalidation channel. writes go to L2 first and are then published on the channel, every other
+    worker drops the key from its L1 so the next read falls through to L2.
+"""
+import collections
+import json
+import pickle
+import threading
+import time
+import typing
+import uuid
+import zlib
+from flask_caching.backends.base import BaseCache
+from data_service.cache.local_redis import LocalRedis
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+# values smaller than this are stored uncompressed, compressing them costs more than it saves
+COMPRESS_THRESHOLD: int = 512
+_PLAIN: bytes = b'p'
+_COMPRESSED: bytes = b'z'
+# sentinel for an L1 miss, None is a valid cached value
+_missing: object = object()
+
+
+def serialize(value: typing.Any) -> bytes:
+    data: bytes = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+    if len(data) >= COMPRESS_THRESHOLD:
+        return _COMPRESSED + zlib.compress(data)
+    return _PLAIN + data
+
+
+def deserialize(data: typing.Union[bytes, None]) -> typing.Any:
+    if data is None:
+        return None
+    if data[:1] == _COMPRESSED:
+        return pickle.loads(zlib.decompress(data[1:]))
+    return pickle.loads(data[1:])
+
+
+class LocalLRU:
+    """
+        bounded in-process L1, least recently used entries are dropped first
+    """
+
+    def __init__(self, threshold: int, timeout: int):
+        self.threshold: int = threshold
+        self.timeout: int = timeout
+        self._entries: collections.OrderedDict = collections.OrderedDict()
+        self._lock: threading.Lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> typing.Any:
+        with self._lock:
+            entry: typing.Union[tuple, None] = self._entries.get(key)
+            if entry is None:
+                return _missing
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return _missing
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: typing.Any, timeout: int) -> None:
+        if self.threshold <= 0:
+            return
+        # L1 never keeps an entry longer than L2 does
+        ttl: int = min(timeout, self.timeout) if timeout > 0 else self.timeout
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.threshold:
+                self._entries.popitem(last=False)
+
+    def delete(self, *keys: str) -> None:
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+class TwoTierCache(BaseCache):
+    """
+        flask-caching backend,
+        configured through CACHE_TYPE = 'data_service.cache.backends.TwoTierCache'
+
+        CACHE_REDIS_URL         shared L2, in-process LocalRedis when unset
+        CACHE_KEY_PREFIX        namespace of the cache in L2
+        CACHE_L1_THRESHOLD      max entries in L1, 0 disables L1
+        CACHE_L1_TIMEOUT        max seconds an entry lives in L1
+    """
+
+    def __init__(self, client: typing.Any, key_prefix: str = "", default_timeout: int = 300,
+                 l1_threshold: int = 500, l1_timeout: int = 60):
+        super(TwoTierCache, self).__init__(default_timeout=default_timeout)
+        self.client: typing.Any = client
+        self.key_prefix: str = key_prefix
+        self.channel: str = "cache-invalidate:{}".format(key_prefix)
+        self.l1: LocalLRU = LocalLRU(threshold=l1_threshold, timeout=l1_timeout)
+        # messages published by this instance are skipped, its own L1 is already up to date
+        self.origin: str = uuid.uuid4().hex
+        self._listener: typing.Any = None
+        if l1_threshold > 0:
+            self._subscribe()
+
+    @classmethod
+    def factory(cls, app, config, args, kwargs):
+        redis_url: typing.Union[str, None] = config.get('CACHE_REDIS_URL')
+        if redis_url:
+            if redis is None:
+                raise RuntimeError("CACHE_REDIS_URL is set but the redis package is not installed")
+            client = redis.Redis.from_url(redis_url)
+        else:
+            client = LocalRedis.shared()
+        kwargs.update(client=client, key_prefix=config.get('CACHE_KEY_PREFIX') or "",
+                      l1_threshold=config.get('CACHE_L1_THRESHOLD', 500),
+                      l1_timeout=config.get('CACHE_L1_TIMEOUT', 60))
+        return cls(*args, **kwargs)
+
+    def _subscribe(self) -> None:
+        # noinspection PyBroadException
+        try:
+            pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(**{self.channel: self._on_invalidate})
+            self._listener = pubsub.run_in_thread(sleep_time=0.5, daemon=True)
+        except Exception:
+            # without invalidation messages L1 could serve stale entries, run on L2 alone instead
+            self.l1 = LocalLRU(threshold=0, timeout=0)
+
+    def _on_invalidate(self, message: dict) -> None:
+        # noinspection PyBroadException
+        try:
+            payload: dict = json.loads(message['data'])
+        except Exception:
+            return
+        if payload.get('origin') == self.origin:
+            return
+        if payload.get('clear'):
+            self.l1.clear()
+        else:
+            self.l1.delete(*payload.get('keys', []))
+
+    def _publish(self, keys: typing.List[str] = None, clear: bool = False) -> None:
+        if self._listener is None:
+            return
+        payload: dict = {'origin': self.origin, 'keys': keys or [], 'clear': clear}
+        self.client.publish(self.channel, json.dumps(payload))
+
+    def _full_key(self, key: str) -> str:
+        return "{}{}".format(self.key_prefix, key)
+
+    def _l2_timeout(self, timeout: typing.Union[int, None]) -> typing.Union[int, None]:
+        timeout = self._normalize_timeout(timeout)
+        return timeout if timeout > 0 else None
+
+    def get(self, key: str) -> typing.Any:
+        value: typing.Any = self.l1.get(key)
+        if value is not _missing:
+            return value
+        value = deserialize(self.client.get(self._full_key(key)))
+        if value is not None:
+            self.l1.set(key, value, timeout=self.default_timeout)
+        return value
+
+    def get_many(self, *keys: str) -> typing.List[typing.Any]:
+        values: typing.List[typing.Any] = [self.l1.get(key) for key in keys]
+        missed: typing.List[int] = [index for index, value in enumerate(values)
+                                    if value is _missing]
+        if missed:
+            stored: list = self.client.mget([self._full_key(keys[index]) for index in missed])
+            for index, data in zip(missed, stored):
+                values[index] = deserialize(data)
+                if values[index] is not None:
+                    self.l1.set(keys[index], values[index], timeout=self.default_timeout)
+        return values
+
+    def set(self, key: str, value: typing.Any, timeout: typing.Union[int, None] = None) -> bool:
+        result: typing.Any = self.client.set(self._full_key(key), serialize(value),
+                                             ex=self._l2_timeout(timeout))
+        self.l1.set(key, value, timeout=self._normalize_timeout(timeout))
+        self._publish(keys=[key])
+        return bool(result)
+
+    def set_many(self, mapping: typing.Dict[str, typing.Any],
+                 timeout: typing.Union[int, None] = None) -> typing.List[typing.Any]:
+        l2_timeout: typing.Union[int, None] = self._l2_timeout(timeout)
+        pipeline = self.client.pipeline(transaction=False)
+        for key, value in mapping.items():
+            pipeline.set(self._full_key(key), serialize(value), ex=l2_timeout)
+        pipeline.execute()
+        for key, value in mapping.items():
+            self.l1.set(key, value, timeout=self._normalize_timeout(timeout))
+        self._publish(keys=list(mapping))
+        return list(mapping)
+
+    def add(self, key: str, value: typing.Any, timeout: typing.Union[int, None] = None) -> bool:
+        added: typing.Any = self.client.set(self._full_key(key), serialize(value),
+                                            ex=self._l2_timeout(timeout), nx=True)
+        if not added:
+            return False
+        self.l1.set(key, value, timeout=self._normalize_timeout(timeout))
+        self._publish(keys=[key])
+        return True
+
+    def delete(self, key: str) -> bool:
+        return bool(self.delete_many(key))
+
+    def delete_many(self, *keys: str) -> typing.List[str]:
+        if not keys:
+            return []
+        self.client.delete(*[self._full_key(key) for key in keys])
+        self.l1.delete(*keys)
+        self._publish(keys=list(keys))
+        return list(keys)
+
+    def has(self, key: str) -> bool:
+        if self.l1.get(key) is not _missing:
+            return True
+        return bool(self.client.exists(self._full_key(key)))
+
+    def clear(self) -> bool:
+        """
+            clears this cache's namespace only, other caches sharing L2 keep their entries
+        """
+        keys: typing.List[bytes] = list(self.client.scan_iter(match="{}*".format(self.key_prefix)))
+        if keys:
+            self.client.delete(*keys)
+        self.l1.clear()
+        self._publish(clear=True)
+        return True
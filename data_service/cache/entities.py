@@ -0,0 +1,90 @@
+"""
+    per entity cache for batch lookups by natural id
+
+    each entity is cached on its own under a key carrying the versions of its invalidation tags, so
+    the writes which already bump those tags for memoized reads evict the cached entity as well. a
+    batch lookup costs two cache round trips, one for the tag versions and one for the entities,
+    plus a single get_multi for the ids which missed.
+"""
+import typing
+from flask_caching import Cache
+from data_service.cache.invalidation import tag_versions
+
+ENTITY_PREFIX: str = "entity:"
+
+
+def entity_key(kind: str, natural_id: str, versions: typing.List[str]) -> str:
+    return "{}{}:{}:{}".format(ENTITY_PREFIX, kind, natural_id,
+                               ":".join(str(version) for version in versions))
+
+
+def unique_ids(natural_ids: typing.Iterable[str]) -> typing.List[str]:
+    """
+        drops duplicates and empty ids, keeps the order ids were requested in
+    """
+    return list(dict.fromkeys(natural_id for natural_id in natural_ids if natural_id))
+
+
+def cached_keys(cache: Cache, kind: str, natural_ids: typing.List[str],
+                tags: typing.Callable[[str], typing.List[str]]
+                ) -> typing.Union[typing.List[str], None]:
+    # noinspection PyBroadException
+    try:
+        entity_tags: typing.List[typing.List[str]] = [tags(natural_id)
+                                                      for natural_id in natural_ids]
+        versions: typing.List[str] = tag_versions(cache=cache, tags=[tag for tag_list in entity_tags
+                                                                     for tag in tag_list])
+    except Exception:
+        return None
+    keys: typing.List[str] = []
+    for natural_id, tag_list in zip(natural_ids, entity_tags):
+        keys.append(entity_key(kind=kind, natural_id=natural_id, versions=versions[:len(tag_list)]))
+        versions = versions[len(tag_list):]
+    return keys
+
+
+def get_multi_cached(cache: Cache, model: typing.Any, natural_ids: typing.Iterable[str],
+                     tags: typing.Callable[[str], typing.List[str]],
+                     timeout: typing.Union[int, None] = None
+                     ) -> typing.Tuple[typing.List[dict], typing.List[str]]:
+    """
+        looks up entities of model by natural id, returns (found, missing)
+
+        found holds the entities as dicts in the order they were requested, missing the ids without
+        an entity. model is a NaturalKeyMixin model, tags gives the invalidation tags of one id.
+        when the cache is unavailable every id is read from the datastore.
+    """
+    ids: typing.List[str] = unique_ids(natural_ids)
+    if not ids:
+        return [], []
+    keys: typing.Union[typing.List[str], None] = cached_keys(cache=cache, kind=model._get_kind(),
+                                                             natural_ids=ids, tags=tags)
+    entities: typing.Dict[str, dict] = {}
+    if keys is not None:
+        # noinspection PyBroadException
+        try:
+            for natural_id, entity in zip(ids, cache.get_many(*keys)):
+                if entity is not None:
+                    entities[natural_id] = entity
+        except Exception:
+            pass
+
+    misses: typing.List[str] = [natural_id for natural_id in ids if natural_id not in entities]
+    if misses:
+        loaded: typing.Dict[str, dict] = {natural_id: instance.to_dict() for natural_id, instance
+                                          in zip(misses, model.get_multi_by_natural_id(misses))
+                                          if instance is not None}
+        entities.update(loaded)
+        if keys is not None and loaded:
+            key_of: typing.Dict[str, str] = dict(zip(ids, keys))
+            # noinspection PyBroadException
+            try:
+                cache.set_many({key_of[natural_id]: entity
+                                for natural_id, entity in loaded.items()}, timeout=timeout)
+            except Exception:
+                pass
+
+    found: typing.List[dict] = [entities[natural_id] for natural_id in ids
+                                if natural_id in entities]
+    missing: typing.List[str] = [natural_id for natural_id in ids if natural_id not in entities]
+    return found, missing
@@ -0,0 +1,49 @@
+"""
+    tag based invalidation for memoized reads
+
+    a memoized read declares the tags it depends on, the current version of each tag is folded into
+    its cache key. a write bumps the versions of the tags it touched, every read depending on one of
+    those tags then resolves to a new key and misses, other reads keep their entries.
+"""
+import typing
+import uuid
+from flask_caching import Cache
+
+TAG_PREFIX: str = "tag:"
+# tag versions must outlive the entries which depend on them
+TAG_TIMEOUT: int = 0
+
+
+def _new_version() -> str:
+    # NOTE: versions are random rather than counters, a tag evicted from the cache comes back with a
+    # version no stored entry was written under, so eviction can never resurrect stale entries
+    return uuid.uuid4().hex
+
+
+def tag_key(tag: str) -> str:
+    return "{}{}".format(TAG_PREFIX, tag)
+
+
+def tag_versions(cache: Cache, tags: typing.List[str]) -> typing.List[str]:
+    """
+        current version of each tag, tags seen for the first time are given a version
+    """
+    if not tags:
+        return []
+    keys: typing.List[str] = [tag_key(tag) for tag in tags]
+    versions: typing.List[typing.Union[str, None]] = list(cache.get_many(*keys))
+    for index, version in enumerate(versions):
+        if version is None:
+            # add does not overwrite a version created concurrently by another worker
+            cache.add(keys[index], _new_version(), timeout=TAG_TIMEOUT)
+            versions[index] = cache.get(keys[index])
+    return versions
+
+
+def invalidate_tags(cache: Cache, tags: typing.Iterable[str]) -> None:
+    """
+        evict every memoized read depending on any of tags
+    """
+    mapping: typing.Dict[str, str] = {tag_key(tag): _new_version() for tag in set(tags) if tag}
+    if mapping:
+        cache.set_many(mapping, timeout=TAG_TIMEOUT)
@@ -0,0 +1,191 @@
+"""
+    in process stand in for a redis server
+
+    implements the subset of the redis-py client used by TwoTierCache so the two tier cache runs in
+    development and tests without a redis server. every client returned by LocalRedis.shared() talks
+    to the same process wide store, the way separate workers talk to one redis server.
+"""
+import fnmatch
+import threading
+import time
+import typing
+
+value_type = typing.Union[bytes, str, int, float]
+
+
+def _encode(value: value_type) -> bytes:
+    # redis stores every value as bytes
+    if isinstance(value, bytes):
+        return value
+    return str(value).encode('utf-8')
+
+
+def _name(name: typing.Union[str, bytes]) -> str:
+    # keys may come back from scan_iter as bytes and be passed on to delete
+    return name.decode('utf-8') if isinstance(name, bytes) else name
+
+
+class LocalPubSub:
+    """
+        handlers are called synchronously by publish, there is no connection to listen on
+    """
+
+    def __init__(self, server: "LocalRedis"):
+        self._server: "LocalRedis" = server
+        self._channels: typing.Dict[str, typing.Callable] = {}
+
+    def subscribe(self, **handlers: typing.Callable) -> None:
+        for channel, handler in handlers.items():
+            self._channels[channel] = handler
+            self._server.add_subscriber(channel=channel, handler=handler)
+
+    def unsubscribe(self, *channels: str) -> None:
+        for channel in channels or list(self._channels):
+            handler: typing.Union[typing.Callable, None] = self._channels.pop(channel, None)
+            if handler is not None:
+                self._server.remove_subscriber(channel=channel, handler=handler)
+
+    def run_in_thread(self, sleep_time: float = 0, daemon: bool = True) -> "LocalPubSub":
+        # messages are delivered on publish, returned object only needs stop()
+        return self
+
+    def stop(self) -> None:
+        self.unsubscribe()
+
+    def close(self) -> None:
+        self.unsubscribe()
+
+
+class LocalPipeline:
+    """
+        buffers commands and runs them on execute, like a redis-py pipeline without transaction
+    """
+
+    def __init__(self, server: "LocalRedis"):
+        self._server: "LocalRedis" = server
+        self._commands: typing.List[typing.Tuple[str, tuple, dict]] = []
+
+    def __getattr__(self, name: str) -> typing.Callable:
+        def command(*args, **kwargs) -> "LocalPipeline":
+            self._commands.append((name, args, kwargs))
+            return self
+        return command
+
+    def execute(self) -> list:
+        results: list = [getattr(self._server, name)(*args, **kwargs)
+                         for name, args, kwargs in self._commands]
+        self._commands = []
+        return results
+
+    def __enter__(self) -> "LocalPipeline":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._commands = []
+
+
+class LocalRedis:
+    """
+        thread safe key value store with expiry and pub/sub, values are bytes as in redis
+    """
+    _shared: typing.Union["LocalRedis", None] = None
+    _shared_lock: threading.Lock = threading.Lock()
+
+    def __init__(self):
+        self._data: typing.Dict[str, typing.Tuple[bytes, typing.Union[float, None]]] = {}
+        self._subscribers: typing.Dict[str, typing.List[typing.Callable]] = {}
+        self._lock: threading.RLock = threading.RLock()
+
+    @classmethod
+    def shared(cls) -> "LocalRedis":
+        """
+            the process wide server
+        """
+        if cls._shared is None:
+            with cls._shared_lock:
+                if cls._shared is None:
+                    cls._shared = cls()
+        return cls._shared
+
+    def _alive(self, name: typing.Union[str, bytes]) -> typing.Union[bytes, None]:
+        name = _name(name)
+        item: typing.Union[tuple, None] = self._data.get(name)
+        if item is None:
+            return None
+        value, expires_at = item
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._data[name]
+            return None
+        return value
+
+    def get(self, name: str) -> typing.Union[bytes, None]:
+        with self._lock:
+            return self._alive(name)
+
+    def mget(self, keys: typing.Iterable[str],
+             *args: str) -> typing.List[typing.Union[bytes, None]]:
+        names: typing.List[str] = [keys] if isinstance(keys, str) else list(keys)
+        with self._lock:
+            return [self._alive(name) for name in names + list(args)]
+
+    def set(self, name: str, value: value_type, ex: typing.Union[int, None] = None,
+            nx: bool = False) -> typing.Union[bool, None]:
+        with self._lock:
+            if nx and self._alive(name) is not None:
+                return None
+            expires_at: typing.Union[float, None] = time.monotonic() + ex if ex else None
+            self._data[_name(name)] = (_encode(value), expires_at)
+            return True
+
+    def setex(self, name: str, time_seconds: int, value: value_type) -> bool:
+        return bool(self.set(name, value, ex=time_seconds))
+
+    def delete(self, *names: str) -> int:
+        with self._lock:
+            alive: typing.List[str] = [_name(name) for name in names
+                                       if self._alive(name) is not None]
+            for name in alive:
+                del self._data[name]
+            return len(alive)
+
+    def exists(self, *names: str) -> int:
+        with self._lock:
+            return sum(1 for name in names if self._alive(name) is not None)
+
+    def scan_iter(self, match: typing.Union[str, None] = None, count: typing.Union[int, None] = None
+                  ) -> typing.Iterator[bytes]:
+        with self._lock:
+            names: typing.List[str] = [name for name in list(self._data)
+                                       if self._alive(name) is not None]
+        for name in names:
+            if match is None or fnmatch.fnmatchcase(name, match):
+                yield name.encode('utf-8')
+
+    def flushdb(self) -> bool:
+        with self._lock:
+            self._data.clear()
+        return True
+
+    def pipeline(self, transaction: bool = False) -> LocalPipeline:
+        return LocalPipeline(server=self)
+
+    def pubsub(self, ignore_subscribe_messages: bool = True) -> LocalPubSub:
+        return LocalPubSub(server=self)
+
+    def add_subscriber(self, channel: str, handler: typing.Callable) -> None:
+        with self._lock:
+            self._subscribers.setdefault(channel, []).append(handler)
+
+    def remove_subscriber(self, channel: str, handler: typing.Callable) -> None:
+        with self._lock:
+            handlers: typing.List[typing.Callable] = self._subscribers.get(channel, [])
+            if handler in handlers:
+                handlers.remove(handler)
+
+    def publish(self, channel: str, message: value_type) -> int:
+        with self._lock:
+            handlers: typing.List[typing.Callable] = list(self._subscribers.get(channel, []))
+        for handler in handlers:
+            handler({'type': 'message', 'pattern': None, 'channel': channel.encode('utf-8'),
+                     'data': _encode(message)})
+        return len(handlers)
@@ -0,0 +1,448 @@
+"""
+    argument aware memoization for view functions
+
+    flask-caching's cached decorator keys entries on request.path, so two calls to the same view
+    with different arguments behind one route share an entry, and calls made outside of a request
+    (cron jobs, tasks) never hit. memoize keys entries on the qualified function name plus the
+    normalized call arguments instead, skipping self, and only stores successful responses.
+
+    reads may also declare the invalidation tags they depend on, see
+    data_service.cache.invalidation. misses are loaded single flight, see
+    data_service.cache.single_flight, and with stale_ttl set an expired entry keeps being served for
+    up to stale_ttl seconds while one worker refreshes it.
+"""
+import asyncio
+import datetime
+import functools
+import hashlib
+import inspect
+import json
+import threading
+import time
+import typing
+from flask import current_app, Response
+from flask_caching import Cache
+from data_service.cache.invalidation import tag_versions
+from data_service.cache.single_flight import (SingleFlight, Flight, Lease, LEASE_TIMEOUT,
+                                              POLL_INTERVAL)
+
+tags_type = typing.Callable[..., typing.List[str]]
+# every response shape the views return is reduced to this before it is stored
+cached_response_type = typing.Tuple[str, typing.Any, int, typing.Union[str, None]]
+# stored entries, the packed response together with the time it stops being fresh, None for never
+cache_entry_type = typing.Tuple[typing.Union[float, None], cached_response_type]
+
+
+class CacheStats:
+    """
+        hit / miss counters for a single memoized function
+    """
+
+    def __init__(self, name: str):
+        self.name: str = name
+        self.hits: int = 0
+        self.misses: int = 0
+        # calls whose result was not stored, error responses for example
+        self.uncached: int = 0
+        # calls that skipped the cache entirely, through unless or missing app context
+        self.bypassed: int = 0
+        # hits served from an expired entry while it was being refreshed
+        self.stale: int = 0
+        # misses which waited on another call loading the
+        # same entry instead of loading it themselves
+        self.coalesced: int = 0
+        self._lock: threading.Lock = threading.Lock()
+
+    def record(self, counter: str) -> None:
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    @property
+    def hit_rate(self) -> float:
+        lookups: int = self.hits + self.misses
+        return round(self.hits / lookups, 4) if lookups else 0.0
+
+    def reset(self) -> None:
+        with self._lock:
+            self.hits = self.misses = self.uncached = 0
+            self.bypassed = self.stale = self.coalesced = 0
+
+    def to_dict(self) -> dict:
+        return {'hits': self.hits, 'misses': self.misses, 'uncached': self.uncached,
+                'bypassed': self.bypassed, 'stale': self.stale, 'coalesced': self.coalesced,
+                'hit_rate': self.hit_rate}
+
+    def __str__(self) -> str:
+        return "<CacheStats {} hits: {} misses: {} hit_rate: {}".format(
+            self.name, self.hits, self.misses, self.hit_rate)
+
+    def __repr__(self) -> str:
+        return self.__str__()
+
+
+_stats: typing.Dict[str, CacheStats] = {}
+
+
+def cache_statistics() -> typing.Dict[str, dict]:
+    """
+        hit rates for every memoized function keyed by qualified function name
+    """
+    return {name: stats.to_dict() for name, stats in _stats.items()}
+
+
+def reset_cache_statistics() -> None:
+    for stats in _stats.values():
+        stats.reset()
+
+
+def normalize_argument(value: typing.Any) -> typing.Any:
+    """
+        turn an argument into a json serializable value which is equal for equal arguments
+    """
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.isoformat()
+    if isinstance(value, dict):
+        return {str(key): normalize_argument(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple, set, frozenset)):
+        items: list = [normalize_argument(item) for item in value]
+        return sorted(items, key=str) if isinstance(value, (set, frozenset)) else items
+    return repr(value)
+
+
+def response_is_cacheable(result: typing.Any) -> bool:
+    """
+        only successful responses are stored, error tuples and None are always recomputed
+    """
+    if result is None:
+        return False
+    if isinstance(result, tuple) and len(result) == 2 and isinstance(result[1], int):
+        if result[1] != 200:
+            return False
+        result = result[0]
+    if isinstance(result, Response):
+        return result.status_code == 200
+    return True
+
+
+def pack_response(result: typing.Any) -> cached_response_type:
+    """
+        responses are stored as their body so they can be pickled and rebuilt for each hit
+    """
+    if isinstance(result, tuple) and len(result) == 2 and isinstance(result[0], Response):
+        response, status = result
+        return 'response_tuple', response.get_data(), status, response.mimetype
+    if isinstance(result, Response):
+        return 'response', result.get_data(), result.status_code, result.mimetype
+    return 'value', result, 200, None
+
+
+def unpack_response(packed: cached_response_type) -> typing.Any:
+    shape, data, status, mimetype = packed
+    if shape == 'value':
+        return data
+    response: Response = current_app.response_class(response=data, mimetype=mimetype)
+    if shape == 'response_tuple':
+        return response, status
+    response.status_code = status
+    return response
+
+
+class Memoized:
+    """
+        cache bookkeeping for a single decorated function, shared by the sync and async wrappers
+    """
+
+    def __init__(self, func: typing.Callable, cache: Cache, timeout: typing.Union[int, None],
+                 unless: typing.Union[typing.Callable, None], tags: typing.Union[tags_type, None],
+                 stale_ttl: int = 0):
+        self.func: typing.Callable = func
+        self.cache: Cache = cache
+        self.timeout: typing.Union[int, None] = timeout
+        self.unless: typing.Union[typing.Callable, None] = unless
+        self.tags: typing.Union[tags_type, None] = tags
+        self.stale_ttl: int = stale_ttl
+        self.flights: SingleFlight = SingleFlight()
+        self.name: str = "{}.{}".format(func.__module__, func.__qualname__)
+        self.signature: inspect.Signature = inspect.signature(inspect.unwrap(func))
+        parameters: typing.List[str] = list(self.signature.parameters)
+        self.skip_first: bool = len(parameters) > 0 and parameters[0] in ('self', 'cls')
+        self.stats: CacheStats = _stats.setdefault(self.name, CacheStats(name=self.name))
+
+    def make_key(self, args: tuple, kwargs: dict) -> str:
+        """
+            key from the call arguments as received by the function, self or cls included,
+            together with the current versions of the tags the call depends on
+        """
+        bound: inspect.BoundArguments = self.signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        arguments: dict = dict(bound.arguments)
+        if self.skip_first:
+            arguments.pop(next(iter(self.signature.parameters)))
+        key_data: dict = {'arguments': normalize_argument(arguments)}
+        if self.tags is not None:
+            key_data['tags'] = tag_versions(cache=self.cache, tags=self.tags(**arguments))
+        serialized: str = json.dumps(key_data, sort_keys=True, separators=(',', ':'))
+        return "memoize:{}:{}".format(self.name,
+                                      hashlib.sha1(serialized.encode('utf-8')).hexdigest())
+
+    def resolve_key(self, args: tuple, kwargs: dict) -> typing.Union[str, None]:
+        """
+            None when the key cannot be built, e.g. the cache holding the tag versions is down,
+            the call then goes straight to the function
+        """
+        # noinspection PyBroadException
+        try:
+            return self.make_key(args=args, kwargs=kwargs)
+        except Exception:
+            return None
+
+    def key_for(self, *args, **kwargs) -> str:
+        """
+            key for arguments given without self, used by callers outside the decorated function
+        """
+        if self.skip_first:
+            args = (None,) + args
+        return self.make_key(args=args, kwargs=kwargs)
+
+    def should_bypass(self) -> bool:
+        if not current_app:
+            return True
+        return bool(self.unless is not None and self.unless())
+
+    def effective_timeout(self) -> int:
+        if self.timeout is not None:
+            return self.timeout
+        return getattr(self.cache.cache, 'default_timeout', 0)
+
+    def lookup(self, key: str) -> typing.Union[cache_entry_type, None]:
+        # noinspection PyBroadException
+        try:
+            entry: typing.Any = self.cache.get(key)
+        except Exception:
+            return None
+        return entry if isinstance(entry, tuple) and len(entry) == 2 else None
+
+    def store(self, key: str, result: typing.Any) -> None:
+        if not response_is_cacheable(result):
+            self.stats.record('uncached')
+            return
+        timeout: int = self.effective_timeout()
+        fresh_until: typing.Union[float, None] = time.time() + timeout if timeout > 0 else None
+        # stale entries are kept around for stale_ttl after they expire
+        stored_timeout: int = timeout + self.stale_ttl if timeout > 0 else 0
+        # noinspection PyBroadException
+        try:
+            self.cache.set(key, (fresh_until, pack_response(result)), timeout=stored_timeout)
+        except Exception:
+            self.stats.record('uncached')
+
+    def serve(self, key: str, refresh: typing.Callable) -> typing.Union[cached_response_type, None]:
+        """
+            the cached response for key, None on a miss. an expired entry is served while refresh
+            reloads it in the background, provided stale_ttl is set
+        """
+        entry: typing.Union[cache_entry_type, None] = self.lookup(key=key)
+        if entry is None:
+            return None
+        fresh_until, packed = entry
+        if fresh_until is None or fresh_until > time.time():
+            self.stats.record('hits')
+            return packed
+        if not self.stale_ttl:
+            return None
+        self.stats.record('hits')
+        self.stats.record('stale')
+        self.refresh_in_background(key=key, stale=packed, refresh=refresh)
+        return packed
+
+    def refresh_in_background(self, key: str, stale: cached_response_type,
+                              refresh: typing.Callable) -> None:
+        flight, leader = self.flights.join(key)
+        if not leader:
+            # already being refreshed by this worker
+            return
+        lease: Lease = Lease(cache=self.cache, key=key)
+        if not lease.acquire():
+            # already being refreshed by another worker
+            self.flights.land(key=key, flight=flight, result=stale)
+            return
+        app = current_app._get_current_object()
+
+        def run_refresh() -> None:
+            with app.app_context():
+                packed: cached_response_type = stale
+                # noinspection PyBroadException
+                try:
+                    result: typing.Any = refresh()
+                    self.store(key=key, result=result)
+                    packed = pack_response(result)
+                except Exception:
+                    # the stale entry keeps being served until it is dropped from the cache
+                    pass
+                finally:
+                    lease.release()
+                    self.flights.land(key=key, flight=flight, result=packed)
+
+        threading.Thread(target=run_refresh, daemon=True).start()
+
+    def wait_for_entry(self, key: str, lease: Lease) -> typing.Union[cache_entry_type, None]:
+        """
+            waits for the holder of lease to store key, None once the lease is gone or runs out
+        """
+        deadline: float = lease.deadline()
+        while time.monotonic() < deadline:
+            time.sleep(POLL_INTERVAL)
+            entry: typing.Union[cache_entry_type, None] = self.lookup(key=key)
+            if entry is not None:
+                return entry
+            if not lease.held():
+                break
+        return None
+
+    async def wait_for_entry_async(self, key: str,
+                                   lease: Lease) -> typing.Union[cache_entry_type, None]:
+        deadline: float = lease.deadline()
+        while time.monotonic() < deadline:
+            await asyncio.sleep(POLL_INTERVAL)
+            entry: typing.Union[cache_entry_type, None] = self.lookup(key=key)
+            if entry is not None:
+                return entry
+            if not lease.held():
+                break
+        return None
+
+    def load(self, key: str, call: typing.Callable) -> typing.Any:
+        """
+            runs call at most once per key across concurrent misses, the result is stored and shared
+        """
+        flight, leader = self.flights.join(key)
+        if not leader:
+            self.stats.record('coalesced')
+            return self.follow(flight=flight, call=call)
+        try:
+            lease: Lease = Lease(cache=self.cache, key=key)
+            entry: typing.Union[cache_entry_type, None] = None
+            if not lease.acquire():
+                entry = self.wait_for_entry(key=key, lease=lease)
+            if entry is not None:
+                result: typing.Any = unpack_response(entry[1])
+            else:
+                try:
+                    result = call()
+                    self.store(key=key, result=result)
+                finally:
+                    lease.release()
+        except BaseException as error:
+            self.flights.land(key=key, flight=flight, error=error)
+            raise
+        self.flights.land(key=key, flight=flight, result=pack_response(result))
+        return result
+
+    async def load_async(self, key: str, call: typing.Callable) -> typing.Any:
+        flight, leader = self.flights.join(key)
+        if not leader:
+            self.stats.record('coalesced')
+            return await self.follow_async(flight=flight, call=call)
+        try:
+            lease: Lease = Lease(cache=self.cache, key=key)
+            entry: typing.Union[cache_entry_type, None] = None
+            if not lease.acquire():
+                entry = await self.wait_for_entry_async(key=key, lease=lease)
+            if entry is not None:
+                result: typing.Any = unpack_response(entry[1])
+            else:
+                try:
+                    result = await call()
+                    self.store(key=key, result=result)
+                finally:
+                    lease.release()
+        except BaseException as error:
+            self.flights.land(key=key, flight=flight, error=error)
+            raise
+        self.flights.land(key=key, flight=flight, result=pack_response(result))
+        return result
+
+    @staticmethod
+    def follow(flight: Flight, call: typing.Callable) -> typing.Any:
+        # every follower gets its own response object rebuilt from the leader's
+        try:
+            return unpack_response(flight.wait(timeout=LEASE_TIMEOUT))
+        except TimeoutError:
+            return call()
+
+    @staticmethod
+    async def follow_async(flight: Flight, call: typing.Callable) -> typing.Any:
+        loop: asyncio.AbstractEventLoop = asyncio.get_running_loop()
+        try:
+            return unpack_response(await loop.run_in_executor(None, flight.wait, LEASE_TIMEOUT))
+        except TimeoutError:
+            return await call()
+
+    def delete(self, *args, **kwargs) -> None:
+        self.cache.delete(self.key_for(*args, **kwargs))
+
+
+def memoize(cache: Cache, timeout: typing.Union[int, None] = None,
+            unless: typing.Union[typing.Callable, None] = None,
+            tags: typing.Union[tags_type, None] = None, stale_ttl: int = 0):
+    """
+        cache the results of func keyed on its arguments
+
+        works for plain functions, methods, and *_async coroutine variants, the decorated function
+        gets cache_info() for its hit rate and invalidate(*args, **kwargs) to evict one entry.
+        tags is called with the call arguments (self excluded) and returns the invalidation tags
+        the result depends on. stale_ttl turns on stale-while-revalidate for that many seconds
+    """
+
+    def decorator(func: typing.Callable):
+        memoized: Memoized = Memoized(func=func, cache=cache, timeout=timeout, unless=unless,
+                                      tags=tags, stale_ttl=stale_ttl)
+
+        if inspect.iscoroutinefunction(inspect.unwrap(func)):
+            @functools.wraps(func)
+            async def wrapper(*args, **kwargs):
+                async def call():
+                    result = func(*args, **kwargs)
+                    return (await result) if inspect.isawaitable(result) else result
+
+                key: typing.Union[str, None] = None
+                if not memoized.should_bypass():
+                    key = memoized.resolve_key(args=args, kwargs=kwargs)
+                if key is None:
+                    memoized.stats.record('bypassed')
+                    return await call()
+                # background refreshes run on their own thread and event loop
+                packed: typing.Union[cached_response_type, None] = memoized.serve(
+                    key=key, refresh=lambda: asyncio.run(call()))
+                if packed is not None:
+                    return unpack_response(packed)
+                memoized.stats.record('misses')
+                return await memoized.load_async(key=key, call=call)
+        else:
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                def call():
+                    return func(*args, **kwargs)
+
+                key: typing.Union[str, None] = None
+                if not memoized.should_bypass():
+                    key = memoized.resolve_key(args=args, kwargs=kwargs)
+                if key is None:
+                    memoized.stats.record('bypassed')
+                    return call()
+                packed: typing.Union[cached_response_type, None] = memoized.serve(
+                    key=key, refresh=call)
+                if packed is not None:
+                    return unpack_response(packed)
+                memoized.stats.record('misses')
+                return memoized.load(key=key, call=call)
+
+        wrapper.memoized = memoized
+        wrapper.cache_info = memoized.stats.to_dict
+        wrapper.invalidate = memoized.delete
+        wrapper.uncached = func
+        return wrapper
+
+    return decorator
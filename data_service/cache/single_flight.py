@@ -0,0 +1,112 @@
+"""
+    single flight loading for memoized reads
+
+    when a popular entry expires every thread and instance misses at once and runs the same query.
+    within a worker concurrent misses for one key join the flight of the first one and wait for its
+    result. across workers and instances a lease stored in the shared cache elects the one loader,
+    the others poll the cache until the loaded entry shows up or the lease runs out.
+"""
+import threading
+import time
+import typing
+import uuid
+from flask_caching import Cache
+
+LEASE_PREFIX: str = "lease:"
+# longest a loader may hold a lease, after this other workers stop waiting and load themselves
+LEASE_TIMEOUT: int = 30
+POLL_INTERVAL: float = 0.05
+
+
+class Flight:
+    """
+        one in-flight load, followers block on wait until the leader lands it
+    """
+
+    def __init__(self):
+        self._done: threading.Event = threading.Event()
+        self._result: typing.Any = None
+        self._error: typing.Union[BaseException, None] = None
+
+    def land(self, result: typing.Any = None,
+             error: typing.Union[BaseException, None] = None) -> None:
+        self._result, self._error = result, error
+        self._done.set()
+
+    def wait(self, timeout: typing.Union[float, None] = None) -> typing.Any:
+        if not self._done.wait(timeout=timeout):
+            raise TimeoutError("timed out waiting for an in-flight load")
+        if self._error is not None:
+            raise self._error
+        return self._result
+
+
+class SingleFlight:
+    """
+        in-process registry of loads in flight, keyed by cache key
+    """
+
+    def __init__(self):
+        self._flights: typing.Dict[str, Flight] = {}
+        self._lock: threading.Lock = threading.Lock()
+
+    def join(self, key: str) -> typing.Tuple[Flight, bool]:
+        """
+            returns the flight for key and whether the caller is its leader
+        """
+        with self._lock:
+            flight: typing.Union[Flight, None] = self._flights.get(key)
+            if flight is not None:
+                return flight, False
+            flight = Flight()
+            self._flights[key] = flight
+            return flight, True
+
+    def land(self, key: str, flight: Flight, result: typing.Any = None,
+             error: typing.Union[BaseException, None] = None) -> None:
+        with self._lock:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+        flight.land(result=result, error=error)
+
+
+class Lease:
+    """
+        distributed lock in the shared cache,
+        at most one holder per key until it is released or expires
+    """
+
+    def __init__(self, cache: Cache, key: str, timeout: int = LEASE_TIMEOUT):
+        self.cache: Cache = cache
+        self.key: str = "{}{}".format(LEASE_PREFIX, key)
+        self.timeout: int = timeout
+        self.token: str = uuid.uuid4().hex
+
+    def acquire(self) -> bool:
+        # noinspection PyBroadException
+        try:
+            return bool(self.cache.add(self.key, self.token, timeout=self.timeout))
+        except Exception:
+            # without the shared cache there is nothing to coordinate with
+            return True
+
+    def release(self) -> None:
+        # noinspection PyBroadException
+        try:
+            if self.cache.get(self.key) == self.token:
+                self.cache.delete(self.key)
+        except Exception:
+            pass
+
+    def held(self) -> bool:
+        """
+            whether anyone holds the lease, the holder releases it once its load is stored
+        """
+        # noinspection PyBroadException
+        try:
+            return self.cache.get(self.key) is not None
+        except Exception:
+            return False
+
+    def deadline(self) -> float:
+        return time.monotonic() + self.timeout
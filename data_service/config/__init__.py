@@ -14,9 +14,55 @@ class Config:
     PUBSUB_VERIFICATION_TOKEN = os.environ.get("PUBSUB_VERIFICATION_TOKEN") or config("PUBSUB_VERIFICATION_TOKEN")
     DATASTORE_TIMEOUT: int = 3600  # seconds
     DATASTORE_RETRIES: int = 10  # total retries when saving to datastore
+    # datastore: Cloud Datastore,
+    # memory: the in-memory stand-in of data_service.store.memory for tests and benchmarks
+    DATASTORE_BACKEND: str = config("DATASTORE_BACKEND", default="datastore")
+    # memory backend RPC time
+    DATASTORE_LATENCY_MS: float = config("DATASTORE_LATENCY_MS", default=0.0, cast=float)
+    # max ids resolved by one batch lookup, the datastore caps a lookup at 1000 keys
+    BATCH_LOOKUP_LIMIT: int = 1000
+    # max volume rows written by one bulk task, keeps task payloads under 1MB
+    BULK_INGEST_LIMIT: int = 2000
+    PAGE_SIZE: int = 100  # entities per page of a list endpoint when the client gives no limit
+    MAX_PAGE_SIZE: int = 1000  # largest limit a client may ask a list endpoint for
+    # entities read per datastore batch and written per chunk of a streamed export
+    EXPORT_BATCH_SIZE: int = 500
+    # daily volumes by stock are read from the columnar volume history,
+    # turn on once /cron/build-volume-history ran
+    VOLUME_HISTORY_READS: bool = config("VOLUME_HISTORY_READS", default=False, cast=bool)
+    # seconds a volume history rebuild waits after a single volume was written, the day lands first
+    VOLUME_HISTORY_DELAY: int = 60
+    # net buying and net selling stocks kept in each DailyMarketSummary
+    MARKET_SUMMARY_TOP: int = 10
+    # seconds a market summary task waits after volumes of its day were written,
+    # the rest of the day lands first
+    MARKET_SUMMARY_DELAY: int = 120
+    # days back /cron/summarize-market summarizes again, today included
+    MARKET_SUMMARY_DAYS: int = 3
+    # accumulating and distributing brokers returned when the client gives no top
+    BROKER_FLOWS_TOP: int = 10
+    ASYNC_VIEWS: bool = False  # routes run the *_async view variants, set by the ASGI entry point
+    # worker threads serving ASGI requests
+    ASGI_THREADS: int = config("ASGI_THREADS", default=8, cast=int)
+    # requests waiting for a thread before 503s
+    ASGI_BACKLOG: int = config("ASGI_BACKLOG", default=64, cast=int)
+    # datastore RPCs one request may make before a warning is logged,
+    # tests fail instead, 0 for no limit
+    DATASTORE_RPC_BUDGET: int = config("DATASTORE_RPC_BUDGET", default=0, cast=int)
+    # budgets of single routes by url rule, in place of DATASTORE_RPC_BUDGET
+    DATASTORE_RPC_BUDGETS: dict = {}
     CURRENCY: str = "PHP"
+    # exchange volumes belong to when none is given, part of every volume transaction id
+    EXCHANGE_ID: str = "PSE"
     BINANCE_API_KEY: str = os.environ.get("BINANCE_API_KEY") or config("BINANCE_API_KEY")
     BINANCE_SECRET: str = os.environ.get("BINANCE_SECRET_KEY") or config("BINANCE_SECRET_KEY")
+    # shared L2 cache e.g. redis://10.0.0.3:6379/0,
+    # when unset every process runs its own in-memory L2
+    CACHE_REDIS_URL: str = os.environ.get("CACHE_REDIS_URL") or \
+        config("CACHE_REDIS_URL", default=None)
+    CACHE_L1_THRESHOLD: int = 500  # max entries held in each worker's L1
+    # seconds, upper bound on L1 staleness should an invalidation message be lost
+    CACHE_L1_TIMEOUT: int = 60
 
 
 
@@ -1,42 +1,62 @@
 import functools
+import inspect
 from flask import jsonify
 from google.api_core.exceptions import Aborted, RetryError
 from google.cloud.ndb.exceptions import BadRequestError, BadQueryError
 from data_service.config.exceptions import InputError, RequestError, DataServiceError
+from data_service.config.instrumentation import record_view_error
+
+
+# errors a view turns into a failed response instead of letting them escape
+view_errors: tuple = (ValueError, TypeError, BadRequestError, BadQueryError, ConnectionRefusedError,
+                      RetryError, Aborted)
+
+
+def view_error_response(e: Exception) -> tuple:
+    """
+        response for an error raised by a view,
+        everything but bad input values is raised as a service error
+        the error itself is logged and kept with the datastore stats of the request
+    """
+    record_view_error(e)
+    if isinstance(e, ValueError):
+        message: str = str(e)
+        # IF debug please print debug messages
+        # raise InputError(description='Bad input values, please check your input')
+        return({'status': False, 'message': message}), 500
+    if isinstance(e, TypeError):
+        raise InputError(status=500, description='Bad input values, please check your input')
+    if isinstance(e, BadRequestError):
+        raise RequestError(status=500, description='Bad request while connecting to database')
+    if isinstance(e, BadQueryError):
+        raise DataServiceError(status=500,
+                               description="Error creating database query please check your input")
+    raise RequestError(status=500,
+                       description="database server is refusing connection please try again later")
 
 
 def handle_view_errors(func):
     """
-        view error handler wrapper
+        view error handler wrapper, coroutine views are wrapped in a coroutine so errors raised
+        while they are awaited are handled too
     #     TODO - raise user related errors here
     """
+    if inspect.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            try:
+                return await func(*args, **kwargs)
+            except view_errors as e:
+                return view_error_response(e)
+
+        return async_wrapper
+
     @functools.wraps(func)
     def wrapper(*args, **kwargs):
         try:
             return func(*args, **kwargs)
-        except ValueError as e:
-            message: str = str(e)
-            # IF debug please print debug messages
-            # raise InputError(description='Bad input values, please check your input')
-            return({'status': False, 'message': message}), 500
-        except TypeError as e:
-            message: str = str(e)
-            raise InputError(status=500, description='Bad input values, please check your input')
-        except BadRequestError as e:
-            message: str = str(e)
-            raise RequestError(status=500, description='Bad request while connecting to database')
-        except BadQueryError as e:
-            message: str = str(e)
-            raise DataServiceError(status=500, description="Error creating database query please check your input")
-        except ConnectionRefusedError as e:
-            message: str = str(e)
-            raise RequestError(status=500, description="database server is refusing connection please try again later")
-        except RetryError as e:
-            message: str = str(e)
-            raise RequestError(status=500, description="database server is refusing connection please try again later")
-        except Aborted as e:
-            message: str = str(e.message or e)
-            raise RequestError(status=500, description="database server is refusing connection please try again later")
+        except view_errors as e:
+            return view_error_response(e)
 
     return wrapper
 
@@ -0,0 +1,246 @@
+"""
+    per request datastore instrumentation
+
+    every RPC ndb makes goes through _datastore_api.make_call, install() wraps it so each call made
+    inside a datastore context opened by use_context is recorded on the DatastoreStats of that
+    context, during a request the stats of the request. lookups, queries and commits are counted
+    with the keys read, entities written and deleted, entities and bytes returned and the wall time
+    from issuing the call to its answer, retries included.
+
+    after each request the stats are sent back in a Server-Timing header, logged as one json line on
+    the data_service.datastore logger and added to the totals of the route, see route_stats(). a
+    request making more RPCs than the budget of its route, DATASTORE_RPC_BUDGETS by url rule else
+    DATASTORE_RPC_BUDGET, logs a warning, or raises DatastoreBudgetExceeded when the app is testing
+    so N+1 regressions fail tests.
+
+    RPCs made while a streamed response is read are made
+    after the request finished and are not counted.
+"""
+import contextlib
+import contextvars
+import functools
+import json
+import logging
+import threading
+import time
+import typing
+from flask import Flask, Response, current_app, g, has_request_context, request
+from google.cloud.ndb import _datastore_api, tasklets
+
+logger: logging.Logger = logging.getLogger('data_service.datastore')
+
+_make_call: typing.Callable = _datastore_api.make_call
+_current_stats: contextvars.ContextVar = contextvars.ContextVar('datastore_stats', default=None)
+_routes: typing.Dict[str, typing.Dict[str, float]] = {}
+_routes_lock: threading.Lock = threading.Lock()
+
+query_rpcs: typing.Tuple[str, ...] = ('run_query', 'run_aggregation_query')
+counters: typing.Tuple[str, ...] = ('rpcs', 'queries', 'gets', 'puts', 'deletes', 'entities',
+                                    'bytes', 'errors')
+
+
+class DatastoreBudgetExceeded(Exception):
+    """
+        a request made more datastore RPCs than the budget of its route allows
+    """
+
+
+def _byte_size(message: typing.Any) -> int:
+    pb: typing.Any = getattr(message, '_pb', None)
+    return pb.ByteSize() if pb is not None else 0
+
+
+class DatastoreStats:
+    """
+        # NOTES: datastore work of one request, or of one datastore context outside of requests
+            gets counts the keys looked up,
+            puts and deletes the mutations committed, rpc_ms the wall time
+            of the calls by RPC name, calls in flight together each count their own time
+    """
+
+    def __init__(self):
+        self.rpcs: int = 0
+        self.queries: int = 0
+        self.gets: int = 0
+        self.puts: int = 0
+        self.deletes: int = 0
+        self.entities: int = 0
+        self.bytes: int = 0
+        self.errors: int = 0
+        self.rpc_counts: typing.Dict[str, int] = {}
+        self.rpc_ms: typing.Dict[str, float] = {}
+        self.view_errors: typing.List[str] = []
+
+    @property
+    def total_ms(self) -> float:
+        return sum(self.rpc_ms.values())
+
+    def record(self, rpc_name: str, rpc_request: typing.Any, response: typing.Any,
+               elapsed_ms: float) -> None:
+        """
+            adds one answered call, response is None when the call failed
+        """
+        self.rpcs += 1
+        self.rpc_counts[rpc_name] = self.rpc_counts.get(rpc_name, 0) + 1
+        self.rpc_ms[rpc_name] = self.rpc_ms.get(rpc_name, 0.0) + elapsed_ms
+        if rpc_name in query_rpcs:
+            self.queries += 1
+        elif rpc_name == 'lookup':
+            self.gets += len(rpc_request.keys)
+        elif rpc_name == 'commit':
+            deletes: int = sum(1 for mutation in rpc_request.mutations if 'delete' in mutation)
+            self.deletes += deletes
+            self.puts += len(rpc_request.mutations) - deletes
+        if response is None:
+            self.errors += 1
+            return
+        self.bytes += _byte_size(response)
+        if rpc_name == 'lookup':
+            self.entities += len(response.found)
+        elif rpc_name == 'run_query':
+            self.entities += len(response.batch.entity_results)
+
+    def record_future(self, rpc_name: str, rpc_request: typing.Any, started: float,
+                      future: tasklets.Future) -> None:
+        elapsed_ms: float = (time.perf_counter() - started) * 1000
+        response: typing.Any = None if future.exception() is not None else future.result()
+        self.record(rpc_name=rpc_name, rpc_request=rpc_request, response=response,
+                    elapsed_ms=elapsed_ms)
+
+    def as_dict(self) -> dict:
+        stats: dict = {name: getattr(self, name) for name in counters}
+        stats['rpc_ms'] = {name: round(ms, 3) for name, ms in self.rpc_ms.items()}
+        stats['rpc_counts'] = dict(self.rpc_counts)
+        return stats
+
+    def server_timing(self, duration_ms: float) -> str:
+        """
+            Server-Timing header value, the whole request, the datastore total and each kind of RPC
+        """
+        datastore: str = 'datastore;dur={:.3f};desc="{} rpcs"'.format(self.total_ms, self.rpcs)
+        metrics: typing.List[str] = ['app;dur={:.3f}'.format(duration_ms), datastore]
+        metrics.extend(
+            'ds-{};dur={:.3f};desc="{}"'.format(name, self.rpc_ms[name], self.rpc_counts[name])
+            for name in sorted(self.rpc_ms))
+        return ", ".join(metrics)
+
+
+def instrumented_make_call(rpc_name: str, rpc_request: typing.Any, *args,
+                           **kwargs) -> tasklets.Future:
+    future: tasklets.Future = _make_call(rpc_name, rpc_request, *args, **kwargs)
+    stats: typing.Union[DatastoreStats, None] = _current_stats.get()
+    if stats is not None:
+        future.add_done_callback(
+            functools.partial(stats.record_future, rpc_name, rpc_request, time.perf_counter()))
+    return future
+
+
+def install() -> None:
+    """
+        routes the RPCs of ndb through instrumented_make_call, safe to call more than once
+    """
+    _datastore_api.make_call = instrumented_make_call
+
+
+def request_stats() -> DatastoreStats:
+    if 'datastore_stats' not in g:
+        g.datastore_stats = DatastoreStats()
+    return g.datastore_stats
+
+
+@contextlib.contextmanager
+def recording() -> typing.Iterator[DatastoreStats]:
+    """
+        records the RPCs made inside on the stats of the request,
+        nested recordings share the outer stats
+    """
+    stats: typing.Union[DatastoreStats, None] = _current_stats.get()
+    if stats is not None:
+        yield stats
+        return
+    stats = request_stats() if has_request_context() else DatastoreStats()
+    token: contextvars.Token = _current_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _current_stats.reset(token)
+
+
+def record_view_error(e: Exception) -> None:
+    """
+        errors views answer with a failed response are kept on the stats of the request and logged
+    """
+    message: str = "{}: {}".format(type(e).__name__, e)
+    stats: typing.Union[DatastoreStats, None] = _current_stats.get()
+    if stats is not None:
+        stats.view_errors.append(message)
+    logger.warning("view error %s", message)
+
+
+def route_stats() -> typing.Dict[str, typing.Dict[str, float]]:
+    """
+        totals of every route served by this process, keyed by "METHOD rule"
+    """
+    with _routes_lock:
+        return {route: dict(totals) for route, totals in _routes.items()}
+
+
+def reset_route_stats() -> None:
+    with _routes_lock:
+        _routes.clear()
+
+
+def _add_to_route(route: str, stats: DatastoreStats, over_budget: bool) -> None:
+    with _routes_lock:
+        totals: typing.Dict[str, float] = _routes.setdefault(route, dict.fromkeys(
+            ('requests', 'max_rpcs', 'rpc_ms', 'over_budget') + counters, 0))
+        totals['requests'] += 1
+        totals['max_rpcs'] = max(totals['max_rpcs'], stats.rpcs)
+        totals['rpc_ms'] += stats.total_ms
+        totals['over_budget'] += int(over_budget)
+        for name in counters:
+            totals[name] += getattr(stats, name)
+
+
+def rpc_budget(rule: str) -> int:
+    """
+        RPCs a request to rule may make, 0 for no limit
+    """
+    budgets: typing.Dict[str, int] = current_app.config.get('DATASTORE_RPC_BUDGETS') or {}
+    return budgets.get(rule, current_app.config.get('DATASTORE_RPC_BUDGET', 0))
+
+
+def start_request() -> None:
+    g.request_started = time.perf_counter()
+
+
+def report_request(response: Response) -> Response:
+    stats: DatastoreStats = g.get('datastore_stats') or DatastoreStats()
+    started: float = g.get('request_started', time.perf_counter())
+    duration_ms: float = (time.perf_counter() - started) * 1000
+    rule: str = request.url_rule.rule if request.url_rule is not None else '<unmatched>'
+    route: str = "{} {}".format(request.method, rule)
+    budget: int = rpc_budget(rule=rule)
+    over_budget: bool = 0 < budget < stats.rpcs
+
+    response.headers.add('Server-Timing', stats.server_timing(duration_ms=duration_ms))
+    record: dict = dict(route=route, status=response.status_code, duration_ms=round(duration_ms, 3),
+                        **stats.as_dict())
+    if stats.view_errors:
+        record['view_errors'] = stats.view_errors
+    logger.info(json.dumps(record))
+    _add_to_route(route=route, stats=stats, over_budget=over_budget)
+
+    if over_budget:
+        message: str = "{} made {} datastore RPCs, its budget is {}".format(
+            route, stats.rpcs, budget)
+        if current_app.testing:
+            raise DatastoreBudgetExceeded(message)
+        logger.warning(message)
+    return response
+
+
+def init_app(app: Flask) -> None:
+    install()
+    app.before_request(start_request)
+    app.after_request(report_request)
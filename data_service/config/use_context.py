@@ -1,27 +1,121 @@
+import contextlib
 import functools
-from flask import current_app
+import inspect
+import os
+import threading
+import typing
+from flask import current_app, Flask
 from data_service.main import create_app
 from data_service.config import Config
+from data_service.config.instrumentation import recording
 from google.cloud import ndb
-from data_service.utils.utils import is_development
-import os
+from google.cloud.ndb import context as context_module
+from data_service.store.memory import MemoryClient
+
+DEFAULT_NAMESPACE: str = "main"
+
+# NOTE: one ndb.Client per (backend, project,
+# namespace) per worker process, the client owns the gRPC channel
+# and credentials so creating it once means no TLS
+# handshake or credential loading on the request path
+_clients: typing.Dict[typing.Tuple[str, typing.Union[str, None], str], ndb.Client] = {}
+_clients_lock: threading.Lock = threading.Lock()
+# app used when a decorated function is called outside of a request e.g. from scripts or benchmarks
+_standalone_app: typing.Union[Flask, None] = None
+
+
+def _reset_clients() -> None:
+    """
+        gRPC channels cannot be shared across a fork, a forked worker starts with an empty registry
+    """
+    global _clients_lock
+    _clients.clear()
+    _clients_lock = threading.Lock()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_clients)
+
+
+def _datastore_client(project: typing.Union[str, None], namespace: str) -> ndb.Client:
+    # credentials are found by google.auth, GOOGLE_APPLICATION_CREDENTIALS when developing locally
+    return ndb.Client(namespace=namespace, project=project)
+
 
-if is_development():
-    credential_path = "C:\\gcp_credentials\\pinoydesk.json"
-    os.environ['GOOGLE_APPLICATION_CREDENTIALS'] = credential_path
+def _memory_client(project: typing.Union[str, None], namespace: str) -> ndb.Client:
+    return MemoryClient(namespace=namespace, project=project)
+
+
+# storage backends by the name DATASTORE_BACKEND gives them
+backends: typing.Dict[str, typing.Callable[[typing.Union[str, None], str], ndb.Client]] = {
+    'datastore': _datastore_client, 'memory': _memory_client}
+
+
+def get_client(project: typing.Union[str, None] = None, namespace: str = DEFAULT_NAMESPACE,
+               backend: str = 'datastore') -> ndb.Client:
+    """
+        returns the process wide ndb client of backend for project and namespace,
+        creating it on first use
+    """
+    registry_key: tuple = (backend, project, namespace)
+    client: typing.Union[ndb.Client, None] = _clients.get(registry_key)
+    if client is None:
+        with _clients_lock:
+            client = _clients.get(registry_key)
+            if client is None:
+                client = backends[backend](project, namespace)
+                _clients[registry_key] = client
+    return client
+
+
+def _get_app() -> Flask:
+    """
+        the app of the current app context,
+        outside of one the standalone app, created once, whose context
+        the caller opens for as long as it needs it, see datastore_context
+    """
+    global _standalone_app
+    if current_app:
+        return current_app._get_current_object()
+    if _standalone_app is None:
+        _standalone_app = create_app(config_class=Config)
+    return _standalone_app
+
+
+@contextlib.contextmanager
+def datastore_context() -> typing.Iterator[None]:
+    """
+        opens a datastore context unless one is already open,
+        for work that outlives the decorated call
+        e.g. generators streamed after the view returned
+    """
+    if context_module.get_context(raise_context_error=False) is not None:
+        yield
+        return
+    app: Flask = _get_app()
+    client: ndb.Client = get_client(project=app.config.get('PROJECT'), namespace=DEFAULT_NAMESPACE,
+                                    backend=app.config.get('DATASTORE_BACKEND', 'datastore'))
+    # outside of a request the standalone app's context
+    # is open only as long as the datastore context
+    app_context: typing.ContextManager = (contextlib.nullcontext() if current_app
+                                          else app.app_context())
+    # TODO - setup everything related to cache policy and all else here
+    with app_context, client.context(), recording():
+        yield
 
 
 def use_context(func):
+    if inspect.iscoroutinefunction(func):
+        # the context has to stay open until the coroutine finished, not just until it was created
+        @functools.wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            with datastore_context():
+                return await func(*args, **kwargs)
+        return async_wrapper
+
     @functools.wraps(func)
     def wrapper(*args, **kwargs):
-        if not current_app:
-            app = create_app(config_class=Config)
-            app.app_context().push()
-        else:
-            app = current_app
-        client = ndb.Client(namespace="main", project=app.config.get('PROJECT'))
-        # TODO - setup everything related to cache policy and all else here
-        with client.context():
+        # nested decorated calls run inside the context already opened by the outer call
+        with datastore_context():
             return func(*args, **kwargs)
     return wrapper
-
@@ -11,12 +11,19 @@ import datetime
 import typing
 from unittest.mock import sentinel
 from google.cloud import ndb
+from data_service.cache.invalidation import invalidate_tags
 from data_service.config.exceptions import RemoteDataError
+from data_service.config.use_context import use_context
+from data_service.main import cache_stocks
+from data_service.store.history import days_recorded_since
+from data_service.store.net_volumes import NetCalculations, calculate_net_totals
 from data_service.store.settings import ExchangeDataModel
 from data_service.utils.utils import create_id, date_string_to_date
 from data_service.views.settings import ExchangeDataView
 from data_service.views.stock_price import StockPriceDataView
+from data_service.views.market import net_totals_tags
 from data_service.sdks.eod.eod_historical_data.data import get_eod_data_async
+from data_service.cron.utils.utils import run_together
 import asyncio
 import aiohttp
 
@@ -39,8 +46,8 @@ def ticker_found(tickers_list: typing.List[dict], stock_instance: dict) -> bool:
 
 
 async def add_stock_to_exchange(exchange_id: str, stock_instance: dict) -> bool:
-    exchange_instance: ExchangeDataModel = ExchangeDataModel.query(
-        ExchangeDataModel.exchange_id == exchange_id).get_async().result()
+    exchange_instance: ExchangeDataModel = \
+        ExchangeDataModel.get_by_natural_id_async(exchange_id).result()
     if isinstance(exchange_instance, ExchangeDataModel):
         tickers_list: typing.List[dict] = exchange_instance.exchange_tickers_list
         if not (ticker_found(tickers_list=tickers_list, stock_instance=stock_instance)):
@@ -73,7 +80,7 @@ async def get_stock_close_data_from_pse(ticker: dict, exchange: dict) -> bool:
     return True
 
 
-def convert_eod_stock_price_data(data) -> dict:
+def convert_eod_stock_price_data(data, stock_id: typing.Union[str, None] = None) -> dict:
     """
         format:
             {
@@ -91,7 +98,7 @@ def convert_eod_stock_price_data(data) -> dict:
         return int(num * 100)
 
     return {
-        "stock_id": create_id(),
+        "stock_id": stock_id or create_id(),
         "date_created": date_string_to_date(date_str=data[0]),
         "price_open": convert_to_int(num=data[1]),
         "price_high": convert_to_int(num=data[2]),
@@ -111,25 +118,29 @@ async def get_stock_close_data_from_eod(ticker: dict, exchange: dict, today: boo
     """
     try:
         stock_price_data: StockPriceDataView = StockPriceDataView()
+        # exchanges are stored without a symbol, eod knows them by their code e.g. PSE
+        exchange_code: str = exchange.get('symbol') or exchange['exchange_name'].upper()
         if today:
             response = await get_eod_data_async(symbol=ticker['symbol'],
-                                                exchange=exchange['symbol'],
+                                                exchange=exchange_code,
                                                 start=str(datetime.datetime.now().date()),
                                                 end=str(datetime.datetime.now().date()))
         else:
             response = await get_eod_data_async(symbol=ticker['symbol'],
-                                                exchange=exchange['symbol'])
+                                                exchange=exchange_code)
 
         if (response is not sentinel) and (response is not None):
             # this means response contains data as dataframe
             coro: list = []
-            for data in response:
-                stock_data: dict = convert_eod_stock_price_data(data=data)
-                coro.append(stock_price_data.add_stock_price_data_async(stock_price_data=stock_data))
+            for data in response.itertuples():
+                # the index holds the date of the row as a Timestamp
+                stock_data: dict = convert_eod_stock_price_data(
+                    data=(str(data[0].date()),) + tuple(data[1:]),
+                    stock_id=ticker.get('stock_id'))
+                coro.append(stock_price_data.add_stock_price_data_async(**stock_data))
 
             if len(coro) > 0:
-                loop = asyncio.new_event_loop()
-                loop.run_until_complete(asyncio.wait(coro))
+                await asyncio.gather(*coro)
     except RemoteDataError:
         pass
     return True
@@ -177,13 +188,29 @@ async def get_crypto_close_data_from_binance(ticker: dict) -> bool:
     return True
 
 
+def all_exchanges(
+        exchange_view_instance: ExchangeDataView) -> typing.Union[typing.List[dict], None]:
+    """
+        every exchange, read one page at a time, None when a page could not be read
+    """
+    exchange_list: typing.List[dict] = []
+    cursor: typing.Union[str, None] = None
+    while True:
+        response, status = exchange_view_instance.return_all_exchanges(cursor=cursor)
+        response_data: dict = response.get_json()
+        if not response_data['status']:
+            return None
+        exchange_list.extend(response_data['payload'])
+        cursor = response_data['cursor']
+        if cursor is None:
+            return exchange_list
+
+
 def cron_call_close_data_apis():
     exchange_view_instance: ExchangeDataView = ExchangeDataView()
-    response, status = exchange_view_instance.return_all_exchanges()
-    response_data: dict = response.get_json()
+    exchange_list: typing.Union[typing.List[dict], None] = all_exchanges(exchange_view_instance)
     coro: list = []
-    if response_data['status']:
-        exchange_list: typing.List[dict] = response_data['payload']
+    if exchange_list is not None:
         for exchange in exchange_list:
             if exchange['exchange_type'] != 'crypto':
                 response, status = exchange_view_instance.get_exchange_tickers(exchange_id=exchange['exchange_id'])
@@ -193,18 +220,15 @@ def cron_call_close_data_apis():
                     for ticker in exchange_tickers:
                         coro.append(get_stock_close_data_from_eod(ticker=ticker, exchange=exchange, today=True))
     if len(coro) > 0:
-        loop = asyncio.new_event_loop()
-        loop.run_until_complete(asyncio.wait(coro))
+        run_together(coro)
     return 'OK', 200
 
 
 def cron_call_crypto_close_data_api():
     exchange_view_instance: ExchangeDataView = ExchangeDataView()
-    response, status = exchange_view_instance.return_all_exchanges()
-    response_data: dict = response.get_json()
+    exchange_list: typing.Union[typing.List[dict], None] = all_exchanges(exchange_view_instance)
     coro: list = []
-    if response_data['status']:
-        exchange_list: typing.List[dict] = response_data['payload']
+    if exchange_list is not None:
         for exchange in exchange_list:
             if exchange['exchange_type'] == 'crypto':
                 if exchange['exchange_name'] == "binance":
@@ -215,11 +239,35 @@ def cron_call_crypto_close_data_api():
                         for ticker in exchange_tickers:
                             coro.append(get_crypto_close_data_from_binance(ticker=ticker))
     if len(coro) > 0:
-        loop = asyncio.new_event_loop()
-        loop.run_until_complete(asyncio.wait(coro))
+        run_together(coro)
     return 'OK', 200
 
 
-def cron_perform_net_calculations():
-    pass
+@use_context
+def cron_perform_net_calculations(
+        date_created: typing.Union[datetime.date, str, None] = None) -> typing.Dict[str, int]:
+    """
+        cron job
+        function: derives the net volume totals of date_created, or of every day whose buy or sell
+        volumes were recorded since the last run, from the buy and sell volumes, returns the totals
+        written or deleted by day
+    """
+    started: datetime.datetime = datetime.datetime.utcnow()
+    state: typing.Union[NetCalculations, None] = None
+    if date_created:
+        days: typing.List[datetime.date] = [date_string_to_date(date_created)]
+    else:
+        state = NetCalculations.state()
+        days = days_recorded_since(since=state.watermark, sides=('buy', 'sell'))
 
+    written: typing.Dict[str, int] = {}
+    for day in days:
+        totals, deleted = calculate_net_totals(date_created=day)
+        if totals or deleted:
+            invalidate_tags(cache=cache_stocks, tags=net_totals_tags(date_created=day))
+        written[str(day)] = len(totals) + len(deleted)
+    # a day recorded while the run read it is after started and calculated again by the next run
+    if state is not None:
+        state.watermark = started
+        state.put()
+    return written
@@ -0,0 +1,27 @@
+# Summarizes the market of the last days,
+# for the volumes written one row at a time which queue no summaries
+import datetime
+import typing
+from data_service.config import Config
+from data_service.config.use_context import use_context
+from data_service.views.market import MarketSummaryView
+
+
+@use_context
+def cron_summarize_market(days: int = Config.MARKET_SUMMARY_DAYS,
+                          today: typing.Union[datetime.date, None] = None) -> typing.Dict[str, int]:
+    """
+        cron job
+        function: summarizes the market of today and the days before it,
+        days in all, returns the stocks
+        traded on each day summarized
+    """
+    today = today or (datetime.datetime.utcnow() + Config.UTC_OFFSET).date()
+    view: MarketSummaryView = MarketSummaryView()
+    traded: typing.Dict[str, int] = {}
+    for days_ago in range(days):
+        day: datetime.date = today - datetime.timedelta(days=days_ago)
+        response, status = view.summarize_market_day(date_created=day)
+        if status == 200:
+            traded[str(day)] = response.get_json()['payload']['stocks_traded']
+    return traded
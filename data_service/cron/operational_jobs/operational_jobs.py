@@ -2,11 +2,12 @@
 import datetime
 import typing
 from google.cloud import ndb
+from data_service.config.use_context import use_context
 from data_service.store.wallet import WalletModel
 from data_service.views.memberships import MembershipsView
 from data_service.store.memberships import Memberships, MembershipPlans
 from data_service.store.affiliates import Affiliates, Recruits, EarningsData
-import asyncio
+from data_service.cron.utils.utils import run_together
 
 
 def return_plan_by_id(plan_id: str, payment_plans: typing.List[MembershipPlans]) -> typing.Union[MembershipPlans, None]:
@@ -23,6 +24,7 @@ async def create_invoice(membership_plan, membership) -> bool:
     pass
 
 
+@use_context
 def cron_create_membership_invoices():
     """
         cron job 400 860
@@ -40,8 +42,7 @@ def cron_create_membership_invoices():
                 # Process Payment
                 coro.append(create_invoice(membership_plan=membership_plan, membership=membership))
     if len(coro) > 0:
-        loop = asyncio.new_event_loop()
-        loop.run_until_complete(asyncio.wait(coro))
+        run_together(coro)
 
 
 def cron_down_grade_unpaid_memberships():
@@ -55,12 +56,18 @@ def cron_down_grade_unpaid_memberships():
 async def add_earnings(affiliate: Affiliates, earnings: EarningsData) -> any:
     # TODO may use ndb.tasklets to complete this tasks
     # validate and refactor the below code
-    wallet_instance: WalletModel = WalletModel.query(WalletModel.uid == affiliate.uid).get_async().get_result()
-    wallet_instance.available_funds = wallet_instance.available_funds + earnings.total_earned
+    wallet_instance: WalletModel = WalletModel.get_by_natural_id_async(affiliate.uid).get_result()
+    if not isinstance(wallet_instance, WalletModel):
+        return False
+    if wallet_instance.available_funds.currency != earnings.total_earned.currency:
+        return False
+    wallet_instance.available_funds.amount += earnings.total_earned.amount
     earnings.is_paid = True
-    return wallet_instance.put_async(), earnings.put_async()
+    ndb.put_multi([wallet_instance, earnings])
+    return True
 
 
+@use_context
 def cron_finalize_affiliate_payments():
     """
         cron job
@@ -71,12 +78,13 @@ def cron_finalize_affiliate_payments():
     coro: list = []
     for affiliate in affiliates_list:
         earnings_data: EarningsData = EarningsData.query(EarningsData.affiliate_id == affiliate.affiliate_id).get()
+        if earnings_data is None:
+            continue
         if not (earnings_data.is_paid or earnings_data.on_hold):
             # if its paid or its on hold do not add
             coro.append(add_earnings(affiliate=affiliate, earnings=earnings_data))
 
     if len(coro) > 0:
-        loop = asyncio.new_event_loop()
-        loop.run_until_complete(asyncio.wait(coro))
+        run_together(coro)
 
 
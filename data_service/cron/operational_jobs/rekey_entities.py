@@ -0,0 +1,138 @@
+# One-off migration moving entities onto natural id keys
+# every request rekeys one page of one kind and queues a task for the next page, the cursor of
+# the kind travels with the task so the migration resumes where the last request left off
+import logging
+import typing
+from google.cloud import ndb
+from data_service.config.use_context import use_context
+from data_service.store.affiliates import Affiliates
+from data_service.store.helpdesk import Ticket
+from data_service.store.memberships import Memberships, MembershipPlans, Coupons
+from data_service.store.mixins import NaturalKeyMixin
+from data_service.store.settings import ExchangeDataModel
+from data_service.store.stocks import (Stock, Broker, StockModel, BuyVolumeModel, SellVolumeModel,
+                                       NetVolumeModel)
+from data_service.store.users import UserModel
+from data_service.store.wallet import WalletModel
+from data_service.tasks.tasks import create_task
+from data_service.utils.pagination import fetch_page
+
+REKEYED_MODELS: typing.Tuple[typing.Type[NaturalKeyMixin], ...] = (
+    Stock, Broker, UserModel, WalletModel, Memberships, MembershipPlans, Coupons, Ticket,
+    ExchangeDataModel, Affiliates, StockModel, BuyVolumeModel, SellVolumeModel, NetVolumeModel)
+# buy volumes saved with datastore allocated keys all share the one transaction id the model default
+# was created with, they move to ids derived from the volume instead. copies of the same stock and
+# date collapse into one entity, they are redeliveries of the same volume. models not listed keep
+# the ids they were given and derive one only when they have none.
+REDERIVED_MODELS: typing.Tuple[typing.Type[NaturalKeyMixin], ...] = (BuyVolumeModel,)
+BATCH_SIZE: int = 500
+REKEY_TASK_URI: str = '/task/stock/rekey-entities'
+rekeyed_kinds: typing.Dict[str, typing.Type[NaturalKeyMixin]] = {
+    model._get_kind(): model for model in REKEYED_MODELS}
+logger: logging.Logger = logging.getLogger('data_service.rekey')
+
+
+def rekeyed_copy(entity: NaturalKeyMixin) -> typing.Union[NaturalKeyMixin, None]:
+    """
+        copy of entity stored under its natural id key,
+        None if it is already there or has no natural id
+    """
+    copy: NaturalKeyMixin = entity.__class__()
+    # stored values are copied as is, validators may reject values written before they were added
+    for prop in entity._properties.values():
+        prop._store_value(copy, prop._retrieve_value(entity))
+    if isinstance(copy, REDERIVED_MODELS) and entity.key is not None \
+            and isinstance(entity.key.id(), int):
+        copy.transaction_id = None
+    if hasattr(copy, 'derive_transaction_id'):
+        copy.derive_transaction_id()
+
+    key: typing.Union[ndb.Key, None] = entity.natural_key(getattr(copy, copy.natural_id, None))
+    if key is None or entity.key == key:
+        return None
+    copy.key = key
+    return copy
+
+
+def rekey_batch(entities: typing.List[NaturalKeyMixin]) -> typing.Tuple[int, int]:
+    """
+        moves one batch of entities to their natural keys, returns counts of (rekeyed, skipped)
+
+        when an entity already exists under the natural
+        key it was written after the switch and is kept,
+        the legacy entity is then only deleted.
+    """
+    moves: typing.List[typing.Tuple[NaturalKeyMixin, NaturalKeyMixin]] = []
+    for entity in entities:
+        copy: typing.Union[NaturalKeyMixin, None] = rekeyed_copy(entity=entity)
+        if copy is not None:
+            moves.append((entity, copy))
+    if not moves:
+        return 0, len(entities)
+
+    # legacy volumes with the same derived id are written once,
+    # a commit cannot touch an entity twice
+    unique: typing.Dict[ndb.Key, NaturalKeyMixin] = {}
+    for _, copy in moves:
+        unique.setdefault(copy.key, copy)
+    existing: list = ndb.get_multi(list(unique))
+    copies: typing.List[NaturalKeyMixin] = [copy for copy, found in zip(unique.values(), existing)
+                                            if found is None]
+    if copies:
+        ndb.put_multi(copies)
+    ndb.delete_multi([entity.key for entity, _ in moves])
+    return len(moves), len(entities) - len(moves)
+
+
+def next_step(kind: str, cursor: typing.Union[str, None]) -> typing.Union[dict, None]:
+    """
+        the page after the one of kind just rekeyed, cursor is where it ended, None after the last
+        kind
+    """
+    if cursor is not None:
+        return {'kind': kind, 'cursor': cursor}
+    kinds: typing.List[str] = list(rekeyed_kinds)
+    index: int = kinds.index(kind) + 1
+    return {'kind': kinds[index], 'cursor': None} if index < len(kinds) else None
+
+
+def queue_step(step: dict) -> bool:
+    """
+        queues the task rekeying the page of step, False when it could not be queued
+    """
+    # noinspection PyBroadException
+    try:
+        task = create_task(uri=REKEY_TASK_URI, payload=step, in_seconds=None)
+    except Exception as error:
+        logger.warning("rekey of %s not queued: %s", step['kind'], error)
+        task = None
+    return task is not None
+
+
+@use_context
+def rekey_entities_step(kind: str, cursor: typing.Union[str, None] = None,
+                        batch_size: int = BATCH_SIZE) -> dict:
+    """
+        rekeys the page of kind starting at cursor and queues the next page, returns the counts of
+        the page, the step queued, None once every kind was rekeyed, and whether it was queued
+
+        a step whose next step could not be queued is run again by its task, the entities it moved
+        are then skipped
+    """
+    model: typing.Type[NaturalKeyMixin] = rekeyed_kinds[kind]
+    entities, next_cursor = fetch_page(query=model.query(), limit=batch_size, cursor=cursor)
+    rekeyed, skipped = rekey_batch(entities=entities)
+    step: typing.Union[dict, None] = next_step(kind=kind, cursor=next_cursor)
+    queued: bool = step is None or queue_step(step=step)
+    return {'kind': kind, 'rekeyed': rekeyed, 'skipped': skipped, 'next': step, 'queued': queued}
+
+
+def cron_rekey_entities(batch_size: int = BATCH_SIZE) -> dict:
+    """
+        cron job
+        function: moves entities written with datastore allocated ids onto their natural id keys,
+        a page at a time, the first page here and every other one in the task the page before
+        queued.
+        safe to run again, entities already on their natural keys are skipped
+    """
+    return rekey_entities_step(kind=REKEYED_MODELS[0]._get_kind(), batch_size=batch_size)
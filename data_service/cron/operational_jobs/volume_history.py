@@ -0,0 +1,39 @@
+# Builds the columnar volume history from the volumes already saved
+import typing
+from data_service.config.use_context import use_context
+from data_service.store.history import record_volumes
+from data_service.store.stocks import BuyVolumeModel, SellVolumeModel, NetVolumeModel, VolumeMixin
+
+HISTORY_MODELS: typing.Tuple[typing.Type[VolumeMixin], ...] = (BuyVolumeModel, SellVolumeModel,
+                                                               NetVolumeModel)
+BATCH_SIZE: int = 500
+
+
+def build_history(model: typing.Type[VolumeMixin],
+                  batch_size: int = BATCH_SIZE) -> typing.Dict[str, int]:
+    """
+        records every volume of model in the history,
+        volumes come in key order so a batch fills few buckets
+    """
+    counts: typing.Dict[str, int] = {'volumes': 0, 'buckets': 0}
+    cursor: typing.Any = None
+    more: bool = True
+    while more:
+        entities, cursor, more = model.query().fetch_page(batch_size, start_cursor=cursor)
+        counts['buckets'] += record_volumes(model=model,
+                                            volumes=[entity.to_dict() for entity in entities])
+        counts['volumes'] += len(entities)
+    return counts
+
+
+@use_context
+def cron_build_volume_history(
+        batch_size: int = BATCH_SIZE) -> typing.Dict[str, typing.Dict[str, int]]:
+    """
+        cron job
+        function: records every saved volume in the volume history,
+        run once before VOLUME_HISTORY_READS
+        is turned on, safe to run again, a volume recorded twice replaces itself
+    """
+    return {model._get_kind(): build_history(model=model, batch_size=batch_size)
+            for model in HISTORY_MODELS}
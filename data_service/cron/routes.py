@@ -1,14 +1,18 @@
 """
     entry point to cron jobs
 """
-
-from flask import Blueprint
+import typing
+from flask import Blueprint, request, jsonify
 
 from data_service.api.api_authenticator import handle_auth
 from data_service.cron.eod_close_data.exchange_close_data_calls import cron_call_close_data_apis, \
-    cron_call_crypto_close_data_api
+    cron_call_crypto_close_data_api, cron_perform_net_calculations
 from data_service.cron.operational_jobs.operational_jobs import cron_create_membership_invoices, \
     cron_down_grade_unpaid_memberships, cron_finalize_affiliate_payments
+from data_service.cron.operational_jobs.rekey_entities import cron_rekey_entities
+from data_service.cron.operational_jobs.volume_history import cron_build_volume_history
+from data_service.cron.operational_jobs.market_summary import cron_summarize_market
+from data_service.utils.utils import date_string_to_date
 
 cron_bp = Blueprint('cron', __name__)
 
@@ -87,3 +91,43 @@ def call_crypto_close_data_api() -> tuple:
     return 'OK', 200
 
 
+# one-off migration, moves entities onto their natural id keys a page at a time
+@cron_bp.route('/cron/rekey-entities', methods=['POST'])
+@handle_auth
+def rekey_entities() -> tuple:
+    step: dict = cron_rekey_entities()
+    if not step['queued']:
+        return jsonify({'status': False, 'message': 'the next page could not be queued',
+                        'payload': step}), 500
+    return jsonify({'status': True, 'message': 'rekeying entities', 'payload': step}), 200
+
+
+# one-off backfill, records the volumes saved before the volume history existed
+@cron_bp.route('/cron/build-volume-history', methods=['POST', 'GET'])
+@handle_auth
+def build_volume_history() -> tuple:
+    cron_build_volume_history()
+    return 'OK', 200
+
+
+# rebuilds the market summaries of the last MARKET_SUMMARY_DAYS days
+@cron_bp.route('/cron/summarize-market', methods=['POST', 'GET'])
+@handle_auth
+def summarize_market() -> tuple:
+    cron_summarize_market()
+    return 'OK', 200
+
+
+# derives the net volumes of ?date=yyyy-mm-dd,
+# or of the days whose buy or sell volumes were written since the last run
+@cron_bp.route('/cron/perform-net-calculations', methods=['POST', 'GET'])
+@handle_auth
+def perform_net_calculations() -> tuple:
+    date_created: typing.Union[str, None] = request.args.get('date')
+    try:
+        if date_created:
+            date_string_to_date(date_created)
+    except (ValueError, TypeError, IndexError):
+        return jsonify({'status': False, 'message': 'date must be a date, yyyy-mm-dd'}), 500
+    cron_perform_net_calculations(date_created=date_created)
+    return 'OK', 200
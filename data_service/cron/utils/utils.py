@@ -1,3 +1,16 @@
+import asyncio
+import typing
+
+
+def run_together(coro: typing.List[typing.Coroutine]) -> list:
+    """
+        runs the coroutines side by side on an event loop of their own until all of them finished
+    """
+    async def gather() -> list:
+        return await asyncio.gather(*coro)
+    return asyncio.run(gather())
+
+
 
 
 async def send_email(to: str, subject: str, body: str) -> bool:
@@ -0,0 +1,4 @@
+"""
+    bulk loaders for the historical data kept under initial_data, run each module with
+    python -m data_service.loaders.<module>
+"""
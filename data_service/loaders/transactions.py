@@ -0,0 +1,306 @@
+"""
+    loads the historical broker transactions in initial_data/transactions/transaction
+
+    every csv row holds what one broker bought and sold of one stock on one day, it is mapped into a
+    BuyVolumeModel, a SellVolumeModel and a NetVolumeModel, the Stock and Broker it mentions are
+    written once per run. files are loaded by a pool of processes, each file is written with
+    put_multi in chunks of PUT_CHUNK_SIZE and recorded in the checkpoint file once it is done, so
+    a load which stopped half way resumes with the files it had not finished.
+
+    volumes are keyed by transaction ids derived from the row, loading a file again overwrites them.
+
+    python -m data_service.loaders.transactions --workers 8
+    python -m data_service.loaders.transactions --dry-run --rpc-latency 5
+"""
+import argparse
+import concurrent.futures
+import json
+import os
+import time
+import typing
+import pandas as pd
+from google.cloud import ndb
+from data_service.config.use_context import use_context
+from data_service.store.stocks import (Stock, Broker, BuyVolumeModel, SellVolumeModel,
+                                       NetVolumeModel, VolumeMixin)
+from data_service.views.history import record_volume_history
+
+INITIAL_DATA: str = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    'initial_data')
+TRANSACTIONS_DIRECTORY: str = os.path.join(INITIAL_DATA, 'transactions', 'transaction')
+BROKERS_FILE: str = os.path.join(INITIAL_DATA, 'brokers', 'brokers.csv')
+CHECKPOINT_FILE: str = 'transactions_import.checkpoint.json'
+# entities written per put_multi call, the datastore caps a commit at 500 entities
+PUT_CHUNK_SIZE: int = 500
+
+BUY_FIELDS: typing.List[str] = ['buy_volume', 'buy_value', 'buy_ave_price',
+                                'buy_market_val_percent', 'buy_trade_count']
+SELL_FIELDS: typing.List[str] = ['sell_volume', 'sell_value', 'sell_ave_price',
+                                 'sell_market_val_percent', 'sell_trade_count']
+NET_FIELDS: typing.List[str] = ['net_volume', 'net_value', 'total_volume', 'total_value']
+
+
+class LocalStore:
+    """
+        # NOTES: stand-in for the datastore used by dry runs, entities are kept in memory by
+        natural id so loading a row twice overwrites it, every put_multi sleeps rpc_latency seconds
+    """
+
+    def __init__(self, rpc_latency: float = 0):
+        self.rpc_latency: float = rpc_latency
+        self.entities: typing.Dict[typing.Tuple[str, str], ndb.Model] = {}
+        self.rpcs: int = 0
+
+    def put_multi(self, entities: typing.List[ndb.Model]) -> None:
+        self.rpcs += 1
+        if self.rpc_latency:
+            time.sleep(self.rpc_latency)
+        for entity in entities:
+            self.entities[(entity._get_kind(), getattr(entity, entity.natural_id))] = entity
+
+
+class DatastoreWriter:
+    """
+        # NOTES: writes to the datastore, callers run inside an ndb context
+            volumes written are recorded in the volume history of their stocks as well
+    """
+
+    def __init__(self):
+        self.rpcs: int = 0
+
+    def put_multi(self, entities: typing.List[ndb.Model]) -> None:
+        self.rpcs += 1
+        ndb.put_multi(entities)
+        for model in (BuyVolumeModel, SellVolumeModel, NetVolumeModel):
+            volumes: typing.List[dict] = [entity.to_dict() for entity in entities
+                                          if isinstance(entity, model)]
+            if volumes:
+                record_volume_history(model=model, volumes=volumes)
+
+
+def read_transactions(path: str) -> pd.DataFrame:
+    """
+        reads one csv file, amounts are rounded to the integers the volume models store
+    """
+    frame: pd.DataFrame = pd.read_csv(path, dtype={'stock_id': str, 'broker_id': str,
+                                                   'stock_code': str, 'stock_name': str,
+                                                   'broker_code': str, 'date': str})
+    frame = frame.dropna(subset=['stock_id', 'broker_id', 'date'])
+    frame['stock_code'] = frame['stock_code'].fillna(frame['stock_id'])
+    frame['stock_name'] = frame['stock_name'].fillna(frame['stock_code'])
+    frame['broker_code'] = frame['broker_code'].fillna(frame['broker_id'])
+    for field in BUY_FIELDS + SELL_FIELDS + NET_FIELDS:
+        frame[field] = pd.to_numeric(frame[field],
+                                     errors='coerce').fillna(0).round().astype('int64')
+    return frame
+
+
+def volume_entities(frame: pd.DataFrame) -> typing.List[VolumeMixin]:
+    """
+        transaction ids are derived from the stock, broker and date of each row
+    """
+    entities: typing.List[VolumeMixin] = []
+    for record in frame.to_dict(orient='records'):
+        date_created = pd.Timestamp(record['date']).date()
+        for model, fields in ((BuyVolumeModel, BUY_FIELDS), (SellVolumeModel, SELL_FIELDS),
+                              (NetVolumeModel, NET_FIELDS)):
+            entity: VolumeMixin = model()
+            values: dict = {field: int(record[field]) for field in fields}
+            entity.populate(stock_id=record['stock_id'], broker_id=record['broker_id'],
+                            date_created=date_created, **values)
+            entity.derive_transaction_id()
+            entities.append(entity)
+    return entities
+
+
+def dimensions(frame: pd.DataFrame) -> typing.Tuple[typing.Dict[str, dict], typing.Dict[str, dict]]:
+    """
+        the distinct stocks and brokers mentioned in frame, by id
+    """
+    stocks: pd.DataFrame = frame.drop_duplicates(subset='stock_id')
+    brokers: pd.DataFrame = frame.drop_duplicates(subset='broker_id')
+    return ({row.stock_id: {'stock_id': row.stock_id, 'stock_code': row.stock_code,
+                            'stock_name': row.stock_name, 'symbol': row.stock_code}
+             for row in stocks.itertuples()},
+            {row.broker_id: {'broker_id': row.broker_id, 'broker_code': row.broker_code}
+             for row in brokers.itertuples()})
+
+
+def put_chunked(store: typing.Union[LocalStore, DatastoreWriter],
+                entities: typing.List[ndb.Model]) -> None:
+    for start in range(0, len(entities), PUT_CHUNK_SIZE):
+        store.put_multi(entities[start:start + PUT_CHUNK_SIZE])
+
+
+def load_file(path: str, store: typing.Union[LocalStore, DatastoreWriter]) -> dict:
+    """
+        writes the volumes of one file, returns its row count and the stocks and brokers it mentions
+    """
+    start: float = time.perf_counter()
+    frame: pd.DataFrame = read_transactions(path=path)
+    put_chunked(store=store, entities=volume_entities(frame=frame))
+    stocks, brokers = dimensions(frame=frame)
+    return {'file': os.path.basename(path), 'rows': len(frame), 'rpcs': store.rpcs,
+            'stocks': stocks, 'brokers': brokers, 'seconds': time.perf_counter() - start}
+
+
+@use_context
+def load_file_to_datastore(path: str) -> dict:
+    return load_file(path=path, store=DatastoreWriter())
+
+
+def load_file_to_local_store(path: str, rpc_latency: float) -> dict:
+    return load_file(path=path, store=LocalStore(rpc_latency=rpc_latency))
+
+
+def broker_names(path: str = BROKERS_FILE) -> typing.Dict[str, str]:
+    if not os.path.exists(path):
+        return {}
+    brokers: pd.DataFrame = pd.read_csv(path, dtype=str)
+    return dict(zip(brokers['broker_id'], brokers['broker_name']))
+
+
+class Checkpoint:
+    """
+        # NOTES: files already loaded and the stocks and brokers already written,
+        saved after every file
+    """
+
+    def __init__(self, path: str):
+        self.path: str = path
+        self.files: typing.Dict[str, int] = {}
+        self.stocks: typing.Set[str] = set()
+        self.brokers: typing.Set[str] = set()
+        if os.path.exists(path):
+            with open(path) as checkpoint_file:
+                saved: dict = json.load(checkpoint_file)
+            self.files = saved.get('files', {})
+            self.stocks = set(saved.get('stocks', []))
+            self.brokers = set(saved.get('brokers', []))
+
+    def save(self) -> None:
+        # written to a temporary file first,
+        # a crash while saving leaves the previous checkpoint in place
+        temporary: str = self.path + '.tmp'
+        with open(temporary, 'w') as checkpoint_file:
+            json.dump({'files': self.files, 'stocks': sorted(self.stocks),
+                       'brokers': sorted(self.brokers)}, checkpoint_file)
+        os.replace(temporary, self.path)
+
+
+class TransactionsLoader:
+    """
+        # NOTES: loads every transactions csv in directory with a pool of workers processes,
+        workers write volumes, stocks and brokers are collected from their results and written here
+        so each is written once
+    """
+
+    def __init__(self, directory: str = TRANSACTIONS_DIRECTORY,
+                 checkpoint_path: str = CHECKPOINT_FILE, workers: int = os.cpu_count() or 1,
+                 dry_run: bool = False, rpc_latency: float = 0):
+        self.directory: str = directory
+        self.checkpoint: Checkpoint = Checkpoint(path=checkpoint_path)
+        self.workers: int = workers
+        self.dry_run: bool = dry_run
+        self.rpc_latency: float = rpc_latency
+        self.store: typing.Union[LocalStore, DatastoreWriter] = LocalStore(rpc_latency) if dry_run \
+            else DatastoreWriter()
+        self.broker_names: typing.Dict[str, str] = broker_names()
+        self.rows: int = 0
+        self.rpcs: int = 0
+
+    def pending_files(self) -> typing.List[str]:
+        names: typing.List[str] = sorted(name for name in os.listdir(self.directory)
+                                         if name.endswith('.csv'))
+        return [os.path.join(self.directory, name) for name in names
+                if name not in self.checkpoint.files]
+
+    def submit(self, executor: concurrent.futures.Executor, path: str) -> concurrent.futures.Future:
+        if self.dry_run:
+            return executor.submit(load_file_to_local_store, path, self.rpc_latency)
+        return executor.submit(load_file_to_datastore, path)
+
+    def new_dimensions(self, result: dict) -> typing.List[ndb.Model]:
+        entities: typing.List[ndb.Model] = []
+        for stock_id, values in result['stocks'].items():
+            if stock_id not in self.checkpoint.stocks:
+                stock: Stock = Stock()
+                stock.populate(**values)
+                entities.append(stock)
+        for broker_id, values in result['brokers'].items():
+            if broker_id not in self.checkpoint.brokers:
+                broker: Broker = Broker()
+                broker.populate(broker_name=self.broker_names.get(broker_id)
+                                or values['broker_code'], **values)
+                entities.append(broker)
+        return entities
+
+    def write_dimensions(self, entities: typing.List[ndb.Model]) -> None:
+        if self.dry_run:
+            put_chunked(store=self.store, entities=entities)
+        else:
+            use_context(put_chunked)(store=self.store, entities=entities)
+
+    def complete(self, result: dict) -> None:
+        """
+            records a loaded file, its stocks and brokers are written before the checkpoint is saved
+        """
+        entities: typing.List[ndb.Model] = self.new_dimensions(result=result)
+        if entities:
+            self.write_dimensions(entities=entities)
+        self.checkpoint.stocks.update(result['stocks'])
+        self.checkpoint.brokers.update(result['brokers'])
+        self.checkpoint.files[result['file']] = result['rows']
+        self.checkpoint.save()
+        self.rows += result['rows']
+        self.rpcs += result['rpcs']
+
+    def run(self, report: typing.Callable[[str], None] = print) -> dict:
+        files: typing.List[str] = self.pending_files()
+        start: float = time.perf_counter()
+        if self.workers <= 1:
+            executor: concurrent.futures.Executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=1)
+        else:
+            executor = concurrent.futures.ProcessPoolExecutor(max_workers=self.workers)
+        with executor:
+            futures: typing.List[concurrent.futures.Future] = [self.submit(executor, path)
+                                                               for path in files]
+            for future in concurrent.futures.as_completed(futures):
+                result: dict = future.result()
+                self.complete(result=result)
+                elapsed: float = time.perf_counter() - start
+                report("{:<24} rows: {:7d}  file rows/sec: {:9.1f}  total rows: {:9d}  "
+                       "rows/sec: {:9.1f}".format(result['file'], result['rows'],
+                                                  result['rows'] / max(result['seconds'], 1e-9),
+                                                  self.rows, self.rows / max(elapsed, 1e-9)))
+        seconds: float = time.perf_counter() - start
+        summary: dict = {'files': len(files), 'skipped': len(self.checkpoint.files) - len(files),
+                         'rows': self.rows, 'stocks': len(self.checkpoint.stocks),
+                         'brokers': len(self.checkpoint.brokers),
+                         'rpcs': self.rpcs + self.store.rpcs, 'seconds': seconds,
+                         'rows_per_second': self.rows / max(seconds, 1e-9)}
+        report(json.dumps(summary))
+        return summary
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--directory', default=TRANSACTIONS_DIRECTORY)
+    parser.add_argument('--checkpoint', default=CHECKPOINT_FILE,
+                        help='progress file, delete it to load again')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--dry-run', action='store_true',
+                        help='write to an in-memory store instead')
+    parser.add_argument('--rpc-latency', type=float, default=0.0,
+                        help='milliseconds per put_multi in a dry run')
+    args = parser.parse_args()
+    TransactionsLoader(directory=args.directory, checkpoint_path=args.checkpoint,
+                       workers=args.workers, dry_run=args.dry_run,
+                       rpc_latency=args.rpc_latency / 1000).run()
+
+
+if __name__ == '__main__':
+    main()
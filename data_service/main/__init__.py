@@ -2,27 +2,41 @@ import functools
 from flask import Flask
 from flask_caching import Cache
 from data_service.config import Config
+from data_service.config import instrumentation
 
 # TODO find a way to insure errors are not cached
 
-cache_stocks: Cache = Cache(config={'CACHE_TYPE': 'simple'})
-cache_affiliates: Cache = Cache(config={'CACHE_TYPE': 'simple'})
-cache_memberships: Cache = Cache(config={'CACHE_TYPE': 'simple'})
-cache_users: Cache = Cache(config={'CACHE_TYPE': 'simple'})
+# NOTE: two tier caches, a bounded L1 in each worker in
+# front of an L2 shared by all workers and instances
+# see data_service.cache.backends
+cache_type: str = 'data_service.cache.backends.TwoTierCache'
+cache_stocks: Cache = Cache(config={'CACHE_TYPE': cache_type})
+cache_affiliates: Cache = Cache(config={'CACHE_TYPE': cache_type})
+cache_memberships: Cache = Cache(config={'CACHE_TYPE': cache_type})
+cache_users: Cache = Cache(config={'CACHE_TYPE': cache_type})
 # Cache data for six hours- cached data should be volume data
 # TODO - there should be a function to purge the cache when not needed
 # but normally when the data-service is not being used it will shutdown and thereby auto purging cache
 default_timeout: int = 60 * 60 * 6
 
 
+def cache_config(namespace: str) -> dict:
+    """
+        each cache keeps its entries under its own prefix in the shared L2
+    """
+    return {'CACHE_TYPE': cache_type, 'CACHE_DEFAULT_TIMEOUT': default_timeout,
+            'CACHE_KEY_PREFIX': '{}:'.format(namespace)}
+
+
 def create_app(config_class=Config):
     app = Flask(__name__)
     app.config.from_object(config_class)
+    instrumentation.init_app(app=app)
 
-    cache_stocks.init_app(app=app, config={'CACHE_TYPE': 'simple', 'CACHE_DEFAULT_TIMEOUT': default_timeout})
-    cache_affiliates.init_app(app=app, config={'CACHE_TYPE': 'simple', 'CACHE_DEFAULT_TIMEOUT': default_timeout})
-    cache_memberships.init_app(app=app, config={'CACHE_TYPE': 'simple', 'CACHE_DEFAULT_TIMEOUT': default_timeout})
-    cache_users.init_app(app=app, config={'CACHE_TYPE': 'simple', 'CACHE_DEFAULT_TIMEOUT': default_timeout})
+    cache_stocks.init_app(app=app, config=cache_config(namespace='stocks'))
+    cache_affiliates.init_app(app=app, config=cache_config(namespace='affiliates'))
+    cache_memberships.init_app(app=app, config=cache_config(namespace='memberships'))
+    cache_users.init_app(app=app, config=cache_config(namespace='users'))
 
     from data_service.cron.routes import cron_bp
     from data_service.api.users.routes import users_bp
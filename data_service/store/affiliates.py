@@ -2,7 +2,7 @@ import typing
 from google.cloud import ndb
 from datetime import date, datetime
 from google.api_core.exceptions import RetryError, Aborted
-from data_service.store.mixins import AmountMixin
+from data_service.store.mixins import AmountMixin, NaturalKeyMixin
 
 
 class AffiliatesValidators:
@@ -14,7 +14,7 @@ class AffiliatesValidators:
         if not(isinstance(affiliate_id, str)) or (affiliate_id == ""):
             raise ValueError("Affiliate ID cannot be Null, and Should be a String")
         try:
-            affiliate_instance: Affiliates = Affiliates.query(Affiliates.affiliate_id == affiliate_id).get()
+            affiliate_instance: Affiliates = Affiliates.get_by_natural_id(affiliate_id)
             if isinstance(affiliate_instance, Affiliates):
                 return True
             return False
@@ -52,7 +52,7 @@ class RecruitsValidators:
         if not(isinstance(uid, str)) or (uid == ""):
             raise ValueError("UID cannot be Null, and can only be a string")
         try:
-            recruit_instance: Recruits = Recruits.query(Recruits.uid == uid).get()
+            recruit_instance: Recruits = Recruits.query(Recruits.referrer_uid == uid).get()
             if isinstance(recruit_instance, Recruits):
                 return True
             return False
@@ -152,7 +152,7 @@ class ClassSetters:
 setters: ClassSetters = ClassSetters()
 
 
-class Affiliates(ndb.Model):
+class Affiliates(NaturalKeyMixin):
     """
         class used to track affiliates registered
     """
@@ -162,6 +162,7 @@ class Affiliates(ndb.Model):
             raise TypeError("{} can only be a datetime object".format(str(self)))
         return value
 
+    natural_id: str = 'affiliate_id'
     affiliate_id: str = ndb.StringProperty(validator=setters.set_id)
     uid: str = ndb.StringProperty(validator=ClassSetters.set_id)
     last_updated: datetime = ndb.DateTimeProperty(auto_now=True, validator=set_date_time)
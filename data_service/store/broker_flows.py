@@ -0,0 +1,107 @@
+"""
+    broker flow analytics of a stock over a window of days
+
+    which brokers accumulated or distributed a stock, and how concentrated its trading was among
+    them, read from the volume history of data_service.store.history. the buy and sell buckets of
+    the stock are read with two ancestor queries run together, their broker and value columns are
+    taken straight from the packed arrays and added up per broker with pandas, so the cost grows
+    with the months of the window and not with the rows in them.
+
+    rows recorded without a broker are left out, there is no broker to attribute them to.
+    concentration is the Herfindahl-Hirschman index of the brokers' shares of the value traded, from
+    0 for trading spread over many brokers to 10000 for a single broker.
+"""
+import datetime
+import typing
+import numpy as np
+import pandas as pd
+from google.cloud import ndb
+from data_service.config import Config
+from data_service.store.history import HISTORY_COLUMNS, HistorySelection, VolumeHistory, in_window
+from data_service.store.stocks import BuyVolumeModel, SellVolumeModel
+from data_service.store.summaries import FLOW_COLUMNS, market_flows
+
+
+def side_frame(buckets: typing.Iterable[VolumeHistory], side: str,
+               date_from: typing.Union[datetime.date, None] = None,
+               date_to: typing.Union[datetime.date, None] = None) -> pd.DataFrame:
+    """
+        broker_id, volume and value of the rows of buckets
+        of side between date_from and date_to inclusive
+    """
+    volume, value = HISTORY_COLUMNS[side][:2]
+    brokers: typing.List[np.ndarray] = []
+    volumes: typing.List[np.ndarray] = []
+    values: typing.List[np.ndarray] = []
+    for bucket in buckets:
+        rows: np.ndarray = bucket.columns()
+        selected: np.ndarray = in_window(rows=rows, date_from=date_from, date_to=date_to)
+        # NO_LABEL, -1, indexes the None after the brokers of the bucket
+        labels: np.ndarray = np.array(list(bucket.broker_id) + [None], dtype=object)
+        brokers.append(labels[rows['broker_id'][selected]])
+        volumes.append(rows[volume][selected])
+        values.append(rows[value][selected])
+    return pd.DataFrame(
+        {'broker_id': np.concatenate(brokers) if brokers else np.empty(0, dtype=object),
+         volume: np.concatenate(volumes) if volumes else np.empty(0, dtype='int64'),
+         value: np.concatenate(values) if values else np.empty(0, dtype='int64')})
+
+
+def read_broker_flows(stock_id: str, date_from: typing.Union[datetime.date, None] = None,
+                      date_to: typing.Union[datetime.date, None] = None) -> pd.DataFrame:
+    """
+        the flow of every broker of stock_id between date_from and date_to,
+        indexed by broker_id, see market_flows
+    """
+    bought: ndb.Future = HistorySelection(model=BuyVolumeModel, stock_id=stock_id,
+                                          date_from=date_from,
+                                          date_to=date_to).query().fetch_async()
+    sold: ndb.Future = HistorySelection(model=SellVolumeModel, stock_id=stock_id,
+                                        date_from=date_from, date_to=date_to).query().fetch_async()
+    return market_flows(
+        buys=side_frame(bought.get_result(), side='buy', date_from=date_from, date_to=date_to),
+        sells=side_frame(sold.get_result(), side='sell', date_from=date_from, date_to=date_to),
+        by='broker_id')
+
+
+def flow_records(flows: pd.DataFrame) -> typing.List[dict]:
+    return [dict(zip(FLOW_COLUMNS, values), broker_id=broker_id)
+            for broker_id, values in zip(flows.index.tolist(), flows.to_numpy().tolist())]
+
+
+def broker_positions(flows: pd.DataFrame) -> typing.List[dict]:
+    """
+        every broker, the largest net buyer first
+    """
+    return flow_records(flows.sort_values('net_value', ascending=False, kind='stable'))
+
+
+def top_brokers(flows: pd.DataFrame,
+                top: int = Config.BROKER_FLOWS_TOP) -> typing.Dict[str, typing.List[dict]]:
+    """
+        the top brokers by net value, accumulating largest net buyer first,
+        distributing largest net seller first
+    """
+    return {'accumulating': flow_records(flows[flows['net_value'] > 0].nlargest(top, 'net_value')),
+            'distributing': flow_records(flows[flows['net_value'] < 0].nsmallest(top, 'net_value'))}
+
+
+def hhi(values: np.ndarray) -> float:
+    """
+        Herfindahl-Hirschman index of the shares of values, 0 when there is nothing to share
+    """
+    total: int = int(values.sum())
+    if not total:
+        return 0.0
+    return round(float(np.square(values / total).sum() * 10000), 2)
+
+
+def concentration(flows: pd.DataFrame) -> dict:
+    """
+        how concentrated the value traded was among brokers,
+        bought and sold together and each side alone
+    """
+    bought: np.ndarray = flows['buy_value'].to_numpy()
+    sold: np.ndarray = flows['sell_value'].to_numpy()
+    return {'brokers': len(flows), 'hhi': hhi(bought + sold), 'buy_hhi': hhi(bought),
+            'sell_hhi': hhi(sold)}
@@ -2,6 +2,7 @@ import typing
 from google.cloud import ndb
 from datetime import datetime
 import re
+from data_service.store.mixins import NaturalKeyMixin
 
 
 class Setters:
@@ -110,7 +111,8 @@ class TicketValid:
         return True
 
 
-class Ticket(ndb.Model):
+class Ticket(NaturalKeyMixin):
+    natural_id: str = 'ticket_id'
     ticket_id: str = ndb.StringProperty(validator=setters_init.set_str)
     uid: str = ndb.StringProperty(validator=setters_init.set_str)
     topic: str = ndb.StringProperty(validator=setters_init.set_str)
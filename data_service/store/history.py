@@ -0,0 +1,428 @@
+"""
+    columnar history of the daily volumes of each stock
+
+    the volume models hold one entity per stock, broker and day, reading years of a stock's volumes
+    is then thousands of entities. VolumeHistory keeps the same rows one entity per side, stock and
+    month, the rows packed as a NumPy structured array in date order, so a stock's history is one
+    ancestor query reading a handful of blobs which np.frombuffer decodes without copying.
+
+    a month is the bucket because a year of a stock traded by every broker is over the 1MB an entity
+    may hold. string columns, broker_id, exchange_id and currency, are stored as indexes into lists
+    on the bucket and transaction ids are stored only when they are not the id derived from the row,
+    see TransactionIds.
+
+    the bulk write paths call record_volumes with the rows they saved, rows are identified by
+    transaction id so recording a row again replaces it. the single row write paths leave the bucket
+    to rebuild_bucket, run from a task after the write, see data_service.views.history.
+    /cron/build-volume-history records every volume already saved.
+"""
+import datetime
+import functools
+import typing
+import numpy as np
+from google.cloud import ndb
+from data_service.store.stocks import TransactionIds, VolumeMixin
+from data_service.utils.fields import parse_fields, fields_type, trim
+
+# columns of each side besides the date and the string columns, in the order they are packed
+HISTORY_COLUMNS: typing.Dict[str, typing.Tuple[str, ...]] = {
+    'buy': ('buy_volume', 'buy_value', 'buy_ave_price', 'buy_market_val_percent',
+            'buy_trade_count'),
+    'sell': ('sell_volume', 'sell_value', 'sell_ave_price', 'sell_market_val_percent',
+             'sell_trade_count'),
+    'net': ('net_volume', 'net_value', 'total_volume', 'total_value'),
+}
+LABELS: typing.Tuple[str, ...] = ('broker_id', 'exchange_id', 'currency')
+# a cross group transaction may touch at most 25 entity groups,
+# buckets are recorded in chunks that size
+TRANSACTION_BUCKETS: int = 25
+# times a history transaction is retried when it lost to a concurrent write of the same buckets
+TRANSACTION_RETRIES: int = 5
+# times a rebuild reads the volumes of a bucket again, the bucket was written while they were read
+REBUILD_ATTEMPTS: int = 3
+# marks a label which was None
+NO_LABEL: int = -1
+
+
+@functools.lru_cache(maxsize=None)
+def row_dtype(side: str) -> np.dtype:
+    """
+        packed little endian layout of one row of side, the layout of the stored blobs
+    """
+    return np.dtype([('date_created', '<M8[D]')] + [(label, '<i4') for label in LABELS] +
+                    [(column, '<i8') for column in HISTORY_COLUMNS[side]])
+
+
+def in_window(rows: np.ndarray, date_from: typing.Union[datetime.date, None] = None,
+              date_to: typing.Union[datetime.date, None] = None) -> np.ndarray:
+    """
+        mask of the rows between date_from and date_to inclusive
+    """
+    selected: np.ndarray = np.ones(len(rows), dtype=bool)
+    if date_from is not None:
+        selected &= rows['date_created'] >= np.datetime64(date_from, 'D')
+    if date_to is not None:
+        selected &= rows['date_created'] <= np.datetime64(date_to, 'D')
+    return selected
+
+
+def history_parent(side: str, stock_id: str) -> ndb.Key:
+    """
+        parent of every bucket of a stock, it is never written,
+        the buckets are read with an ancestor query
+    """
+    return ndb.Key('VolumeHistory', TransactionIds.separator.join([side, stock_id]))
+
+
+def month_id(date_created: datetime.date) -> str:
+    return date_created.strftime('%Y-%m')
+
+
+def next_month(date_created: datetime.date) -> datetime.date:
+    return (date_created.replace(day=1) + datetime.timedelta(days=32)).replace(day=1)
+
+
+def history_key(side: str, stock_id: str, date_created: datetime.date) -> ndb.Key:
+    return ndb.Key('VolumeHistory', month_id(date_created),
+                   parent=history_parent(side=side, stock_id=stock_id))
+
+
+class VolumeHistory(ndb.Model):
+    """
+        # NOTES: one month of the daily volumes of one stock on one side, keyed by history_key
+            rows is the packed array of row_dtype,
+            transaction_ids holds a line per row, empty for derived ids
+    """
+    rows: bytes = ndb.BlobProperty()
+    transaction_ids: bytes = ndb.BlobProperty()
+    updated: datetime.datetime = ndb.DateTimeProperty(auto_now=True, indexed=False)
+    # when the volumes of the last rebuild were read, a rebuild queued before then has nothing to do
+    rebuilt: datetime.datetime = ndb.DateTimeProperty(indexed=False)
+    broker_id: typing.List[str] = ndb.TextProperty(repeated=True)
+    exchange_id: typing.List[str] = ndb.TextProperty(repeated=True)
+    currency: typing.List[str] = ndb.TextProperty(repeated=True)
+
+    @property
+    def side(self) -> str:
+        return self.key.parent().id().partition(TransactionIds.separator)[0]
+
+    @property
+    def stock_id(self) -> str:
+        return self.key.parent().id().partition(TransactionIds.separator)[2]
+
+    def columns(self) -> np.ndarray:
+        """
+            the rows, a read only view of the stored blob
+        """
+        return np.frombuffer(self.rows or b"", dtype=row_dtype(self.side))
+
+    def stored_ids(self) -> typing.List[str]:
+        return self.transaction_ids.decode('utf-8').split('\n') if self.rows else []
+
+    def label(self, name: str, code: int) -> typing.Union[str, None]:
+        return getattr(self, name)[code] if code != NO_LABEL else None
+
+    def label_code(self, name: str, value: typing.Union[str, None]) -> int:
+        if value is None:
+            return NO_LABEL
+        values: typing.List[str] = getattr(self, name)
+        if value not in values:
+            values.append(value)
+        return values.index(value)
+
+    def derived_ids(self, rows: np.ndarray) -> typing.List[str]:
+        """
+            the id TransactionIds derives from each row
+        """
+        columns: typing.Iterator[tuple] = zip(rows['date_created'].tolist(),
+                                              rows['broker_id'].tolist(),
+                                              rows['exchange_id'].tolist())
+        return [TransactionIds.volume_id(side=self.side, stock_id=self.stock_id,
+                                         date_created=date_created,
+                                         broker_id=self.label('broker_id', broker),
+                                         exchange_id=self.label('exchange_id', exchange))
+                for date_created, broker, exchange in columns]
+
+    def resolved_ids(self, rows: np.ndarray) -> typing.List[str]:
+        """
+            the transaction id of every row, derived where none was stored
+        """
+        ids: typing.List[str] = self.stored_ids()
+        if all(ids):
+            return ids
+        return [transaction_id or derived
+                for transaction_id, derived in zip(ids, self.derived_ids(rows=rows))]
+
+    def merge(self, volumes: typing.List[dict], removed: typing.Set[str]) -> None:
+        """
+            replaces the rows of the transaction ids of volumes and removed with volumes
+            volumes are dicts of the volume model's fields,
+            a later volume with the same id wins over an earlier one
+        """
+        incoming: typing.Dict[str, dict] = {volume['transaction_id']: volume for volume in volumes}
+        current: np.ndarray = self.columns()
+        current_ids: typing.List[str] = self.resolved_ids(rows=current)
+        dropped: typing.Set[str] = removed | set(incoming)
+        keep: np.ndarray = np.array(
+            [transaction_id not in dropped for transaction_id in current_ids], dtype=bool)
+
+        added: np.ndarray = np.zeros(len(incoming), dtype=row_dtype(self.side))
+        added['date_created'] = [volume['date_created'] for volume in incoming.values()]
+        for name in LABELS:
+            added[name] = [self.label_code(name, volume.get(name)) for volume in incoming.values()]
+        for column in HISTORY_COLUMNS[self.side]:
+            added[column] = [volume.get(column) or 0 for volume in incoming.values()]
+
+        rows: np.ndarray = np.concatenate([current[keep], added])
+        ids: typing.List[str] = [transaction_id for transaction_id, kept in zip(current_ids, keep)
+                                 if kept]
+        ids.extend(incoming)
+        order: np.ndarray = (np.lexsort((np.array(ids, dtype=str), rows['date_created']))
+                             if ids else np.arange(0))
+        rows = rows[order]
+        ids = [ids[n] for n in order.tolist()]
+        self.rows = rows.tobytes()
+        # ids derived from the row are left out, most rows are keyed by them
+        derived_ids: typing.List[str] = self.derived_ids(rows=rows)
+        stored: typing.List[str] = ["" if transaction_id == derived else transaction_id
+                                    for transaction_id, derived in zip(ids, derived_ids)]
+        self.transaction_ids = '\n'.join(stored).encode('utf-8')
+
+    def records(self, date_from: typing.Union[datetime.date, None] = None,
+                date_to: typing.Union[datetime.date, None] = None) -> typing.List[dict]:
+        """
+            the rows between date_from and date_to inclusive as dicts,
+            the same dicts to_dict of the volumes gives
+        """
+        rows: np.ndarray = self.columns()
+        ids: typing.List[str] = self.resolved_ids(rows=rows)
+        selected: np.ndarray = in_window(rows=rows, date_from=date_from, date_to=date_to)
+        indexes: typing.List[int] = np.flatnonzero(selected).tolist()
+        values: typing.Dict[str, list] = {name: rows[name][indexes].tolist()
+                                          for name in rows.dtype.names}
+        for name in LABELS:
+            values[name] = [self.label(name, code) for code in values[name]]
+        names: typing.Tuple[str, ...] = rows.dtype.names
+        stock_id: str = self.stock_id
+        return [dict(zip(names, row), transaction_id=ids[index], stock_id=stock_id)
+                for index, row in zip(indexes, zip(*(values[name] for name in names)))]
+
+
+class VolumeDay(ndb.Model):
+    """
+        # NOTES: a day volumes of one side were recorded on, keyed by volume_day_key,
+            updated is when they last were
+            the days recorded since a time are read with days_recorded_since
+    """
+    date_created: datetime.date = ndb.DateProperty(indexed=False)
+    updated: datetime.datetime = ndb.DateTimeProperty(auto_now=True)
+
+
+def volume_day_key(side: str, date_created: datetime.date) -> ndb.Key:
+    return ndb.Key('VolumeDay', TransactionIds.separator.join([side, date_created.isoformat()]))
+
+
+def days_recorded_since(since: typing.Union[datetime.datetime, None],
+                        sides: typing.Iterable[str]) -> typing.List[datetime.date]:
+    """
+        the days volumes of sides were recorded on after since,
+        every day ever recorded when since is None
+    """
+    query: ndb.Query = (VolumeDay.query(VolumeDay.updated > since) if since is not None
+                        else VolumeDay.query())
+    keys: typing.List[ndb.Key] = query.fetch(keys_only=True)
+    days: typing.Set[datetime.date] = set()
+    for key in keys:
+        side, _, day = key.id().partition(TransactionIds.separator)
+        if side in sides:
+            days.add(datetime.date.fromisoformat(day))
+    return sorted(days)
+
+
+class StaleBucket(Exception):
+    """
+        the bucket was written while the volumes of its rebuild were read
+    """
+
+
+def merge_buckets(
+        changes: typing.Dict[ndb.Key, typing.Tuple[typing.List[dict], typing.Set[str]]]) -> None:
+    """
+        reads, merges and writes back the buckets of changes, run inside a transaction
+    """
+    keys: typing.List[ndb.Key] = list(changes)
+    buckets: typing.List[typing.Union[VolumeHistory, None]] = ndb.get_multi(keys)
+    written: typing.List[VolumeHistory] = []
+    emptied: typing.List[ndb.Key] = []
+    for key, found in zip(keys, buckets):
+        bucket: VolumeHistory = found if found is not None else VolumeHistory(key=key)
+        volumes, removed = changes[key]
+        bucket.merge(volumes=volumes, removed=removed)
+        if bucket.rows:
+            written.append(bucket)
+        elif found is not None:
+            emptied.append(key)
+    if written:
+        ndb.put_multi(written)
+    if emptied:
+        ndb.delete_multi(emptied)
+
+
+def bucketed(volume: dict) -> bool:
+    # volumes never saved have no transaction id, stock or date yet and belong to no bucket
+    return bool(volume.get('transaction_id') and volume.get('stock_id')
+                and volume.get('date_created'))
+
+
+def bucket_key(model: typing.Type[VolumeMixin], volume: dict) -> ndb.Key:
+    return history_key(side=model.side, stock_id=volume['stock_id'],
+                       date_created=volume['date_created'])
+
+
+def bucket_months(volumes: typing.Iterable[dict]) -> typing.Set[typing.Tuple[str, datetime.date]]:
+    """
+        the stock and the first day of the month of the bucket of each of volumes
+    """
+    return {(volume['stock_id'], volume['date_created'].replace(day=1)) for volume in volumes
+            if bucketed(volume)}
+
+
+def mark_days(side: str, days: typing.Iterable[datetime.date]) -> typing.List[ndb.Future]:
+    """
+        marks days recorded on side, see days_recorded_since
+    """
+    return ndb.put_multi_async([VolumeDay(key=volume_day_key(side=side, date_created=day),
+                                          date_created=day) for day in sorted(set(days))])
+
+
+def record_volumes(model: typing.Type[VolumeMixin], volumes: typing.Iterable[dict],
+                   removed: typing.Iterable[dict] = ()) -> int:
+    """
+        records volumes of model saved by a write path in the history of their stocks,
+        returns the buckets written
+
+        volumes and removed are dicts of the volume's fields, as to_dict gives. removed are rows no
+        longer where they were, a volume moved to another stock or date, only their transaction_id,
+        stock_id and date_created are read. a transaction id moved without being given in removed
+        stays in its old bucket. the days of volumes and removed are marked recorded, see
+        days_recorded_since
+    """
+    changes: typing.Dict[ndb.Key, typing.Tuple[typing.List[dict], typing.Set[str]]] = {}
+    days: typing.Set[datetime.date] = set()
+    for volume in removed:
+        if bucketed(volume):
+            key: ndb.Key = bucket_key(model, volume)
+            changes.setdefault(key, ([], set()))[1].add(volume['transaction_id'])
+            days.add(volume['date_created'])
+    for volume in volumes:
+        if bucketed(volume):
+            changes.setdefault(bucket_key(model, volume), ([], set()))[0].append(volume)
+            days.add(volume['date_created'])
+    # the days are marked while the buckets are merged, the volumes themselves were saved before
+    marked: typing.List[ndb.Future] = mark_days(side=model.side, days=days)
+
+    keys: typing.List[ndb.Key] = list(changes)
+    for start in range(0, len(keys), TRANSACTION_BUCKETS):
+        chunk: typing.Dict[ndb.Key, tuple] = {key: changes[key]
+                                              for key in keys[start:start + TRANSACTION_BUCKETS]}
+        ndb.transaction(functools.partial(merge_buckets, chunk), xg=True,
+                        retries=TRANSACTION_RETRIES)
+    for future in marked:
+        future.result()
+    return len(keys)
+
+
+def replace_bucket(key: ndb.Key, volumes: typing.List[dict], read_at: datetime.datetime) -> None:
+    """
+        writes the bucket of key holding only volumes, which were read at read_at,
+        run inside a transaction
+    """
+    found: typing.Union[VolumeHistory, None] = key.get()
+    if found is not None and found.updated is not None and found.updated > read_at:
+        raise StaleBucket("volume history {} was written while its volumes were read".format(
+            key.id()))
+    bucket: VolumeHistory = VolumeHistory(key=key, rebuilt=read_at)
+    bucket.merge(volumes=volumes, removed=set())
+    if bucket.rows:
+        bucket.put()
+    elif found is not None:
+        key.delete()
+
+
+def rebuild_bucket(model: typing.Type[VolumeMixin], stock_id: str, month: datetime.date,
+                   queued_at: typing.Union[datetime.datetime, None] = None) -> bool:
+    """
+        writes the bucket of stock_id and month from the volumes saved, False when it was current
+
+        a bucket rebuilt from volumes read after queued_at holds every volume written before then
+        and is kept. the volumes are read before the transaction, no query may run in it, and read
+        again when the bucket was written in the meantime, StaleBucket after REBUILD_ATTEMPTS
+    """
+    key: ndb.Key = history_key(side=model.side, stock_id=stock_id, date_created=month)
+    for _ in range(REBUILD_ATTEMPTS):
+        found: typing.Union[VolumeHistory, None] = key.get(use_cache=False)
+        if queued_at is not None and found is not None and found.rebuilt is not None and \
+                found.rebuilt >= queued_at:
+            return False
+        read_at: datetime.datetime = datetime.datetime.utcnow()
+        query: ndb.Query = model.query(model.stock_id == stock_id,
+                                       model.date_created >= month.replace(day=1),
+                                       model.date_created < next_month(month))
+        volumes: typing.List[dict] = [volume.to_dict() for volume in query.fetch()]
+        try:
+            ndb.transaction(functools.partial(replace_bucket, key, volumes, read_at),
+                            retries=TRANSACTION_RETRIES)
+            return True
+        except StaleBucket:
+            continue
+    raise StaleBucket("volume history {} kept changing while it was rebuilt".format(key.id()))
+
+
+class HistorySelection:
+    """
+        # NOTES: the daily volumes of one stock read from its history,
+            fields as FieldSelection selects them
+            query and records stand in for those of WindowSelection filtered on stock_id,
+            windowed on date_created
+    """
+
+    def __init__(self, model: typing.Type[VolumeMixin], stock_id: str, fields: fields_type = None,
+                 date_from: typing.Union[datetime.date, None] = None,
+                 date_to: typing.Union[datetime.date, None] = None,
+                 limit: typing.Union[int, None] = None):
+        self.model: typing.Type[VolumeMixin] = model
+        self.stock_id: str = stock_id
+        self.fields: typing.Union[typing.List[str], None] = parse_fields(fields)
+        self.date_from: typing.Union[datetime.date, None] = date_from
+        self.date_to: typing.Union[datetime.date, None] = date_to
+        self.limit: typing.Union[int, None] = limit
+
+    def query(self) -> ndb.Query:
+        """
+            the buckets of the months between date_from and date_to, in month order
+        """
+        parent: ndb.Key = history_parent(side=self.model.side, stock_id=self.stock_id)
+        nodes: typing.List[ndb.Node] = []
+        if self.date_from is not None:
+            nodes.append(VolumeHistory.key >= ndb.Key('VolumeHistory', month_id(self.date_from),
+                                                      parent=parent))
+        if self.date_to is not None:
+            nodes.append(VolumeHistory.key <= ndb.Key('VolumeHistory', month_id(self.date_to),
+                                                      parent=parent))
+        return VolumeHistory.query(*nodes, ancestor=parent)
+
+    @property
+    def fetch_limit(self) -> None:
+        # every bucket of the window is read, records stops at limit rows
+        return None
+
+    def records(self, buckets: typing.Iterable[VolumeHistory]) -> typing.List[dict]:
+        records: typing.List[dict] = []
+        for bucket in buckets:
+            records.extend(bucket.records(date_from=self.date_from, date_to=self.date_to))
+            if self.limit is not None and len(records) >= self.limit:
+                del records[self.limit:]
+                break
+        if not self.fields:
+            return records
+        return [trim(record=record, fields=self.fields) for record in records]
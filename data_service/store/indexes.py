@@ -0,0 +1,360 @@
+"""
+    composite index manifest generated from the queries of the service
+
+    the query call sites under data_service are read with ast, every Model.query(...) with its
+    filters, its .order(...) and its projection becomes a query pattern, so do the equality filters
+    of FieldSelection and ExistsCheck, the filters and window of WindowSelection and the projections
+    and windows declared by ProjectionMixin.projection_indexes and window_indexes. a pattern on two
+    or more properties needs a composite index, equality only patterns could be served by a merge
+    join of the built in indexes but that is slow on large kinds so they get one too.
+
+    the patterns are checked against the models, properties queried but not indexed never match and
+    properties indexed but never queried cost an index write on every put of their kind.
+
+    python -m data_service.store.indexes             writes index.yaml and prints the findings
+    python -m data_service.store.indexes --check     exits with 1 when index.yaml is stale or a
+                                                     query cannot be served
+"""
+import argparse
+import ast
+import importlib
+import os
+import pkgutil
+import sys
+import typing
+from google.cloud import ndb
+
+PACKAGE_PATH: str = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+INDEX_FILE: str = os.path.join(os.path.dirname(PACKAGE_PATH), 'index.yaml')
+EQUALITY, INEQUALITY = 'equality', 'inequality'
+equality_ops: tuple = (ast.Eq, ast.In)
+inequality_ops: tuple = (ast.Lt, ast.LtE, ast.Gt, ast.GtE, ast.NotEq)
+# arguments of FieldSelection and WindowSelection which are not equality filters
+selection_arguments: typing.Tuple[typing.Union[str, None], ...] = (
+    None, 'model', 'fields', 'window', 'date_from', 'date_to', 'limit')
+# properties datastore indexes on its own, queries on them never need a property index
+builtin_properties: typing.Set[str] = {'key', '__key__'}
+
+
+class QueryPattern:
+    """
+        # NOTES: one query of kind, filters are (property, EQUALITY or INEQUALITY),
+            orders (property, 'asc' or 'desc')
+            location is where the query is made, file:line
+    """
+
+    def __init__(self, kind: str, location: str,
+                 filters: typing.Union[typing.List[typing.Tuple[str, str]], None] = None,
+                 orders: typing.Union[typing.List[typing.Tuple[str, str]], None] = None,
+                 projection: typing.Union[typing.List[str], None] = None):
+        self.kind: str = kind
+        self.location: str = location
+        self.filters: typing.List[typing.Tuple[str, str]] = [f for f in filters or []
+                                                             if f[0] not in builtin_properties]
+        self.orders: typing.List[typing.Tuple[str, str]] = [o for o in orders or []
+                                                            if o[0] not in builtin_properties]
+        self.projection: typing.List[str] = [name for name in projection or []
+                                             if name not in builtin_properties]
+
+    @property
+    def properties(self) -> typing.List[str]:
+        names: typing.List[str] = [name for name, _ in self.filters + self.orders] + self.projection
+        return list(dict.fromkeys(names))
+
+    def composite(self) -> typing.Union[typing.Tuple[typing.Tuple[str, str], ...], None]:
+        """
+            the composite index serving the query, None when the built in indexes serve it equality
+            properties come first, in name order so the same filters in any order share an index,
+            then the inequality property and the sort orders, then the other projected properties
+        """
+        equalities: typing.List[str] = sorted({name for name, op in self.filters if op == EQUALITY})
+        inequalities: typing.List[str] = list(
+            dict.fromkeys(name for name, op in self.filters if op == INEQUALITY))
+        index: typing.List[typing.Tuple[str, str]] = [(name, 'asc') for name in equalities]
+        orders: typing.List[typing.Tuple[str, str]] = [order for order in self.orders
+                                                       if order[0] not in equalities]
+        if inequalities and not (orders and orders[0][0] == inequalities[0]):
+            index.append((inequalities[0], 'asc'))
+        index.extend(order for order in orders if order[0] not in dict(index))
+        index.extend((name, 'asc') for name in self.projection if name not in dict(index))
+        return tuple(index) if len(index) > 1 else None
+
+
+def load_models() -> typing.Dict[str, typing.Type[ndb.Model]]:
+    """
+        every model of data_service.store by class name,
+        mixins are only stored as part of other kinds
+    """
+    import data_service.store
+    for module in pkgutil.iter_modules(data_service.store.__path__):
+        importlib.import_module('data_service.store.{}'.format(module.name))
+    return {kind: model for kind, model in ndb.Model._kind_map.items()
+            if model.__module__.startswith('data_service.') and not kind.endswith('Mixin')}
+
+
+def _property_name(node: ast.AST,
+                   models: typing.Dict[str, typing.Type[ndb.Model]]) -> typing.Union[str, None]:
+    """
+        dotted property name of Model.prop or Model.structured.prop
+    """
+    names: typing.List[str] = []
+    while isinstance(node, ast.Attribute):
+        names.insert(0, node.attr)
+        node = node.value
+    if isinstance(node, ast.Name) and node.id in models and names:
+        return ".".join(names)
+    return None
+
+
+def _filters(node: ast.AST, models: dict) -> typing.List[typing.Tuple[str, str]]:
+    if isinstance(node, ast.Compare) and len(node.ops) == 1:
+        name: typing.Union[str, None] = _property_name(node.left, models)
+        if name is not None and isinstance(node.ops[0], equality_ops + inequality_ops):
+            return [(name, EQUALITY if isinstance(node.ops[0], equality_ops) else INEQUALITY)]
+    if isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute):
+        if node.func.attr in ('AND', 'OR'):
+            return [found for argument in node.args for found in _filters(argument, models)]
+        if node.func.attr == 'IN':
+            name = _property_name(node.func.value, models)
+            return [(name, EQUALITY)] if name is not None else []
+    return []
+
+
+def _orders(node: ast.Call, models: dict) -> typing.List[typing.Tuple[str, str]]:
+    orders: typing.List[typing.Tuple[str, str]] = []
+    for argument in node.args:
+        descending: bool = isinstance(argument, ast.UnaryOp) and isinstance(argument.op, ast.USub)
+        name: typing.Union[str, None] = _property_name(
+            argument.operand if descending else argument, models)
+        if name is not None:
+            orders.append((name, 'desc' if descending else 'asc'))
+    return orders
+
+
+def _projection(node: ast.Call, models: dict) -> typing.List[str]:
+    for keyword in node.keywords:
+        if keyword.arg == 'projection' and isinstance(keyword.value, (ast.Tuple, ast.List)):
+            names: typing.List[typing.Union[str, None]] = [
+                element.value if isinstance(element, ast.Constant)
+                else _property_name(element, models) for element in keyword.value.elts]
+            return [name for name in names if isinstance(name, str)]
+    return []
+
+
+def _keyword(node: ast.Call, name: str, position: int) -> typing.Union[ast.AST, None]:
+    for keyword in node.keywords:
+        if keyword.arg == name:
+            return keyword.value
+    return node.args[position] if len(node.args) > position else None
+
+
+def source_patterns(source: str, filename: str,
+                    models: typing.Dict[str, typing.Type[ndb.Model]]) -> typing.List[QueryPattern]:
+    """
+        query patterns of one module
+    """
+    tree: ast.AST = ast.parse(source, filename=filename)
+    parents: typing.Dict[ast.AST, ast.AST] = {child: node for node in ast.walk(tree)
+                                              for child in ast.iter_child_nodes(node)}
+    patterns: typing.List[QueryPattern] = []
+    calls: typing.List[ast.Call] = sorted(
+        (node for node in ast.walk(tree) if isinstance(node, ast.Call)),
+        key=lambda call: (call.lineno, call.col_offset))
+    for node in calls:
+        location: str = "{}:{}".format(filename, node.lineno)
+        func: ast.AST = node.func
+        if isinstance(func, ast.Attribute) and func.attr == 'query' \
+                and isinstance(func.value, ast.Name) and func.value.id in models:
+            pattern = QueryPattern(kind=func.value.id, location=location,
+                                   filters=[found for argument in node.args
+                                            for found in _filters(argument, models)],
+                                   projection=_projection(node, models))
+            # .filter(...) and .order(...) chained onto the query
+            chained: ast.AST = node
+            while isinstance(parents.get(chained), ast.Attribute) and \
+                    isinstance(parents.get(parents[chained]), ast.Call):
+                call: ast.Call = parents[parents[chained]]
+                if parents[chained].attr == 'filter':
+                    pattern.filters.extend(found for argument in call.args
+                                           for found in _filters(argument, models))
+                elif parents[chained].attr == 'order':
+                    pattern.orders.extend(_orders(call, models))
+                chained = call
+            patterns.append(pattern)
+        elif isinstance(func, ast.Name) and func.id in ('ExistsCheck', 'FieldSelection',
+                                                        'WindowSelection'):
+            model: typing.Union[ast.AST, None] = _keyword(node, 'model', 0)
+            if not (isinstance(model, ast.Name) and model.id in models):
+                continue
+            if func.id == 'ExistsCheck':
+                field: typing.Union[ast.AST, None] = _keyword(node, 'field', 1)
+                if isinstance(field, ast.Constant) \
+                        and field.value != getattr(models[model.id], 'natural_id', None):
+                    patterns.append(QueryPattern(kind=model.id, location=location,
+                                                 filters=[(field.value, EQUALITY)]))
+            else:
+                filters: typing.List[typing.Tuple[str, str]] = [
+                    (keyword.arg, EQUALITY) for keyword in node.keywords
+                    if keyword.arg not in selection_arguments]
+                orders: typing.List[typing.Tuple[str, str]] = []
+                window: typing.Union[ast.AST, None] = _keyword(node, 'window', 1) \
+                    if func.id == 'WindowSelection' else None
+                # a window may be unbounded,
+                # the pattern with its bounds needs the index the ordered one needs too
+                if isinstance(window, ast.Constant):
+                    filters.append((window.value, INEQUALITY))
+                    orders.append((window.value, 'asc'))
+                patterns.append(
+                    QueryPattern(kind=model.id, location=location, filters=filters, orders=orders))
+    return patterns
+
+
+def declared_patterns(
+        models: typing.Dict[str, typing.Type[ndb.Model]]) -> typing.List[QueryPattern]:
+    """
+        projection and window queries declared by
+        ProjectionMixin.projection_indexes and window_indexes
+    """
+    patterns: typing.List[QueryPattern] = []
+    for kind, model in sorted(models.items()):
+        for filter_name, window in getattr(model, 'window_indexes', {}).items():
+            bounded: typing.List[typing.Tuple[str, str]] = ([(filter_name, EQUALITY)]
+                                                            if filter_name else [])
+            patterns.append(QueryPattern(kind=kind, location='{}.window_indexes'.format(kind),
+                                         filters=bounded + [(window, INEQUALITY)],
+                                         orders=[(window, 'asc')]))
+        for filter_name, indexes in getattr(model, 'projection_indexes', {}).items():
+            for index in indexes:
+                filters: typing.List[typing.Tuple[str, str]] = ([(filter_name, EQUALITY)]
+                                                                if filter_name else [])
+                patterns.append(
+                    QueryPattern(kind=kind, location='{}.projection_indexes'.format(kind),
+                                 filters=filters, projection=list(index)))
+    return patterns
+
+
+def find_patterns(models: typing.Dict[str, typing.Type[ndb.Model]],
+                  path: str = PACKAGE_PATH) -> typing.List[QueryPattern]:
+    patterns: typing.List[QueryPattern] = []
+    for directory, _, filenames in sorted(os.walk(path)):
+        for filename in sorted(name for name in filenames if name.endswith('.py')):
+            file_path: str = os.path.join(directory, filename)
+            with open(file_path, encoding='utf-8') as source:
+                relative: str = os.path.relpath(file_path, os.path.dirname(path))
+                patterns.extend(source_patterns(source=source.read(), models=models,
+                                                filename=relative))
+    return patterns + declared_patterns(models=models)
+
+
+def composite_indexes(
+        patterns: typing.Iterable[QueryPattern]) -> typing.List[typing.Tuple[str, tuple]]:
+    """
+        distinct (kind, index) pairs in kind order
+        equality filters match on any index starting with
+        their properties in any order, an index serving only
+        equality filters is left out when a longer index of the kind starts with the same properties
+    """
+    indexes: typing.Set[typing.Tuple[str, tuple]] = set()
+    equality_only: typing.Set[typing.Tuple[str, tuple]] = set()
+    for pattern in patterns:
+        index: typing.Union[tuple, None] = pattern.composite()
+        if index is None:
+            continue
+        indexes.add((pattern.kind, index))
+        if len(index) == len({name for name, op in pattern.filters if op == EQUALITY}):
+            equality_only.add((pattern.kind, index))
+
+    def covered(kind: str, index: tuple) -> bool:
+        return any(other_kind == kind and other != index and len(other) >= len(index)
+                   and set(other[:len(index)]) == set(index) for other_kind, other in indexes)
+
+    return sorted(item for item in indexes if not (item in equality_only and covered(*item)))
+
+
+def index_yaml(indexes: typing.List[typing.Tuple[str, tuple]]) -> str:
+    lines: typing.List[str] = ["# generated by python -m data_service.store.indexes, do not edit",
+                               "indexes:"]
+    for kind, index in indexes:
+        lines.extend(["", "- kind: {}".format(kind), "  properties:"])
+        for name, direction in index:
+            lines.append("  - name: {}".format(name))
+            if direction == 'desc':
+                lines.append("    direction: desc")
+    return "\n".join(lines) + "\n"
+
+
+def _indexed(model: typing.Type[ndb.Model], name: str) -> typing.Union[bool, None]:
+    """
+        whether the property name of model is indexed, None when model has no such property
+    """
+    head, _, rest = name.partition(".")
+    prop: typing.Union[ndb.Property, None] = model._properties.get(head)
+    if prop is None:
+        return None
+    if rest:
+        return _indexed(prop._model_class, rest) \
+            if isinstance(prop, ndb.StructuredProperty) else None
+    return bool(prop._indexed)
+
+
+def findings(patterns: typing.List[QueryPattern], models: typing.Dict[str, typing.Type[ndb.Model]]
+             ) -> typing.Dict[str, typing.List[str]]:
+    """
+        errors: queries on properties which do not exist or are not indexed,
+            such queries never match
+        unused: indexed properties no query filters, sorts or projects on,
+            each costs index writes on every put
+    """
+    errors: typing.List[str] = []
+    queried: typing.Dict[str, typing.Set[str]] = {kind: set() for kind in models}
+    for pattern in patterns:
+        for name in pattern.properties:
+            queried[pattern.kind].add(name.partition(".")[0])
+            indexed: typing.Union[bool, None] = _indexed(models[pattern.kind], name)
+            if indexed is None:
+                errors.append(
+                    "{}: {} has no property {}".format(pattern.location, pattern.kind, name))
+            elif not indexed:
+                errors.append("{}: {}.{} is queried but not indexed".format(
+                    pattern.location, pattern.kind, name))
+    unused: typing.List[str] = []
+    for kind, model in sorted(models.items()):
+        for name, prop in sorted(model._properties.items()):
+            if prop._indexed and name not in queried[kind] \
+                    and not isinstance(prop, ndb.StructuredProperty):
+                unused.append("{}.{} is indexed but never queried".format(kind, name))
+    return {'errors': errors, 'unused': unused}
+
+
+def main(argv: typing.Union[typing.List[str], None] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--output', default=INDEX_FILE)
+    parser.add_argument('--check', action='store_true',
+                        help='compare with --output instead of writing it')
+    args = parser.parse_args(argv)
+
+    models: typing.Dict[str, typing.Type[ndb.Model]] = load_models()
+    patterns: typing.List[QueryPattern] = find_patterns(models=models)
+    manifest: str = index_yaml(composite_indexes(patterns))
+    found: typing.Dict[str, typing.List[str]] = findings(patterns=patterns, models=models)
+    for message in found['errors']:
+        print("error: {}".format(message))
+    for message in found['unused']:
+        print("unused: {}".format(message))
+
+    if args.check:
+        current: str = (open(args.output, encoding='utf-8').read() if os.path.exists(args.output)
+                        else "")
+        if current != manifest:
+            print("{} is out of date, run python -m data_service.store.indexes".format(args.output))
+            return 1
+        return 1 if found['errors'] else 0
+    with open(args.output, 'w', encoding='utf-8') as index_file:
+        index_file.write(manifest)
+    print("wrote {} composite indexes to {}".format(manifest.count("- kind:"), args.output))
+    return 1 if found['errors'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
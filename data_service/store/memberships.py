@@ -2,7 +2,8 @@ import typing
 from datetime import datetime, date
 from google.api_core.exceptions import RetryError, Aborted
 from google.cloud import ndb
-from data_service.store.mixins import AmountMixin
+from data_service.store.mixins import AmountMixin, NaturalKeyMixin
+from data_service.store.uniqueness import exists
 from data_service.utils.utils import get_days, get_payment_methods
 
 
@@ -18,15 +19,6 @@ class MembershipValidators:
             return True
         return False
 
-    @staticmethod
-    async def start_date_valid_async(start_date: date) -> bool:
-        """
-            check if date is from today and falls within normal parameters
-        """
-        now = datetime.now().date()
-        if isinstance(start_date, date) and start_date > now:
-            return True
-        return False
 
 class PlanValidators:
 
@@ -42,31 +34,7 @@ class PlanValidators:
         if plan_id == "":
             return False
         try:
-            plan_instance: MembershipPlans = MembershipPlans.query(MembershipPlans.plan_id == plan_id).get()
-            if isinstance(plan_instance, MembershipPlans):
-                return True
-        except ConnectionRefusedError:
-            return None
-        except RetryError:
-            return None
-        except Aborted:
-            return None
-        return False
-
-    @staticmethod
-    async def plan_exist_async(plan_id: str) -> typing.Union[None, bool]:
-        """
-            return True or False
-            return None if Error
-        """
-        if not isinstance(plan_id, str):
-            return False
-        plan_id = plan_id.strip()
-        if plan_id == "":
-            return False
-        try:
-            plan_instance: MembershipPlans = MembershipPlans.query(
-                MembershipPlans.plan_id == plan_id).get_async().get_result()
+            plan_instance: MembershipPlans = MembershipPlans.get_by_natural_id(plan_id)
             if isinstance(plan_instance, MembershipPlans):
                 return True
         except ConnectionRefusedError:
@@ -88,37 +56,8 @@ class PlanValidators:
         plan_name = plan_name.strip().lower()
         if plan_name == "":
             return False
-        try:
-            plan_instance: MembershipPlans = MembershipPlans.query(MembershipPlans.plan_name == plan_name).get()
-            if isinstance(plan_instance, MembershipPlans):
-                return True
-        except ConnectionRefusedError:
-            return None
-        except RetryError:
-            return None
-        return False
-
-    @staticmethod
-    async def plan_name_exist_async(plan_name: str) -> typing.Union[None, bool]:
-        """
-            returns True or False if plan exist or dont exist
-            returns None if an error occurred
-        """
-        if not isinstance(plan_name, str):
-            return False
-        plan_name = plan_name.strip().lower()
-        if plan_name == "":
-            return False
-        try:
-            plan_instance: MembershipPlans = MembershipPlans.query(
-                MembershipPlans.plan_name == plan_name).get_async().get_result()
-            if isinstance(plan_instance, MembershipPlans):
-                return True
-        except ConnectionRefusedError:
-            return None
-        except RetryError:
-            return None
-        return False
+        # keys-only, the plan itself is not needed
+        return exists(model=MembershipPlans, field='plan_name', value=plan_name)
 
 
 class CouponsValidator:
@@ -131,31 +70,7 @@ class CouponsValidator:
             return False
         if code == "":
             return False
-        try:
-            coupons_instance: Coupons = Coupons.query(Coupons.code == code).get()
-            if isinstance(coupons_instance, Coupons):
-                return True
-            return False
-        except ConnectionRefusedError:
-            return None
-        except RetryError:
-            return None
-
-    @staticmethod
-    async def coupon_exist_async(code: str) -> typing.Union[None, bool]:
-        if not(isinstance(code, str)):
-            return False
-        if code == "":
-            return False
-        try:
-            coupons_instance: Coupons = Coupons.query(Coupons.code == code).get_async().get_result()
-            if isinstance(coupons_instance, Coupons):
-                return True
-            return False
-        except ConnectionRefusedError:
-            return None
-        except RetryError:
-            return None
+        return exists(model=Coupons, field='code', value=code)
 
     @staticmethod
     def expiration_valid(expiration_time: int) -> bool:
@@ -165,14 +80,6 @@ class CouponsValidator:
             return False
         return True
 
-    @staticmethod
-    async def expiration_valid_async(expiration_time: int) -> bool:
-        if not(isinstance(expiration_time, int)):
-            return False
-        if expiration_time < get_days(days=1):
-            return False
-        return True
-
     @staticmethod
     def discount_valid(discount_valid: int) -> bool:
         if not(isinstance(discount_valid, int)):
@@ -181,14 +88,6 @@ class CouponsValidator:
             return False
         return True
 
-    @staticmethod
-    async def discount_valid_async(discount_valid: int) -> bool:
-        if not(isinstance(discount_valid, int)):
-            return False
-        if 0 < discount_valid > 100:
-            return False
-        return True
-
 
 class ClassSetters:
     """
@@ -292,10 +191,11 @@ setters: ClassSetters = ClassSetters()
 
 
 # noinspection DuplicatedCode
-class Memberships(ndb.Model):
+class Memberships(NaturalKeyMixin):
     """
         TODO - add validators
     """
+    natural_id: str = 'uid'
     uid: str = ndb.StringProperty(validator=setters.set_id)
     plan_id: str = ndb.StringProperty(validator=setters.set_id)
     status: str = ndb.StringProperty(default="unpaid", validator=setters.set_status)  # Paid/ Unpaid
@@ -333,11 +233,12 @@ class Memberships(ndb.Model):
 
 
 # noinspection DuplicatedCode
-class MembershipPlans(ndb.Model):
+class MembershipPlans(NaturalKeyMixin):
     """
         contains a definition of all membership plans
         TODO - add validators
     """
+    natural_id: str = 'plan_id'
     plan_id: str = ndb.StringProperty(validator=setters.set_id)
     plan_name: str = ndb.StringProperty(validator=setters.set_string)
     description: str = ndb.StringProperty(validator=setters.set_string)
@@ -438,7 +339,7 @@ class MembershipInvoices(ndb.Model):
 
 
 # noinspection DuplicatedCode
-class Coupons(ndb.Model):
+class Coupons(NaturalKeyMixin):
     """
         applied on checkout of memberships
         front end should read coupons on checkout and apply the code to registration fees only ...
@@ -461,6 +362,7 @@ class Coupons(ndb.Model):
             raise TypeError("{} can only be an integer".format(str(self)))
         return value
 
+    natural_id: str = 'code'
     code: str = ndb.StringProperty(validator=set_code)
     discount: AmountMixin = ndb.StructuredProperty(AmountMixin)
     is_valid: bool = ndb.BooleanProperty(default=True, validator=setters.set_bool)
@@ -0,0 +1,518 @@
+"""
+    in-memory datastore backend
+
+    MemoryDatastore answers the gRPC calls ndb makes, lookup, run_query, commit, allocate_ids,
+    begin_transaction and rollback, from entities held in memory. ndb itself, its batching and
+    caching and the datastore instrumentation run unchanged on top of it. MemoryClient is an
+    ndb.Client using it, use_context opens its contexts on one when DATASTORE_BACKEND is memory.
+
+    every call is answered latency seconds after it was made, DATASTORE_LATENCY_MS by default. ndb
+    waits on all the calls in flight together so overlapping lookups cost one latency, as they do
+    against the datastore.
+
+    queries support kinds, ancestors, equality, inequality, IN and NOT_IN filters joined by AND or
+    OR, orders, projections, distinct on, offsets, limits and cursors. values compare in datastore
+    order, types first, and properties excluded from indexes never match a filter. cursors hold a
+    position in the results of the query, paging through a kind written to meanwhile may skip or
+    repeat entities. writes apply when the call is made and transactions are not isolated.
+"""
+import heapq
+import itertools
+import operator
+import threading
+import time
+import typing
+import uuid
+from google.auth.credentials import AnonymousCredentials
+from google.cloud import ndb
+from google.cloud.datastore_v1.types import datastore as datastore_pb2
+from google.cloud.datastore_v1.types import entity as entity_pb2
+from google.cloud.datastore_v1.types import query as query_pb2
+from data_service.config import Config
+
+Entity = entity_pb2.Entity.pb()
+EntityResult = query_pb2.EntityResult.pb()
+PropertyFilter = query_pb2.PropertyFilter.pb()
+CompositeFilter = query_pb2.CompositeFilter.pb()
+PropertyOrder = query_pb2.PropertyOrder.pb()
+QueryResultBatch = query_pb2.QueryResultBatch.pb()
+
+# most results of one run_query call, the rest are fetched with the end cursor
+BATCH_SIZE: int = 300
+# datastore orders values of different types by type, integers and timestamps are ordered together
+type_ranks: typing.Dict[str, int] = {'null_value': 0, 'integer_value': 1, 'timestamp_value': 1,
+                                     'boolean_value': 2, 'blob_value': 3, 'string_value': 4,
+                                     'double_value': 5, 'geo_point_value': 6, 'key_value': 7,
+                                     'entity_value': 8}
+comparisons: typing.Dict[int, typing.Callable[[typing.Any, typing.Any], bool]] = {
+    PropertyFilter.LESS_THAN: operator.lt, PropertyFilter.LESS_THAN_OR_EQUAL: operator.le,
+    PropertyFilter.GREATER_THAN: operator.gt, PropertyFilter.GREATER_THAN_OR_EQUAL: operator.ge,
+    PropertyFilter.EQUAL: operator.eq, PropertyFilter.NOT_EQUAL: operator.ne}
+
+
+def key_path(key: typing.Any) -> tuple:
+    """
+        path of a key in datastore order, ids sort before names
+    """
+    return tuple((element.kind, 0, element.id, '') if element.WhichOneof('id_type') == 'id'
+                 else (element.kind, 1, 0, element.name) for element in key.path)
+
+
+def partition(partition_id: typing.Any) -> tuple:
+    return partition_id.project_id, partition_id.database_id, partition_id.namespace_id
+
+
+def storage_key(key: typing.Any) -> tuple:
+    return partition(key.partition_id) + (key_path(key),)
+
+
+def sort_value(value: typing.Any) -> tuple:
+    """
+        comparable form of a value, (type rank, value)
+    """
+    value_type: str = value.WhichOneof('value_type')
+    if value_type == 'timestamp_value':
+        return 1, value.timestamp_value.seconds * 1000000 + value.timestamp_value.nanos // 1000
+    if value_type == 'key_value':
+        return 7, key_path(value.key_value)
+    if value_type == 'geo_point_value':
+        return 6, (value.geo_point_value.latitude, value.geo_point_value.longitude)
+    if value_type == 'entity_value':
+        return 8, value.entity_value.SerializeToString()
+    if value_type == 'null_value' or value_type is None:
+        return 0, 0
+    return type_ranks[value_type], getattr(value, value_type)
+
+
+def indexed_values(entity: typing.Any, name: str) -> typing.List[typing.Any]:
+    """
+        the values of property name a query can match, one per element of a list,
+        none when the property is missing or excluded from indexes
+    """
+    if name == '__key__':
+        return [entity_pb2.Value.pb()(key_value=entity.key)]
+    if name not in entity.properties:
+        return []
+    value: typing.Any = entity.properties[name]
+    values: typing.Iterable[typing.Any] = value.array_value.values \
+        if value.WhichOneof('value_type') == 'array_value' else [value]
+    return [element for element in values if not element.exclude_from_indexes]
+
+
+def and_filters(query_filter: typing.Any) -> typing.List[typing.Any]:
+    """
+        the property filters every match of query_filter satisfies
+    """
+    if query_filter.WhichOneof('filter_type') == 'composite_filter':
+        if query_filter.composite_filter.op != CompositeFilter.AND:
+            return []
+        return [found for inner in query_filter.composite_filter.filters
+                for found in and_filters(inner)]
+    return [query_filter.property_filter]
+
+
+def matches(entity: typing.Any, query_filter: typing.Any) -> bool:
+    if query_filter.WhichOneof('filter_type') == 'composite_filter':
+        found: typing.Iterator[bool] = (matches(entity, inner)
+                                        for inner in query_filter.composite_filter.filters)
+        return any(found) if query_filter.composite_filter.op == CompositeFilter.OR else all(found)
+    property_filter: typing.Any = query_filter.property_filter
+    op: int = property_filter.op
+    if op == PropertyFilter.HAS_ANCESTOR:
+        ancestor: tuple = key_path(property_filter.value.key_value)
+        return key_path(entity.key)[:len(ancestor)] == ancestor
+    values: typing.List[tuple] = [
+        sort_value(value) for value in indexed_values(entity, property_filter.property.name)]
+    if op in (PropertyFilter.IN, PropertyFilter.NOT_IN):
+        targets: typing.Set[tuple] = {sort_value(value)
+                                      for value in property_filter.value.array_value.values}
+        if op == PropertyFilter.IN:
+            return any(value in targets for value in values)
+        return any(value not in targets for value in values)
+    target: tuple = sort_value(property_filter.value)
+    compare: typing.Callable[[typing.Any, typing.Any], bool] = comparisons[op]
+    return any(compare(value, target) for value in values)
+
+
+class MemoryCall:
+    """
+        # NOTES: the answer to one call, stands in for the grpc.Future ndb waits on
+    """
+
+    def __init__(self):
+        self._done: threading.Event = threading.Event()
+        self._lock: threading.Lock = threading.Lock()
+        self._callbacks: typing.List[typing.Callable[['MemoryCall'], None]] = []
+        self._response: typing.Any = None
+        self._exception: typing.Union[Exception, None] = None
+
+    def finish(self, response: typing.Any, exception: typing.Union[Exception, None]) -> None:
+        with self._lock:
+            self._response, self._exception = response, exception
+            self._done.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            callback(self)
+
+    def add_done_callback(self, callback: typing.Callable[['MemoryCall'], None]) -> None:
+        with self._lock:
+            if not self._done.is_set():
+                self._callbacks.append(callback)
+                return
+        callback(self)
+
+    def done(self) -> bool:
+        return self._done.is_set()
+
+    def result(self, timeout: typing.Union[float, None] = None) -> typing.Any:
+        self._done.wait(timeout)
+        if self._exception is not None:
+            raise self._exception
+        return self._response
+
+    def exception(self, timeout: typing.Union[float, None] = None) -> typing.Union[Exception, None]:
+        self._done.wait(timeout)
+        return self._exception
+
+    @staticmethod
+    def cancel() -> bool:
+        return False
+
+
+class Scheduler:
+    """
+        # NOTES: finishes calls when they are due, from one daemon thread started on first use
+    """
+
+    def __init__(self):
+        self._due: typing.List[tuple] = []
+        self._order: typing.Iterator[int] = itertools.count()
+        self._condition: threading.Condition = threading.Condition()
+        self._thread: typing.Union[threading.Thread, None] = None
+
+    def schedule(self, delay: float, call: MemoryCall, response: typing.Any,
+                 exception: typing.Any) -> None:
+        with self._condition:
+            heapq.heappush(self._due,
+                           (time.monotonic() + delay, next(self._order), call, response, exception))
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='memory-datastore',
+                                                daemon=True)
+                self._thread.start()
+            self._condition.notify()
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                while not self._due or self._due[0][0] > time.monotonic():
+                    self._condition.wait(self._due[0][0] - time.monotonic() if self._due else None)
+                _, _, call, response, exception = heapq.heappop(self._due)
+            call.finish(response=response, exception=exception)
+
+
+class Method:
+    """
+        # NOTES: one RPC of the stub, ndb calls future(request, timeout=..., metadata=...)
+    """
+
+    def __init__(self, datastore: 'MemoryDatastore',
+                 handler: typing.Callable[[typing.Any], typing.Any]):
+        self.datastore: MemoryDatastore = datastore
+        self.handler: typing.Callable[[typing.Any], typing.Any] = handler
+
+    def future(self, request: typing.Any, timeout: typing.Any = None,
+               metadata: typing.Any = ()) -> MemoryCall:
+        return self.datastore.call(handler=self.handler, request=request)
+
+    def __call__(self, request: typing.Any, timeout: typing.Any = None,
+                 metadata: typing.Any = ()) -> typing.Any:
+        return self.future(request=request).result()
+
+
+class MemoryDatastore:
+    """
+        # NOTES: entities by (project, database, namespace, key path),
+            each with the version it was written at
+            kinds indexes the storage keys by kind, equalities the storage keys of a kind by the
+            indexed values of a property, built the first time a query filters on that property for
+            equality and kept up to date from then on, so a query only reads the entities matching
+            its most selective equality filter
+            latency is in seconds, 0 answers every call before it returns
+    """
+
+    def __init__(self, latency: typing.Union[float, None] = None):
+        self.latency: float = Config.DATASTORE_LATENCY_MS / 1000 if latency is None else latency
+        self.entities: typing.Dict[tuple, typing.Tuple[typing.Any, int]] = {}
+        self.kinds: typing.Dict[tuple, typing.Set[tuple]] = {}
+        self.equalities: typing.Dict[tuple, typing.Dict[tuple, typing.Set[tuple]]] = {}
+        # storage keys of the entities with a parent by each of their ancestors,
+        # (partition + ancestor path)
+        self.descendants: typing.Dict[tuple, typing.Set[tuple]] = {}
+        self._lock: threading.RLock = threading.RLock()
+        self._versions: typing.Iterator[int] = itertools.count(1)
+        self._ids: typing.Iterator[int] = itertools.count(1)
+        self._scheduler: Scheduler = Scheduler()
+        self.lookup: Method = Method(self, self._lookup)
+        self.run_query: Method = Method(self, self._run_query)
+        self.commit: Method = Method(self, self._commit)
+        self.allocate_ids: Method = Method(self, self._allocate_ids)
+        self.begin_transaction: Method = Method(self, self._begin_transaction)
+        self.rollback: Method = Method(self, self._rollback)
+
+    def __getattr__(self, name: str) -> Method:
+        # run_aggregation_query, reserve_ids and the other calls ndb does not make
+        # to serve the models
+        def unsupported(request: typing.Any) -> typing.Any:
+            raise NotImplementedError("the in-memory datastore does not answer {}".format(name))
+        return Method(self, unsupported)
+
+    def clear(self) -> None:
+        with self._lock:
+            self.entities.clear()
+            self.kinds.clear()
+            self.equalities.clear()
+            self.descendants.clear()
+
+    def _index(self, index: typing.Dict[tuple, typing.Set[tuple]], stored_key: tuple,
+               entity: typing.Any, name: str) -> None:
+        for value in indexed_values(entity, name):
+            index.setdefault(sort_value(value), set()).add(stored_key)
+
+    def equality_index(self, kind_key: tuple, name: str) -> typing.Dict[tuple, typing.Set[tuple]]:
+        """
+            storage keys of the entities of kind_key,
+            (partition + kind), by the indexed values of property name
+        """
+        index: typing.Union[typing.Dict[tuple, typing.Set[tuple]], None] = \
+            self.equalities.get(kind_key + (name,))
+        if index is None:
+            index = self.equalities[kind_key + (name,)] = {}
+            for stored_key in self.kinds.get(kind_key, ()):
+                entity: typing.Any = self.entities[stored_key][0]
+                if name in entity.properties:
+                    self._index(index, stored_key, entity, name)
+        return index
+
+    def write(self, entity: typing.Any, version: int) -> None:
+        """
+            stores entity, a complete entity_pb2.Entity protobuf the datastore keeps from now on
+        """
+        stored_key: tuple = storage_key(entity.key)
+        kind_key: tuple = stored_key[:3] + (entity.key.path[-1].kind,)
+        self.delete(stored_key)
+        self.entities[stored_key] = (entity, version)
+        self.kinds.setdefault(kind_key, set()).add(stored_key)
+        for depth in range(1, len(stored_key[3])):
+            ancestor: tuple = stored_key[:3] + (stored_key[3][:depth],)
+            self.descendants.setdefault(ancestor, set()).add(stored_key)
+        for name in entity.properties:
+            index: typing.Union[typing.Dict[tuple, typing.Set[tuple]], None] = \
+                self.equalities.get(kind_key + (name,))
+            if index is not None:
+                self._index(index, stored_key, entity, name)
+
+    def delete(self, stored_key: tuple) -> None:
+        stored: typing.Union[typing.Tuple[typing.Any, int], None] = \
+            self.entities.pop(stored_key, None)
+        if stored is None:
+            return
+        kind_key: tuple = stored_key[:3] + (stored[0].key.path[-1].kind,)
+        self.kinds[kind_key].discard(stored_key)
+        for depth in range(1, len(stored_key[3])):
+            self.descendants[stored_key[:3] + (stored_key[3][:depth],)].discard(stored_key)
+        for name in stored[0].properties:
+            index: typing.Union[typing.Dict[tuple, typing.Set[tuple]], None] = \
+                self.equalities.get(kind_key + (name,))
+            if index is None:
+                continue
+            for value in indexed_values(stored[0], name):
+                index.get(sort_value(value), set()).discard(stored_key)
+
+    def call(self, handler: typing.Callable[[typing.Any], typing.Any],
+             request: typing.Any) -> MemoryCall:
+        call: MemoryCall = MemoryCall()
+        response: typing.Any = None
+        exception: typing.Union[Exception, None] = None
+        try:
+            with self._lock:
+                response = handler(type(request).pb(request))
+        except Exception as e:
+            exception = e
+        if self.latency > 0:
+            self._scheduler.schedule(delay=self.latency, call=call, response=response,
+                                     exception=exception)
+        else:
+            call.finish(response=response, exception=exception)
+        return call
+
+    def _allocate(self, key: typing.Any) -> None:
+        if key.path and not key.path[-1].WhichOneof('id_type'):
+            key.path[-1].id = next(self._ids)
+
+    def _lookup(self, request: typing.Any) -> datastore_pb2.LookupResponse:
+        response: typing.Any = datastore_pb2.LookupResponse.pb()()
+        version: int = next(self._versions)
+        for key in request.keys:
+            stored: typing.Union[typing.Tuple[typing.Any, int], None] = \
+                self.entities.get(storage_key(key))
+            result: typing.Any = response.found.add() if stored is not None \
+                else response.missing.add()
+            if stored is not None:
+                result.entity.CopyFrom(stored[0])
+                result.version = stored[1]
+            else:
+                result.version = version
+            # ndb matches answers to the keys it asked for by their serialized form
+            result.entity.key.CopyFrom(key)
+        return datastore_pb2.LookupResponse.wrap(response)
+
+    def _commit(self, request: typing.Any) -> datastore_pb2.CommitResponse:
+        response: typing.Any = datastore_pb2.CommitResponse.pb()()
+        for mutation in request.mutations:
+            operation: str = mutation.WhichOneof('operation')
+            result: typing.Any = response.mutation_results.add()
+            result.version = next(self._versions)
+            if operation == 'delete':
+                self.delete(storage_key(mutation.delete))
+                continue
+            entity: typing.Any = Entity()
+            entity.CopyFrom(getattr(mutation, operation))
+            if entity.key.path and not entity.key.path[-1].WhichOneof('id_type'):
+                self._allocate(entity.key)
+                result.key.CopyFrom(entity.key)
+            self.write(entity=entity, version=result.version)
+        response.index_updates = len(request.mutations)
+        return datastore_pb2.CommitResponse.wrap(response)
+
+    def _allocate_ids(self, request: typing.Any) -> datastore_pb2.AllocateIdsResponse:
+        response: typing.Any = datastore_pb2.AllocateIdsResponse.pb()()
+        for key in request.keys:
+            allocated: typing.Any = response.keys.add()
+            allocated.CopyFrom(key)
+            self._allocate(allocated)
+        return datastore_pb2.AllocateIdsResponse.wrap(response)
+
+    @staticmethod
+    def _begin_transaction(request: typing.Any) -> datastore_pb2.BeginTransactionResponse:
+        return datastore_pb2.BeginTransactionResponse(transaction=uuid.uuid4().bytes)
+
+    @staticmethod
+    def _rollback(request: typing.Any) -> datastore_pb2.RollbackResponse:
+        return datastore_pb2.RollbackResponse()
+
+    def _query_results(self, request: typing.Any) -> typing.List[typing.Any]:
+        """
+            entities matching the query in its order, projected
+        """
+        query: typing.Any = request.query
+        kind: typing.Union[str, None] = query.kind[0].name if query.kind else None
+        space: tuple = partition(request.partition_id)
+        candidates: typing.Iterable[tuple] = \
+            [stored_key for stored_key in self.entities if stored_key[:3] == space] \
+            if kind is None else self.kinds.get(space + (kind,), set())
+        if query.HasField('filter'):
+            for property_filter in and_filters(query.filter):
+                if property_filter.op == PropertyFilter.HAS_ANCESTOR:
+                    ancestor: tuple = space + (key_path(property_filter.value.key_value),)
+                    matching: typing.Set[tuple] = self.descendants.get(ancestor, set()) | (
+                        {ancestor} if ancestor in self.entities else set())
+                    if kind is not None:
+                        matching &= self.kinds.get(space + (kind,), set())
+                elif (kind is not None and property_filter.op == PropertyFilter.EQUAL and
+                      property_filter.property.name != '__key__'):
+                    index: typing.Dict[tuple, typing.Set[tuple]] = self.equality_index(
+                        kind_key=space + (kind,), name=property_filter.property.name)
+                    matching = index.get(sort_value(property_filter.value), set())
+                else:
+                    continue
+                if len(matching) < len(candidates):
+                    candidates = matching
+        found: typing.List[typing.Any] = [
+            self.entities[stored_key][0] for stored_key in candidates
+            if not query.HasField('filter') or matches(self.entities[stored_key][0], query.filter)]
+
+        found.sort(key=lambda entity: key_path(entity.key))
+        for order in reversed(query.order):
+            name: str = order.property.name
+            descending: bool = order.direction == PropertyOrder.DESCENDING
+            # entities without a value for a sorted property are left out,
+            # as they are not in its index
+            found = [entity for entity in found if indexed_values(entity, name)]
+            pick: typing.Callable = max if descending else min
+            found.sort(key=lambda entity: pick(
+                sort_value(value) for value in indexed_values(entity, name)), reverse=descending)
+
+        names: typing.List[str] = [projection.property.name for projection in query.projection]
+        if not names:
+            return found
+        if names == ['__key__']:
+            return [Entity(key=entity.key) for entity in found]
+        projected: typing.List[typing.Any] = []
+        for entity in found:
+            for values in itertools.product(*(indexed_values(entity, name) for name in names)):
+                result: typing.Any = Entity(key=entity.key)
+                for name, value in zip(names, values):
+                    result.properties[name].CopyFrom(value)
+                projected.append(result)
+        if query.distinct_on:
+            seen: typing.Set[tuple] = set()
+            distinct: typing.List[typing.Any] = []
+            for result in projected:
+                values = tuple(sort_value(result.properties[on.name]) for on in query.distinct_on)
+                if values not in seen:
+                    seen.add(values)
+                    distinct.append(result)
+            projected = distinct
+        return projected
+
+    def _run_query(self, request: typing.Any) -> datastore_pb2.RunQueryResponse:
+        if request.HasField('gql_query'):
+            raise NotImplementedError("the in-memory datastore does not answer gql queries")
+        query: typing.Any = request.query
+        results: typing.List[typing.Any] = self._query_results(request)
+        start: int = int(query.start_cursor or b'0')
+        end: int = int(query.end_cursor) if query.end_cursor else len(results)
+        skipped: int = max(0, min(query.offset, end - start))
+        position: int = start + skipped
+        limit: typing.Union[int, None] = query.limit.value if query.HasField('limit') else None
+        remaining: int = max(0, end - position)
+        size: int = min(BATCH_SIZE, remaining if limit is None else min(limit, remaining))
+
+        response: typing.Any = datastore_pb2.RunQueryResponse.pb()()
+        batch: typing.Any = response.batch
+        names: typing.List[str] = [projection.property.name for projection in query.projection]
+        batch.entity_result_type = EntityResult.FULL if not names else \
+            EntityResult.KEY_ONLY if names == ['__key__'] else EntityResult.PROJECTION
+        batch.skipped_results = skipped
+        batch.skipped_cursor = str(position).encode()
+        for index in range(position, position + size):
+            result: typing.Any = batch.entity_results.add()
+            result.entity.CopyFrom(results[index])
+            result.cursor = str(index + 1).encode()
+            if not names:
+                result.version = self.entities[storage_key(results[index].key)][1]
+        batch.end_cursor = str(position + size).encode()
+        if limit is not None and size == limit:
+            batch.more_results = QueryResultBatch.MORE_RESULTS_AFTER_LIMIT if remaining > size \
+                else QueryResultBatch.NO_MORE_RESULTS
+        else:
+            batch.more_results = QueryResultBatch.NOT_FINISHED if remaining > size \
+                else QueryResultBatch.NO_MORE_RESULTS
+        return datastore_pb2.RunQueryResponse.wrap(response)
+
+
+memory_datastore: MemoryDatastore = MemoryDatastore()
+
+
+class MemoryClient(ndb.Client):
+    """
+        # NOTES: ndb client answered by a MemoryDatastore, the process wide one unless given one
+            it never loads credentials nor opens a connection
+    """
+
+    def __init__(self, project: typing.Union[str, None] = None,
+                 namespace: typing.Union[str, None] = None,
+                 datastore: typing.Union[MemoryDatastore, None] = None):
+        super(MemoryClient, self).__init__(project=project or 'local', namespace=namespace,
+                                           credentials=AnonymousCredentials())
+        self.stub: MemoryDatastore = datastore or memory_datastore
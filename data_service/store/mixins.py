@@ -1,3 +1,4 @@
+import typing
 from google.cloud import ndb
 from data_service.config.stocks import currency_symbols
 import re
@@ -86,6 +87,77 @@ class AmountMixin(ndb.Model):
         return True if self.amount is not None else False
 
 
+class NaturalKeyMixin(ndb.Model):
+    """
+        entities keyed by their natural id, natural_id names the property holding it.
+        lookups by that id become strongly consistent key gets instead of indexed queries.
+    """
+    natural_id: str = ""
+
+    @classmethod
+    def natural_key(cls, natural_id: str) -> typing.Union[ndb.Key, None]:
+        if not natural_id:
+            return None
+        return ndb.Key(cls, natural_id)
+
+    @classmethod
+    def get_by_natural_id(cls, natural_id: str) -> typing.Any:
+        key: typing.Union[ndb.Key, None] = cls.natural_key(natural_id)
+        return key.get() if key is not None else None
+
+    @classmethod
+    def get_by_natural_id_async(cls, natural_id: str) -> ndb.Future:
+        key: typing.Union[ndb.Key, None] = cls.natural_key(natural_id)
+        if key is not None:
+            return key.get_async()
+        future: ndb.Future = ndb.Future()
+        future.set_result(None)
+        return future
+
+    @classmethod
+    def get_multi_by_natural_id(cls, natural_ids: typing.Iterable[str]) -> typing.List[typing.Any]:
+        """
+            one batch get, results line up with natural_ids and are None where nothing was found
+        """
+        keys: typing.List[typing.Union[ndb.Key, None]] = [cls.natural_key(natural_id)
+                                                          for natural_id in natural_ids]
+        found: list = ndb.get_multi([key for key in keys if key is not None])
+        entities: typing.Iterator[typing.Any] = iter(found)
+        return [next(entities) if key is not None else None for key in keys]
+
+    def _pre_put_hook(self) -> None:
+        # new entities take their key from the natural id, entities which already have a key keep it
+        if self.key is None:
+            self.key = self.natural_key(getattr(self, self.natural_id, None))
+
+
+class ProjectionMixin(ndb.Model):
+    """
+        projection_indexes lists the composite indexes a projection query on the model can use,
+        keyed by the equality filter of the query, "" for queries without filters, each index given
+        by the properties it holds after the filter. a query may project a set of fields only when
+        one of those indexes holds exactly them. window_indexes names, keyed the same way, the
+        property the windows of WindowSelection on the model are bounded and ordered on, a query
+        with a window reading whole entities needs an index of the two.
+    """
+    projection_indexes: typing.Dict[str, typing.List[typing.Tuple[str, ...]]] = {}
+    window_indexes: typing.Dict[str, str] = {}
+
+    @classmethod
+    def projection(cls, fields: typing.Iterable[str],
+                   filter_name: str = "") -> typing.Union[typing.Tuple[str, ...], None]:
+        """
+            the projection serving fields for a query filtered on filter_name,
+            None when no index serves it
+            the filtered property is never projected, its value is known from the filter
+        """
+        projected: typing.Set[str] = set(fields) - {filter_name}
+        for index in cls.projection_indexes.get(filter_name, []):
+            if projected and projected == set(index):
+                return tuple(name for name in index if name in projected)
+        return None
+
+
 class UserMixin(ndb.Model):
     email: str = ndb.StringProperty(validator=setters.set_email)
     password: str = ndb.StringProperty(validator=setters.set_password)
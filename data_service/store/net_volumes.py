@@ -0,0 +1,143 @@
+"""
+    net volumes of each stock and day derived from the buy and sell volumes of the day
+
+    the net volume of a stock on a day is what it was bought for less what it was sold for, its
+    total what it was bought and sold for together. the buy and sell volumes of the day are read
+    with the date_created projection queries, joined by stock with pandas, see market_flows, and
+    saved as a NetVolumeTotal.
+
+    NetVolumeTotal is a kind of its own, NetVolumeModel holds the net volume of each broker as the
+    loaders and bulk ingest write it, a stock's total kept among them would be counted twice by
+    anything adding them up.
+
+    totals are keyed by exchange, stock and day so calculating a day again overwrites the same
+    totals, and only the ones whose numbers changed are written, the totals of stocks no longer
+    traded on the day are deleted. NetCalculations keeps the watermark of the runs, the days
+    recorded after it, see data_service.store.history.days_recorded_since, are the ones the next run
+    calculates.
+"""
+import datetime
+import typing
+import pandas as pd
+from google.cloud import ndb
+from data_service.config import Config
+from data_service.store.mixins import NaturalKeyMixin
+from data_service.store.stocks import TransactionIds
+from data_service.store.summaries import market_flows, read_day
+
+NET_CALCULATIONS_ID: str = 'net-calculations'
+# what a net volume total holds, a saved one is written again only when one of them changed
+NET_COLUMNS: typing.Tuple[str, ...] = ('net_volume', 'net_value', 'total_volume', 'total_value')
+# the datastore caps a commit at 500 entities
+PUT_CHUNK_SIZE: int = 500
+
+
+class NetCalculations(ndb.Model):
+    """
+        # NOTES: state of the net volume calculations, keyed by NET_CALCULATIONS_ID
+            watermark is when the last run started, None before the first
+    """
+    watermark: datetime.datetime = ndb.DateTimeProperty(indexed=False)
+
+    @classmethod
+    def state(cls) -> 'NetCalculations':
+        return cls.get_by_id(NET_CALCULATIONS_ID) or cls(id=NET_CALCULATIONS_ID)
+
+
+class NetVolumeTotal(NaturalKeyMixin):
+    """
+        # NOTES: the net volume of one stock on one day, every broker together, keyed by total_id_of
+            the totals of a day are read with a query on date_created
+    """
+    natural_id: str = 'total_id'
+    total_id: str = ndb.StringProperty()
+    exchange_id: str = ndb.StringProperty(default=Config.EXCHANGE_ID)
+    stock_id: str = ndb.StringProperty()
+    date_created: datetime.date = ndb.DateProperty()
+    net_volume: int = ndb.IntegerProperty(default=0, indexed=False)
+    net_value: int = ndb.IntegerProperty(default=0, indexed=False)
+    total_volume: int = ndb.IntegerProperty(default=0, indexed=False)
+    total_value: int = ndb.IntegerProperty(default=0, indexed=False)
+
+    @staticmethod
+    def total_id_of(stock_id: str, date_created: datetime.date,
+                    exchange_id: typing.Union[str, None] = None) -> str:
+        return TransactionIds.separator.join(
+            [exchange_id or Config.EXCHANGE_ID, stock_id, date_created.isoformat()])
+
+    def __eq__(self, other) -> bool:
+        if self.__class__ != other.__class__:
+            return False
+        return self.to_dict() == other.to_dict()
+
+    def __str__(self) -> str:
+        return "<NetVolumeTotal {} net volume: {} net value: {}".format(
+            self.total_id, self.net_volume, self.net_value)
+
+    def __repr__(self) -> str:
+        return self.__str__()
+
+
+def day_net_totals(date_created: datetime.date, buys: pd.DataFrame,
+                   sells: pd.DataFrame) -> typing.List[NetVolumeTotal]:
+    """
+        the net volume total of every stock traded on date_created
+        from the frames of its buy and sell volumes
+    """
+    flows: pd.DataFrame = market_flows(buys=buys, sells=sells)
+    flows['total_volume'] = flows['buy_volume'] + flows['sell_volume']
+    flows['total_value'] = flows['buy_value'] + flows['sell_value']
+    rows: typing.List[list] = flows[list(NET_COLUMNS)].to_numpy().tolist()
+    return [NetVolumeTotal(total_id=NetVolumeTotal.total_id_of(stock_id=stock_id,
+                                                               date_created=date_created),
+                           stock_id=stock_id, date_created=date_created,
+                           **dict(zip(NET_COLUMNS, values)))
+            for stock_id, values in zip(flows.index.tolist(), rows)]
+
+
+def changed_totals(totals: typing.List[NetVolumeTotal]) -> typing.List[NetVolumeTotal]:
+    """
+        the totals not saved yet or saved with other numbers
+    """
+    keys: typing.List[ndb.Key] = [NetVolumeTotal.natural_key(total.total_id) for total in totals]
+    saved: typing.List[typing.Union[NetVolumeTotal, None]] = []
+    for start in range(0, len(keys), Config.BATCH_LOOKUP_LIMIT):
+        saved.extend(ndb.get_multi(keys[start:start + Config.BATCH_LOOKUP_LIMIT]))
+    return [total for total, current in zip(totals, saved)
+            if current is None or any(getattr(current, column) != getattr(total, column)
+                                      for column in NET_COLUMNS)]
+
+
+def calculate_net_totals(date_created: datetime.date
+                         ) -> typing.Tuple[typing.List[NetVolumeTotal], typing.List[ndb.Key]]:
+    """
+        derives the net volume totals of date_created from its buy and sell volumes, writes the
+        changed ones and deletes the saved ones of stocks no longer traded on the day, returns the
+        totals written and the keys deleted
+    """
+    saved: ndb.Future = NetVolumeTotal.query(NetVolumeTotal.date_created == date_created) \
+        .fetch_async(keys_only=True)
+    buys, sells = read_day(date_created=date_created)
+    totals: typing.List[NetVolumeTotal] = day_net_totals(date_created=date_created, buys=buys,
+                                                         sells=sells)
+    current: typing.Set[str] = {total.total_id for total in totals}
+    deleted: typing.List[ndb.Key] = [key for key in saved.get_result()
+                                     if key.id() not in current]
+    written: typing.List[NetVolumeTotal] = changed_totals(totals)
+    futures: typing.List[ndb.Future] = []
+    for start in range(0, len(written), PUT_CHUNK_SIZE):
+        futures.extend(ndb.put_multi_async(written[start:start + PUT_CHUNK_SIZE]))
+    for start in range(0, len(deleted), PUT_CHUNK_SIZE):
+        futures.extend(ndb.delete_multi_async(deleted[start:start + PUT_CHUNK_SIZE]))
+    for future in futures:
+        future.result()
+    return written, deleted
+
+
+def get_day_totals(date_created: datetime.date) -> typing.List[NetVolumeTotal]:
+    """
+        the net volume totals of every stock traded on date_created, in stock order
+    """
+    totals: typing.List[NetVolumeTotal] = \
+        NetVolumeTotal.query(NetVolumeTotal.date_created == date_created).fetch()
+    return sorted(totals, key=lambda total: total.stock_id)
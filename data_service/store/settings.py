@@ -3,6 +3,7 @@ from google.cloud import ndb
 from google.cloud.ndb.exceptions import BadArgumentError, BadQueryError, BadRequestError, BadValueError
 from data_service.config.types import tickers_type, errors_type, timestamps_type
 from data_service.utils.utils import create_id
+from data_service.store.mixins import NaturalKeyMixin
 
 
 class UserSettingsModel(ndb.Model):
@@ -17,7 +18,8 @@ class AdminSettingsModel(ndb.Model):
     #  TODO - complete the necessary d_under functions
 
 
-class ExchangeDataModel(ndb.Model):
+class ExchangeDataModel(NaturalKeyMixin):
+    natural_id: str = 'exchange_id'
     exchange_id: str = ndb.StringProperty()
     exchange_country: str = ndb.StringProperty()
     exchange_name: str = ndb.StringProperty()
@@ -2,8 +2,8 @@ import typing
 from google.cloud import ndb
 import datetime
 from data_service.config import Config
-from data_service.utils.utils import create_id
 from data_service.config.stocks import currency_symbols
+from data_service.store.mixins import NaturalKeyMixin, ProjectionMixin
 
 
 class Setters:
@@ -68,14 +68,15 @@ class Setters:
 setters: Setters = Setters()
 
 
-class Stock(ndb.Model):
+class Stock(NaturalKeyMixin):
     """
         A Model for keeping stock code, stored separately on datastore
         but also a sub model of StockModel
     """
+    natural_id: str = 'stock_id'
     stock_id: str = ndb.StringProperty(required=True, indexed=True, validator=setters.set_string)
     stock_code: str = ndb.StringProperty(required=True, indexed=True, validator=setters.set_string)
-    stock_name: str = ndb.StringProperty(required=True, validator=setters.set_stock_name)
+    stock_name: str = ndb.TextProperty(required=True, validator=setters.set_stock_name)
     symbol: str = ndb.StringProperty(required=True, indexed=True, validator=setters.set_string)
     is_crypto: bool = ndb.BooleanProperty(validator=setters.set_bool)
 
@@ -103,10 +104,11 @@ class Stock(ndb.Model):
         return bool(self.stock_id)
 
 
-class Broker(ndb.Model):
+class Broker(NaturalKeyMixin):
     """
         a model for storing broker data
     """
+    natural_id: str = 'broker_id'
     broker_id: str = ndb.StringProperty(required=True, indexed=True, validator=setters.set_id)
     broker_code: str = ndb.StringProperty(required=True, indexed=True, validator=setters.set_broker_code)
     broker_name: str = ndb.StringProperty(required=True, validator=setters.set_broker_name)
@@ -175,6 +177,18 @@ class StockModelSetters:
             raise ValueError("{} can only be a positive integer".format(str(prop)))
         return value
 
+    @staticmethod
+    def set_signed_int(prop, value: int) -> int:
+        """
+            net figures are negative when a broker sold more than it bought
+        """
+        if (value is None) or (value == ""):
+            raise ValueError("{} can not be Null".format(str(prop)))
+
+        if not(isinstance(value, int)):
+            raise TypeError("{} can only be an Integer".format(str(prop)))
+        return value
+
     @staticmethod
     def set_float(prop, value: float) -> float:
         if (value is None) or (value == ""):
@@ -210,10 +224,93 @@ stock_setters: StockModelSetters = StockModelSetters()
 ###########################################
 
 
-class StockModel(ndb.Model):
+class TransactionIds:
+    """
+        deterministic transaction ids, the same exchange, stock, date, broker and side always give
+        the same id so writing a volume twice overwrites it. ids sort by exchange, stock then date,
+        a stock's volumes between two dates are a single range of keys.
+    """
+    separator: str = "|"
+    # sorts after every character of an id
+    upper_bound: str = "\ufffd"
+
+    @staticmethod
+    def volume_id(side: str, stock_id: str, date_created: datetime.date,
+                  broker_id: typing.Union[str, None] = None,
+                  exchange_id: typing.Union[str, None] = None) -> str:
+        """
+            volumes without a broker are the stock's total for the day
+        """
+        return TransactionIds.separator.join([exchange_id or Config.EXCHANGE_ID, stock_id,
+                                              date_created.isoformat(), broker_id or "", side])
+
+    @staticmethod
+    def stock_range(stock_id: str, date_from: typing.Union[datetime.date, None] = None,
+                    date_to: typing.Union[datetime.date, None] = None,
+                    exchange_id: typing.Union[str, None] = None) -> typing.Tuple[str, str]:
+        """
+            [start, end) of the ids of stock_id between date_from and date_to inclusive,
+            open ended when not given
+        """
+        prefix: str = TransactionIds.separator.join(
+            [exchange_id or Config.EXCHANGE_ID, stock_id, ""])
+        start: str = prefix + date_from.isoformat() + TransactionIds.separator if date_from \
+            else prefix
+        end: str = prefix + date_to.isoformat() + TransactionIds.separator if date_to else prefix
+        return start, end + TransactionIds.upper_bound
+
+    @staticmethod
+    def stock_model_id(exchange_id: str, stock_id: str, broker_id: str) -> str:
+        return TransactionIds.separator.join([exchange_id, stock_id, broker_id])
+
+
+class VolumeMixin(NaturalKeyMixin, ProjectionMixin):
+    """
+        daily volumes keyed by their transaction id,
+        the id is derived from the volume when not given
+    """
+    natural_id: str = 'transaction_id'
+    side: str = ""
+    # daily volumes of a stock are read a window of days at a time, see stock_volumes_selection
+    window_indexes = {'stock_id': 'date_created'}
+    exchange_id: str = ndb.StringProperty(default=Config.EXCHANGE_ID, validator=setters.set_id)
+    broker_id: str = ndb.StringProperty(validator=setters.set_id)
+
+    def derive_transaction_id(self) -> typing.Union[str, None]:
+        """
+            sets transaction_id from the volume when it has none, returns it
+        """
+        if not self.transaction_id and self.stock_id \
+                and isinstance(self.date_created, datetime.date):
+            self.transaction_id = TransactionIds.volume_id(side=self.side, stock_id=self.stock_id,
+                                                           date_created=self.date_created,
+                                                           broker_id=self.broker_id,
+                                                           exchange_id=self.exchange_id)
+        return self.transaction_id
+
+    def _pre_put_hook(self) -> None:
+        self.derive_transaction_id()
+        super()._pre_put_hook()
+
+    @classmethod
+    def query_stock_range(cls, stock_id: str, date_from: typing.Union[datetime.date, None] = None,
+                          date_to: typing.Union[datetime.date, None] = None,
+                          exchange_id: typing.Union[str, None] = None) -> ndb.Query:
+        """
+            volumes of stock_id between two dates in date order,
+            a scan of the key index, no composite index needed
+            only volumes keyed by derived ids are found
+        """
+        start, end = TransactionIds.stock_range(stock_id=stock_id, date_from=date_from,
+                                                date_to=date_to, exchange_id=exchange_id)
+        return cls.query(cls.key >= ndb.Key(cls, start), cls.key < ndb.Key(cls, end))
+
+
+class StockModel(NaturalKeyMixin):
     """
         StockModel for daily trade volumes
     """
+    natural_id: str = 'transaction_id'
     exchange_id: str = ndb.StringProperty(required=True, indexed=True, validator=setters.set_id)
     transaction_id: str = ndb.StringProperty(validator=setters.set_id)
     stock = ndb.StructuredProperty(Stock, validator=stock_setters.set_stock)
@@ -242,12 +339,32 @@ class StockModel(ndb.Model):
     def __bool__(self) -> bool:
         return bool(self.transaction_id)
 
+    def derive_transaction_id(self) -> typing.Union[str, None]:
+        # one stock model per exchange, stock and broker
+        if not self.transaction_id and self.exchange_id and self.stock and self.broker:
+            self.transaction_id = TransactionIds.stock_model_id(exchange_id=self.exchange_id,
+                                                                stock_id=self.stock.stock_id,
+                                                                broker_id=self.broker.broker_id)
+        return self.transaction_id
+
+    def _pre_put_hook(self) -> None:
+        self.derive_transaction_id()
+        super()._pre_put_hook()
+
 
-class BuyVolumeModel(ndb.Model):
+class BuyVolumeModel(VolumeMixin):
     """
         daily buy volumes
     """
-    transaction_id: str = ndb.StringProperty(indexed=True, required=True, default=create_id())
+    side: str = 'buy'
+    # composite indexes of the day and daily by stock lists, see ProjectionMixin
+    projection_indexes = {
+        'date_created': [('stock_id', 'buy_volume', 'buy_value'),
+                         ('stock_id', 'broker_id', 'buy_volume', 'buy_value')],
+        'stock_id': [('date_created', 'buy_volume', 'buy_value'),
+                     ('date_created', 'broker_id', 'buy_volume', 'buy_value')],
+    }
+    transaction_id: str = ndb.StringProperty(indexed=True, required=True)
     stock_id: str = ndb.StringProperty(validator=stock_setters.set_stock_id)
     date_created: datetime.date = ndb.DateProperty(auto_now_add=True, tzinfo=datetime.timezone(Config.UTC_OFFSET),
                                                    validator=stock_setters.set_date)
@@ -286,10 +403,18 @@ class BuyVolumeModel(ndb.Model):
         return bool(self.transaction_id)
 
 
-class SellVolumeModel(ndb.Model):
+class SellVolumeModel(VolumeMixin):
     """
         daily sell volumes
     """
+    side: str = 'sell'
+    # composite indexes of the day and daily by stock lists, see ProjectionMixin
+    projection_indexes = {
+        'date_created': [('stock_id', 'sell_volume', 'sell_value'),
+                         ('stock_id', 'broker_id', 'sell_volume', 'sell_value')],
+        'stock_id': [('date_created', 'sell_volume', 'sell_value'),
+                     ('date_created', 'broker_id', 'sell_volume', 'sell_value')],
+    }
     transaction_id: str = ndb.StringProperty(indexed=True, validator=setters.set_id)
     stock_id: str = ndb.StringProperty(validator=setters.set_id)
     # Auto now add can be over written
@@ -329,17 +454,24 @@ class SellVolumeModel(ndb.Model):
         return bool(self.transaction_id)
 
 
-class NetVolumeModel(ndb.Model):
+class NetVolumeModel(VolumeMixin):
     """
         daily net volume
     """
+    side: str = 'net'
+    # composite indexes of the day and daily by stock lists, see ProjectionMixin
+    projection_indexes = {
+        'date_created': [('stock_id', 'net_volume', 'net_value')],
+        'stock_id': [('date_created', 'net_volume', 'net_value'),
+                     ('date_created', 'broker_id', 'net_volume', 'net_value')],
+    }
     stock_id: str = ndb.StringProperty(validator=setters.set_id)
     transaction_id: str = ndb.StringProperty(validator=setters.set_id)
     date_created: datetime.date = ndb.DateProperty(auto_now_add=True, tzinfo=datetime.timezone(Config.UTC_OFFSET),
                                                    validator=stock_setters.set_date)
     currency: str = ndb.StringProperty(default=Config.CURRENCY, validator=stock_setters.set_currency)
-    net_volume: int = ndb.IntegerProperty(default=0, validator=stock_setters.set_int)
-    net_value: int = ndb.IntegerProperty(default=0, validator=stock_setters.set_int)
+    net_volume: int = ndb.IntegerProperty(default=0, validator=stock_setters.set_signed_int)
+    net_value: int = ndb.IntegerProperty(default=0, validator=stock_setters.set_signed_int)
     total_volume: int = ndb.IntegerProperty(default=0, validator=stock_setters.set_int)
     total_value: int = ndb.IntegerProperty(default=0, validator=stock_setters.set_int)
 
@@ -0,0 +1,193 @@
+"""
+    market wide rollups of the daily volumes
+
+    get_day_*_volumes return every row of a day, thousands of them, and left every client to add
+    them up. DailyMarketSummary holds the totals of one day, computed once when the day's volumes
+    land, so a client reads a day of the market with one key lookup.
+
+    a summary is built from the buy and sell volumes of the day, read with the date_created
+    projection queries of the volume models, and aggregated a column at a time with pandas.
+    advancers and decliners are counted on flow, a stock advances when it was bought for more than
+    it was sold for on the day.
+"""
+import datetime
+import typing
+import numpy as np
+import pandas as pd
+from google.cloud import ndb
+from data_service.config import Config
+from data_service.store.mixins import NaturalKeyMixin
+from data_service.store.stocks import BuyVolumeModel, SellVolumeModel
+from data_service.utils.fields import FieldSelection
+
+# columns of the flow of one stock on one day,
+# the order MarketFlow and the frames of market_flows hold them in
+FLOW_COLUMNS: typing.Tuple[str, ...] = ('buy_volume', 'buy_value', 'sell_volume', 'sell_value',
+                                        'net_volume', 'net_value')
+
+
+class MarketFlow(ndb.Model):
+    """
+        # NOTES: what one stock was bought and sold for on one day, stored inside DailyMarketSummary
+    """
+    stock_id: str = ndb.StringProperty()
+    buy_volume: int = ndb.IntegerProperty(default=0)
+    buy_value: int = ndb.IntegerProperty(default=0)
+    sell_volume: int = ndb.IntegerProperty(default=0)
+    sell_value: int = ndb.IntegerProperty(default=0)
+    net_volume: int = ndb.IntegerProperty(default=0)
+    net_value: int = ndb.IntegerProperty(default=0)
+
+
+class DailyMarketSummary(NaturalKeyMixin):
+    """
+        # NOTES: the market on one day, keyed by the day as yyyy-mm-dd, see summary_id
+            computed_at is when the volumes it was built from were read, a summary computed after
+            the volumes of its day were written holds them
+    """
+    natural_id: str = 'summary_id'
+    summary_id: str = ndb.StringProperty()
+    date_created: datetime.date = ndb.DateProperty(indexed=False)
+    computed_at: datetime.datetime = ndb.DateTimeProperty(indexed=False)
+    volumes: int = ndb.IntegerProperty(default=0, indexed=False)
+    stocks_traded: int = ndb.IntegerProperty(default=0, indexed=False)
+    total_buy_volume: int = ndb.IntegerProperty(default=0, indexed=False)
+    total_buy_value: int = ndb.IntegerProperty(default=0, indexed=False)
+    total_sell_volume: int = ndb.IntegerProperty(default=0, indexed=False)
+    total_sell_value: int = ndb.IntegerProperty(default=0, indexed=False)
+    net_volume: int = ndb.IntegerProperty(default=0, indexed=False)
+    net_value: int = ndb.IntegerProperty(default=0, indexed=False)
+    advancers: int = ndb.IntegerProperty(default=0, indexed=False)
+    decliners: int = ndb.IntegerProperty(default=0, indexed=False)
+    unchanged: int = ndb.IntegerProperty(default=0, indexed=False)
+    top_net_buyers: typing.List[MarketFlow] = ndb.LocalStructuredProperty(MarketFlow, repeated=True)
+    top_net_sellers: typing.List[MarketFlow] = ndb.LocalStructuredProperty(MarketFlow,
+                                                                           repeated=True)
+
+    @staticmethod
+    def summary_id_of(date_created: datetime.date) -> str:
+        return date_created.isoformat()
+
+    @classmethod
+    def get_by_date(cls, date_created: datetime.date) -> typing.Union['DailyMarketSummary', None]:
+        return cls.get_by_natural_id(cls.summary_id_of(date_created))
+
+    def __eq__(self, other) -> bool:
+        if self.__class__ != other.__class__:
+            return False
+        return self.to_dict() == other.to_dict()
+
+    def __str__(self) -> str:
+        return "<DailyMarketSummary {} net value: {} advancers: {} decliners: {}".format(
+            self.summary_id, self.net_value, self.advancers, self.decliners)
+
+    def __repr__(self) -> str:
+        return self.__str__()
+
+
+def day_frame(entities: typing.Iterable[ndb.Model],
+              columns: typing.Tuple[str, ...]) -> pd.DataFrame:
+    """
+        the columns of projected volume entities as a frame
+    """
+    rows: typing.List[tuple] = [tuple(getattr(entity, column) for column in columns)
+                                for entity in entities]
+    return pd.DataFrame.from_records(rows, columns=list(columns))
+
+
+def counted_rows(rows: pd.DataFrame) -> pd.DataFrame:
+    """
+        the rows of a day which add up to each stock's flow, a row without a broker is the stock's
+        total for the day and stands for the rows of its brokers, which are dropped
+    """
+    if 'stock_id' not in rows.columns or 'broker_id' not in rows.columns:
+        return rows
+    is_total: pd.Series = rows['broker_id'].isna() | rows['broker_id'].eq("")
+    has_total: pd.Series = rows['stock_id'].isin(rows.loc[is_total, 'stock_id'])
+    return rows[is_total | ~has_total]
+
+
+def market_flows(buys: pd.DataFrame, sells: pd.DataFrame, by: str = 'stock_id') -> pd.DataFrame:
+    """
+        the flow of every stock traded, indexed by stock_id in stock order,
+        from the rows of buy and sell volumes
+        a stock only bought or only sold has zeros on the other side
+        by groups on another column, broker_id
+        rows carrying a broker_id are counted once per stock, see counted_rows
+    """
+    buys, sells = counted_rows(buys), counted_rows(sells)
+    bought: pd.DataFrame = buys.groupby(by, sort=False)[['buy_volume', 'buy_value']].sum()
+    sold: pd.DataFrame = sells.groupby(by, sort=False)[['sell_volume', 'sell_value']].sum()
+    flows: pd.DataFrame = bought.join(sold, how='outer').fillna(0).astype('int64').sort_index()
+    flows['net_volume'] = flows['buy_volume'] - flows['sell_volume']
+    flows['net_value'] = flows['buy_value'] - flows['sell_value']
+    return flows[list(FLOW_COLUMNS)]
+
+
+def top_flows(flows: pd.DataFrame, top: int, sellers: bool = False) -> typing.List[MarketFlow]:
+    """
+        the top stocks by net value, net buyers largest first or net sellers most sold first
+    """
+    signed: pd.DataFrame = flows[flows['net_value'] < 0] if sellers \
+        else flows[flows['net_value'] > 0]
+    ranked: pd.DataFrame = signed.nsmallest(top, 'net_value') if sellers \
+        else signed.nlargest(top, 'net_value')
+    return [MarketFlow(stock_id=stock_id, **dict(zip(FLOW_COLUMNS, values)))
+            for stock_id, values in zip(ranked.index.tolist(), ranked.to_numpy().tolist())]
+
+
+def market_summary(date_created: datetime.date, buys: pd.DataFrame, sells: pd.DataFrame,
+                   top: int = Config.MARKET_SUMMARY_TOP) -> DailyMarketSummary:
+    """
+        the summary of a day from the frames of its buy and sell volumes, see day_frame
+    """
+    flows: pd.DataFrame = market_flows(buys=buys, sells=sells)
+    totals: typing.Dict[str, int] = dict(zip(FLOW_COLUMNS, flows.to_numpy().sum(axis=0).tolist())) \
+        if len(flows) else dict.fromkeys(FLOW_COLUMNS, 0)
+    direction: np.ndarray = np.sign(flows['net_value'].to_numpy())
+    return DailyMarketSummary(summary_id=DailyMarketSummary.summary_id_of(date_created),
+                              date_created=date_created, volumes=len(buys) + len(sells),
+                              stocks_traded=len(flows), total_buy_volume=totals['buy_volume'],
+                              total_buy_value=totals['buy_value'],
+                              total_sell_volume=totals['sell_volume'],
+                              total_sell_value=totals['sell_value'],
+                              net_volume=totals['net_volume'], net_value=totals['net_value'],
+                              advancers=int((direction > 0).sum()),
+                              decliners=int((direction < 0).sum()),
+                              unchanged=int((direction == 0).sum()),
+                              top_net_buyers=top_flows(flows, top=top),
+                              top_net_sellers=top_flows(flows, top=top, sellers=True))
+
+
+def read_day(date_created: datetime.date) -> typing.Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+        the buy and sell volumes of a day as frames of day_frame,
+        two projection queries run together
+        broker_id is read so market_flows counts a stock's total and its brokers' rows once
+    """
+    buy_columns: typing.Tuple[str, ...] = ('stock_id', 'broker_id', 'buy_volume', 'buy_value')
+    sell_columns: typing.Tuple[str, ...] = ('stock_id', 'broker_id', 'sell_volume', 'sell_value')
+    buy_selection: FieldSelection = FieldSelection(
+        model=BuyVolumeModel, fields='stock_id,broker_id,buy_volume,buy_value',
+        date_created=date_created)
+    sell_selection: FieldSelection = FieldSelection(
+        model=SellVolumeModel, fields='stock_id,broker_id,sell_volume,sell_value',
+        date_created=date_created)
+    bought: ndb.Future = buy_selection.query().fetch_async()
+    sold: ndb.Future = sell_selection.query().fetch_async()
+    return (day_frame(bought.get_result(), columns=buy_columns),
+            day_frame(sold.get_result(), columns=sell_columns))
+
+
+def summarize_day(date_created: datetime.date,
+                  top: int = Config.MARKET_SUMMARY_TOP) -> DailyMarketSummary:
+    """
+        reads the buy and sell volumes of a day and writes its summary
+    """
+    computed_at: datetime.datetime = datetime.datetime.utcnow()
+    buys, sells = read_day(date_created=date_created)
+    summary: DailyMarketSummary = market_summary(date_created=date_created, buys=buys, sells=sells,
+                                                 top=top)
+    summary.computed_at = computed_at
+    summary.put()
+    return summary
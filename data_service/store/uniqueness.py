@@ -0,0 +1,67 @@
+import typing
+from google.api_core.exceptions import RetryError, Aborted
+from google.cloud import ndb
+from google.cloud.ndb.exceptions import BadRequestError, BadQueryError
+
+# errors after which a lookup cannot tell whether a value is taken
+lookup_errors: tuple = (BadRequestError, BadQueryError, ConnectionRefusedError, RetryError, Aborted)
+
+
+class ExistsCheck:
+    """
+        # NOTES: does an entity of model with field equal to value exist
+            the natural id of the model is checked with a strongly consistent key lookup,
+            any other field with a keys-only query which returns no entity data,
+            values which are not non empty strings never exist
+    """
+
+    def __init__(self, model: typing.Type[ndb.Model], field: str, value: typing.Any):
+        self.model: typing.Type[ndb.Model] = model
+        self.field: str = field
+        self.value: typing.Any = value
+
+    @property
+    def checkable(self) -> bool:
+        return isinstance(self.value, str) and self.value != ""
+
+    def lookup_async(self) -> ndb.Future:
+        """
+            future resolving to the key or entity found, None when there is none
+        """
+        if self.field == getattr(self.model, 'natural_id', None):
+            return self.model.natural_key(self.value).get_async()
+        return self.model.query(self.model._properties[self.field] == self.value).get_async(
+            keys_only=True)
+
+
+@ndb.tasklet
+def exists_tasklet(check: ExistsCheck) -> typing.Generator[ndb.Future, typing.Any, None]:
+    if not check.checkable:
+        raise ndb.Return(False)
+    found: typing.Any = yield check.lookup_async()
+    raise ndb.Return(found is not None)
+
+
+def exists_concurrently(
+        checks: typing.Dict[str, ExistsCheck]) -> typing.Union[typing.Dict[str, bool], None]:
+    """
+        runs every check at once,
+        the lookups are in flight together so the answer takes one round trip
+        returns whether each check found an entity, None when any lookup failed
+    """
+    try:
+        futures: typing.Dict[str, ndb.Future] = {name: exists_tasklet(check)
+                                                 for name, check in checks.items()}
+        return {name: future.result() for name, future in futures.items()}
+    except lookup_errors:
+        return None
+
+
+def exists(model: typing.Type[ndb.Model], field: str,
+           value: typing.Any) -> typing.Union[bool, None]:
+    """
+        one check, None when the lookup failed
+    """
+    check: ExistsCheck = ExistsCheck(model=model, field=field, value=value)
+    found: typing.Union[typing.Dict[str, bool], None] = exists_concurrently({field: check})
+    return None if found is None else found[field]
@@ -2,7 +2,7 @@ import typing
 from google.api_core.exceptions import RetryError
 from google.cloud import ndb
 from werkzeug.security import generate_password_hash
-from data_service.store.mixins import AddressMixin
+from data_service.store.mixins import AddressMixin, NaturalKeyMixin, ProjectionMixin
 from data_service.utils.utils import timestamp
 
 
@@ -14,21 +14,7 @@ class UserValidators:
         if not(isinstance(uid, str)) or (uid == ""):
             return False
         try:
-            user_instance: UserModel = UserModel.query(UserModel.uid == uid).get()
-        except ConnectionRefusedError:
-            return None
-        except RetryError:
-            return None
-        if isinstance(user_instance, UserModel):
-            return True
-        return False
-
-    @staticmethod
-    async def is_user_valid_async(uid: str) -> typing.Union[None, bool]:
-        if not(isinstance(uid, str)) or (uid == ""):
-            return False
-        try:
-            user_instance: UserModel = UserModel.query(UserModel.uid == uid).get_async().get_result()
+            user_instance: UserModel = UserModel.get_by_natural_id(uid)
         except ConnectionRefusedError:
             return None
         except RetryError:
@@ -38,13 +24,16 @@ class UserValidators:
         return False
 
 
-class UserModel(ndb.Model):
+class UserModel(NaturalKeyMixin, ProjectionMixin):
+    natural_id: str = 'uid'
+    # composite indexes of the users list, see ProjectionMixin
+    projection_indexes = {'': [('uid', 'email'), ('uid', 'names', 'surname')]}
     uid: str = ndb.StringProperty(required=True, indexed=True)
     names: str = ndb.StringProperty()
     surname: str = ndb.StringProperty()
     cell: str = ndb.StringProperty(indexed=True)
     email: str = ndb.StringProperty(indexed=True)
-    password: str = ndb.StringProperty()
+    password: str = ndb.TextProperty()
     is_active: bool = ndb.BooleanProperty(default=True)
     time_registered: int = ndb.IntegerProperty(default=timestamp())
     is_admin: bool = ndb.BooleanProperty(default=False)
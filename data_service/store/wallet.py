@@ -1,7 +1,7 @@
 import typing
 from datetime import datetime
 from google.cloud import ndb
-from data_service.store.mixins import AmountMixin
+from data_service.store.mixins import AmountMixin, NaturalKeyMixin
 from data_service.config.exception_handlers import handle_store_errors
 
 
@@ -12,13 +12,7 @@ class WalletValidator:
     @staticmethod
     @handle_store_errors
     def wallet_exist(uid: str) -> typing.Union[bool, None]:
-        wallet_instance: WalletModel = WalletModel.query(WalletModel.uid == uid).get()
-        return True if isinstance(wallet_instance, WalletModel) else False
-
-    @staticmethod
-    @handle_store_errors
-    async def wallet_exist_async(uid: str) -> typing.Union[bool, None]:
-        wallet_instance: WalletModel = WalletModel.query(WalletModel.uid == uid).get_async().get_result()
+        wallet_instance: WalletModel = WalletModel.get_by_natural_id(uid)
         return True if isinstance(wallet_instance, WalletModel) else False
 
     # TODO complete validations for all Wallet Models
@@ -76,7 +70,8 @@ class ClassSetters:
 setters: ClassSetters = ClassSetters()
 
 
-class WalletModel(ndb.Model):
+class WalletModel(NaturalKeyMixin):
+    natural_id: str = 'uid'
     uid: str = ndb.StringProperty(validator=ClassSetters.set_id)
     available_funds: AmountMixin = ndb.StructuredProperty(AmountMixin, validator=setters.set_funds)
     time_created: datetime = ndb.DateTimeProperty(auto_now_add=True)
@@ -1,6 +1,13 @@
 import json
+import typing
 from flask import Blueprint, request, jsonify
 from data_service.views.stocks import StockView
+from data_service.views.bulk_volumes import BulkVolumeView
+from data_service.views.market import MarketSummaryView
+from data_service.views.history import VolumeHistoryView
+from data_service.cron.operational_jobs.rekey_entities import rekey_entities_step, rekeyed_kinds
+from data_service.utils.pagination import page_error
+from data_service.utils.async_views import async_views
 task_bp = Blueprint('tasks', __name__)
 
 
@@ -14,7 +21,7 @@ def stock_task_handler(path: str) -> tuple:
         in order to submit data to be saved to database
     :return:
     """
-    stock_view_instance: StockView = StockView()
+    stock_view_instance: StockView = async_views(StockView())
     if path == "create-stock":
         stock_data: dict = request.get_json()
         return stock_view_instance.create_stock_data(stock_data=stock_data)
@@ -53,4 +60,43 @@ def stock_task_handler(path: str) -> tuple:
 
     elif path == "create-net-volume":
         net_data: dict = request.get_json()
-        return stock_view_instance.create_net_volume(net_volume_data=net_data)
\ No newline at end of file
+        return stock_view_instance.create_net_volume(net_volume_data=net_data)
+
+    elif path == "summarize-market-day":
+        json_data: dict = request.get_json()
+        return MarketSummaryView().summarize_market_day(date_created=json_data.get('date'),
+                                                        queued_at=json_data.get('queued_at'))
+
+    elif path == "rebuild-volume-history":
+        json_data: dict = request.get_json()
+        return VolumeHistoryView().rebuild_volume_history(side=json_data.get('side'),
+                                                          stock_id=json_data.get('stock_id'),
+                                                          month=json_data.get('month'),
+                                                          queued_at=json_data.get('queued_at'))
+
+    elif path == "rekey-entities":
+        json_data: dict = request.get_json()
+        kind: str = json_data.get('kind')
+        if kind not in rekeyed_kinds:
+            return jsonify({'status': False, 'message': 'unknown kind: {}'.format(kind)}), 500
+        message: typing.Union[str, None] = page_error(limit=None, cursor=json_data.get('cursor'))
+        if message is not None:
+            return jsonify({'status': False, 'message': message}), 500
+        step: dict = rekey_entities_step(kind=kind, cursor=json_data.get('cursor'))
+        # a step whose next page was not queued is retried, its page is skipped the second time
+        if not step['queued']:
+            return jsonify({'status': False, 'message': 'the next page could not be queued',
+                            'payload': step}), 500
+        return jsonify({'status': True, 'message': 'rekeyed a page of {}'.format(kind),
+                        'payload': step}), 200
+
+
+@task_bp.route('/task/stock/bulk/<path:path>', methods=['POST'])
+def stock_bulk_task_handler(path: str) -> tuple:
+    """
+        writes the rows of a bulk volume task, path is buy-volumes, sell-volumes or net-volumes
+    :return:
+    """
+    json_data: dict = request.get_json()
+    rows: list = json_data.get("rows") if isinstance(json_data, dict) else None
+    return BulkVolumeView().create_volumes_bulk(path=path, rows=rows)
@@ -0,0 +1,65 @@
+"""
+    serving the *_async view variants
+
+    routes reach their views through async_views(view), when the app has ASYNC_VIEWS set, as the
+    ASGI entry point does, every method with an *_async variant runs that variant instead. only
+    views with independent datastore lookups have a variant, it issues them together from an ndb
+    tasklet. the coroutine is driven to completion by an event loop kept by the worker thread
+    serving the request, ndb waits on its RPCs synchronously, so requests are served side by side by
+    worker threads as under gunicorn, not by interleaving coroutines on the loop of the server.
+"""
+import asyncio
+import functools
+import inspect
+import threading
+import typing
+from flask import current_app
+
+_thread_state: threading.local = threading.local()
+view_type = typing.TypeVar('view_type')
+
+
+def event_loop() -> asyncio.AbstractEventLoop:
+    """
+        event loop of the calling thread, created on first use and kept for the life of the thread
+    """
+    loop: typing.Union[asyncio.AbstractEventLoop, None] = getattr(_thread_state, 'loop', None)
+    if loop is None or loop.is_closed():
+        loop = asyncio.new_event_loop()
+        _thread_state.loop = loop
+    return loop
+
+
+def run_view(method: typing.Callable, *args, **kwargs) -> typing.Any:
+    """
+        calls an async view method to completion,
+        wrappers validating the input may answer without a coroutine
+    """
+    result: typing.Any = method(*args, **kwargs)
+    if inspect.isawaitable(result):
+        return event_loop().run_until_complete(result)
+    return result
+
+
+class AsyncViews:
+    """
+        # NOTES: stands in for a view,
+            methods resolve to their *_async variant when the app serves async views
+            methods without a variant, and every method when ASYNC_VIEWS is off, are the view's own
+    """
+
+    def __init__(self, view: typing.Any):
+        self._view: typing.Any = view
+
+    def __getattr__(self, name: str) -> typing.Any:
+        attribute: typing.Any = getattr(self._view, name)
+        if not callable(attribute) or not current_app.config.get('ASYNC_VIEWS', False):
+            return attribute
+        variant: typing.Union[typing.Callable, None] = getattr(self._view, name + '_async', None)
+        if variant is None:
+            return attribute
+        return functools.partial(run_view, variant)
+
+
+def async_views(view: view_type) -> view_type:
+    return typing.cast(view_type, AsyncViews(view=view))
@@ -0,0 +1,72 @@
+"""
+    streamed exports of whole kinds as newline delimited json
+
+    the kind is read a page of batch_size entities at a time, each page starting at the cursor the
+    previous one ended at, and every page is written to the response as soon as it is read, so
+    memory stays at one page however large the kind is. exports can be gzip compressed, the
+    compressor is flushed after every page so clients can decode the stream as it arrives.
+"""
+import typing
+import zlib
+from flask import Response, current_app, json, stream_with_context
+from google.cloud import ndb
+from data_service.config import Config
+from data_service.config.use_context import datastore_context
+
+NDJSON_MIMETYPE: str = "application/x-ndjson"
+
+
+def is_compressed(compress: typing.Any) -> bool:
+    """
+        compress flag of an export request, from a json body or a query string
+    """
+    if isinstance(compress, str):
+        return compress.strip().lower() in ('1', 'true', 'yes', 'gzip')
+    return compress is True
+
+
+def ndjson_chunks(model: typing.Type[ndb.Model], batch_size: int,
+                  exclude: typing.Union[typing.List[str], None] = None) -> typing.Iterator[bytes]:
+    """
+        one chunk of json lines per page of batch_size entities,
+        pages are read with fetch_page inside the
+        generator since the stream is written after the
+        view returned and its datastore context was closed
+    """
+    with datastore_context():
+        cursor: typing.Union[ndb.Cursor, None] = None
+        more: bool = True
+        while more:
+            entities, cursor, more = model.query().fetch_page(batch_size, start_cursor=cursor)
+            if entities:
+                yield ("".join(json.dumps(entity.to_dict(exclude=exclude)) + "\n"
+                               for entity in entities)).encode('utf-8')
+            more = more and cursor is not None
+
+
+def gzip_chunks(chunks: typing.Iterable[bytes]) -> typing.Iterator[bytes]:
+    compressor = zlib.compressobj(wbits=zlib.MAX_WBITS | 16)
+    for chunk in chunks:
+        data: bytes = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def export_response(model: typing.Type[ndb.Model], name: str, compress: bool = False,
+                    batch_size: typing.Union[int, None] = None,
+                    exclude: typing.Union[typing.List[str], None] = None) -> Response:
+    """
+        streaming response holding every entity of model, name is used for the download file name
+        properties listed in exclude are left out of every line
+    """
+    batch_size = batch_size or current_app.config.get('EXPORT_BATCH_SIZE', Config.EXPORT_BATCH_SIZE)
+    chunks: typing.Iterator[bytes] = ndjson_chunks(model=model, batch_size=batch_size,
+                                                   exclude=exclude)
+    headers: typing.Dict[str, str] = {
+        'Content-Disposition': 'attachment; filename="{}.ndjson"'.format(name),
+        'X-Accel-Buffering': 'no', 'Cache-Control': 'no-store'}
+    if compress:
+        chunks = gzip_chunks(chunks=chunks)
+        headers['Content-Encoding'] = 'gzip'
+    return Response(stream_with_context(chunks), mimetype=NDJSON_MIMETYPE, headers=headers)
@@ -0,0 +1,194 @@
+"""
+    sparse fieldsets for the list endpoints
+
+    fields names the properties a client needs, "a,b" or ["a", "b"], structured properties are
+    reached with dotted names e.g. address.city. when the model declares a composite index holding
+    exactly those fields the list is read with a projection query, see ProjectionMixin, otherwise
+    whole entities are read and trimmed before they are serialized.
+
+    WindowSelection reads a window of a list,
+    the entities whose date lies between two dates, in date order.
+"""
+import datetime
+import typing
+from google.cloud import ndb
+from data_service.config import Config
+from data_service.utils.pagination import page_limit
+from data_service.utils.utils import date_string_to_date
+
+fields_type = typing.Union[str, typing.List[str], None]
+
+
+def parse_fields(fields: fields_type) -> typing.Union[typing.List[str], None]:
+    """
+        list of field names, None when every field was asked for, raises ValueError on anything else
+    """
+    if fields is None or fields == "":
+        return None
+    if isinstance(fields, str):
+        fields = fields.split(",")
+    if not isinstance(fields, list) or not all(isinstance(name, str) for name in fields):
+        raise ValueError("fields must be a comma separated string or a list of field names")
+    names: typing.List[str] = [name.strip() for name in fields if name.strip()]
+    # keep the order the client asked for, drop repeats
+    return list(dict.fromkeys(names)) or None
+
+
+def _has_field(model: typing.Type[ndb.Model], name: str) -> bool:
+    head, _, rest = name.partition(".")
+    prop: typing.Union[ndb.Property, None] = model._properties.get(head)
+    if prop is None:
+        return False
+    if not rest:
+        return True
+    return isinstance(prop, ndb.StructuredProperty) and _has_field(model=prop._model_class,
+                                                                   name=rest)
+
+
+def fields_error(model: typing.Type[ndb.Model], fields: fields_type) -> typing.Union[str, None]:
+    """
+        message explaining why fields cannot be selected from model, None if they can
+    """
+    try:
+        names: typing.Union[typing.List[str], None] = parse_fields(fields)
+    except ValueError as error:
+        return str(error)
+    unknown: typing.List[str] = [name for name in names or []
+                                 if not _has_field(model=model, name=name)]
+    if unknown:
+        return "unknown fields: {}".format(", ".join(unknown))
+    return None
+
+
+def trim(record: dict, fields: typing.List[str]) -> dict:
+    """
+        the parts of record named by fields, dotted names select inside nested records
+    """
+    trimmed: dict = {}
+    for name in fields:
+        head, _, rest = name.partition(".")
+        if head not in record:
+            continue
+        if rest and isinstance(record[head], dict):
+            trimmed.setdefault(head, {}).update(trim(record=record[head], fields=[rest]))
+        elif rest and record[head] is None:
+            trimmed.setdefault(head, None)
+        elif not rest:
+            trimmed[head] = record[head]
+    return trimmed
+
+
+class FieldSelection:
+    """
+        # NOTES: a list query of model filtered by equality on filters, reading only fields
+            fields must have passed fields_error
+    """
+
+    def __init__(self, model: typing.Type[ndb.Model], fields: fields_type = None, **filters):
+        self.model: typing.Type[ndb.Model] = model
+        self.fields: typing.Union[typing.List[str], None] = parse_fields(fields)
+        self.filters: typing.Dict[str, typing.Any] = filters
+
+    @property
+    def projection(self) -> typing.Union[typing.Tuple[str, ...], None]:
+        """
+            properties to project, None when whole entities have to be read
+        """
+        if not self.fields or len(self.filters) > 1 or not hasattr(self.model, 'projection'):
+            return None
+        return self.model.projection(fields=self.fields, filter_name=next(iter(self.filters), ""))
+
+    def query(self) -> ndb.Query:
+        nodes: typing.List[ndb.Node] = [self.model._properties[name] == value
+                                        for name, value in self.filters.items()]
+        projection: typing.Union[typing.Tuple[str, ...], None] = self.projection
+        if projection is not None:
+            return self.model.query(*nodes, projection=projection)
+        return self.model.query(*nodes)
+
+    def records(self, entities: typing.Iterable[ndb.Model]) -> typing.List[dict]:
+        """
+            entities of the query as dicts holding the selected fields,
+            filtered fields are filled in from the filter
+        """
+        if not self.fields:
+            return [entity.to_dict() for entity in entities]
+        known: dict = {name: value for name, value in self.filters.items() if name in self.fields}
+        # a projected entity raises on properties it was not projected on,
+        # the filtered ones are among those
+        top_level: typing.Set[str] = {name.partition(".")[0] for name in self.fields} - set(known)
+        records: typing.List[dict] = []
+        for entity in entities:
+            record: dict = trim(record=entity.to_dict(include=top_level), fields=self.fields)
+            record.update(known)
+            records.append(record)
+        return records
+
+
+def window_dates(date_from: typing.Any,
+                 date_to: typing.Any) -> typing.Tuple[typing.Union[datetime.date, None], ...]:
+    """
+        the bounds of a window as dates, None where it is open,
+        raises ValueError when a bound is not a date
+    """
+    return tuple(None if bound is None or bound == "" else date_string_to_date(bound)
+                 for bound in (date_from, date_to))
+
+
+def window_error(date_from: typing.Any, date_to: typing.Any,
+                 limit: typing.Any = None) -> typing.Union[str, None]:
+    """
+        message explaining why the window cannot be read, None if it can
+    """
+    try:
+        start, end = window_dates(date_from=date_from, date_to=date_to)
+    except (ValueError, TypeError, IndexError):
+        return "from and to must be dates, yyyy-mm-dd"
+    if start is not None and end is not None and start > end:
+        return "from cannot be after to"
+    if limit not in (None, "") and page_limit(limit) is None:
+        return "limit must be an integer between 1 and {}".format(Config.MAX_PAGE_SIZE)
+    return None
+
+
+class WindowSelection(FieldSelection):
+    """
+        # NOTES: a FieldSelection of the entities whose window property lies between date_from
+            and date_to inclusive,
+            in order of it and at most limit of them,
+            every entity when the bounds and limit are None
+            the bounds and limit must have passed window_error
+    """
+
+    def __init__(self, model: typing.Type[ndb.Model], window: str, fields: fields_type = None,
+                 date_from: typing.Any = None, date_to: typing.Any = None,
+                 limit: typing.Any = None, **filters):
+        super().__init__(model, fields, **filters)
+        self.window: str = window
+        self.date_from, self.date_to = window_dates(date_from=date_from, date_to=date_to)
+        self.limit: typing.Union[int, None] = page_limit(limit) if limit not in (None, "") else None
+
+    @property
+    def projection(self) -> typing.Union[typing.Tuple[str, ...], None]:
+        """
+            a projection has to hold the window property, the query is ordered on it
+        """
+        projection: typing.Union[typing.Tuple[str, ...], None] = super().projection
+        return projection if projection is not None and self.window in projection else None
+
+    def query(self) -> ndb.Query:
+        prop: ndb.Property = self.model._properties[self.window]
+        nodes: typing.List[ndb.Node] = [self.model._properties[name] == value
+                                        for name, value in self.filters.items()]
+        if self.date_from is not None:
+            nodes.append(prop >= self.date_from)
+        if self.date_to is not None:
+            nodes.append(prop <= self.date_to)
+        return self.model.query(*nodes, projection=self.projection).order(prop)
+
+    @property
+    def fetch_limit(self) -> typing.Union[int, None]:
+        """
+            the limit to fetch the query with, a query takes its limit when it is fetched
+        """
+        return self.limit
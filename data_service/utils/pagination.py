@@ -0,0 +1,81 @@
+"""
+    cursor pagination for the list endpoints
+
+    a list is read one page of at most limit entities at a time with fetch_page, every response
+    carries the cursor the next page starts at, None once the last page was returned. memoized views
+    key their cache entries on (limit, cursor) so every page is cached on its own.
+"""
+import binascii
+import typing
+from google.cloud import ndb
+from data_service.config import Config
+
+
+def page_limit(limit: typing.Any) -> typing.Union[int, None]:
+    """
+        limit requested by the client, PAGE_SIZE when none was given, None when limit is not valid
+    """
+    if limit is None or limit == "":
+        return Config.PAGE_SIZE
+    if isinstance(limit, str) and limit.isdigit():
+        limit = int(limit)
+    if isinstance(limit, bool) or not isinstance(limit, int) or \
+            not (0 < limit <= Config.MAX_PAGE_SIZE):
+        return None
+    return limit
+
+
+def start_cursor(cursor: typing.Any) -> typing.Union[ndb.Cursor, None]:
+    """
+        cursor returned with the previous page, raises ValueError when it is not one
+    """
+    if cursor is None or cursor == "":
+        return None
+    if not isinstance(cursor, str):
+        raise ValueError("cursor must be a string")
+    try:
+        return ndb.Cursor(urlsafe=cursor)
+    except (binascii.Error, ValueError, TypeError):
+        raise ValueError("cursor is not valid")
+
+
+def page_error(limit: typing.Any, cursor: typing.Any) -> typing.Union[str, None]:
+    """
+        message explaining why the page cannot be read, None if it can
+    """
+    if page_limit(limit) is None:
+        return "limit must be an integer between 1 and {}".format(Config.MAX_PAGE_SIZE)
+    try:
+        start_cursor(cursor)
+    except ValueError as error:
+        return str(error)
+    return None
+
+
+def next_page(next_cursor: typing.Union[ndb.Cursor, None], more: bool) -> typing.Union[str, None]:
+    return next_cursor.urlsafe().decode('utf-8') if more and next_cursor else None
+
+
+def fetch_page(query: ndb.Query, limit: typing.Any = None,
+               cursor: typing.Any = None) -> typing.Tuple[list, typing.Union[str, None]]:
+    """
+        one page of query and the cursor of the next page, None on the last page
+    """
+    entities, next_cursor, more = query.fetch_page(page_limit(limit),
+                                                   start_cursor=start_cursor(cursor))
+    return entities, next_page(next_cursor=next_cursor, more=more)
+
+
+def fetch_page_async(query: ndb.Query, limit: typing.Any = None,
+                     cursor: typing.Any = None) -> typing.Tuple[list, typing.Union[str, None]]:
+    future = query.fetch_page_async(page_limit(limit), start_cursor=start_cursor(cursor))
+    entities, next_cursor, more = future.get_result()
+    return entities, next_page(next_cursor=next_cursor, more=more)
+
+
+def page_arguments(data: typing.Union[typing.Mapping, None]) -> dict:
+    """
+        limit and cursor of a list request, data is the json body or the query string
+    """
+    data = data or {}
+    return {'limit': data.get('limit'), 'cursor': data.get('cursor')}
@@ -115,6 +115,17 @@ def get_payment_methods() -> typing.List[str]:
     return ['eft', 'paypal']
 
 
+def batch_ids_error(ids: typing.Any, limit: int, name: str = 'ids') -> typing.Union[str, None]:
+    """
+        message explaining why ids cannot be looked up as one batch, None if they can
+    """
+    if not isinstance(ids, list) or not all(isinstance(item, str) for item in ids):
+        return "{} must be a list of strings".format(name)
+    if len(ids) > limit:
+        return "at most {} {} can be looked up per request".format(limit, name)
+    return None
+
+
 if __name__ == '__main__':
     # today = datetime.datetime.now()
     # last_30_days_timestamp = timestamp() - get_days(days=30)
@@ -1,12 +1,14 @@
 import typing
 from flask import current_app, jsonify
 from data_service.main import cache_affiliates
+from data_service.cache.memoize import memoize
 from data_service.store.affiliates import AffiliatesValidators as ValidAffiliate
 from data_service.store.affiliates import RecruitsValidators as ValidRecruit
 from data_service.store.affiliates import EarningsValidators as ValidEarnings
 from data_service.store.affiliates import Affiliates, Recruits
 from data_service.config.exceptions import DataServiceError
 from data_service.utils.utils import create_id, return_ttl, end_of_month
+from data_service.utils.pagination import page_error, fetch_page
 from data_service.config.exception_handlers import handle_view_errors
 from data_service.config.use_context import use_context
 
@@ -64,7 +66,7 @@ class AffiliatesView(Validator):
         affiliate_id: typing.Union[str, None] = affiliate_data.get('affiliate_id')
         if (affiliate_id is None) or (affiliate_id == ""):
             return jsonify({'status': False, 'message': 'affiliate_id is required'}), 500
-        affiliate_instance: Affiliates = Affiliates.query(Affiliates.affiliate_id == affiliate_id).get()
+        affiliate_instance: Affiliates = Affiliates.get_by_natural_id(affiliate_id)
         if isinstance(affiliate_instance, Affiliates):
             affiliate_instance.total_recruits += add
             key = affiliate_instance.put(retries=self._max_retries, timeout=self._max_timeout)
@@ -86,7 +88,7 @@ class AffiliatesView(Validator):
         affiliate_id: typing.Union[None, str] = affiliate_data.get('affiliate_id')
         if (affiliate_id is None) or (affiliate_id == ""):
             return jsonify({'status': False, 'message': 'affiliate_id is required'}), 500
-        affiliate_instance: Affiliates = Affiliates.query(Affiliates.affiliate_id == affiliate_id).get()
+        affiliate_instance: Affiliates = Affiliates.get_by_natural_id(affiliate_id)
         if isinstance(affiliate_instance, Affiliates):
             affiliate_instance.is_active = False
             affiliate_instance.is_deleted = True
@@ -111,7 +113,7 @@ class AffiliatesView(Validator):
             return jsonify({'status': False, 'message': 'affiliate_id is required'}), 500
         if not isinstance(is_active, bool):
             raise ValueError("is_active is required and can only be a boolean")
-        affiliate_instance: Affiliates = Affiliates.query(Affiliates.affiliate_id == affiliate_id).get()
+        affiliate_instance: Affiliates = Affiliates.get_by_natural_id(affiliate_id)
         if isinstance(affiliate_instance, Affiliates):
             affiliate_instance.is_active = is_active
             key = affiliate_instance.put(retries=self._max_retries, timeout=self._max_timeout)
@@ -124,7 +126,7 @@ class AffiliatesView(Validator):
             message: str = "Unable to locate affiliate record"
             return jsonify({'status': False, 'message': message}), 500
 
-    @cache_affiliates.cached(timeout=return_ttl(name='medium'), unless=end_of_month)
+    @memoize(cache=cache_affiliates, timeout=return_ttl(name='medium'), unless=end_of_month)
     @use_context
     @handle_view_errors
     def get_affiliate(self, affiliate_data: dict) -> tuple:
@@ -139,7 +141,7 @@ class AffiliatesView(Validator):
         if uid is not None:
             affiliate_instance: Affiliates = Affiliates.query(Affiliates.uid == uid).get()
         else:
-            affiliate_instance: Affiliates = Affiliates.query(Affiliates.affiliate_id == affiliate_id).get()
+            affiliate_instance: Affiliates = Affiliates.get_by_natural_id(affiliate_id)
 
         if isinstance(affiliate_instance, Affiliates):
             return jsonify({'status': True,
@@ -148,21 +150,27 @@ class AffiliatesView(Validator):
         else:
             return jsonify({'status': False, 'message': 'unable to locate affiliate'}), 500
 
-    @cache_affiliates.cached(timeout=return_ttl(name='medium'), unless=end_of_month)
+    @memoize(cache=cache_affiliates, timeout=return_ttl(name='medium'), unless=end_of_month)
     @use_context
     @handle_view_errors
-    def get_all_affiliates(self) -> tuple:
+    def get_all_affiliates(self, limit: typing.Union[int, None] = None,
+                           cursor: typing.Union[str, None] = None) -> tuple:
         """
-            return all affiliates
+            return one page of affiliates
         """
-        affiliates_list: typing.List[Affiliates] = Affiliates.query().fetch()
+        message: typing.Union[str, None] = page_error(limit=limit, cursor=cursor)
+        if message is not None:
+            return jsonify({'status': False, 'message': message}), 500
+        affiliates_list, next_cursor = fetch_page(query=Affiliates.query(), limit=limit,
+                                                  cursor=cursor)
         payload = [affiliate.to_dict() for affiliate in affiliates_list]
-        message: str = "Successfully returned all affiliates"
+        message = "Successfully returned all affiliates"
         return jsonify({'status': True,
                         'message': message,
-                        'payload': payload}), 200
+                        'payload': payload,
+                        'cursor': next_cursor}), 200
 
-    @cache_affiliates.cached(timeout=return_ttl(name='medium'), unless=end_of_month)
+    @memoize(cache=cache_affiliates, timeout=return_ttl(name='medium'), unless=end_of_month)
     @use_context
     @handle_view_errors
     def get_active_affiliates(self) -> tuple:
@@ -175,7 +183,7 @@ class AffiliatesView(Validator):
         return jsonify({'status': True, 'message': 'successfully returned all affiliates',
                         'payload': payload}), 200
     
-    @cache_affiliates.cached(timeout=return_ttl(name='medium'), unless=end_of_month)
+    @memoize(cache=cache_affiliates, timeout=return_ttl(name='medium'), unless=end_of_month)
     @use_context
     @handle_view_errors
     def get_in_active_affiliates(self) -> tuple:
@@ -190,7 +198,7 @@ class AffiliatesView(Validator):
                         'message': message,
                         'payload': payload}), 200
 
-    @cache_affiliates.cached(timeout=return_ttl(name='medium'), unless=end_of_month)
+    @memoize(cache=cache_affiliates, timeout=return_ttl(name='medium'), unless=end_of_month)
     @use_context
     @handle_view_errors
     def get_deleted_affiliates(self) -> tuple:
@@ -204,7 +212,7 @@ class AffiliatesView(Validator):
                         'message': message,
                         'payload': payload}), 200
 
-    @cache_affiliates.cached(timeout=return_ttl(name='medium'), unless=end_of_month)
+    @memoize(cache=cache_affiliates, timeout=return_ttl(name='medium'), unless=end_of_month)
     @use_context
     @handle_view_errors
     def get_not_deleted_affiliates(self) -> tuple:
@@ -295,7 +303,7 @@ class RecruitsView(Validator):
             message: str = "Recruit does not exist"
             return jsonify({'status': False, 'message': message}), 500
 
-    @cache_affiliates.cached(timeout=return_ttl(name='short'), unless=end_of_month)
+    @memoize(cache=cache_affiliates, timeout=return_ttl(name='short'), unless=end_of_month)
     @use_context
     @handle_view_errors
     def get_recruit(self, recruit_data: dict) -> tuple:
@@ -310,7 +318,7 @@ class RecruitsView(Validator):
             message: str = "Recruit does not exist"
             return jsonify({'status': False, 'message': message}), 500
 
-    @cache_affiliates.cached(timeout=return_ttl(name='short'), unless=end_of_month)
+    @memoize(cache=cache_affiliates, timeout=return_ttl(name='short'), unless=end_of_month)
     @use_context
     @handle_view_errors
     def get_recruits_by_active_status(self, is_active: bool) -> tuple:
@@ -321,7 +329,7 @@ class RecruitsView(Validator):
         message: str = "{} recruits successfully fetched recruits by active status".format(str(len(recruits_list)))
         return jsonify({'status': True, 'message': message, 'payload': payload}), 200
 
-    @cache_affiliates.cached(timeout=return_ttl(name='short'), unless=end_of_month)
+    @memoize(cache=cache_affiliates, timeout=return_ttl(name='short'), unless=end_of_month)
     @use_context
     @handle_view_errors
     def get_recruits_by_deleted_status(self, is_deleted: bool) -> tuple:
@@ -332,7 +340,7 @@ class RecruitsView(Validator):
         message: str = "{} recruits successfully fetched recruits by deleted status".format(str(len(recruits_list)))
         return jsonify({'status': True, 'message': message, 'payload': payload}), 200
 
-    @cache_affiliates.cached(timeout=return_ttl(name='short'), unless=end_of_month)
+    @memoize(cache=cache_affiliates, timeout=return_ttl(name='short'), unless=end_of_month)
     @use_context
     @handle_view_errors
     def get_recruits_by_affiliate(self, affiliate_data: dict) -> tuple:
@@ -345,7 +353,7 @@ class RecruitsView(Validator):
         message: str = "{} recruits successfully fetched recruits by active status".format(str(len(recruits_list)))
         return jsonify({'status': True, 'message': message, 'payload': payload}), 200
 
-    @cache_affiliates.cached(timeout=return_ttl(name='short'), unless=end_of_month)
+    @memoize(cache=cache_affiliates, timeout=return_ttl(name='short'), unless=end_of_month)
     @use_context
     @handle_view_errors
     def get_recruits_by_active_affiliate(self, affiliate_data: dict, is_active: bool) -> tuple:
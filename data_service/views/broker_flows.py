@@ -0,0 +1,101 @@
+import datetime
+import typing
+from flask import jsonify
+from data_service.main import cache_stocks
+from data_service.cache.memoize import memoize
+from data_service.config import Config
+from data_service.config.exception_handlers import handle_view_errors
+from data_service.config.use_context import use_context
+from data_service.store.broker_flows import (broker_positions, concentration, read_broker_flows,
+                                             top_brokers)
+from data_service.utils.fields import window_dates, window_error
+from data_service.utils.pagination import page_limit
+from data_service.utils.utils import return_ttl
+from data_service.views.stocks import StockCacheTags
+
+date_type = typing.Union[datetime.date, str, None]
+
+
+def broker_flow_tags(stock_id: typing.Union[str, None] = None, **window) -> typing.List[str]:
+    # broker flows are built from the buy and sell volumes of the stock,
+    # any write to them evicts every window
+    return StockCacheTags.stock_volumes('buy_volume', stock_id=stock_id) + \
+        StockCacheTags.stock_volumes('sell_volume', stock_id=stock_id)
+
+
+def broker_flow_error(stock_id: typing.Union[str, None], date_from: date_type, date_to: date_type,
+                      top: typing.Any = None) -> typing.Union[str, None]:
+    """
+        message explaining why the broker flows of a window cannot be read, None if they can
+    """
+    if (stock_id is None) or (stock_id == ""):
+        return 'Stock ID cannot be None'
+    if top not in (None, "") and page_limit(top) is None:
+        return "top must be an integer between 1 and {}".format(Config.MAX_PAGE_SIZE)
+    return window_error(date_from=date_from, date_to=date_to)
+
+
+class BrokerFlowView:
+    """
+        which brokers bought and sold a stock over a window of days, read from the volume history
+        each (stock, window) is cached on its own until volumes of the stock are written
+    """
+
+    @memoize(cache=cache_stocks, timeout=return_ttl(name='medium'), tags=broker_flow_tags)
+    @use_context
+    @handle_view_errors
+    def get_broker_flows(self, stock_id: typing.Union[str, None] = None,
+                         date_from: date_type = None, date_to: date_type = None) -> tuple:
+        """
+            net volume and value of every broker of a stock
+            between date_from and date_to, largest net buyer first
+        """
+        message: typing.Union[str, None] = broker_flow_error(stock_id=stock_id, date_from=date_from,
+                                                             date_to=date_to)
+        if message is not None:
+            return jsonify({'status': False, 'message': message}), 500
+        start, end = window_dates(date_from=date_from, date_to=date_to)
+        payload: typing.List[dict] = broker_positions(
+            read_broker_flows(stock_id=stock_id, date_from=start, date_to=end))
+        message: str = 'successfully fetched broker flows'
+        return jsonify({'status': True, 'payload': payload, 'message': message}), 200
+
+    @memoize(cache=cache_stocks, timeout=return_ttl(name='medium'), tags=broker_flow_tags)
+    @use_context
+    @handle_view_errors
+    def get_top_brokers(self, stock_id: typing.Union[str, None] = None, date_from: date_type = None,
+                        date_to: date_type = None,
+                        top: typing.Union[int, str, None] = None) -> tuple:
+        """
+            the top accumulating and distributing brokers of a stock between date_from and date_to
+        """
+        message: typing.Union[str, None] = broker_flow_error(stock_id=stock_id, date_from=date_from,
+                                                             date_to=date_to, top=top)
+        if message is not None:
+            return jsonify({'status': False, 'message': message}), 500
+        start, end = window_dates(date_from=date_from, date_to=date_to)
+        payload: dict = top_brokers(
+            read_broker_flows(stock_id=stock_id, date_from=start, date_to=end),
+            top=page_limit(top) if top not in (None, "") else Config.BROKER_FLOWS_TOP)
+        message: str = 'successfully fetched top brokers'
+        return jsonify({'status': True, 'payload': payload, 'message': message}), 200
+
+    @memoize(cache=cache_stocks, timeout=return_ttl(name='medium'), tags=broker_flow_tags)
+    @use_context
+    @handle_view_errors
+    def get_broker_concentration(self, stock_id: typing.Union[str, None] = None,
+                                 date_from: date_type = None, date_to: date_type = None) -> tuple:
+        """
+            Herfindahl-Hirschman index of the brokers' shares
+            of the value of a stock traded between date_from
+            and date_to
+        """
+        message: typing.Union[str, None] = broker_flow_error(stock_id=stock_id, date_from=date_from,
+                                                             date_to=date_to)
+        if message is not None:
+            return jsonify({'status': False, 'message': message}), 500
+        start, end = window_dates(date_from=date_from, date_to=date_to)
+        payload: dict = concentration(
+            read_broker_flows(stock_id=stock_id, date_from=start, date_to=end))
+        message: str = 'successfully fetched broker concentration'
+        return jsonify({'status': True, 'payload': payload, 'message': message}), 200
@@ -0,0 +1,254 @@
+import typing
+import numpy as np
+import pandas as pd
+from flask import current_app, jsonify
+from google.cloud import ndb
+from data_service.main import cache_stocks
+from data_service.cache.invalidation import invalidate_tags
+from data_service.config import Config
+from data_service.config.exception_handlers import handle_view_errors
+from data_service.config.use_context import use_context
+from data_service.store.stocks import BuyVolumeModel, SellVolumeModel, NetVolumeModel
+from data_service.views.history import record_volume_history
+from data_service.views.market import queue_market_summaries
+from data_service.views.stocks import StockCacheTags
+
+# entities written per put_multi_async call, the datastore caps a commit at 500 entities
+PUT_CHUNK_SIZE: int = 500
+# earliest trading date accepted, matches date_string_to_date
+MIN_YEAR: int = 1990
+
+
+class VolumeSpec:
+    """
+        # NOTES: what a row of one kind of volume looks like and where it is stored
+    """
+
+    def __init__(self, kind: str, model: typing.Type[ndb.Model], int_fields: typing.List[str],
+                 percent_fields: typing.List[str], requires_transaction_id: bool,
+                 signed_fields: typing.Union[typing.List[str], None] = None):
+        self.kind: str = kind
+        self.model: typing.Type[ndb.Model] = model
+        self.int_fields: typing.List[str] = int_fields
+        self.percent_fields: typing.List[str] = percent_fields
+        self.requires_transaction_id: bool = requires_transaction_id
+        self.signed_fields: typing.List[str] = signed_fields or []
+
+    @property
+    def columns(self) -> typing.List[str]:
+        return ['transaction_id', 'stock_id', 'broker_id', 'date_created'] + self.int_fields
+
+
+volume_specs: typing.Dict[str, VolumeSpec] = {
+    'buy-volumes': VolumeSpec(kind='buy_volume', model=BuyVolumeModel,
+                              int_fields=['buy_volume', 'buy_value', 'buy_ave_price',
+                                          'buy_market_val_percent', 'buy_trade_count'],
+                              percent_fields=['buy_market_val_percent'],
+                              requires_transaction_id=False),
+    'sell-volumes': VolumeSpec(kind='sell_volume', model=SellVolumeModel,
+                               int_fields=['sell_volume', 'sell_value', 'sell_ave_price',
+                                           'sell_market_val_percent', 'sell_trade_count'],
+                               percent_fields=['sell_market_val_percent'],
+                               requires_transaction_id=False),
+    'net-volumes': VolumeSpec(kind='net_volume', model=NetVolumeModel,
+                              int_fields=['net_volume', 'net_value', 'total_value', 'total_volume'],
+                              percent_fields=[], requires_transaction_id=True,
+                              signed_fields=['net_volume', 'net_value']),
+}
+
+
+def _non_empty_strings(column: pd.Series) -> np.ndarray:
+    is_string: pd.Series = column.map(lambda value: isinstance(value, str))
+    return (is_string & column.where(is_string, "").str.strip().ne("")).to_numpy()
+
+
+def validate_volume_rows(rows: typing.List[typing.Any], spec: VolumeSpec
+                         ) -> typing.Tuple[pd.DataFrame, typing.List[typing.List[str]]]:
+    """
+        validates every row in one pass over columns,
+        returns the parsed rows and the errors of each row
+        rows without errors hold python values ready to be written
+    """
+    records: typing.List[dict] = [row if isinstance(row, dict) else {} for row in rows]
+    frame: pd.DataFrame = pd.DataFrame.from_records(records, columns=spec.columns,
+                                                    index=range(len(records)))
+    errors: typing.List[typing.List[str]] = [[] if isinstance(row, dict)
+                                             else ["row must be an object"] for row in rows]
+
+    def reject(mask: np.ndarray, message: str) -> None:
+        for index in np.flatnonzero(mask):
+            errors[index].append(message)
+
+    reject(~_non_empty_strings(frame['stock_id']), "stock id is required")
+
+    has_transaction_id: np.ndarray = _non_empty_strings(frame['transaction_id'])
+    if spec.requires_transaction_id:
+        reject(~has_transaction_id, "transaction id is required")
+    else:
+        reject(~has_transaction_id & frame['transaction_id'].notna().to_numpy(),
+               "transaction id must be a string")
+    has_broker_id: np.ndarray = _non_empty_strings(frame['broker_id'])
+    reject(~has_broker_id & frame['broker_id'].notna().to_numpy(), "broker id must be a string")
+
+    dates: pd.Series = pd.to_datetime(
+        frame['date_created'].astype('string').str.replace('/', '-', regex=False),
+        format='%Y-%m-%d', errors='coerce')
+    reject((dates.isna() | (dates.dt.year < MIN_YEAR)).to_numpy(),
+           "date_created must be a YYYY-MM-DD date")
+    frame['date_created'] = dates.dt.date
+
+    for field in spec.int_fields:
+        values: pd.Series = pd.to_numeric(frame[field], errors='coerce')
+        invalid: pd.Series = values.isna() | (values % 1 != 0)
+        if field not in spec.signed_fields:
+            invalid |= values < 0
+        if field in spec.percent_fields:
+            invalid |= values > 100
+        reject(invalid.to_numpy(), "{} must be a{} integer{}".format(
+            field, "n" if field in spec.signed_fields else " positive",
+            " no larger than 100" if field in spec.percent_fields else ""))
+        frame[field] = values.where(~invalid, 0).astype('int64')
+    return frame, errors
+
+
+class BulkVolumeView:
+    """
+        writes many buy, sell or net volume rows at once, rows are validated together and written
+        with put_multi_async in chunks of PUT_CHUNK_SIZE
+    """
+
+    def __init__(self):
+        self._max_retries = current_app.config.get('DATASTORE_RETRIES')
+        self._max_timeout = current_app.config.get('DATASTORE_TIMEOUT')
+        self._bulk_limit = current_app.config.get('BULK_INGEST_LIMIT', Config.BULK_INGEST_LIMIT)
+
+    @staticmethod
+    def existing_net_volumes(transaction_ids: typing.List[str]) -> typing.Dict[str, NetVolumeModel]:
+        """
+            net volumes are updated in place,
+            every row is looked up by key in batches of one get_multi
+        """
+        existing: typing.Dict[str, NetVolumeModel] = {}
+        for start in range(0, len(transaction_ids), Config.BATCH_LOOKUP_LIMIT):
+            batch: typing.List[str] = transaction_ids[start:start + Config.BATCH_LOOKUP_LIMIT]
+            existing.update({transaction_id: entity for transaction_id, entity
+                             in zip(batch, NetVolumeModel.get_multi_by_natural_id(batch))
+                             if entity is not None})
+        return existing
+
+    def build_entities(self, frame: pd.DataFrame, spec: VolumeSpec,
+                       indexes: typing.List[int]) -> typing.Tuple[typing.List[ndb.Model],
+                                                                  typing.List[str],
+                                                                  typing.Dict[str, dict]]:
+        """
+            the entities of the rows at indexes,
+            the cache tags they make stale and where the existing net volumes
+            among them were before, by transaction id
+        """
+        records: typing.List[dict] = frame.loc[indexes].to_dict(orient='records')
+        existing: typing.Dict[str, ndb.Model] = {}
+        if spec.model is NetVolumeModel:
+            existing = self.existing_net_volumes(
+                transaction_ids=[record['transaction_id'] for record in records])
+        entities: typing.List[ndb.Model] = []
+        stale_tags: typing.List[str] = []
+        moved_from: typing.Dict[str, dict] = {}
+        for record in records:
+            # rows without a transaction id or broker get them derived,
+            # the same row always maps to the same id
+            for field in ('transaction_id', 'broker_id'):
+                if not isinstance(record[field], str):
+                    record[field] = None
+            record.update({field: int(record[field]) for field in spec.int_fields})
+            entity: typing.Union[ndb.Model, None] = existing.get(record['transaction_id'])
+            if entity is None:
+                entity = spec.model()
+            else:
+                # an existing net volume may move to another stock or date
+                stale_tags.extend(
+                    StockCacheTags.volume_writes(spec.kind, transaction_id=entity.transaction_id,
+                                                 stock_id=entity.stock_id,
+                                                 date_created=entity.date_created))
+                moved_from[entity.transaction_id] = {'transaction_id': entity.transaction_id,
+                                                     'stock_id': entity.stock_id,
+                                                     'date_created': entity.date_created}
+            entity.populate(**record)
+            entity.derive_transaction_id()
+            entities.append(entity)
+        return entities, stale_tags, moved_from
+
+    def put_chunks(self, entities: typing.List[ndb.Model]) -> typing.List[typing.Union[str, None]]:
+        """
+            writes every chunk concurrently,
+            returns an error message per entity or None if it was written
+        """
+        chunks: typing.List[typing.List[ndb.Future]] = []
+        for start in range(0, len(entities), PUT_CHUNK_SIZE):
+            chunks.append(ndb.put_multi_async(entities[start:start + PUT_CHUNK_SIZE],
+                                              retries=self._max_retries, timeout=self._max_timeout))
+        ndb.wait_all([future for chunk in chunks for future in chunk])
+        failures: typing.List[typing.Union[str, None]] = []
+        for chunk in chunks:
+            for future in chunk:
+                error: typing.Union[BaseException, None] = future.exception()
+                failures.append(None if error is None else "unable to save row: {}".format(error))
+        return failures
+
+    @use_context
+    @handle_view_errors
+    def create_volumes_bulk(self, path: str, rows: typing.List[dict]) -> tuple:
+        """
+            path is one of buy-volumes, sell-volumes or net-volumes
+            payload holds one result per row, in the order rows were submitted
+        """
+        spec: typing.Union[VolumeSpec, None] = volume_specs.get(path)
+        if spec is None:
+            return jsonify(
+                {'status': False, 'message': 'unknown volume type: {}'.format(path)}), 500
+        if not isinstance(rows, list) or not rows:
+            return jsonify(
+                {'status': False, 'message': 'please provide a list of volume rows'}), 500
+        if len(rows) > self._bulk_limit:
+            message: str = 'at most {} rows can be submitted per request'.format(self._bulk_limit)
+            return jsonify({'status': False, 'message': message}), 500
+
+        frame, errors = validate_volume_rows(rows=rows, spec=spec)
+        valid: typing.List[int] = [index for index, row_errors in enumerate(errors)
+                                   if not row_errors]
+        entities, stale_tags, moved_from = self.build_entities(frame=frame, spec=spec,
+                                                               indexes=valid)
+        failures: typing.List[typing.Union[str, None]] = \
+            self.put_chunks(entities=entities) if entities else []
+
+        results: typing.List[dict] = [{'row': index, 'status': False, 'errors': row_errors}
+                                      for index, row_errors in enumerate(errors)]
+        tags: typing.Set[str] = set(stale_tags)
+        written_volumes: typing.List[dict] = []
+        for index, entity, failure in zip(valid, entities, failures):
+            if failure is None:
+                results[index] = {'row': index, 'status': True,
+                                  'transaction_id': entity.transaction_id}
+                written_volumes.append(entity.to_dict())
+                tags.update(
+                    StockCacheTags.volume_writes(spec.kind, transaction_id=entity.transaction_id,
+                                                 stock_id=entity.stock_id,
+                                                 date_created=entity.date_created))
+            else:
+                results[index]['errors'] = [failure]
+        if written_volumes:
+            record_volume_history(model=spec.model, volumes=written_volumes,
+                                  removed=[moved_from[volume['transaction_id']]
+                                           for volume in written_volumes
+                                           if volume['transaction_id'] in moved_from])
+        if tags:
+            invalidate_tags(cache=cache_stocks, tags=tags)
+        # market summaries are built from the buy and sell volumes,
+        # the days written are summarized again
+        if written_volumes and spec.model in (BuyVolumeModel, SellVolumeModel):
+            queue_market_summaries(dates=[volume['date_created'] for volume in written_volumes])
+
+        written: int = sum(1 for result in results if result['status'])
+        message: str = 'saved {} of {} rows'.format(written, len(rows))
+        return jsonify({'status': written == len(rows), 'message': message,
+                        'payload': {'written': written, 'failed': len(rows) - written,
+                                    'results': results}}), 200
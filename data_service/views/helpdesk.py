@@ -3,6 +3,7 @@ from flask import jsonify
 from data_service.store.helpdesk import HelpDeskValid, TicketValid, TicketThreadValid, Ticket
 from data_service.store.helpdesk import HelpDesk
 from data_service.utils.utils import create_id
+from data_service.utils.pagination import page_error, fetch_page, fetch_page_async
 from data_service.config.exception_handlers import handle_view_errors
 from data_service.config.use_context import use_context
 import re
@@ -218,7 +219,7 @@ class TicketView(Validators):
             ticket_id: str
             return: resolved ticket
         """
-        ticket_instance: Ticket = Ticket.query(Ticket.ticket_id == ticket_id).get()
+        ticket_instance: Ticket = Ticket.get_by_natural_id(ticket_id)
         if isinstance(ticket_instance, Ticket):
             ticket_instance.is_resolved = True
 
@@ -237,7 +238,7 @@ class TicketView(Validators):
             ticket_id: str
             return: resolved ticket
         """
-        ticket_instance: Ticket = Ticket.query(Ticket.ticket_id == ticket_id).get_async().get_result()
+        ticket_instance: Ticket = Ticket.get_by_natural_id_async(ticket_id).get_result()
         if isinstance(ticket_instance, Ticket):
             ticket_instance.is_resolved = True
             key = ticket_instance.put_async().get_result()
@@ -255,7 +256,7 @@ class TicketView(Validators):
                       email: str = typing.Union[str, None], cell: typing.Union[str, None] = None,
                       assigned_to_uid: typing.Union[str, None] = None) -> tuple:
 
-        ticket_instance: Ticket = Ticket.query(Ticket.ticket_id == ticket_id).get()
+        ticket_instance: Ticket = Ticket.get_by_natural_id(ticket_id)
         if isinstance(ticket_instance, Ticket):
             if topic is not None:
                 ticket_instance.topic = topic
@@ -283,7 +284,7 @@ class TicketView(Validators):
                                   email: str = typing.Union[str, None], cell: typing.Union[str, None] = None,
                                   assigned_to_uid: typing.Union[str, None] = None) -> tuple:
 
-        ticket_instance: Ticket = Ticket.query(Ticket.ticket_id == ticket_id).get_async().get_result()
+        ticket_instance: Ticket = Ticket.get_by_natural_id_async(ticket_id).get_result()
         if isinstance(ticket_instance, Ticket):
             if topic is not None:
                 ticket_instance.topic = topic
@@ -307,7 +308,7 @@ class TicketView(Validators):
     @use_context
     @handle_view_errors
     def assign_ticket(self, ticket_id: str, assigned_to_uid: str) -> tuple:
-        ticket_instance: Ticket = Ticket.query(Ticket.ticket_id == ticket_id).get()
+        ticket_instance: Ticket = Ticket.get_by_natural_id(ticket_id)
         if isinstance(ticket_instance, Ticket):
             ticket_instance.assigned_to_uid = assigned_to_uid
             key = ticket_instance.put()
@@ -320,7 +321,7 @@ class TicketView(Validators):
     @use_context
     @handle_view_errors
     async def assign_ticket_async(self, ticket_id: str, assigned_to_uid: str) -> tuple:
-        ticket_instance: Ticket = Ticket.query(Ticket.ticket_id == ticket_id).get_async().get_result()
+        ticket_instance: Ticket = Ticket.get_by_natural_id_async(ticket_id).get_result()
         if isinstance(ticket_instance, Ticket):
             ticket_instance.assigned_to_uid = assigned_to_uid
             key = ticket_instance.put_async().get_result()
@@ -336,7 +337,7 @@ class TicketView(Validators):
         """
             find ticket send email response mark ticket save ticket save response
         """
-        ticket_instance: Ticket = Ticket.query(Ticket.ticket_id == ticket_id).get()
+        ticket_instance: Ticket = Ticket.get_by_natural_id(ticket_id)
         if isinstance(ticket_instance, Ticket):
             ticket_instance.response_sent = True
             key = ticket_instance.put()
@@ -353,7 +354,7 @@ class TicketView(Validators):
         """
             find ticket send email response mark ticket save ticket save response
         """
-        ticket_instance: Ticket = Ticket.query(Ticket.ticket_id == ticket_id).get_async().get_result()
+        ticket_instance: Ticket = Ticket.get_by_natural_id_async(ticket_id).get_result()
         if isinstance(ticket_instance, Ticket):
             ticket_instance.response_sent = True
             key = ticket_instance.put_async().get_result()
@@ -370,7 +371,7 @@ class TicketView(Validators):
         """
             find ticket send notification update ticket to reflect that notification was sent
         """
-        ticket_instance: Ticket = Ticket.query(Ticket.ticket_id == ticket_id).get()
+        ticket_instance: Ticket = Ticket.get_by_natural_id(ticket_id)
         if isinstance(ticket_instance, Ticket):
             ticket_instance.response_sent = True
             key = ticket_instance.put()
@@ -387,7 +388,7 @@ class TicketView(Validators):
         """
             find ticket send notification update ticket to reflect that notification was sent
         """
-        ticket_instance: Ticket = Ticket.query(Ticket.ticket_id == ticket_id).get_async().get_result()
+        ticket_instance: Ticket = Ticket.get_by_natural_id_async(ticket_id).get_result()
         if isinstance(ticket_instance, Ticket):
             ticket_instance.response_sent = True
             key = ticket_instance.put_async().get_result()
@@ -404,7 +405,7 @@ class TicketView(Validators):
         """
             find ticket add response
         """
-        ticket_instance: Ticket = Ticket.query(Ticket.ticket_id == ticket_id).get()
+        ticket_instance: Ticket = Ticket.get_by_natural_id(ticket_id)
         if isinstance(ticket_instance, Ticket):
             ticket_instance.response_sent = True
             key = ticket_instance.put()
@@ -421,8 +422,7 @@ class TicketView(Validators):
         """
             find ticket add response
         """
-        ticket_instance: Ticket = Ticket.query(
-            Ticket.ticket_id == ticket_id).get_async().get_result()
+        ticket_instance: Ticket = Ticket.get_by_natural_id_async(ticket_id).get_result()
         if isinstance(ticket_instance, Ticket):
             ticket_instance.response_sent = True
             key = ticket_instance.put_async().get_result()
@@ -435,15 +435,27 @@ class TicketView(Validators):
 
     @use_context
     @handle_view_errors
-    def get_all_tickets(self) -> tuple:
-        tickets_list: typing.List[dict] = [ticket.to_dict() for ticket in Ticket.query().fetch()]
-        return jsonify({'status': True, 'payload': tickets_list, 'message': 'successfully returned tickets'}), 200
+    def get_all_tickets(self, limit: typing.Union[int, None] = None,
+                        cursor: typing.Union[str, None] = None) -> tuple:
+        message: typing.Union[str, None] = page_error(limit=limit, cursor=cursor)
+        if message is not None:
+            return jsonify({'status': False, 'message': message}), 500
+        tickets, next_cursor = fetch_page(query=Ticket.query(), limit=limit, cursor=cursor)
+        tickets_list: typing.List[dict] = [ticket.to_dict() for ticket in tickets]
+        return jsonify({'status': True, 'payload': tickets_list, 'cursor': next_cursor,
+                        'message': 'successfully returned tickets'}), 200
 
     @use_context
     @handle_view_errors
-    async def get_all_tickets_async(self) -> tuple:
-        tickets_list: typing.List[dict] = [ticket.to_dict() for ticket in Ticket.query().fetch_async().get_result()]
-        return jsonify({'status': True, 'payload': tickets_list, 'message': 'successfully returned tickets'}), 200
+    async def get_all_tickets_async(self, limit: typing.Union[int, None] = None,
+                                    cursor: typing.Union[str, None] = None) -> tuple:
+        message: typing.Union[str, None] = page_error(limit=limit, cursor=cursor)
+        if message is not None:
+            return jsonify({'status': False, 'message': message}), 500
+        tickets, next_cursor = fetch_page_async(query=Ticket.query(), limit=limit, cursor=cursor)
+        tickets_list: typing.List[dict] = [ticket.to_dict() for ticket in tickets]
+        return jsonify({'status': True, 'payload': tickets_list, 'cursor': next_cursor,
+                        'message': 'successfully returned tickets'}), 200
 
     @use_context
     @handle_view_errors
@@ -480,14 +492,14 @@ class TicketView(Validators):
     @use_context
     @handle_view_errors
     def fetch_ticket(self, ticket_id: str) -> tuple:
-        ticket_instance: Ticket = Ticket.query(Ticket.ticket_id == ticket_id).get()
+        ticket_instance: Ticket = Ticket.get_by_natural_id(ticket_id)
         return jsonify({'status': True, 'payload': ticket_instance.to_dict(),
                         'message': 'successfully returned ticket'}), 200
 
     @use_context
     @handle_view_errors
     async def fetch_ticket_async(self, ticket_id: str) -> tuple:
-        ticket_instance: Ticket = Ticket.query(Ticket.ticket_id == ticket_id).get_async().get_result()
+        ticket_instance: Ticket = Ticket.get_by_natural_id_async(ticket_id).get_result()
         return jsonify({'status': True, 'payload': ticket_instance.to_dict(),
                         'message': 'successfully returned ticket'}), 200
 
@@ -0,0 +1,130 @@
+"""
+    keeps the volume history of data_service.store.history up to date, never failing a write on it
+
+    the single row write paths queue a rebuild of the buckets they touched, which runs
+    VOLUME_HISTORY_DELAY seconds later, the rows of every broker of a stock and day landing together
+    are then written by one task, the other tasks of the bucket find it rebuilt since they were
+    queued. the bulk write paths merge their rows straight away and queue the buckets a merge could
+    not write. a bucket neither written nor queued is logged, /cron/build-volume-history records it.
+"""
+import datetime
+import logging
+import typing
+from flask import jsonify
+from data_service.config import Config
+from data_service.config.exception_handlers import handle_view_errors
+from data_service.config.use_context import use_context
+from data_service.store.history import (StaleBucket, bucket_months, mark_days, rebuild_bucket,
+                                        record_volumes)
+from data_service.store.stocks import BuyVolumeModel, SellVolumeModel, NetVolumeModel, VolumeMixin
+from data_service.tasks.tasks import create_task
+from data_service.utils.utils import date_string_to_date
+
+HISTORY_TASK_URI: str = '/task/stock/rebuild-volume-history'
+history_models: typing.Dict[str, typing.Type[VolumeMixin]] = {
+    model.side: model for model in (BuyVolumeModel, SellVolumeModel, NetVolumeModel)}
+logger: logging.Logger = logging.getLogger('data_service.history')
+bucket_type = typing.Tuple[str, datetime.date]
+
+
+def queue_history_rebuilds(model: typing.Type[VolumeMixin],
+                           buckets: typing.Iterable[bucket_type]) -> typing.List[bucket_type]:
+    """
+        queues a rebuild task for each stock and month of buckets, returns the ones not queued
+    """
+    queued_at: str = datetime.datetime.utcnow().isoformat()
+    not_queued: typing.List[bucket_type] = []
+    for stock_id, month in sorted(buckets):
+        payload: dict = {'side': model.side, 'stock_id': stock_id, 'month': str(month),
+                         'queued_at': queued_at}
+        # noinspection PyBroadException
+        try:
+            task = create_task(uri=HISTORY_TASK_URI, payload=payload,
+                               in_seconds=Config.VOLUME_HISTORY_DELAY)
+        except Exception:
+            task = None
+        if task is None:
+            not_queued.append((stock_id, month))
+    return not_queued
+
+
+def queue_volume_history(model: typing.Type[VolumeMixin], volumes: typing.Iterable[dict],
+                         removed: typing.Iterable[dict] = ()) -> int:
+    """
+        for the single row write paths, once the volumes were saved, marks their days recorded and
+        queues a rebuild of the buckets of volumes and removed, returns the buckets queued.
+        a bucket whose task could not be queued is rebuilt now, errors are logged, not raised
+    """
+    touched: typing.List[dict] = list(volumes) + list(removed)
+    # noinspection PyBroadException
+    try:
+        days: typing.List[datetime.date] = [volume['date_created'] for volume in touched
+                                            if volume.get('date_created')]
+        for future in mark_days(side=model.side, days=days):
+            future.result()
+    except Exception as error:
+        logger.warning("days of %s volumes not marked recorded: %s", model.side, error)
+
+    buckets: typing.Set[bucket_type] = bucket_months(touched)
+    not_queued: typing.List[bucket_type] = queue_history_rebuilds(model=model, buckets=buckets)
+    for stock_id, month in not_queued:
+        # noinspection PyBroadException
+        try:
+            rebuild_bucket(model=model, stock_id=stock_id, month=month)
+        except Exception as error:
+            logger.warning("%s volume history of %s %s not written: %s", model.side, stock_id,
+                           month, error)
+    return len(buckets) - len(not_queued)
+
+
+def record_volume_history(model: typing.Type[VolumeMixin], volumes: typing.List[dict],
+                          removed: typing.Iterable[dict] = ()) -> int:
+    """
+        for the bulk write paths, merges volumes and removed into the history straight away,
+        returns the buckets written. a merge still losing to concurrent writes after its retries
+        queues a rebuild of its buckets instead
+    """
+    removed = list(removed)
+    # noinspection PyBroadException
+    try:
+        return record_volumes(model=model, volumes=volumes, removed=removed)
+    except Exception as error:
+        logger.warning("%s volume history not merged, queueing rebuilds: %s", model.side, error)
+    buckets: typing.Set[bucket_type] = bucket_months(list(volumes) + removed)
+    for stock_id, month in queue_history_rebuilds(model=model, buckets=buckets):
+        logger.warning("%s volume history of %s %s not written", model.side, stock_id, month)
+    return 0
+
+
+class VolumeHistoryView:
+    """
+        rebuilds the volume history buckets the write paths queued
+    """
+
+    @use_context
+    @handle_view_errors
+    def rebuild_volume_history(self, side: typing.Union[str, None] = None,
+                               stock_id: typing.Union[str, None] = None,
+                               month: typing.Union[str, None] = None,
+                               queued_at: typing.Union[str, None] = None) -> tuple:
+        """
+            rebuilds the bucket of side, stock_id and month, one rebuilt since queued_at is kept
+            a bucket which kept changing answers 500 so the task is retried
+        """
+        model: typing.Union[typing.Type[VolumeMixin], None] = history_models.get(side)
+        if model is None:
+            message: str = 'unknown volume side: {}'.format(side)
+            return jsonify({'status': False, 'message': message}), 500
+        if (stock_id is None) or (stock_id == "") or (month is None) or (month == ""):
+            return jsonify({'status': False, 'message': 'stock_id and month are required'}), 500
+        since: typing.Union[datetime.datetime, None] = None
+        if queued_at:
+            since = datetime.datetime.fromisoformat(queued_at)
+        try:
+            rebuilt: bool = rebuild_bucket(model=model, stock_id=stock_id,
+                                           month=date_string_to_date(month), queued_at=since)
+        except StaleBucket as error:
+            return jsonify({'status': False, 'message': str(error)}), 500
+        message: str = '{} volume history of {} {} {}'.format(
+            side, stock_id, month, 'rebuilt' if rebuilt else 'is current')
+        return jsonify({'status': True, 'message': message}), 200
@@ -0,0 +1,111 @@
+import datetime
+import typing
+from flask import jsonify
+from data_service.main import cache_stocks
+from data_service.cache.invalidation import invalidate_tags
+from data_service.cache.memoize import memoize
+from data_service.config import Config
+from data_service.config.exception_handlers import handle_view_errors
+from data_service.config.use_context import use_context
+from data_service.store.net_volumes import NetVolumeTotal, get_day_totals
+from data_service.store.summaries import DailyMarketSummary, summarize_day
+from data_service.tasks.tasks import create_task
+from data_service.utils.utils import date_string_to_date, return_ttl
+
+SUMMARY_TASK_URI: str = '/task/stock/summarize-market-day'
+
+
+def market_summary_tags(
+        date_created: typing.Union[datetime.date, str, None] = None) -> typing.List[str]:
+    # dates are tagged as yyyy-mm-dd whichever way the client wrote them
+    try:
+        return ['market_summary:date:{}'.format(date_string_to_date(date_created))] \
+            if date_created else []
+    except ValueError:
+        return []
+
+
+def net_totals_tags(
+        date_created: typing.Union[datetime.date, str, None] = None) -> typing.List[str]:
+    try:
+        return ['net_totals:date:{}'.format(date_string_to_date(date_created))] \
+            if date_created else []
+    except ValueError:
+        return []
+
+
+def queue_market_summaries(dates: typing.Iterable[datetime.date]) -> int:
+    """
+        queues a summary task for each of dates after MARKET_SUMMARY_DELAY, returns the tasks queued
+        the tasks carry when they were queued, a day summarized since then is not summarized again
+    """
+    queued_at: str = datetime.datetime.utcnow().isoformat()
+    queued: int = 0
+    for day in sorted(set(dates)):
+        task = create_task(uri=SUMMARY_TASK_URI, payload={'date': str(day), 'queued_at': queued_at},
+                           in_seconds=Config.MARKET_SUMMARY_DELAY)
+        queued += task is not None
+    return queued
+
+
+class MarketSummaryView:
+    """
+        market wide daily rollups, written by summarize_market_day and read with one key lookup
+    """
+
+    @use_context
+    @handle_view_errors
+    def summarize_market_day(self, date_created: typing.Union[datetime.date, str, None] = None,
+                             queued_at: typing.Union[str, None] = None) -> tuple:
+        """
+            computes and saves the summary of a day,
+            a summary computed after queued_at already holds every
+            volume written before the task was queued and is kept
+        """
+        if (date_created is None) or (date_created == ""):
+            return jsonify({'status': False, 'message': 'date is required'}), 500
+        day: datetime.date = date_string_to_date(date_created)
+        if queued_at:
+            summary: typing.Union[DailyMarketSummary, None] = DailyMarketSummary.get_by_date(day)
+            if summary is not None and \
+                    summary.computed_at >= datetime.datetime.fromisoformat(queued_at):
+                message: str = 'market summary of {} is current'.format(day)
+                return jsonify({'status': True, 'payload': summary.to_dict(),
+                                'message': message}), 200
+        summary = summarize_day(date_created=day)
+        invalidate_tags(cache=cache_stocks, tags=market_summary_tags(date_created=day))
+        message: str = 'successfully summarized the market of {}'.format(day)
+        return jsonify({'status': True, 'payload': summary.to_dict(), 'message': message}), 200
+
+    @memoize(cache=cache_stocks, timeout=return_ttl(name='medium'), tags=market_summary_tags)
+    @use_context
+    @handle_view_errors
+    def get_market_summary(self,
+                           date_created: typing.Union[datetime.date, str, None] = None) -> tuple:
+        """
+            the summary of the market on a day
+        """
+        if (date_created is None) or (date_created == ""):
+            return jsonify({'status': False, 'message': 'date is required'}), 500
+        summary: typing.Union[DailyMarketSummary, None] = DailyMarketSummary.get_by_date(
+            date_string_to_date(date_created))
+        if summary is None:
+            return jsonify({'status': False, 'message': 'market summary not found'}), 500
+        message: str = 'successfully fetched market summary'
+        return jsonify({'status': True, 'payload': summary.to_dict(), 'message': message}), 200
+
+    @memoize(cache=cache_stocks, timeout=return_ttl(name='medium'), tags=net_totals_tags)
+    @use_context
+    @handle_view_errors
+    def get_net_totals(self, date_created: typing.Union[datetime.date, str, None] = None) -> tuple:
+        """
+            the net volume of every stock traded on a day,
+            every broker together, see cron_perform_net_calculations
+        """
+        if (date_created is None) or (date_created == ""):
+            return jsonify({'status': False, 'message': 'date is required'}), 500
+        totals: typing.List[NetVolumeTotal] = get_day_totals(
+            date_created=date_string_to_date(date_created))
+        message: str = 'successfully fetched net volume totals'
+        return jsonify({'status': True, 'payload': [total.to_dict() for total in totals],
+                        'message': message}), 200
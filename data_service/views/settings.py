@@ -2,9 +2,11 @@ import typing
 from flask import jsonify, current_app
 from data_service.config.types import dict_list_type, tickers_type
 from data_service.main import cache_stocks
+from data_service.cache.memoize import memoize
 from data_service.store.settings import (ExchangeDataModel,
                                          ScrappingPagesModel, StockAPIEndPointModel)
 from data_service.utils.utils import return_ttl, end_of_month
+from data_service.utils.pagination import page_error, fetch_page
 from data_service.config.exception_handlers import handle_view_errors
 from data_service.config.use_context import use_context
 exc_list_type = typing.List[ExchangeDataModel]
@@ -43,7 +45,7 @@ class ExchangeDataView:
     @use_context
     @handle_view_errors
     def update_exchange(self, exchange_id: str = None, country: str = None, name: str = None) -> tuple:
-        exchange_instance: ExchangeDataModel = ExchangeDataModel.query(ExchangeDataModel.exchange_id == exchange_id).get()
+        exchange_instance: ExchangeDataModel = ExchangeDataModel.get_by_natural_id(exchange_id)
         if isinstance(exchange_instance, ExchangeDataModel):
             exchange_instance.set_exchange_country(country=country)
             exchange_instance.set_exchange_name(exchange=name)
@@ -54,7 +56,7 @@ class ExchangeDataView:
     @use_context
     @handle_view_errors
     def add_complete_stock_tickers_list(self, exchange_id: str, tickers_list: list) -> tuple:
-        exchange_instance: ExchangeDataModel = ExchangeDataModel.query(ExchangeDataModel.exchange_id == exchange_id).get()
+        exchange_instance: ExchangeDataModel = ExchangeDataModel.get_by_natural_id(exchange_id)
         if isinstance(exchange_instance, ExchangeDataModel):
             if exchange_instance.set_exchange_tickers_list(tickers_list=tickers_list) is True:
                 exchange_instance.put()
@@ -65,11 +67,11 @@ class ExchangeDataView:
         else:
             return jsonify({'status': False, 'message': 'unable to find the exchange please inform admin'}), 500
 
-    @cache_stocks.cached(timeout=return_ttl(name='medium'))
+    @memoize(cache=cache_stocks, timeout=return_ttl(name='medium'))
     @use_context
     @handle_view_errors
     def get_exchange_tickers(self, exchange_id: str) -> tuple:
-        exchange_instance: ExchangeDataModel = ExchangeDataModel.query(ExchangeDataModel.exchange_id == exchange_id).get()
+        exchange_instance: ExchangeDataModel = ExchangeDataModel.get_by_natural_id(exchange_id)
         if isinstance(exchange_instance, ExchangeDataModel):
             tickers_list: tickers_type = exchange_instance.exchange_tickers_list
             return jsonify({'status': True, 'message': 'successfully obtained exchange tickers',
@@ -77,30 +79,37 @@ class ExchangeDataView:
         else:
             return jsonify({'status': False, 'message': 'Unable to locate exchange'}), 500
 
-    @cache_stocks.cached(timeout=return_ttl(name='medium'))
+    @memoize(cache=cache_stocks, timeout=return_ttl(name='medium'))
     @use_context
     @handle_view_errors
     def get_exchange(self, exchange_id: str) -> tuple:
-        exchange_instance: ExchangeDataModel = ExchangeDataModel.query(ExchangeDataModel.exchange_id == exchange_id).get()
+        exchange_instance: ExchangeDataModel = ExchangeDataModel.get_by_natural_id(exchange_id)
         if isinstance(exchange_instance, ExchangeDataModel):
             return jsonify({'status': True, 'message': 'successfully fetched an exchange',
                             'payload': exchange_instance.to_dict()}), 200
         return jsonify({'status': False, 'message': 'error unable to locate exchange'}), 500
 
-    @cache_stocks.cached(timeout=return_ttl(name='medium'))
+    @memoize(cache=cache_stocks, timeout=return_ttl(name='medium'),
+             stale_ttl=return_ttl(name='short'))
     @use_context
     @handle_view_errors
-    def return_all_exchanges(self) -> tuple:
-        exchange_list: exc_list_type = ExchangeDataModel.query().fetch()
+    def return_all_exchanges(self, limit: typing.Union[int, None] = None,
+                             cursor: typing.Union[str, None] = None) -> tuple:
+        message: typing.Union[str, None] = page_error(limit=limit, cursor=cursor)
+        if message is not None:
+            return jsonify({'status': False, 'message': message}), 500
+        exchange_list, next_cursor = fetch_page(query=ExchangeDataModel.query(), limit=limit,
+                                                cursor=cursor)
         payload: dict_list_type = [exchange.to_dict() for exchange in exchange_list]
-        message: str = 'successfully retrieved Exchanges List'
-        return jsonify({'status': True, 'message': message, 'payload': payload}), 200
+        message = 'successfully retrieved Exchanges List'
+        return jsonify({'status': True, 'message': message, 'payload': payload,
+                        'cursor': next_cursor}), 200
 
-    @cache_stocks.cached(timeout=return_ttl(name='short'))
+    @memoize(cache=cache_stocks, timeout=return_ttl(name='short'))
     @use_context
     @handle_view_errors
     def return_exchange_errors(self, exchange_id: str) -> tuple:
-        exchange_instance: ExchangeDataModel = ExchangeDataModel.query(ExchangeDataModel.exchange_id == exchange_id).get()
+        exchange_instance: ExchangeDataModel = ExchangeDataModel.get_by_natural_id(exchange_id)
         if isinstance(exchange_instance, ExchangeDataModel):
             payload: typing.List[str] = exchange_instance.errors_list.split(",")
             return jsonify({'status': True,
@@ -112,7 +121,7 @@ class ExchangeDataView:
     @use_context
     @handle_view_errors
     def delete_exchange(self, exchange_id: str) -> tuple:
-        exchange_instance: ExchangeDataModel = ExchangeDataModel.query(ExchangeDataModel.exchange_id == exchange_id).get()
+        exchange_instance: ExchangeDataModel = ExchangeDataModel.get_by_natural_id(exchange_id)
         if isinstance(exchange_instance, ExchangeDataModel):
             exchange_instance.key.delete()
             pages_list: scrape_list_type = ScrappingPagesModel.query(
@@ -135,7 +144,7 @@ class ScrappingPagesView:
         self._max_retries = current_app.config.get('DATASTORE_RETRIES')
         self._max_timeout = current_app.config.get('DATASTORE_TIMEOUT')
 
-    @cache_stocks.cached(timeout=return_ttl(name='long'), unless=end_of_month)
+    @memoize(cache=cache_stocks, timeout=return_ttl(name='long'), unless=end_of_month)
     @use_context
     @handle_view_errors
     def return_scrappers_settings(self) -> tuple:
@@ -2,10 +2,13 @@ import typing
 import functools
 from google.api_core.exceptions import RetryError, Aborted
 from flask import current_app, jsonify
+from google.cloud import ndb
 from google.cloud.ndb.exceptions import BadRequestError, BadQueryError
 from data_service.main import cache_stocks
+from data_service.cache.memoize import memoize
 from data_service.config.exceptions import DataServiceError
 from data_service.store.stocks import StockPriceData, Stock
+from data_service.store.uniqueness import lookup_errors
 from datetime import date
 from data_service.utils.utils import create_id, return_ttl, date_days_ago
 from data_service.config.exception_handlers import handle_view_errors
@@ -71,7 +74,7 @@ class CatchStockPriceDataErrors:
         try:
             if not isinstance(stock_id, str):
                 return None
-            stock_instance: Stock = Stock.query(Stock.stock_id == stock_id).get()
+            stock_instance: Stock = Stock.get_by_natural_id(stock_id)
             if isinstance(stock_instance, Stock):
                 return True
             return False
@@ -91,7 +94,7 @@ class CatchStockPriceDataErrors:
         try:
             if not isinstance(stock_id, str):
                 return None
-            stock_instance: Stock = Stock.query(Stock.stock_id == stock_id).get_async().get_result()
+            stock_instance: Stock = Stock.get_by_natural_id_async(stock_id).get_result()
             if isinstance(stock_instance, Stock):
                 return True
             return False
@@ -156,6 +159,24 @@ class CatchStockPriceDataErrors:
         except Aborted:
             return None
 
+    @staticmethod
+    @ndb.tasklet
+    def price_lookups_tasklet(stock_id: typing.Union[str, None],
+                              date_created: typing.Union[date, None]
+                              ) -> typing.Generator[tuple, tuple, None]:
+        """
+            whether the stock exists and whether it has price data for date_created,
+            None where an id is not valid
+            both lookups are in flight together
+        """
+        if not isinstance(stock_id, str) or not isinstance(date_created, date):
+            raise ndb.Return(None, None)
+        prices: ndb.Query = StockPriceData.query(StockPriceData.stock_id == stock_id,
+                                                 StockPriceData.date_created == date_created)
+        stock, price_data_key = yield (Stock.get_by_natural_id_async(stock_id),
+                                       prices.get_async(keys_only=True))
+        raise ndb.Return(isinstance(stock, Stock), price_data_key is not None)
+
     def can_add_price_data(self, stock_id: typing.Union[str, None],
                            date_created: typing.Union[date, None]) -> bool:
         is_stock_exist = self.stock_exist(stock_id=stock_id)
@@ -167,8 +188,11 @@ class CatchStockPriceDataErrors:
 
     async def can_add_price_data_async(self, stock_id: typing.Union[str, None],
                                        date_created: typing.Union[date, None]) -> bool:
-        is_stock_exist = await self.stock_exist_async(stock_id=stock_id)
-        is_price_data_exist = await self.price_data_exist_async(stock_id=stock_id, date_created=date_created)
+        try:
+            is_stock_exist, is_price_data_exist = self.price_lookups_tasklet(
+                stock_id=stock_id, date_created=date_created).result()
+        except lookup_errors:
+            is_stock_exist, is_price_data_exist = None, None
         if isinstance(is_stock_exist, bool) and isinstance(is_price_data_exist, bool):
             return is_stock_exist and not is_price_data_exist
         message: str = "Unable to read database"
@@ -240,7 +264,7 @@ class StockPriceDataView(CatchStockPriceDataErrors):
                         'message': 'successfully saved stock data',
                         "payload": stock_price_data_instance.to_dict()}), 200
 
-    @cache_stocks.cached(timeout=return_ttl(name='medium'))
+    @memoize(cache=cache_stocks, timeout=return_ttl(name='medium'))
     @use_context
     @handle_view_errors
     def get_stock_price_data_list_by_date(self, date_created: typing.Union[date, None]) -> tuple:
@@ -250,7 +274,7 @@ class StockPriceDataView(CatchStockPriceDataErrors):
         payload: typing.List[dict] = [price_data.to_dict() for price_data in stock_price_data_list]
         return jsonify({'status': True, 'payload': payload, 'message': 'successfully fetched stock price data'}), 200
 
-    @cache_stocks.cached(timeout=return_ttl(name='medium'))
+    @memoize(cache=cache_stocks, timeout=return_ttl(name='medium'))
     @use_context
     @handle_view_errors
     async def get_stock_price_data_list_by_date_async(self, date_created: typing.Union[date, None]) -> tuple:
@@ -260,7 +284,7 @@ class StockPriceDataView(CatchStockPriceDataErrors):
         payload: typing.List[dict] = [price_data.to_dict() for price_data in stock_price_data_list]
         return jsonify({'status': True, 'payload': payload, 'message': 'successfully fetched stock price data'}), 200
 
-    @cache_stocks.cached(timeout=return_ttl(name='medium'))
+    @memoize(cache=cache_stocks, timeout=return_ttl(name='medium'))
     @use_context
     @handle_view_errors
     def get_monthly_stock_price_data_list_by_stock_id(self, stock_id: typing.Union[str, None]) -> tuple:
@@ -273,7 +297,7 @@ class StockPriceDataView(CatchStockPriceDataErrors):
         message: str = 'successfully fetched monthly stock price data'
         return jsonify({'status': True, 'payload': payload, 'message': message}), 200
 
-    @cache_stocks.cached(timeout=return_ttl(name='medium'))
+    @memoize(cache=cache_stocks, timeout=return_ttl(name='medium'))
     @use_context
     @handle_view_errors
     async def get_monthly_stock_price_data_list_by_stock_id_async(self, stock_id: typing.Union[str, None]) -> tuple:
@@ -286,7 +310,7 @@ class StockPriceDataView(CatchStockPriceDataErrors):
         message: str = 'successfully fetched monthly stock price data'
         return jsonify({'status': True, 'payload': payload, 'message': message}), 200
 
-    @cache_stocks.cached(timeout=return_ttl(name='medium'))
+    @memoize(cache=cache_stocks, timeout=return_ttl(name='medium'))
     @use_context
     @handle_view_errors
     def get_weekly_stock_price_data_list_by_stock_id(self, stock_id: typing.Union[str, None]) -> tuple:
@@ -300,7 +324,7 @@ class StockPriceDataView(CatchStockPriceDataErrors):
         message: str = 'successfully fetched weekly stock price data'
         return jsonify({'status': True, 'payload': payload, 'message': message}), 200
 
-    @cache_stocks.cached(timeout=return_ttl(name='medium'))
+    @memoize(cache=cache_stocks, timeout=return_ttl(name='medium'))
     @use_context
     @handle_view_errors
     async def get_weekly_stock_price_data_list_by_stock_id_async(self, stock_id: typing.Union[str, None]) -> tuple:
@@ -314,7 +338,7 @@ class StockPriceDataView(CatchStockPriceDataErrors):
         message: str = 'successfully fetched weekly stock price data'
         return jsonify({'status': True, 'payload': payload, 'message': message}), 200
 
-    @cache_stocks.cached(timeout=return_ttl(name='medium'))
+    @memoize(cache=cache_stocks, timeout=return_ttl(name='medium'))
     @use_context
     @handle_view_errors
     def get_n_days_stock_price_data_list_by_stock_id(self, stock_id: typing.Union[str, None],
@@ -332,7 +356,7 @@ class StockPriceDataView(CatchStockPriceDataErrors):
         message: str = 'successfully fetched weekly stock price data'
         return jsonify({'status': True, 'payload': payload, 'message': message}), 200
 
-    @cache_stocks.cached(timeout=return_ttl(name='medium'))
+    @memoize(cache=cache_stocks, timeout=return_ttl(name='medium'))
     @use_context
     @handle_view_errors
     async def get_n_days_stock_price_data_list_by_stock_id_async(self, stock_id: typing.Union[str, None],
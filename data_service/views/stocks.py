@@ -2,18 +2,131 @@ import typing
 import functools
 from datetime import date as date_class
 from datetime import datetime, timezone
-from google.api_core.exceptions import RetryError, Aborted
 from flask import current_app, jsonify
-from google.cloud.ndb.exceptions import BadRequestError, BadQueryError
+from google.cloud import ndb
 from data_service.main import cache_stocks
+from data_service.cache.memoize import memoize
+from data_service.cache.invalidation import invalidate_tags
+from data_service.cache.entities import get_multi_cached
 from data_service.config.exceptions import DataServiceError
-from data_service.store.stocks import Stock, Broker, StockModel, BuyVolumeModel, SellVolumeModel, NetVolumeModel
-from data_service.utils.utils import date_string_to_date, create_id, return_ttl, end_of_month
+from data_service.store.stocks import (Stock, Broker, StockModel, BuyVolumeModel, SellVolumeModel,
+                                       NetVolumeModel, TransactionIds)
+from data_service.store.history import HistorySelection
+from data_service.views.history import queue_volume_history
+from data_service.store.uniqueness import ExistsCheck, exists_concurrently
+from data_service.utils.utils import (date_string_to_date, create_id, return_ttl, end_of_month,
+                                      batch_ids_error)
+from data_service.utils.pagination import page_error, page_limit, fetch_page
+from data_service.utils.export import export_response
+from data_service.utils.fields import (FieldSelection, WindowSelection, fields_error, fields_type,
+                                       window_dates, window_error)
 from data_service.config import Config
 from data_service.config.exception_handlers import handle_view_errors
 from data_service.config.use_context import use_context
 
 stock_list_type = typing.List[Stock]
+volume_selection_type = typing.Union[WindowSelection, HistorySelection]
+# kinds that can be streamed whole by StockView.export, keyed by the path of the export route
+export_models: typing.Dict[str, typing.Type[ndb.Model]] = {
+    'stocks': Stock, 'brokers': Broker, 'stock-models': StockModel, 'buy-volumes': BuyVolumeModel,
+    'sell-volumes': SellVolumeModel, 'net-volumes': NetVolumeModel}
+
+
+def stock_volumes_selection(model: typing.Type[ndb.Model], stock_id: str,
+                            fields: fields_type = None,
+                            date_from: typing.Union[date_class, str, None] = None,
+                            date_to: typing.Union[date_class, str, None] = None,
+                            limit: typing.Union[int, None] = None) -> volume_selection_type:
+    """
+        the daily volumes of one stock between date_from
+        and date_to in date order, at most limit of them,
+        read from the volume history when VOLUME_HISTORY_READS is on,
+        the window must have passed window_error
+    """
+    if current_app.config.get('VOLUME_HISTORY_READS'):
+        start, end = window_dates(date_from=date_from, date_to=date_to)
+        return HistorySelection(model=model, stock_id=stock_id, fields=fields, date_from=start,
+                                date_to=end,
+                                limit=page_limit(limit) if limit not in (None, "") else None)
+    return WindowSelection(model=model, window='date_created', fields=fields, date_from=date_from,
+                           date_to=date_to, limit=limit, stock_id=stock_id)
+
+
+class StockCacheTags:
+    """
+        # NOTES: invalidation tags shared by the cached reads and the writes of StockView
+            each read is tagged with the entities it returns,
+            each write bumps the tags of the entities
+            it changed, before and after the change, so only the reads depending on them are evicted
+    """
+
+    def __init__(self):
+        pass
+
+    @staticmethod
+    def all_stocks(**page) -> typing.List[str]:
+        # every page of a list shares the tag of the list
+        return ['stocks']
+
+    @staticmethod
+    def stock(stock_id: typing.Union[str, None] = None, stock_code: typing.Union[str, None] = None,
+              symbol: typing.Union[str, None] = None) -> typing.List[str]:
+        identifiers: typing.List[tuple] = [('id', stock_id), ('code', stock_code),
+                                           ('symbol', symbol)]
+        return ['stock:{}:{}'.format(name, value) for name, value in identifiers if value]
+
+    @staticmethod
+    def all_brokers(**page) -> typing.List[str]:
+        return ['brokers']
+
+    @staticmethod
+    def broker(broker_id: typing.Union[str, None] = None,
+               broker_code: typing.Union[str, None] = None) -> typing.List[str]:
+        identifiers: typing.List[tuple] = [('id', broker_id), ('code', broker_code)]
+        return ['broker:{}:{}'.format(name, value) for name, value in identifiers if value]
+
+    @staticmethod
+    def all_stock_models(**page) -> typing.List[str]:
+        return ['stock_models']
+
+    @staticmethod
+    def stock_model(transaction_id: typing.Union[str, None] = None) -> typing.List[str]:
+        return ['stock_model:{}'.format(transaction_id)] if transaction_id else []
+
+    @staticmethod
+    def volume(kind: str, transaction_id: typing.Union[str, None] = None,
+               date_created: typing.Union[date_class, str, None] = None,
+               stock_id: typing.Union[str, None] = None) -> typing.List[str]:
+        """
+            a single volume, looked up by transaction_id or by stock_id on date_created
+        """
+        if transaction_id:
+            return ['{}:transaction:{}'.format(kind, transaction_id)]
+        if date_created and stock_id:
+            return ['{}:stock_date:{}:{}'.format(kind, stock_id, date_created)]
+        return []
+
+    @staticmethod
+    def day_volumes(kind: str, date_created: typing.Union[date_class, str, None] = None,
+                    **selection) -> typing.List[str]:
+        return ['{}:date:{}'.format(kind, date_created)] if date_created else []
+
+    @staticmethod
+    def stock_volumes(kind: str, stock_id: typing.Union[str, None] = None,
+                      **selection) -> typing.List[str]:
+        return ['{}:stock:{}'.format(kind, stock_id)] if stock_id else []
+
+    @staticmethod
+    def volume_writes(kind: str, transaction_id: typing.Union[str, None],
+                      stock_id: typing.Union[str, None],
+                      date_created: typing.Union[date_class, str, None]) -> typing.List[str]:
+        """
+            every tag a write to one volume of kind touches
+        """
+        return (StockCacheTags.volume(kind, transaction_id=transaction_id) +
+                StockCacheTags.volume(kind, date_created=date_created, stock_id=stock_id) +
+                StockCacheTags.day_volumes(kind, date_created=date_created) +
+                StockCacheTags.stock_volumes(kind, stock_id=stock_id))
 
 
 class StockDataWrappers:
@@ -115,17 +228,21 @@ class StockDataWrappers:
             else:
                 return jsonify({'status': False, 'message': "buy trade account"}), 500
 
+            # optional, volumes without a broker are the stock's total for the day
+            broker_id: typing.Union[str, None] = buy_data.get('broker_id') or None
+
             if "transaction_id" in buy_data and buy_data["transaction_id"] != "":
                 transaction_id: typing.Union[str, None] = buy_data.get("transaction_id")
 
                 return func(stock_id=stock_id, date_created=date_created, buy_volume=buy_volume,
                             buy_value=buy_value, buy_ave_price=buy_ave_price,
                             buy_market_val_percent=buy_market_val_percent, buy_trade_count=buy_trade_count,
-                            transaction_id=transaction_id, *args)
+                            broker_id=broker_id, transaction_id=transaction_id, *args)
 
             return func(stock_id=stock_id, date_created=date_created, buy_volume=buy_volume,
                         buy_value=buy_value, buy_ave_price=buy_ave_price,
-                        buy_market_val_percent=buy_market_val_percent, buy_trade_count=buy_trade_count, *args)
+                        buy_market_val_percent=buy_market_val_percent,
+                        buy_trade_count=buy_trade_count, broker_id=broker_id, *args)
 
         return wrapper
 
@@ -174,17 +291,20 @@ class StockDataWrappers:
                 sell_trade_count: typing.Union[int, None] = int(sell_data.get("sell_trade_count"))
             else:
                 return jsonify({"status": False, "message": "sell trade account percent price is required"}), 500
+            # optional, volumes without a broker are the stock's total for the day
+            broker_id: typing.Union[str, None] = sell_data.get('broker_id') or None
             if 'transaction_id' in sell_data and sell_data['transaction_id'] != "":
                 transaction_id: typing.Union[str, None] = sell_data['transaction_id']
 
                 return func(stock_id=stock_id, date_created=date_created, sell_volume=sell_volume,
                             sell_value=sell_value,
                             sell_ave_price=sell_ave_price, sell_market_val_percent=sell_market_val_percent,
-                            sell_trade_count=sell_trade_count, transaction_id=transaction_id, *args)
+                            sell_trade_count=sell_trade_count, broker_id=broker_id,
+                            transaction_id=transaction_id, *args)
 
             return func(stock_id=stock_id, date_created=date_created, sell_volume=sell_volume, sell_value=sell_value,
                         sell_ave_price=sell_ave_price, sell_market_val_percent=sell_market_val_percent,
-                        sell_trade_count=sell_trade_count, *args)
+                        sell_trade_count=sell_trade_count, broker_id=broker_id, *args)
 
         return wrapper
 
@@ -207,10 +327,11 @@ class StockDataWrappers:
             else:
                 return jsonify({'status': False, 'message': "date_created is required"}), 500
 
-            if "transaction_id" in net_volume_data and net_volume_data["transaction_id"] != "":
-                transaction_id: typing.Union[str, None] = net_volume_data.get("transaction_id")
-            else:
-                return jsonify({'status': False, 'message': "transaction id is required"}), 500
+            # optional, derived from the volume when not given
+            transaction_id: typing.Union[str, None] = net_volume_data.get("transaction_id") or None
+
+            # optional, volumes without a broker are the stock's total for the day
+            broker_id: typing.Union[str, None] = net_volume_data.get('broker_id') or None
 
             if "net_volume" in net_volume_data and net_volume_data["net_volume"] != "":
                 net_volume: typing.Union[int, None] = int(net_volume_data.get("net_volume"))
@@ -234,7 +355,7 @@ class StockDataWrappers:
 
             return func(stock_id=stock_id, date_created=date_created, transaction_id=transaction_id,
                         net_volume=net_volume, net_value=net_value, total_value=total_value,
-                        total_volume=total_volume, *args)
+                        total_volume=total_volume, broker_id=broker_id, *args)
 
         return wrapper
 
@@ -257,153 +378,31 @@ class CatchStockErrors(StockViewContext):
         super(CatchStockErrors, self).__int__()
 
     @staticmethod
-    def symbol_exist(symbol: typing.Union[str, None]) -> typing.Union[None, bool]:
-        # noinspection DuplicatedCode
-        try:
-            if not isinstance(symbol, str):
-                return None
-            stock_instance: Stock = Stock.query(Stock.symbol == symbol).get()
-        except BadRequestError:
-            return None
-        except BadQueryError:
-            return None
-        except ConnectionRefusedError:
-            return None
-        except RetryError:
-            return None
-        except Aborted:
-            return None
-        if isinstance(stock_instance, Stock):
-            return True
-        return False
-
-    @staticmethod
-    async def symbol_exist_async(symbol: typing.Union[str, None]) -> typing.Union[None, bool]:
-        # noinspection DuplicatedCode
-        try:
-            if not isinstance(symbol, str):
-                return None
-            stock_instance: Stock = Stock.query(Stock.symbol == symbol).get_async().get_result()
-        except BadRequestError:
-            return None
-        except BadQueryError:
-            return None
-        except ConnectionRefusedError:
-            return None
-        except RetryError:
-            return None
-        except Aborted:
-            return None
-        if isinstance(stock_instance, Stock):
-            return True
-        return False
-
-    @staticmethod
-    def stock_code_exist(stock_code: typing.Union[str, None]) -> typing.Union[None, bool]:
-        try:
-            if not isinstance(stock_code, str):
-                return None
-            stock_list: stock_list_type = Stock.query(Stock.stock_code == stock_code).get()
-        except BadRequestError:
-            return None
-        except BadQueryError:
-            return None
-        except ConnectionRefusedError:
-            return None
-        except RetryError:
-            return None
-        except Aborted:
-            return None
-
-        if isinstance(stock_list, list) and len(stock_list) > 0:
-            return True
-        return False
-
-    @staticmethod
-    async def stock_code_exist_async(stock_code: typing.Union[str, None]) -> typing.Union[None, bool]:
-        try:
-            if not isinstance(stock_code, str):
-                return None
-            stock_list: stock_list_type = Stock.query(Stock.stock_code == stock_code).get_async().get_result()
-        except BadRequestError:
-            return None
-        except BadQueryError:
-            return None
-        except ConnectionRefusedError:
-            return None
-        except RetryError:
-            return None
-        except Aborted:
-            return None
-
-        if isinstance(stock_list, list) and len(stock_list) > 0:
-            return True
-        return False
-
-    @staticmethod
-    def stock_id_exist(stock_id: typing.Union[str, None]) -> typing.Union[None, bool]:
-        try:
-            if not isinstance(stock_id, str):
-                return None
-            stock_list: stock_list_type = Stock.query(Stock.stock_id == stock_id).get()
-        except BadRequestError:
-            return None
-        except BadQueryError:
-            return None
-        except ConnectionRefusedError:
-            return None
-        except RetryError:
-            return None
-        except Aborted:
-            return None
-        if isinstance(stock_list, list) and len(stock_list) > 0:
-            return True
-        return False
-
-    @staticmethod
-    async def stock_id_exist_async(stock_id: typing.Union[str, None]) -> typing.Union[None, bool]:
-        try:
-            if not isinstance(stock_id, str):
-                return None
-            stock_list: stock_list_type = Stock.query(Stock.stock_id == stock_id).get_async().get_result()
-        except BadRequestError:
-            return None
-        except BadQueryError:
-            return None
-        except ConnectionRefusedError:
-            return None
-        except RetryError:
-            return None
-        except Aborted:
+    def stock_taken(stock_code: typing.Union[str, None], symbol: typing.Union[str, None],
+                    stock_id: typing.Union[str, None]) -> typing.Union[bool, None]:
+        """
+            True when the stock id, code or symbol is already used,
+            the three lookups run concurrently
+            None when they cannot be checked
+        """
+        if not all(isinstance(value, str) for value in (stock_code, symbol, stock_id)):
             return None
-        if isinstance(stock_list, list) and len(stock_list) > 0:
-            return True
-        return False
+        taken: typing.Union[typing.Dict[str, bool], None] = exists_concurrently({
+            'stock_id': ExistsCheck(model=Stock, field='stock_id', value=stock_id),
+            'stock_code': ExistsCheck(model=Stock, field='stock_code', value=stock_code),
+            'symbol': ExistsCheck(model=Stock, field='symbol', value=symbol)})
+        return None if taken is None else any(taken.values())
 
     def can_add_stock(self, stock_code: typing.Union[str, None] = None, symbol: typing.Union[str, None] = None,
                       stock_id: typing.Union[str, None] = None) -> bool:
-        stock_id_exist: bool = self.stock_id_exist(stock_id=stock_id)
-        stock_code_exist: bool = self.stock_code_exist(stock_code=stock_code)
-        symbol_exist: bool = self.symbol_exist(symbol=symbol)
-        if isinstance(stock_id_exist, bool) and isinstance(stock_code_exist, bool) and isinstance(symbol_exist, bool):
-            return not (stock_id_exist or stock_code_exist or symbol_exist)
+        stock_taken: typing.Union[bool, None] = self.stock_taken(stock_code=stock_code,
+                                                                 symbol=symbol, stock_id=stock_id)
+        if isinstance(stock_taken, bool):
+            return not stock_taken
 
         message: str = "Unable to verify input data, Due to database error please try again later"
         raise DataServiceError(status=500, description=message)
 
-    async def can_add_stock_async(self, stock_code: typing.Union[str, None] = None,
-                                  symbol: typing.Union[str, None] = None,
-                                  stock_id: typing.Union[str, None] = None) -> bool:
-        stock_id_exist: bool = await self.stock_id_exist_async(stock_id=stock_id)
-        stock_code_exist: bool = await self.stock_code_exist_async(stock_code=stock_code)
-        symbol_exist: bool = await self.symbol_exist_async(symbol=symbol)
-        if isinstance(stock_id_exist, bool) and isinstance(stock_code_exist, bool) and isinstance(symbol_exist, bool):
-            return not (stock_id_exist or stock_code_exist or symbol_exist)
-
-        message: str = "Unable to verify input data, Due to database error please try again later"
-        raise DataServiceError(status=500, description=message)
-
-
 
 # noinspection DuplicatedCode
 class CatchBrokerErrors(StockViewContext):
@@ -412,101 +411,24 @@ class CatchBrokerErrors(StockViewContext):
         super(CatchBrokerErrors, self).__init__()
 
     @staticmethod
-    def broker_id_exist(broker_id: typing.Union[str, None]) -> typing.Union[None, bool]:
-        try:
-            if not isinstance(broker_id, str):
-                return None
-            broker_instance: Broker = Broker.query(Broker.broker_id == broker_id).get()
-            if isinstance(broker_instance, Broker):
-                return True
-            return False
-        except BadRequestError:
-            return None
-        except BadQueryError:
-            return None
-        except ConnectionRefusedError:
-            return None
-        except RetryError:
-            return None
-        except Aborted:
-            return None
-
-    @staticmethod
-    async def broker_id_exist_async(broker_id: typing.Union[str, None]) -> typing.Union[None, bool]:
-        try:
-            if not isinstance(broker_id, str):
-                return None
-            broker_instance: Broker = Broker.query(Broker.broker_id == broker_id).get_async().get_result()
-            if isinstance(broker_instance, Broker):
-                return True
-            return False
-        except BadRequestError:
-            return None
-        except BadQueryError:
-            return None
-        except ConnectionRefusedError:
-            return None
-        except RetryError:
-            return None
-        except Aborted:
-            return None
-
-    # noinspection DuplicatedCode
-    @staticmethod
-    def broker_code_exist(broker_code: typing.Union[str, None]) -> typing.Union[None, bool]:
-        try:
-            if not isinstance(broker_code, str):
-                return None
-            broker_instance: Broker = Broker.query(Broker.broker_code == broker_code).get()
-            if isinstance(broker_instance, Broker):
-                return True
-            return False
-        except BadRequestError:
-            return None
-        except BadQueryError:
-            return None
-        except ConnectionRefusedError:
-            return None
-        except RetryError:
-            return None
-        except Aborted:
-            return None
-
-    # noinspection DuplicatedCode
-    @staticmethod
-    async def broker_code_exist_async(broker_code: typing.Union[str, None]) -> typing.Union[None, bool]:
-        try:
-            if not isinstance(broker_code, str):
-                return None
-            broker_instance: Broker = Broker.query(Broker.broker_code == broker_code).get_async().get_result()
-            if isinstance(broker_instance, Broker):
-                return True
-            return False
-        except BadRequestError:
-            return None
-        except BadQueryError:
-            return None
-        except ConnectionRefusedError:
-            return None
-        except RetryError:
-            return None
-        except Aborted:
+    def broker_taken(broker_id: typing.Union[str, None],
+                     broker_code: typing.Union[str, None]) -> typing.Union[bool, None]:
+        """
+            True when the broker id or code is already used, both lookups run concurrently
+            None when they cannot be checked
+        """
+        if not (isinstance(broker_id, str) and isinstance(broker_code, str)):
             return None
+        taken: typing.Union[typing.Dict[str, bool], None] = exists_concurrently({
+            'broker_id': ExistsCheck(model=Broker, field='broker_id', value=broker_id),
+            'broker_code': ExistsCheck(model=Broker, field='broker_code', value=broker_code)})
+        return None if taken is None else any(taken.values())
 
     def can_add_broker(self, broker_id: typing.Union[str, None], broker_code: typing.Union[str, None]) -> bool:
-        broker_id_exist: bool = self.broker_id_exist(broker_id=broker_id)
-        broker_code_exist: bool = self.broker_code_exist(broker_code=broker_code)
-        if isinstance(broker_id_exist, bool) and isinstance(broker_code_exist, bool):
-            return not (broker_id_exist or broker_code_exist)
-        message: str = "Unable to verify broker data due to database errors please try again later"
-        raise DataServiceError(status=500, description=message)
-
-    async def can_add_broker_async(self, broker_id: typing.Union[str, None],
-                                   broker_code: typing.Union[str, None]) -> bool:
-        broker_id_exist: bool = await self.broker_id_exist_async(broker_id=broker_id)
-        broker_code_exist: bool = await self.broker_code_exist_async(broker_code=broker_code)
-        if isinstance(broker_id_exist, bool) and isinstance(broker_code_exist, bool):
-            return not (broker_id_exist or broker_code_exist)
+        broker_taken: typing.Union[bool, None] = self.broker_taken(broker_id=broker_id,
+                                                                   broker_code=broker_code)
+        if isinstance(broker_taken, bool):
+            return not broker_taken
         message: str = "Unable to verify broker data due to database errors please try again later"
         raise DataServiceError(status=500, description=message)
 
@@ -517,6 +439,7 @@ class StockView(CatchStockErrors, CatchBrokerErrors):
         super(StockView, self).__init__()
         self._max_retries = current_app.config.get('DATASTORE_RETRIES')
         self._max_timeout = current_app.config.get('DATASTORE_TIMEOUT')
+        self._batch_limit = current_app.config.get('BATCH_LOOKUP_LIMIT', Config.BATCH_LOOKUP_LIMIT)
         with current_app.app_context():
             self.timezone = timezone(Config.UTC_OFFSET)
 
@@ -524,29 +447,42 @@ class StockView(CatchStockErrors, CatchBrokerErrors):
     def fetch_stock(self, stock_id: str) -> typing.Union[Stock, None]:
         if not isinstance(stock_id, str):
             return None
-        stock: Stock = Stock.query(Stock.stock_id == stock_id).get()
-        return stock
-
-    @use_context
-    async def fetch_stock_async(self, stock_id: str) -> typing.Union[Stock, None]:
-        if not isinstance(stock_id, str):
-            return None
-        stock: Stock = Stock.query(Stock.stock_id == stock_id).get_async().get_result()
+        stock: Stock = Stock.get_by_natural_id(stock_id)
         return stock
 
     @use_context
     def fetch_broker(self, broker_id: str) -> typing.Union[Broker, None]:
         if not isinstance(broker_id, str):
             return None
-        broker: Broker = Broker.query(Broker.broker_id == broker_id).get()
+        broker: Broker = Broker.get_by_natural_id(broker_id)
         return broker
 
-    @use_context
-    async def fetch_broker_async(self, broker_id: str) -> typing.Union[Broker, None]:
-        if not isinstance(broker_id, str):
-            return None
-        broker: Broker = Broker.query(Broker.broker_id == broker_id).get_async().get_result()
-        return broker
+    @staticmethod
+    @ndb.tasklet
+    def stock_and_broker_tasklet(stock_id: str,
+                                 broker_id: str) -> typing.Generator[tuple, tuple, None]:
+        """
+            stock and broker by their ids,
+            both gets are in flight together so the pair takes one round trip
+        """
+        stock, broker = yield (
+            Stock.get_by_natural_id_async(stock_id if isinstance(stock_id, str) else None),
+            Broker.get_by_natural_id_async(broker_id if isinstance(broker_id, str) else None))
+        raise ndb.Return(stock, broker)
+
+    @staticmethod
+    @ndb.tasklet
+    def stock_model_parts_tasklet(transaction_id: str, stock_code: str,
+                                  broker_code: str) -> typing.Generator[tuple, tuple, None]:
+        """
+            stock model with the stock and broker it is being pointed at,
+            the three lookups are in flight together
+        """
+        brokers: ndb.Query = Broker.query(Broker.broker_code == broker_code)
+        stock_model, stock, broker = yield (StockModel.get_by_natural_id_async(transaction_id),
+                                            Stock.query(Stock.stock_code == stock_code).get_async(),
+                                            brokers.get_async())
+        raise ndb.Return(stock_model, stock, broker)
 
     @data_wrappers.get_stock_data
     @use_context
@@ -559,25 +495,9 @@ class StockView(CatchStockErrors, CatchBrokerErrors):
             if key is None:
                 message: str = "For some strange reason we could not save your data to database"
                 raise DataServiceError(status=500, description=message)
-
-        else:
-            message: str = "Stock Duplicate detected, you cannot add duplicate stock in here"
-            return jsonify({'status': False, 'message': message}), 500
-        return jsonify({'status': True,
-                        'message': 'successfully saved stock data',
-                        "payload": stock_instance.to_dict()}), 200
-
-    @data_wrappers.get_stock_data
-    @use_context
-    @handle_view_errors
-    async def create_stock_data_async(self, stock_id: str, stock_code: str, stock_name: str, symbol: str) -> tuple:
-        if await self.can_add_stock_async(stock_code=stock_code, stock_id=stock_id, symbol=symbol) is True:
-            stock_instance: Stock = Stock(stock_id=stock_id, stock_code=stock_code, stock_name=stock_name,
-                                          symbol=symbol)
-            key = stock_instance.put_async(retries=self._max_retries, timeout=self._max_timeout).get_result()
-            if key is None:
-                message: str = "For some strange reason we could not save your data to database"
-                raise DataServiceError(status=500, description=message)
+            invalidate_tags(cache=cache_stocks,
+                            tags=StockCacheTags.all_stocks() + StockCacheTags.stock(
+                                stock_id=stock_id, stock_code=stock_code, symbol=symbol))
 
         else:
             message: str = "Stock Duplicate detected, you cannot add duplicate stock in here"
@@ -597,24 +517,9 @@ class StockView(CatchStockErrors, CatchBrokerErrors):
             if key is None:
                 message: str = "For some strange reason we could not save your data to database"
                 raise DataServiceError(status=500, description=message)
-
-        else:
-            message: str = "cannot create broker data, duplicates would be created"
-            return jsonify({'status': False, 'message': message}), 500
-        return jsonify({'status': True, 'message': 'successfully saved broker data',
-                        'payload': broker_instance.to_dict()}), 200
-
-    @data_wrappers.get_broker_data
-    @use_context
-    @handle_view_errors
-    async def create_broker_data_async(self, broker_id: str, broker_code: str, broker_name: str) -> tuple:
-        if await self.can_add_broker_async(broker_id=broker_id, broker_code=broker_code) is True:
-            broker_instance: Broker = Broker(broker_id=broker_id, broker_code=broker_code,
-                                             broker_name=broker_name)
-            key = broker_instance.put_async(retries=self._max_retries, timeout=self._max_timeout).get_result()
-            if key is None:
-                message: str = "For some strange reason we could not save your data to database"
-                raise DataServiceError(status=500, description=message)
+            invalidate_tags(cache=cache_stocks,
+                            tags=StockCacheTags.all_brokers() + StockCacheTags.broker(
+                                broker_id=broker_id, broker_code=broker_code))
 
         else:
             message: str = "cannot create broker data, duplicates would be created"
@@ -634,11 +539,15 @@ class StockView(CatchStockErrors, CatchBrokerErrors):
             return jsonify({'status': False, 'message': 'A broker with that ID was not found'}), 500
 
         stock_model_instance: StockModel = StockModel(exchange_id=exchange_id,
-                                                      sid=sid, stock=stock, broker=broker)
+                                                      transaction_id=sid, stock=stock,
+                                                      broker=broker)
         key = stock_model_instance.put(retries=self._max_retries, timeout=self._max_timeout)
         if key is None:
             message: str = "For some strange reason we could not save your data to database"
             raise DataServiceError(status=500, description=message)
+        invalidate_tags(cache=cache_stocks,
+                        tags=StockCacheTags.all_stock_models() + StockCacheTags.stock_model(
+                            transaction_id=stock_model_instance.transaction_id))
 
         return jsonify({'status': True, 'message': 'Stock Model Successfully created',
                         'payload': stock_model_instance.to_dict()}), 200
@@ -647,19 +556,23 @@ class StockView(CatchStockErrors, CatchBrokerErrors):
     @handle_view_errors
     async def create_stock_model_async(self, exchange_id: str, sid: str, stock_id: str, broker_id: str) -> tuple:
 
-        stock: typing.Union[Stock, None] = await self.fetch_stock_async(stock_id=stock_id)
-        broker: typing.Union[Broker, None] = await self.fetch_broker_async(broker_id=broker_id)
+        stock, broker = self.stock_and_broker_tasklet(stock_id=stock_id,
+                                                      broker_id=broker_id).result()
         if not isinstance(stock, Stock):
             return jsonify({'status': False, 'message': 'A stock with that ID was not found'}), 500
         if not isinstance(broker, Broker):
             return jsonify({'status': False, 'message': 'A broker with that ID was not found'}), 500
 
         stock_model_instance: StockModel = StockModel(exchange_id=exchange_id,
-                                                      sid=sid, stock=stock, broker=broker)
+                                                      transaction_id=sid, stock=stock,
+                                                      broker=broker)
         key = stock_model_instance.put_async(retries=self._max_retries, timeout=self._max_timeout).get_result()
         if key is None:
             message: str = "For some strange reason we could not save your data to database"
             raise DataServiceError(status=500, description=message)
+        invalidate_tags(cache=cache_stocks,
+                        tags=StockCacheTags.all_stock_models() + StockCacheTags.stock_model(
+                            transaction_id=stock_model_instance.transaction_id))
 
         return jsonify({'status': True, 'message': 'Stock Model Successfully created',
                         'payload': stock_model_instance.to_dict()}), 200
@@ -669,36 +582,28 @@ class StockView(CatchStockErrors, CatchBrokerErrors):
     @handle_view_errors
     def create_buy_model(self, stock_id: str, date_created: date_class, buy_volume: int, buy_value: int,
                          buy_ave_price: int, buy_market_val_percent: int,
-                         buy_trade_count: int) -> tuple:
+                         buy_trade_count: int, broker_id: typing.Union[str, None] = None,
+                         transaction_id: typing.Union[str, None] = None) -> tuple:
+        """
+            transaction_id is derived from the volume when not given,
+            writing the same volume again overwrites it
+        """
 
         buy_volume_instance: BuyVolumeModel = BuyVolumeModel(stock_id=stock_id, date_created=date_created,
                                                              buy_volume=buy_volume, buy_value=buy_value,
                                                              buy_ave_price=buy_ave_price,
                                                              buy_market_val_percent=buy_market_val_percent,
-                                                             buy_trade_count=buy_trade_count)
+                                                             buy_trade_count=buy_trade_count,
+                                                             broker_id=broker_id,
+                                                             transaction_id=transaction_id)
         key = buy_volume_instance.put(retries=self._max_retries, timeout=self._max_timeout)
         if key is None:
             message: str = "For some strange reason we could not save your data to database"
             raise DataServiceError(status=500, description=message)
-
-        message: str = "Buy volume successfully created"
-        return jsonify({'status': True, 'message': message, 'payload': buy_volume_instance.to_dict()}), 200
-
-    @data_wrappers.get_buy_volume_data
-    @use_context
-    @handle_view_errors
-    async def create_buy_model_async(self, stock_id: str, date_created: date_class, buy_volume: int, buy_value: int,
-                                     buy_ave_price: int, buy_market_val_percent: int, buy_trade_count: int) -> tuple:
-
-        buy_volume_instance: BuyVolumeModel = BuyVolumeModel(stock_id=stock_id, date_created=date_created,
-                                                             buy_volume=buy_volume, buy_value=buy_value,
-                                                             buy_ave_price=buy_ave_price,
-                                                             buy_market_val_percent=buy_market_val_percent,
-                                                             buy_trade_count=buy_trade_count)
-        key = buy_volume_instance.put_async(retries=self._max_retries, timeout=self._max_timeout).get_result()
-        if key is None:
-            message: str = "For some strange reason we could not save your data to database"
-            raise DataServiceError(status=500, description=message)
+        queue_volume_history(model=BuyVolumeModel, volumes=[buy_volume_instance.to_dict()])
+        invalidate_tags(cache=cache_stocks, tags=StockCacheTags.volume_writes(
+            'buy_volume', transaction_id=buy_volume_instance.transaction_id, stock_id=stock_id,
+            date_created=date_created))
 
         message: str = "Buy volume successfully created"
         return jsonify({'status': True, 'message': message, 'payload': buy_volume_instance.to_dict()}), 200
@@ -708,39 +613,29 @@ class StockView(CatchStockErrors, CatchBrokerErrors):
     @handle_view_errors
     def create_sell_volume(self, stock_id: str, date_created: date_class, sell_volume: int, sell_value: int,
                            sell_ave_price: int, sell_market_val_percent: int,
-                           sell_trade_count: int) -> tuple:
+                           sell_trade_count: int, broker_id: typing.Union[str, None] = None,
+                           transaction_id: typing.Union[str, None] = None) -> tuple:
+        """
+            transaction_id is derived from the volume when not given,
+            writing the same volume again overwrites it
+        """
         sell_volume_instance: SellVolumeModel = SellVolumeModel(stock_id=stock_id,
                                                                 date_created=date_created,
                                                                 sell_volume=sell_volume,
                                                                 sell_value=sell_value,
                                                                 sell_ave_price=sell_ave_price,
                                                                 sell_market_val_percent=sell_market_val_percent,
-                                                                sell_trade_count=sell_trade_count)
+                                                                sell_trade_count=sell_trade_count,
+                                                                broker_id=broker_id,
+                                                                transaction_id=transaction_id)
         key = sell_volume_instance.put(retries=self._max_retries, timeout=self._max_timeout)
         if key is None:
             message: str = "For some strange reason we could not save your data to database"
             raise DataServiceError(status=500, description=message)
-
-        return jsonify({'status': True, 'message': 'Sell Volume Successfully created',
-                        'payload': sell_volume_instance.to_dict()}), 200
-
-    @data_wrappers.get_sell_volume_data
-    @use_context
-    @handle_view_errors
-    async def create_sell_volume_async(self, stock_id: str, date_created: date_class, sell_volume: int, sell_value: int,
-                                       sell_ave_price: int, sell_market_val_percent: int,
-                                       sell_trade_count: int) -> tuple:
-        sell_volume_instance: SellVolumeModel = SellVolumeModel(stock_id=stock_id,
-                                                                date_created=date_created,
-                                                                sell_volume=sell_volume,
-                                                                sell_value=sell_value,
-                                                                sell_ave_price=sell_ave_price,
-                                                                sell_market_val_percent=sell_market_val_percent,
-                                                                sell_trade_count=sell_trade_count)
-        key = sell_volume_instance.put_async(retries=self._max_retries, timeout=self._max_timeout).get_result()
-        if key is None:
-            message: str = "For some strange reason we could not save your data to database"
-            raise DataServiceError(status=500, description=message)
+        queue_volume_history(model=SellVolumeModel, volumes=[sell_volume_instance.to_dict()])
+        invalidate_tags(cache=cache_stocks, tags=StockCacheTags.volume_writes(
+            'sell_volume', transaction_id=sell_volume_instance.transaction_id, stock_id=stock_id,
+            date_created=date_created))
 
         return jsonify({'status': True, 'message': 'Sell Volume Successfully created',
                         'payload': sell_volume_instance.to_dict()}), 200
@@ -749,20 +644,34 @@ class StockView(CatchStockErrors, CatchBrokerErrors):
     @data_wrappers.get_net_volume_data
     @use_context
     @handle_view_errors
-    def create_net_volume(self, stock_id: str, date_created: date_class, transaction_id: str, net_volume: str,
-                          net_value: str, total_value: str, total_volume: str) -> tuple:
+    def create_net_volume(self, stock_id: str, date_created: date_class, net_volume: str,
+                          net_value: str, total_value: str, total_volume: str,
+                          broker_id: typing.Union[str, None] = None,
+                          transaction_id: typing.Union[str, None] = None) -> tuple:
         """
             if net volume already exist update net volume
+            transaction_id is derived from the volume when not given, writing the same volume
+            again overwrites it
         """
-        net_volume_list: typing.List[NetVolumeModel] = NetVolumeModel.query(
-            NetVolumeModel.transaction_id == transaction_id).fetch()
-        if isinstance(net_volume_list, list) and len(net_volume_list) > 0:
-            net_volume_instance: NetVolumeModel = net_volume_list[0]
-        else:
-            net_volume_instance: NetVolumeModel = NetVolumeModel()
-
+        if not transaction_id:
+            transaction_id = TransactionIds.volume_id(side=NetVolumeModel.side, stock_id=stock_id,
+                                                      date_created=date_created,
+                                                      broker_id=broker_id)
+        net_volume_instance: typing.Union[NetVolumeModel, None] = \
+            NetVolumeModel.get_by_natural_id(transaction_id)
+        if not isinstance(net_volume_instance, NetVolumeModel):
+            net_volume_instance = NetVolumeModel()
+
+        # an existing net volume may move to another stock or date
+        stale_tags: typing.List[str] = StockCacheTags.volume_writes(
+            'net_volume', transaction_id=net_volume_instance.transaction_id,
+            stock_id=net_volume_instance.stock_id, date_created=net_volume_instance.date_created)
+        moved_from: dict = {'transaction_id': net_volume_instance.transaction_id,
+                            'stock_id': net_volume_instance.stock_id,
+                            'date_created': net_volume_instance.date_created}
         net_volume_instance.stock_id = stock_id
         net_volume_instance.transaction_id = transaction_id
+        net_volume_instance.broker_id = broker_id
         net_volume_instance.date_created = date_created
         net_volume_instance.net_volume = net_volume
         net_volume_instance.net_value = net_value
@@ -773,39 +682,11 @@ class StockView(CatchStockErrors, CatchBrokerErrors):
         if key is None:
             message: str = "For some strange reason we could not save your data to database"
             raise DataServiceError(status=500, description=message)
-
-        message: str = 'Net Volume Successfully created'
-        return jsonify({'status': True, 'message': message,
-                        'payload': net_volume_instance.to_dict()}), 200
-
-    # noinspection DuplicatedCode
-    @data_wrappers.get_net_volume_data
-    @use_context
-    @handle_view_errors
-    async def create_net_volume_async(self, stock_id: str, date_created: date_class, transaction_id: str,
-                                      net_volume: str, net_value: str, total_value: str, total_volume: str) -> tuple:
-        """
-            if net volume already exist update net volume
-        """
-        net_volume_list: typing.List[NetVolumeModel] = NetVolumeModel.query(
-            NetVolumeModel.transaction_id == transaction_id).fetch_async().get_result()
-        if isinstance(net_volume_list, list) and len(net_volume_list) > 0:
-            net_volume_instance: NetVolumeModel = net_volume_list[0]
-        else:
-            net_volume_instance: NetVolumeModel = NetVolumeModel()
-
-        net_volume_instance.stock_id = stock_id
-        net_volume_instance.transaction_id = transaction_id
-        net_volume_instance.date_created = date_created
-        net_volume_instance.net_volume = net_volume
-        net_volume_instance.net_value = net_value
-        net_volume_instance.total_value = total_value
-        net_volume_instance.total_volume = total_volume
-
-        key = net_volume_instance.put_async(retries=self._max_retries, timeout=self._max_timeout).get_result()
-        if key is None:
-            message: str = "For some strange reason we could not save your data to database"
-            raise DataServiceError(status=500, description=message)
+        queue_volume_history(model=NetVolumeModel, volumes=[net_volume_instance.to_dict()],
+                             removed=[moved_from])
+        invalidate_tags(cache=cache_stocks, tags=stale_tags + StockCacheTags.volume_writes(
+            'net_volume', transaction_id=transaction_id, stock_id=stock_id,
+            date_created=date_created))
 
         message: str = 'Net Volume Successfully created'
         return jsonify({'status': True, 'message': message,
@@ -815,38 +696,20 @@ class StockView(CatchStockErrors, CatchBrokerErrors):
     @use_context
     @handle_view_errors
     def update_stock_data(self, stock_id: str, stock_code: str, stock_name: str, symbol: str) -> tuple:
-        stock_instance_list: typing.List[Stock] = Stock.query(Stock.stock_id == stock_id).fetch()
-        if len(stock_instance_list) > 0:
-            stock_instance: Stock = stock_instance_list[0]
+        stock_instance: Stock = Stock.get_by_natural_id(stock_id)
+        if isinstance(stock_instance, Stock):
+            stale_tags: typing.List[str] = StockCacheTags.stock(
+                stock_id=stock_instance.stock_id, stock_code=stock_instance.stock_code,
+                symbol=stock_instance.symbol)
             stock_instance.stock_id = stock_id
             stock_instance.stock_code = stock_code
             stock_instance.stock_name = stock_name
             stock_instance.symbol = symbol
             key = stock_instance.put(retries=self._max_retries, timeout=self._max_timeout)
             if key is not None:
-                return jsonify({'status': True, 'payload': stock_instance.to_dict(),
-                                'message': 'successfully updated stock'}), 200
-            else:
-                message: str = "Unable to update stock data due to database erros"
-                raise DataServiceError(status=500, description=message)
-
-        else:
-            message: str = "Could not find stock please try again later"
-            return jsonify({'status': False, 'message': message}), 500
-
-    @data_wrappers.get_stock_data
-    @use_context
-    @handle_view_errors
-    async def update_stock_data_async(self, stock_id: str, stock_code: str, stock_name: str, symbol: str) -> tuple:
-        stock_instance_list: typing.List[Stock] = Stock.query(Stock.stock_id == stock_id).fetch_async().get_result()
-        if len(stock_instance_list) > 0:
-            stock_instance: Stock = stock_instance_list[0]
-            stock_instance.stock_id = stock_id
-            stock_instance.stock_code = stock_code
-            stock_instance.stock_name = stock_name
-            stock_instance.symbol = symbol
-            key = stock_instance.put_async(retries=self._max_retries, timeout=self._max_timeout).get_result()
-            if key is not None:
+                invalidate_tags(cache=cache_stocks, tags=stale_tags + StockCacheTags.all_stocks() +
+                                StockCacheTags.stock(stock_id=stock_id, stock_code=stock_code,
+                                                     symbol=symbol))
                 return jsonify({'status': True, 'payload': stock_instance.to_dict(),
                                 'message': 'successfully updated stock'}), 200
             else:
@@ -861,30 +724,17 @@ class StockView(CatchStockErrors, CatchBrokerErrors):
     @use_context
     @handle_view_errors
     def update_broker_data(self, broker_id: str, broker_code: str, broker_name: str) -> tuple:
-        broker_instance: Broker = Broker.query(Broker.broker_id == broker_id).get()
+        broker_instance: Broker = Broker.get_by_natural_id(broker_id)
         if isinstance(broker_instance, Broker):
+            stale_tags: typing.List[str] = StockCacheTags.broker(
+                broker_id=broker_instance.broker_id, broker_code=broker_instance.broker_code)
             broker_instance.broker_id = broker_id
             broker_instance.broker_code = broker_code
             broker_instance.broker_name = broker_name
             key = broker_instance.put(retries=self._max_retries, timeout=self._max_timeout)
             if key is not None:
-                return jsonify({'status': True, 'payload': broker_instance.to_dict(),
-                                'message': 'broker instance updated successfully'}), 200
-            else:
-                message: str = 'while updating broker something snapped'
-                raise DataServiceError(status=500, description=message)
-
-    @data_wrappers.get_broker_data
-    @use_context
-    @handle_view_errors
-    async def update_broker_data_async(self, broker_id: str, broker_code: str, broker_name: str) -> tuple:
-        broker_instance: Broker = Broker.query(Broker.broker_id == broker_id).get_async().get_result()
-        if isinstance(broker_instance, Broker):
-            broker_instance.broker_id = broker_id
-            broker_instance.broker_code = broker_code
-            broker_instance.broker_name = broker_name
-            key = broker_instance.put_async(retries=self._max_retries, timeout=self._max_timeout).get_result()
-            if key is not None:
+                invalidate_tags(cache=cache_stocks, tags=stale_tags + StockCacheTags.all_brokers() +
+                                StockCacheTags.broker(broker_id=broker_id, broker_code=broker_code))
                 return jsonify({'status': True, 'payload': broker_instance.to_dict(),
                                 'message': 'broker instance updated successfully'}), 200
             else:
@@ -914,7 +764,7 @@ class StockView(CatchStockErrors, CatchBrokerErrors):
         else:
             return jsonify({'status': False, 'message': 'Broker is required'}), 500
         # TODO fix bug Stock and Broker would Dicts not Instances of Stock and Broker
-        stock_model_instance: StockModel = StockModel.query(StockModel.transaction_id == transaction_id).get()
+        stock_model_instance: StockModel = StockModel.get_by_natural_id(transaction_id)
 
         if stock is not None:
             stock_instance: Stock = Stock.query(Stock.stock_code == stock['stock_code']).get()
@@ -934,6 +784,8 @@ class StockView(CatchStockErrors, CatchBrokerErrors):
             stock_model.broker = broker_instance
             key = stock_model.put(retries=self._max_retries, timeout=self._max_timeout)
             if key is not None:
+                invalidate_tags(cache=cache_stocks, tags=StockCacheTags.all_stock_models() +
+                                StockCacheTags.stock_model(transaction_id=transaction_id))
                 return jsonify({'status': True, 'payload': stock_model.to_dict(),
                                 'message': 'stock model is update'}), 200
             else:
@@ -965,20 +817,14 @@ class StockView(CatchStockErrors, CatchBrokerErrors):
             broker: typing.Union[Broker, None] = stock_model.get('broker')
         else:
             return jsonify({'status': False, 'message': 'Broker is required'}), 500
-        # TODO fix bug Stock and Broker would Dicts not Instances of Stock and Broker
-        stock_model_instance: StockModel = StockModel.query(
-            StockModel.transaction_id == transaction_id).get_async().get_result()
-
-        if stock is not None:
-            stock_instance: Stock = Stock.query(Stock.stock_code == stock['stock_code']).get_async().get_result()
-        else:
+        if stock is None:
             return jsonify({'status': False, 'message': 'stock is required'}), 500
-
-        if broker is not None:
-            broker_instance: Broker = Broker.query(
-                Broker.broker_code == broker['broker_code']).get_async().get_result()
-        else:
+        if broker is None:
             return jsonify({'status': False, 'message': 'Broker is required'}), 500
+        # TODO fix bug Stock and Broker would Dicts not Instances of Stock and Broker
+        stock_model_instance, stock_instance, broker_instance = self.stock_model_parts_tasklet(
+            transaction_id=transaction_id, stock_code=stock['stock_code'],
+            broker_code=broker['broker_code']).result()
 
         if isinstance(stock_model_instance, StockModel):
             stock_model = stock_model_instance
@@ -988,6 +834,8 @@ class StockView(CatchStockErrors, CatchBrokerErrors):
             stock_model.broker = broker_instance
             key = stock_model.put_async(retries=self._max_retries, timeout=self._max_timeout).get_result()
             if key is not None:
+                invalidate_tags(cache=cache_stocks, tags=StockCacheTags.all_stock_models() +
+                                StockCacheTags.stock_model(transaction_id=transaction_id))
                 return jsonify({'status': True, 'payload': stock_model.to_dict(),
                                 'message': 'stock model is update'}), 200
             else:
@@ -1003,9 +851,16 @@ class StockView(CatchStockErrors, CatchBrokerErrors):
     @handle_view_errors
     def update_buy_volume(self, stock_id: str, date_created: date_class, buy_volume: int, buy_value: int,
                           buy_ave_price: int, buy_market_val_percent: int,
-                          buy_trade_count: int, transaction_id: str) -> tuple:
-        buy_instance: BuyVolumeModel = BuyVolumeModel.query(BuyVolumeModel.transaction_id == transaction_id).get()
+                          buy_trade_count: int, transaction_id: str,
+                          broker_id: typing.Union[str, None] = None) -> tuple:
+        buy_instance: BuyVolumeModel = BuyVolumeModel.get_by_natural_id(transaction_id)
         if isinstance(buy_instance, BuyVolumeModel):
+            # the volume may move to another stock or date, reads of the old ones are stale as well
+            stale_tags: typing.List[str] = StockCacheTags.volume_writes(
+                'buy_volume', transaction_id=transaction_id, stock_id=buy_instance.stock_id,
+                date_created=buy_instance.date_created)
+            moved_from: dict = {'transaction_id': transaction_id, 'stock_id': buy_instance.stock_id,
+                                'date_created': buy_instance.date_created}
             buy_instance.stock_id = stock_id
             buy_instance.date_created = date_created
             buy_instance.buy_volume = buy_volume
@@ -1013,54 +868,41 @@ class StockView(CatchStockErrors, CatchBrokerErrors):
             buy_instance.buy_ave_price = buy_ave_price
             buy_instance.buy_market_val_percent = buy_market_val_percent
             buy_instance.buy_trade_count = buy_trade_count
+            if broker_id:
+                buy_instance.broker_id = broker_id
             key = buy_instance.put(retries=self._max_retries, timeout=self._max_timeout)
             if key is None:
                 message: str = "For some strange reason we could not save your data to database"
                 raise DataServiceError(status=500, description=message)
+            queue_volume_history(model=BuyVolumeModel, volumes=[buy_instance.to_dict()],
+                                 removed=[moved_from])
+            invalidate_tags(cache=cache_stocks, tags=stale_tags + StockCacheTags.volume_writes(
+                'buy_volume', transaction_id=transaction_id, stock_id=stock_id,
+                date_created=date_created))
 
         else:
             return jsonify({'status': False, 'message': 'buy volume not found'}), 500
 
         return jsonify({"status": True, "message": "successfully updated buy volume",
-                        "payload": buy_instance.to_dict()})
-
-    @data_wrappers.get_buy_volume_data
-    @use_context
-    @handle_view_errors
-    async def update_buy_volume_async(self, stock_id: str, date_created: date_class, buy_volume: int, buy_value: int,
-                                      buy_ave_price: int, buy_market_val_percent: int,
-                                      buy_trade_count: int, transaction_id: str) -> tuple:
-        buy_instance: BuyVolumeModel = BuyVolumeModel.query(
-            BuyVolumeModel.transaction_id == transaction_id).get_async().get_result()
-        if isinstance(buy_instance, BuyVolumeModel):
-            buy_instance.stock_id = stock_id
-            buy_instance.date_created = date_created
-            buy_instance.buy_volume = buy_volume
-            buy_instance.buy_value = buy_value
-            buy_instance.buy_ave_price = buy_ave_price
-            buy_instance.buy_market_val_percent = buy_market_val_percent
-            buy_instance.buy_trade_count = buy_trade_count
-            key = buy_instance.put_async(retries=self._max_retries, timeout=self._max_timeout).get_result()
-            if key is None:
-                message: str = "For some strange reason we could not save your data to database"
-                raise DataServiceError(status=500, description=message)
-
-        else:
-            return jsonify({'status': False, 'message': 'buy volume not found'}), 500
-
-        return jsonify({"status": True, "message": "successfully updated buy volume",
-                        "payload": buy_instance.to_dict()})
+                        "payload": buy_instance.to_dict()}), 200
 
     @data_wrappers.get_sell_volume_data
     @use_context
     @handle_view_errors
     def update_sell_volume(self, stock_id: str, date_created: date_class, sell_volume: int, sell_value: int,
                            sell_ave_price: int, sell_market_val_percent: int,
-                           sell_trade_count: int, transaction_id: str) -> tuple:
-        sell_volume_instance: SellVolumeModel = SellVolumeModel.query(
-            SellVolumeModel.transaction_id == transaction_id).get()
+                           sell_trade_count: int, transaction_id: str,
+                           broker_id: typing.Union[str, None] = None) -> tuple:
+        sell_volume_instance: SellVolumeModel = SellVolumeModel.get_by_natural_id(transaction_id)
 
         if isinstance(sell_volume_instance, SellVolumeModel):
+            stale_tags: typing.List[str] = StockCacheTags.volume_writes(
+                'sell_volume', transaction_id=transaction_id,
+                stock_id=sell_volume_instance.stock_id,
+                date_created=sell_volume_instance.date_created)
+            moved_from: dict = {'transaction_id': transaction_id,
+                                'stock_id': sell_volume_instance.stock_id,
+                                'date_created': sell_volume_instance.date_created}
             sell_volume_instance.stock_id = stock_id
             sell_volume_instance.date_created = date_created
             sell_volume_instance.sell_volume = sell_volume
@@ -1069,43 +911,24 @@ class StockView(CatchStockErrors, CatchBrokerErrors):
             sell_volume_instance.sell_market_val_percent = sell_market_val_percent
             sell_volume_instance.sell_trade_count = sell_trade_count
             sell_volume_instance.transaction_id = transaction_id
+            if broker_id:
+                sell_volume_instance.broker_id = broker_id
             key = sell_volume_instance.put(retries=self._max_retries, timeout=self._max_timeout)
 
             if key is not None:
+                queue_volume_history(model=SellVolumeModel,
+                                     volumes=[sell_volume_instance.to_dict()], removed=[moved_from])
+                invalidate_tags(cache=cache_stocks, tags=stale_tags + StockCacheTags.volume_writes(
+                    'sell_volume', transaction_id=transaction_id, stock_id=stock_id,
+                    date_created=date_created))
                 return jsonify({'status': True, 'payload': sell_volume_instance.to_dict(),
                                 'message': 'sell volume successfully updated'}), 200
             else:
                 message: str = "something snapped updating sell volume"
                 raise DataServiceError(status=500, description=message)
 
-    @data_wrappers.get_sell_volume_data
-    @use_context
-    @handle_view_errors
-    async def update_sell_volume_async(self, stock_id: str, date_created: date_class, sell_volume: int, sell_value: int,
-                                       sell_ave_price: int, sell_market_val_percent: int,
-                                       sell_trade_count: int, transaction_id: str) -> tuple:
-        sell_volume_instance: SellVolumeModel = SellVolumeModel.query(
-            SellVolumeModel.transaction_id == transaction_id).get_async().get_result()
-
-        if isinstance(sell_volume_instance, SellVolumeModel):
-            sell_volume_instance.stock_id = stock_id
-            sell_volume_instance.date_created = date_created
-            sell_volume_instance.sell_volume = sell_volume
-            sell_volume_instance.sell_value = sell_value
-            sell_volume_instance.sell_ave_price = sell_ave_price
-            sell_volume_instance.sell_market_val_percent = sell_market_val_percent
-            sell_volume_instance.sell_trade_count = sell_trade_count
-            sell_volume_instance.transaction_id = transaction_id
-            key = sell_volume_instance.put_async(retries=self._max_retries, timeout=self._max_timeout).get_result()
-
-            if key is not None:
-                return jsonify({'status': True, 'payload': sell_volume_instance.to_dict(),
-                                'message': 'sell volume successfully updated'}), 200
-            else:
-                message: str = "something snapped updating sell volume"
-                raise DataServiceError(status=500, description=message)
-
-    @cache_stocks.cached(timeout=return_ttl(name='medium'), unless=end_of_month)
+    @memoize(cache=cache_stocks, timeout=return_ttl(name='medium'), unless=end_of_month,
+             tags=StockCacheTags.stock)
     @use_context
     @handle_view_errors
     def get_stock_data(self, stock_id: typing.Union[str, None] = None, stock_code: typing.Union[str, None] = None,
@@ -1114,7 +937,7 @@ class StockView(CatchStockErrors, CatchBrokerErrors):
             with either stock_id or stock_code or symbol return stock_data
         """
         if stock_id is not None:
-            stock_instance: Stock = Stock.query(Stock.stock_id == stock_id).get()
+            stock_instance: Stock = Stock.get_by_natural_id(stock_id)
         elif stock_code is not None:
             stock_instance: Stock = Stock.query(Stock.stock_code == stock_code).get()
         elif symbol is not None:
@@ -1128,45 +951,25 @@ class StockView(CatchStockErrors, CatchBrokerErrors):
 
         return jsonify({"status": False, "message": "Stock not found", }), 500
 
-    @cache_stocks.cached(timeout=return_ttl(name='medium'), unless=end_of_month)
+    @memoize(cache=cache_stocks, timeout=return_ttl(name='medium'), unless=end_of_month,
+             tags=StockCacheTags.all_stocks, stale_ttl=return_ttl(name='short'))
     @use_context
     @handle_view_errors
-    async def get_stock_data_async(self, stock_id: typing.Union[str, None] = None,
-                                   stock_code: typing.Union[str, None] = None,
-                                   symbol: typing.Union[str, None] = None) -> tuple:
+    def get_all_stocks(self, limit: typing.Union[int, None] = None,
+                       cursor: typing.Union[str, None] = None) -> tuple:
         """
-            with either stock_id or stock_code or symbol return stock_data
+            one page of stocks, cursor is the cursor returned with the previous page
         """
-        if stock_id is not None:
-            stock_instance: Stock = Stock.query(Stock.stock_id == stock_id).get_async().get_result()
-        elif stock_code is not None:
-            stock_instance: Stock = Stock.query(Stock.stock_code == stock_code).get_async().get_result()
-        elif symbol is not None:
-            stock_instance: Stock = Stock.query(Stock.symbol == symbol).get_async().get_result()
-        else:
-            return jsonify({"status": False, "message": "Stock not found", }), 500
-
-        if isinstance(stock_instance, Stock):
-            return jsonify({"status": True, "payload": stock_instance.to_dict(),
-                            "message": "successfully fetched stock data with stock_id"}), 200
-
-        return jsonify({"status": False, "message": "Stock not found", }), 500
-
-    @cache_stocks.cached(timeout=return_ttl(name='medium'), unless=end_of_month)
-    @use_context
-    @handle_view_errors
-    def get_all_stocks(self) -> tuple:
-        stock_list: typing.List[dict] = [stock.to_dict() for stock in Stock.query().fetch()]
-        return jsonify({"status": True, "payload": stock_list, "message": "stocks returns"}), 200
-
-    @cache_stocks.cached(timeout=return_ttl(name='medium'), unless=end_of_month)
-    @use_context
-    @handle_view_errors
-    async def get_all_stocks_async(self) -> tuple:
-        stock_list: typing.List[dict] = [stock.to_dict() for stock in Stock.query().fetch_async().get_result()]
-        return jsonify({"status": True, "payload": stock_list, "message": "stocks returns"}), 200
+        message: typing.Union[str, None] = page_error(limit=limit, cursor=cursor)
+        if message is not None:
+            return jsonify({'status': False, 'message': message}), 500
+        stocks, next_cursor = fetch_page(query=Stock.query(), limit=limit, cursor=cursor)
+        stock_list: typing.List[dict] = [stock.to_dict() for stock in stocks]
+        return jsonify({"status": True, "payload": stock_list, "cursor": next_cursor,
+                        "message": "stocks returns"}), 200
 
-    @cache_stocks.cached(timeout=return_ttl(name='medium'), unless=end_of_month)
+    @memoize(cache=cache_stocks, timeout=return_ttl(name='medium'), unless=end_of_month,
+             tags=StockCacheTags.broker)
     @use_context
     @handle_view_errors
     def get_broker_data(self, broker_id: str = None, broker_code: str = None) -> tuple:
@@ -1174,7 +977,7 @@ class StockView(CatchStockErrors, CatchBrokerErrors):
             with either broker_id or broker_code return broker data
         """
         if broker_id is not None:
-            broker_instance: Broker = Broker.query(Broker.broker_id == broker_id).get()
+            broker_instance: Broker = Broker.get_by_natural_id(broker_id)
         elif broker_code is not None:
             broker_instance: Broker = Broker.query(Broker.broker_code == broker_code).get()
         else:
@@ -1182,96 +985,104 @@ class StockView(CatchStockErrors, CatchBrokerErrors):
         return jsonify({"status": True, "payload": broker_instance.to_dict(),
                         "message": "successfully fetched broker data"}), 200
 
-    @cache_stocks.cached(timeout=return_ttl(name='medium'), unless=end_of_month)
     @use_context
     @handle_view_errors
-    async def get_broker_data_async(self, broker_id: str = None, broker_code: str = None) -> tuple:
+    def get_stocks_batch(self, stock_ids: typing.List[str]) -> tuple:
         """
-            with either broker_id or broker_code return broker data
+            resolves many stock_ids with one batch get,
+            payload separates found stocks from missing ids
         """
-        if broker_id is not None:
-            broker_instance: Broker = Broker.query(Broker.broker_id == broker_id).get_async().get_result()
-        elif broker_code is not None:
-            broker_instance: Broker = Broker.query(Broker.broker_code == broker_code).get_async().get_result()
-        else:
-            return jsonify({"status": False, "message": "Broker not found"}), 500
-        return jsonify({"status": True, "payload": broker_instance.to_dict(),
-                        "message": "successfully fetched broker data"}), 200
+        message: typing.Union[str, None] = batch_ids_error(ids=stock_ids, limit=self._batch_limit,
+                                                           name='stock_ids')
+        if message is not None:
+            return jsonify({'status': False, 'message': message}), 500
+        found, missing = get_multi_cached(cache=cache_stocks, model=Stock, natural_ids=stock_ids,
+                                          tags=lambda sid: StockCacheTags.stock(stock_id=sid),
+                                          timeout=return_ttl(name='medium'))
+        return jsonify({'status': True, 'payload': {'found': found, 'missing': missing},
+                        'message': 'successfully fetched stocks'}), 200
 
-    @cache_stocks.cached(timeout=return_ttl(name='medium'), unless=end_of_month)
     @use_context
     @handle_view_errors
-    def get_all_brokers(self) -> tuple:
-        brokers_list: typing.List[dict] = [broker.to_dict() for broker in Broker.query().fetch()]
-        return jsonify({
-            "status": True,
-            "payload": brokers_list,
-            "message": "successfully fetched all brokers"}), 200
-
-    @cache_stocks.cached(timeout=return_ttl(name='medium'), unless=end_of_month)
+    def get_brokers_batch(self, broker_ids: typing.List[str]) -> tuple:
+        """
+            resolves many broker_ids with one batch get,
+            payload separates found brokers from missing ids
+        """
+        message: typing.Union[str, None] = batch_ids_error(ids=broker_ids, limit=self._batch_limit,
+                                                           name='broker_ids')
+        if message is not None:
+            return jsonify({'status': False, 'message': message}), 500
+        found, missing = get_multi_cached(cache=cache_stocks, model=Broker, natural_ids=broker_ids,
+                                          tags=lambda bid: StockCacheTags.broker(broker_id=bid),
+                                          timeout=return_ttl(name='medium'))
+        return jsonify({'status': True, 'payload': {'found': found, 'missing': missing},
+                        'message': 'successfully fetched brokers'}), 200
+
+    @memoize(cache=cache_stocks, timeout=return_ttl(name='medium'), unless=end_of_month,
+             tags=StockCacheTags.all_brokers)
     @use_context
     @handle_view_errors
-    async def get_all_brokers_async(self) -> tuple:
-        brokers_list: typing.List[dict] = [broker.to_dict() for broker in Broker.query().fetch_async().get_result()]
+    def get_all_brokers(self, limit: typing.Union[int, None] = None,
+                        cursor: typing.Union[str, None] = None) -> tuple:
+        message: typing.Union[str, None] = page_error(limit=limit, cursor=cursor)
+        if message is not None:
+            return jsonify({'status': False, 'message': message}), 500
+        brokers, next_cursor = fetch_page(query=Broker.query(), limit=limit, cursor=cursor)
+        brokers_list: typing.List[dict] = [broker.to_dict() for broker in brokers]
         return jsonify({
             "status": True,
             "payload": brokers_list,
+            "cursor": next_cursor,
             "message": "successfully fetched all brokers"}), 200
 
-    @cache_stocks.cached(timeout=return_ttl(name='medium'), unless=end_of_month)
+    @memoize(cache=cache_stocks, timeout=return_ttl(name='medium'), unless=end_of_month,
+             tags=StockCacheTags.stock_model)
     @use_context
     @handle_view_errors
     def get_stock_model(self, transaction_id: typing.Union[str, None] = None) -> tuple:
         if (transaction_id is None) or (transaction_id == ""):
             return jsonify({"status": False, "message": "transaction id is required"}), 500
 
-        stock_model: StockModel = StockModel.query(StockModel.transaction_id == transaction_id).get()
-        if isinstance(stock_model, StockModel):
-            return jsonify({"status": False, "message": "stock found", "payload": stock_model.to_dict()}), 200
-
-        return jsonify({"status": False, "message": "that transaction does not exist"}), 500
-
-    @cache_stocks.cached(timeout=return_ttl(name='medium'), unless=end_of_month)
-    @use_context
-    @handle_view_errors
-    async def get_stock_model_async(self, transaction_id: typing.Union[str, None] = None) -> tuple:
-        if (transaction_id is None) or (transaction_id == ""):
-            return jsonify({"status": False, "message": "transaction id is required"}), 500
-
-        stock_model: StockModel = StockModel.query(StockModel.transaction_id == transaction_id).get_async().get_result()
+        stock_model: StockModel = StockModel.get_by_natural_id(transaction_id)
         if isinstance(stock_model, StockModel):
             return jsonify({"status": False, "message": "stock found", "payload": stock_model.to_dict()}), 200
 
         return jsonify({"status": False, "message": "that transaction does not exist"}), 500
 
-    @cache_stocks.cached(timeout=return_ttl(name='medium'), unless=end_of_month)
+    @memoize(cache=cache_stocks, timeout=return_ttl(name='medium'), unless=end_of_month,
+             tags=StockCacheTags.all_stock_models)
     @use_context
     @handle_view_errors
-    def get_all_stock_models(self) -> tuple:
+    def get_all_stock_models(self, limit: typing.Union[int, None] = None,
+                             cursor: typing.Union[str, None] = None) -> tuple:
         """
-            return stock models
+            return one page of stock models
         """
-        stock_model_list: typing.List[dict] = [stock_model.to_dict() for stock_model in StockModel.query().fetch()]
+        message: typing.Union[str, None] = page_error(limit=limit, cursor=cursor)
+        if message is not None:
+            return jsonify({'status': False, 'message': message}), 500
+        stock_models, next_cursor = fetch_page(query=StockModel.query(), limit=limit, cursor=cursor)
+        stock_model_list: typing.List[dict] = [stock_model.to_dict()
+                                               for stock_model in stock_models]
         return jsonify({
             "status": True,
             "payload": stock_model_list,
+            "cursor": next_cursor,
             "message": "successfully fetched all stock model data"}), 200
 
-    @cache_stocks.cached(timeout=return_ttl(name='medium'), unless=end_of_month)
-    @use_context
     @handle_view_errors
-    async def get_all_stock_models_async(self) -> tuple:
+    def export(self, path: str, compress: bool = False) -> tuple:
         """
-            return stock models
+            streams every entity of the kind at path as newline delimited json, see export_models
         """
-        stock_model_list: typing.List[dict] = [stock_model.to_dict() for stock_model in
-                                               StockModel.query().fetch_async().get_result()]
-        return jsonify({
-            "status": True,
-            "payload": stock_model_list,
-            "message": "successfully fetched all stock model data"}), 200
+        model: typing.Union[typing.Type[ndb.Model], None] = export_models.get(path)
+        if model is None:
+            return jsonify({'status': False, 'message': 'unknown export: {}'.format(path)}), 500
+        return export_response(model=model, name=path.replace('-', '_'), compress=compress), 200
 
-    @cache_stocks.cached(timeout=return_ttl(name='medium'), unless=end_of_month)
+    @memoize(cache=cache_stocks, timeout=return_ttl(name='medium'), unless=end_of_month,
+             tags=functools.partial(StockCacheTags.volume, 'buy_volume'))
     @use_context
     @handle_view_errors
     def get_buy_volume(self, transaction_id: typing.Union[str, None] = None,
@@ -1282,7 +1093,7 @@ class StockView(CatchStockErrors, CatchBrokerErrors):
             by date_class and stock_id
         """
         if (transaction_id is not None) and (transaction_id != ""):
-            buy_volume: BuyVolumeModel = BuyVolumeModel.query(BuyVolumeModel.transaction_id == transaction_id).get()
+            buy_volume: BuyVolumeModel = BuyVolumeModel.get_by_natural_id(transaction_id)
         elif (date_created is not None) and (date_created != ""):
             # for a specific date_class buy volume should be filtered by stock
             buy_volume: BuyVolumeModel = BuyVolumeModel.query(
@@ -1293,95 +1104,60 @@ class StockView(CatchStockErrors, CatchBrokerErrors):
         message: str = "buy volume data successfully found"
         return jsonify({"status": True, "payload": buy_volume.to_dict(), "message": message}), 200
 
-    @cache_stocks.cached(timeout=return_ttl(name='medium'), unless=end_of_month)
+    @memoize(cache=cache_stocks, timeout=return_ttl(name='medium'), unless=end_of_month,
+             tags=functools.partial(StockCacheTags.day_volumes, 'buy_volume'),
+             stale_ttl=return_ttl(name='short'))
     @use_context
     @handle_view_errors
-    async def get_buy_volume_async(self, transaction_id: typing.Union[str, None] = None,
-                                   date_created: typing.Union[date_class, None] = None,
-                                   stock_id: typing.Union[str, None] = None) -> tuple:
-        """
-            get a specific buy volume filtered by transaction_id or
-            by date_class and stock_id
-        """
-        if (transaction_id is not None) and (transaction_id != ""):
-            buy_volume: BuyVolumeModel = BuyVolumeModel.query(
-                BuyVolumeModel.transaction_id == transaction_id).get_async().get_result()
-        elif (date_created is not None) and (date_created != ""):
-            # for a specific date_class buy volume should be filtered by stock
-            buy_volume: BuyVolumeModel = BuyVolumeModel.query(
-                BuyVolumeModel.date_created == date_created,
-                BuyVolumeModel.stock_id == stock_id).get_async().get_result()
-        else:
-            message: str = "transaction id or transaction date_class need to be specified"
-            return jsonify({"status": False, "message": message}), 500
-        message: str = "buy volume data successfully found"
-        return jsonify({"status": True, "payload": buy_volume.to_dict(), "message": message}), 200
-
-    @cache_stocks.cached(timeout=return_ttl(name='medium'), unless=end_of_month)
-    @use_context
-    @handle_view_errors
-    def get_day_buy_volumes(self, date_created: typing.Union[date_class, None] = None) -> tuple:
+    def get_day_buy_volumes(self, date_created: typing.Union[date_class, None] = None,
+                            fields: fields_type = None) -> tuple:
         """
             return buy volumes for all stocks for a specific date_class
         """
         if (date_created is None) or (date_created == ""):
             return jsonify({'status': True, 'message': 'date is required'}), 500
 
-        buy_volume_list: typing.List[BuyVolumeModel] = BuyVolumeModel.query(
-            BuyVolumeModel.date_created == date_created).fetch()
-        payload: typing.List[dict] = [buy_volume.to_dict() for buy_volume in buy_volume_list]
-        message: str = "successfully fetched day buy volume data"
-        return jsonify({"status": True, "payload": payload, "message": message}), 200
-
-    @cache_stocks.cached(timeout=return_ttl(name='medium'), unless=end_of_month)
-    @use_context
-    @handle_view_errors
-    async def get_day_buy_volumes_async(self, date_created: typing.Union[date_class, None] = None) -> tuple:
-        """
-            return buy volumes for all stocks for a specific date_class
-        """
-        if (date_created is None) or (date_created == ""):
-            return jsonify({'status': True, 'message': 'date is required'}), 500
-
-        buy_volume_list: typing.List[BuyVolumeModel] = BuyVolumeModel.query(
-            BuyVolumeModel.date_created == date_created).fetch_async().get_result()
-        payload: typing.List[dict] = [buy_volume.to_dict() for buy_volume in buy_volume_list]
+        message: typing.Union[str, None] = fields_error(model=BuyVolumeModel, fields=fields)
+        if message is not None:
+            return jsonify({'status': False, 'message': message}), 500
+        selection: FieldSelection = FieldSelection(model=BuyVolumeModel, fields=fields,
+                                                   date_created=date_created)
+        payload: typing.List[dict] = selection.records(selection.query().fetch())
         message: str = "successfully fetched day buy volume data"
         return jsonify({"status": True, "payload": payload, "message": message}), 200
 
-    @cache_stocks.cached(timeout=return_ttl(name='medium'), unless=end_of_month)
+    @memoize(cache=cache_stocks, timeout=return_ttl(name='medium'), unless=end_of_month,
+             tags=functools.partial(StockCacheTags.stock_volumes, 'buy_volume'))
     @use_context
     @handle_view_errors
-    def get_daily_buy_volumes_by_stock(self, stock_id: typing.Union[str, None] = None) -> tuple:
+    def get_daily_buy_volumes_by_stock(self, stock_id: typing.Union[str, None] = None,
+                                       fields: fields_type = None,
+                                       date_from: typing.Union[date_class, str, None] = None,
+                                       date_to: typing.Union[date_class, str, None] = None,
+                                       limit: typing.Union[int, None] = None) -> tuple:
         """
             for a specific stock return daily buy volumes
         """
         if (stock_id is None) or (stock_id == ""):
             return jsonify({'status': False, 'message': 'Stock ID cannot be None'}), 500
 
-        buy_volume_list: typing.List[BuyVolumeModel] = BuyVolumeModel.query(
-            BuyVolumeModel.stock_id == stock_id).fetch()
-        payload: typing.List[dict] = [buy_volume.to_dict() for buy_volume in buy_volume_list]
-        message: str = "successfully daily buy volumes by stock"
-        return jsonify({"status": True, "payload": payload, "message": message}), 200
-
-    @cache_stocks.cached(timeout=return_ttl(name='medium'), unless=end_of_month)
-    @use_context
-    @handle_view_errors
-    async def get_daily_buy_volumes_by_stock_async(self, stock_id: typing.Union[str, None] = None) -> tuple:
-        """
-            for a specific stock return daily buy volumes
-        """
-        if (stock_id is None) or (stock_id == ""):
-            return jsonify({'status': False, 'message': 'Stock ID cannot be None'}), 500
-
-        buy_volume_list: typing.List[BuyVolumeModel] = BuyVolumeModel.query(
-            BuyVolumeModel.stock_id == stock_id).fetch_async().get_result()
-        payload: typing.List[dict] = [buy_volume.to_dict() for buy_volume in buy_volume_list]
+        message: typing.Union[str, None] = (fields_error(model=BuyVolumeModel, fields=fields) or
+                                            window_error(date_from=date_from, date_to=date_to,
+                                                         limit=limit))
+        if message is not None:
+            return jsonify({'status': False, 'message': message}), 500
+        selection: volume_selection_type = stock_volumes_selection(model=BuyVolumeModel,
+                                                                   fields=fields,
+                                                                   stock_id=stock_id,
+                                                                   date_from=date_from,
+                                                                   date_to=date_to, limit=limit)
+        payload: typing.List[dict] = selection.records(
+            selection.query().fetch(limit=selection.fetch_limit))
         message: str = "successfully daily buy volumes by stock"
         return jsonify({"status": True, "payload": payload, "message": message}), 200
 
-    @cache_stocks.cached(timeout=return_ttl(name='medium'), unless=end_of_month)
+    @memoize(cache=cache_stocks, timeout=return_ttl(name='medium'), unless=end_of_month,
+             tags=functools.partial(StockCacheTags.volume, 'sell_volume'))
     @use_context
     @handle_view_errors
     def get_sell_volume(self, transaction_id: typing.Union[str, None] = None,
@@ -1392,8 +1168,9 @@ class StockView(CatchStockErrors, CatchBrokerErrors):
             or for date_class and stock_id return a specific sell_volume
         """
         if (transaction_id is not None) or (transaction_id == ""):
-            sell_volume_list: typing.List[SellVolumeModel] = SellVolumeModel.query(
-                SellVolumeModel.transaction_id == transaction_id).fetch()
+            volume: typing.Union[SellVolumeModel, None] = \
+                SellVolumeModel.get_by_natural_id(transaction_id)
+            sell_volume_list: typing.List[SellVolumeModel] = [volume] if volume is not None else []
 
         elif (date_created is not None) and (stock_id is not None):
             sell_volume_list: typing.List[SellVolumeModel] = SellVolumeModel.query(
@@ -1410,91 +1187,52 @@ class StockView(CatchStockErrors, CatchBrokerErrors):
 
         return jsonify({"status": False, "message": "sell volume not found"}), 500
 
-    @cache_stocks.cached(timeout=return_ttl(name='medium'), unless=end_of_month)
-    @use_context
-    @handle_view_errors
-    async def get_sell_volume_async(self, transaction_id: typing.Union[str, None] = None,
-                                    date_created: typing.Union[None, date_class] = None,
-                                    stock_id: typing.Union[str, None] = None) -> tuple:
-        """
-            for a specific transaction_id return the related transaction_id
-            or for date_class and stock_id return a specific sell_volume
-        """
-        if (transaction_id is not None) or (transaction_id == ""):
-            sell_volume_list: typing.List[SellVolumeModel] = SellVolumeModel.query(
-                SellVolumeModel.transaction_id == transaction_id).fetch_async().get_result()
-
-        elif (date_created is not None) and (stock_id is not None):
-            sell_volume_list: typing.List[SellVolumeModel] = SellVolumeModel.query(
-                SellVolumeModel.date_created == date_created,
-                SellVolumeModel.stock_id == stock_id).fetch_async().get_result()
-        else:
-            return jsonify({"status": False, "message": "sell volume not found"}), 500
-
-        if len(sell_volume_list) > 0:
-            sell_volume_instance: SellVolumeModel = sell_volume_list[0]
-            message: str = "successfully found sell volume"
-            return jsonify({"status": True,
-                            "payload": sell_volume_instance.to_dict(),
-                            "message": message}), 200
-
-        return jsonify({"status": False, "message": "sell volume not found"}), 500
-
-    @cache_stocks.cached(timeout=return_ttl(name='medium'), unless=end_of_month)
-    @use_context
-    @handle_view_errors
-    def get_day_sell_volumes(self, date_created: date_class) -> tuple:
-        """
-            fetch all daily sell volumes
-        """
-        sell_volume_list: typing.List[SellVolumeModel] = SellVolumeModel.query(
-            SellVolumeModel.date_created == date_created).fetch()
-        sell_volumes: typing.List[dict] = [sell_volume.to_dict() for sell_volume in sell_volume_list]
-        message: str = "day sell volumes returned"
-        return jsonify({"status": False, "payload": sell_volumes, "message": message}), 200
-
-    @cache_stocks.cached(timeout=return_ttl(name='medium'), unless=end_of_month)
+    @memoize(cache=cache_stocks, timeout=return_ttl(name='medium'), unless=end_of_month,
+             tags=functools.partial(StockCacheTags.day_volumes, 'sell_volume'))
     @use_context
     @handle_view_errors
-    async def get_day_sell_volumes_async(self, date_created: date_class) -> tuple:
+    def get_day_sell_volumes(self, date_created: date_class, fields: fields_type = None) -> tuple:
         """
             fetch all daily sell volumes
         """
-        sell_volume_list: typing.List[SellVolumeModel] = SellVolumeModel.query(
-            SellVolumeModel.date_created == date_created).fetch_async().get_result()
-        sell_volumes: typing.List[dict] = [sell_volume.to_dict() for sell_volume in sell_volume_list]
+        message: typing.Union[str, None] = fields_error(model=SellVolumeModel, fields=fields)
+        if message is not None:
+            return jsonify({'status': False, 'message': message}), 500
+        selection: FieldSelection = FieldSelection(model=SellVolumeModel, fields=fields,
+                                                   date_created=date_created)
+        sell_volumes: typing.List[dict] = selection.records(selection.query().fetch())
         message: str = "day sell volumes returned"
         return jsonify({"status": False, "payload": sell_volumes, "message": message}), 200
 
-    @cache_stocks.cached(timeout=return_ttl(name='medium'), unless=end_of_month)
+    @memoize(cache=cache_stocks, timeout=return_ttl(name='medium'), unless=end_of_month,
+             tags=functools.partial(StockCacheTags.stock_volumes, 'sell_volume'))
     @use_context
     @handle_view_errors
-    def get_daily_sell_volumes_by_stock(self, stock_id: typing.Union[str, None] = None) -> tuple:
+    def get_daily_sell_volumes_by_stock(self, stock_id: typing.Union[str, None] = None,
+                                        fields: fields_type = None,
+                                        date_from: typing.Union[date_class, str, None] = None,
+                                        date_to: typing.Union[date_class, str, None] = None,
+                                        limit: typing.Union[int, None] = None) -> tuple:
         if (stock_id is None) or (stock_id == ""):
             return jsonify({'status': False, "message": "stock_id cannot be None"}), 500
 
-        sell_volume_list: typing.List[SellVolumeModel] = SellVolumeModel.query(
-            SellVolumeModel.stock_id == stock_id).fetch()
-
-        payload: typing.List[dict] = [sell_volume.to_dict() for sell_volume in sell_volume_list]
-        message: str = "successfully fetched sell volume by stock"
-        return jsonify({'status': False, "payload": payload, "message": message}), 200
-
-    @cache_stocks.cached(timeout=return_ttl(name='medium'), unless=end_of_month)
-    @use_context
-    @handle_view_errors
-    async def get_daily_sell_volumes_by_stock_async(self, stock_id: typing.Union[str, None] = None) -> tuple:
-        if (stock_id is None) or (stock_id == ""):
-            return jsonify({'status': False, "message": "stock_id cannot be None"}), 500
-
-        sell_volume_list: typing.List[SellVolumeModel] = SellVolumeModel.query(
-            SellVolumeModel.stock_id == stock_id).fetch_async().get_result()
-
-        payload: typing.List[dict] = [sell_volume.to_dict() for sell_volume in sell_volume_list]
+        message: typing.Union[str, None] = (fields_error(model=SellVolumeModel, fields=fields) or
+                                            window_error(date_from=date_from, date_to=date_to,
+                                                         limit=limit))
+        if message is not None:
+            return jsonify({'status': False, 'message': message}), 500
+        selection: volume_selection_type = stock_volumes_selection(model=SellVolumeModel,
+                                                                   fields=fields,
+                                                                   stock_id=stock_id,
+                                                                   date_from=date_from,
+                                                                   date_to=date_to, limit=limit)
+        payload: typing.List[dict] = selection.records(
+            selection.query().fetch(limit=selection.fetch_limit))
         message: str = "successfully fetched sell volume by stock"
         return jsonify({'status': False, "payload": payload, "message": message}), 200
 
-    @cache_stocks.cached(timeout=return_ttl(name='medium'), unless=end_of_month)
+    @memoize(cache=cache_stocks, timeout=return_ttl(name='medium'), unless=end_of_month,
+             tags=functools.partial(StockCacheTags.volume, 'net_volume'))
     @use_context
     @handle_view_errors
     def get_net_volume(self, transaction_id: typing.Union[str, None] = None,
@@ -1502,8 +1240,9 @@ class StockView(CatchStockErrors, CatchBrokerErrors):
                        stock_id: typing.Union[str, None] = None) -> tuple:
 
         if (transaction_id is not None) and (transaction_id != ""):
-            net_volume_list: typing.List[NetVolumeModel] = NetVolumeModel.query(
-                NetVolumeModel.transaction_id == transaction_id).fetch()
+            volume: typing.Union[NetVolumeModel, None] = \
+                NetVolumeModel.get_by_natural_id(transaction_id)
+            net_volume_list: typing.List[NetVolumeModel] = [volume] if volume is not None else []
         elif date_class and stock_id:
             net_volume_list: typing.List[NetVolumeModel] = NetVolumeModel.query(
                 NetVolumeModel.date_created == date_created, NetVolumeModel.stock_id == stock_id).fetch()
@@ -1515,86 +1254,51 @@ class StockView(CatchStockErrors, CatchBrokerErrors):
         message: str = "successfully fetched net volume"
         return jsonify({"status": True, "payload": payload, "message": message}), 200
 
-    @cache_stocks.cached(timeout=return_ttl(name='medium'), unless=end_of_month)
+    @memoize(cache=cache_stocks, timeout=return_ttl(name='medium'), unless=end_of_month,
+             tags=functools.partial(StockCacheTags.day_volumes, 'net_volume'))
     @use_context
     @handle_view_errors
-    async def get_net_volume_async(self, transaction_id: typing.Union[str, None] = None,
-                                   date_created: typing.Union[date_class, None] = None,
-                                   stock_id: typing.Union[str, None] = None) -> tuple:
-
-        if (transaction_id is not None) and (transaction_id != ""):
-            net_volume_list: typing.List[NetVolumeModel] = NetVolumeModel.query(
-                NetVolumeModel.transaction_id == transaction_id).fetch_async().get_result()
-        elif date_class and stock_id:
-            net_volume_list: typing.List[NetVolumeModel] = NetVolumeModel.query(
-                NetVolumeModel.date_created == date_created,
-                NetVolumeModel.stock_id == stock_id).fetch_async().get_result()
-        else:
-            message: str = "net volume data not found"
-            return jsonify({"status": False, "message": message}), 500
-
-        payload: typing.List[dict] = [net_volume.to_dict() for net_volume in net_volume_list]
-        message: str = "successfully fetched net volume"
-        return jsonify({"status": True, "payload": payload, "message": message}), 200
-
-    @cache_stocks.cached(timeout=return_ttl(name='medium'), unless=end_of_month)
-    @use_context
-    @handle_view_errors
-    def get_day_net_volumes(self, date_created: typing.Union[date_class, None] = None) -> tuple:
-        if (date_created is not None) and (date_created != ""):
-            net_volume_list: typing.List[NetVolumeModel] = NetVolumeModel.query(
-                NetVolumeModel.date_created == date_created).fetch()
-
-            payload: typing.List[dict] = [net_volume.to_dict() for net_volume in net_volume_list]
-        else:
-            message: str = "day net volume data not found"
-            return jsonify({"status": False, "message": message}), 500
-
-        message: str = "day net volume data not found"
-        return jsonify({"status": True, "payload": payload, "message": message}), 500
-
-    @cache_stocks.cached(timeout=return_ttl(name='medium'), unless=end_of_month)
-    @use_context
-    @handle_view_errors
-    async def get_day_net_volumes_async(self, date_created: typing.Union[date_class, None] = None) -> tuple:
+    def get_day_net_volumes(self, date_created: typing.Union[date_class, None] = None,
+                            fields: fields_type = None) -> tuple:
         if (date_created is not None) and (date_created != ""):
-            net_volume_list: typing.List[NetVolumeModel] = NetVolumeModel.query(
-                NetVolumeModel.date_created == date_created).fetch_async().get_result()
-
-            payload: typing.List[dict] = [net_volume.to_dict() for net_volume in net_volume_list]
+            message: typing.Union[str, None] = fields_error(model=NetVolumeModel, fields=fields)
+            if message is not None:
+                return jsonify({'status': False, 'message': message}), 500
+            selection: FieldSelection = FieldSelection(model=NetVolumeModel, fields=fields,
+                                                       date_created=date_created)
+            payload: typing.List[dict] = selection.records(selection.query().fetch())
         else:
             message: str = "day net volume data not found"
             return jsonify({"status": False, "message": message}), 500
 
-        message: str = "day net volume data not found"
-        return jsonify({"status": True, "payload": payload, "message": message}), 500
-
-    @cache_stocks.cached(timeout=return_ttl(name='medium'), unless=end_of_month)
-    @use_context
-    @handle_view_errors
-    def get_daily_net_volumes_by_stock(self, stock_id: typing.Union[str, None] = None) -> tuple:
-        if (stock_id is not None) and (stock_id != ""):
-            net_volume_list: typing.List[NetVolumeModel] = NetVolumeModel.query(
-                NetVolumeModel.stock_id == stock_id).fetch()
-            payload: typing.List[dict] = [net_volume.to_dict() for net_volume in net_volume_list]
-        else:
-            message: str = "daily net volume data not found"
-            return jsonify({"status": False, "message": message}), 500
-
-        message: str = "daily net volume data not found"
-        return jsonify({"status": True, "payload": payload, "message": message}), 500
+        message: str = "successfully fetched day net volume data"
+        return jsonify({"status": True, "payload": payload, "message": message}), 200
 
-    @cache_stocks.cached(timeout=return_ttl(name='medium'), unless=end_of_month)
+    @memoize(cache=cache_stocks, timeout=return_ttl(name='medium'), unless=end_of_month,
+             tags=functools.partial(StockCacheTags.stock_volumes, 'net_volume'))
     @use_context
     @handle_view_errors
-    async def get_daily_net_volumes_by_stock_async(self, stock_id: typing.Union[str, None] = None) -> tuple:
+    def get_daily_net_volumes_by_stock(self, stock_id: typing.Union[str, None] = None,
+                                       fields: fields_type = None,
+                                       date_from: typing.Union[date_class, str, None] = None,
+                                       date_to: typing.Union[date_class, str, None] = None,
+                                       limit: typing.Union[int, None] = None) -> tuple:
         if (stock_id is not None) and (stock_id != ""):
-            net_volume_list: typing.List[NetVolumeModel] = NetVolumeModel.query(
-                NetVolumeModel.stock_id == stock_id).fetch_async().get_result()
-            payload: typing.List[dict] = [net_volume.to_dict() for net_volume in net_volume_list]
+            message: typing.Union[str, None] = (fields_error(model=NetVolumeModel, fields=fields) or
+                                                window_error(date_from=date_from, date_to=date_to,
+                                                             limit=limit))
+            if message is not None:
+                return jsonify({'status': False, 'message': message}), 500
+            selection: volume_selection_type = stock_volumes_selection(model=NetVolumeModel,
+                                                                       fields=fields,
+                                                                       stock_id=stock_id,
+                                                                       date_from=date_from,
+                                                                       date_to=date_to, limit=limit)
+            payload: typing.List[dict] = selection.records(
+                selection.query().fetch(limit=selection.fetch_limit))
         else:
             message: str = "daily net volume data not found"
             return jsonify({"status": False, "message": message}), 500
 
-        message: str = "daily net volume data not found"
-        return jsonify({"status": True, "payload": payload, "message": message}), 500
+        message: str = "successfully fetched daily net volumes by stock"
+        return jsonify({"status": True, "payload": payload, "message": message}), 200
@@ -3,20 +3,68 @@ from flask import jsonify, current_app
 from werkzeug.security import check_password_hash
 from data_service.config.types import dict_list_type
 from data_service.main import cache_users
+from data_service.cache.memoize import memoize
+from data_service.cache.invalidation import invalidate_tags
+from data_service.cache.entities import get_multi_cached
+from data_service.config import Config
+from data_service.config.exceptions import DataServiceError
 from data_service.store.users import UserModel
-from data_service.utils.utils import create_id, return_ttl
+from data_service.store.uniqueness import ExistsCheck, exists_concurrently
+from data_service.utils.utils import create_id, return_ttl, batch_ids_error
+from data_service.utils.pagination import page_error, fetch_page
+from data_service.utils.export import export_response
+from data_service.utils.fields import FieldSelection, fields_error, fields_type
 from data_service.config.exception_handlers import handle_view_errors
 from data_service.config.use_context import use_context
 
 users_type = typing.List[UserModel]
 
 
+class UserCacheTags:
+    """
+        # NOTES: invalidation tags of cached user reads,
+            a write bumps the tags of the user it changed
+    """
+
+    def __init__(self):
+        pass
+
+    @staticmethod
+    def user(uid: typing.Union[str, None] = None, cell: typing.Union[str, None] = None,
+             email: typing.Union[str, None] = None) -> typing.List[str]:
+        identifiers: typing.List[tuple] = [('uid', uid), ('cell', cell), ('email', email)]
+        return ['user:{}:{}'.format(name, value) for name, value in identifiers if value]
+
+    @staticmethod
+    def user_instance(user_instance: UserModel) -> typing.List[str]:
+        return UserCacheTags.user(uid=user_instance.uid, cell=user_instance.cell,
+                                  email=user_instance.email)
+
+
 # TODO create test cases for User View and Documentations
 # noinspection DuplicatedCode
 class UserView:
     def __init__(self):
         self._max_retries = current_app.config.get('DATASTORE_RETRIES')
         self._max_timeout = current_app.config.get('DATASTORE_TIMEOUT')
+        self._batch_limit = current_app.config.get('BATCH_LOOKUP_LIMIT', Config.BATCH_LOOKUP_LIMIT)
+
+    @staticmethod
+    def taken_fields(uid: typing.Union[str, None], email: typing.Union[str, None],
+                     cell: typing.Union[str, None]) -> typing.Dict[str, bool]:
+        """
+            which of uid, email and cell another user already has,
+            checked concurrently in one round trip
+        """
+        taken: typing.Union[typing.Dict[str, bool], None] = exists_concurrently({
+            'uid': ExistsCheck(model=UserModel, field='uid', value=uid),
+            'email': ExistsCheck(model=UserModel, field='email', value=email),
+            'cell': ExistsCheck(model=UserModel, field='cell', value=cell)})
+        if taken is None:
+            message: str = "Unable to verify user data, due to database error, " \
+                           "please try again later"
+            raise DataServiceError(status=500, description=message)
+        return taken
 
     @use_context
     @handle_view_errors
@@ -33,19 +81,16 @@ class UserView:
         :param uid:
         :return:
         """
-        if (uid is not None) and (uid != ""):
-            user_list: users_type = UserModel.query(UserModel.uid == uid).fetch()
-            if len(user_list) > 0:
-                return jsonify({'status': False, 'message': 'user already exists'}), 500
-        user_list: users_type = UserModel.query(UserModel.email == email).fetch()
-        if len(user_list) > 0:
+        taken: typing.Dict[str, bool] = self.taken_fields(uid=uid, email=email, cell=cell)
+        if taken['uid']:
+            return jsonify({'status': False, 'message': 'user already exists'}), 500
+        if taken['email']:
             message: str = '''
             the email you submitted is already attached to an account please login again or reset your password
             '''
             return jsonify({'status': False, 'message': message}), 500
 
-        user_list: users_type = UserModel.query(UserModel.cell == cell).fetch()
-        if len(user_list) > 0:
+        if taken['cell']:
             message: str = '''
             the cell you submitted is already attached to an account please login again or reset your password
             '''
@@ -68,56 +113,6 @@ class UserView:
                         "payload": user_instance.to_dict()
                         }), 200
 
-    @use_context
-    @handle_view_errors
-    async def add_user_async(self, names:  typing.Union[str, None], surname:  typing.Union[str, None],
-                             cell:  typing.Union[str, None], email:  typing.Union[str, None],
-                             password:  typing.Union[str, None], uid:  typing.Union[str, None] = None) -> tuple:
-        """
-            create new user
-        :param names:
-        :param surname:
-        :param cell:
-        :param email:
-        :param password:
-        :param uid:
-        :return:
-        """
-        if (uid is not None) and (uid != ""):
-            user_list: users_type = UserModel.query(UserModel.uid == uid).fetch_async().get_result()
-            if len(user_list) > 0:
-                return jsonify({'status': False, 'message': 'user already exists'}), 500
-        user_list: users_type = UserModel.query(UserModel.email == email).fetch_async().get_result()
-        if len(user_list) > 0:
-            message: str = '''
-            the email you submitted is already attached to an account please login again or reset your password
-            '''
-            return jsonify({'status': False, 'message': message}), 500
-
-        user_list: users_type = UserModel.query(UserModel.cell == cell).fetch_async().get_result()
-        if len(user_list) > 0:
-            message: str = '''
-            the cell you submitted is already attached to an account please login again or reset your password
-            '''
-            return jsonify({'status': False, 'message': message}), 500
-        user_instance: UserModel = UserModel()
-        if (uid is not None) and (uid != ""):
-            user_instance.set_uid(uid=uid)
-        else:
-            user_instance.set_uid(uid=create_id())
-
-        user_instance.set_names(names=names)
-        user_instance.set_surname(surname=surname)
-        user_instance.set_cell(cell=cell)
-        user_instance.set_email(email=email)
-        user_instance.set_password(password=password)
-        user_instance.set_is_active(is_active=True)
-        key = user_instance.put_async(retries=self._max_retries, timeout=self._max_timeout).get_result()
-        return jsonify({'status': True,
-                        "message": "Successfully created new user",
-                        "payload": user_instance.to_dict()
-                        }), 200
-
     @use_context
     @handle_view_errors
     def update_user(self, uid:  typing.Union[str, None], names:  typing.Union[str, None],
@@ -129,8 +124,9 @@ class UserView:
         if (uid is None) or (uid == ""):
             return jsonify({'status': False, 'message': 'User ID is required'}), 500
 
-        user_instance: UserModel = UserModel.query(UserModel.uid == uid).get()
+        user_instance: UserModel = UserModel.get_by_natural_id(uid)
         if isinstance(user_instance, UserModel):
+            stale_tags: typing.List[str] = UserCacheTags.user_instance(user_instance=user_instance)
             user_instance.set_names(names=names)
             user_instance.set_surname(surname=surname)
             user_instance.set_cell(cell=cell)
@@ -138,31 +134,8 @@ class UserView:
             user_instance.set_admin(is_admin=is_admin)
             user_instance.set_support(is_support=is_support)
             user_instance.put(retries=self._max_retries, timeout=self._max_timeout)
-            return jsonify({'status': True, 'message': 'successfully updated user details',
-                            'payload': user_instance.to_dict()}), 200
-        else:
-            return jsonify({'status': False, 'message': 'user not found cannot update user details'}), 500
-
-    @use_context
-    @handle_view_errors
-    async def update_user_async(self, uid:  typing.Union[str, None], names:  typing.Union[str, None],
-                                surname:  typing.Union[str, None], cell:  typing.Union[str, None],
-                                email:  typing.Union[str, None], is_admin: bool, is_support: bool) -> tuple:
-        """
-            update user details
-        """
-        if (uid is None) or (uid == ""):
-            return jsonify({'status': False, 'message': 'User ID is required'}), 500
-
-        user_instance: UserModel = UserModel.query(UserModel.uid == uid).get_async().get_result()
-        if isinstance(user_instance, UserModel):
-            user_instance.set_names(names=names)
-            user_instance.set_surname(surname=surname)
-            user_instance.set_cell(cell=cell)
-            user_instance.set_email(email=email)
-            user_instance.set_admin(is_admin=is_admin)
-            user_instance.set_support(is_support=is_support)
-            key = user_instance.put_async(retries=self._max_retries, timeout=self._max_timeout).get_result()
+            invalidate_tags(cache=cache_users, tags=stale_tags
+                            + UserCacheTags.user_instance(user_instance))
             return jsonify({'status': True, 'message': 'successfully updated user details',
                             'payload': user_instance.to_dict()}), 200
         else:
@@ -180,53 +153,30 @@ class UserView:
         :return:
         """
         if (uid != "") and (uid is not None):
-            user_instance: UserModel = UserModel.query(UserModel.uid == uid).get()
+            user_instance: UserModel = UserModel.get_by_natural_id(uid)
             if isinstance(user_instance, UserModel):
                 user_instance.key.delete()
+                invalidate_tags(cache=cache_users,
+                                tags=UserCacheTags.user_instance(user_instance=user_instance))
                 return jsonify({'status': True, 'message': 'successfully deleted user'}), 200
         elif (email != "") and (email is not None):
             user_instance: UserModel = UserModel.query(UserModel.email == email).get()
             if isinstance(user_instance, UserModel):
                 user_instance.key.delete()
+                invalidate_tags(cache=cache_users,
+                                tags=UserCacheTags.user_instance(user_instance=user_instance))
                 return jsonify({'status': True, 'message': 'successfully deleted user'}), 200
         elif (cell != "") and (cell is not None):
             user_instance: UserModel = UserModel.query(UserModel.cell == cell).get()
             if isinstance(user_instance, UserModel):
                 # TODO- rather mark user as deleted
                 user_instance.key.delete()
+                invalidate_tags(cache=cache_users,
+                                tags=UserCacheTags.user_instance(user_instance=user_instance))
                 return jsonify({'status': True, 'message': 'successfully deleted user'}), 200
         return jsonify({'status': False, 'message': 'user not found'}), 500
 
-    @use_context
-    @handle_view_errors
-    async def delete_user_async(self, uid: typing.Union[str, None] = None, email: typing.Union[str, None] = None,
-                    cell:  typing.Union[str, None] = None) -> tuple:
-        """
-            given either, uid, email or cell delete user
-        :param uid:
-        :param email:
-        :param cell:
-        :return:
-        """
-        if (uid != "") and (uid is not None):
-            user_instance: UserModel = UserModel.query(UserModel.uid == uid).get_async().get_result()
-            if isinstance(user_instance, UserModel):
-                user_instance.key.delete()
-                return jsonify({'status': True, 'message': 'successfully deleted user'}), 200
-        elif (email != "") and (email is not None):
-            user_instance: UserModel = UserModel.query(UserModel.email == email).get_async().get_result()
-            if isinstance(user_instance, UserModel):
-                user_instance.key.delete()
-                return jsonify({'status': True, 'message': 'successfully deleted user'}), 200
-        elif (cell != "") and (cell is not None):
-            user_instance: UserModel = UserModel.query(UserModel.cell == cell).get_async().get_result()
-            if isinstance(user_instance, UserModel):
-                # TODO- rather mark user as deleted
-                user_instance.key.delete()
-                return jsonify({'status': True, 'message': 'successfully deleted user'}), 200
-        return jsonify({'status': False, 'message': 'user not found'}), 500
-
-    @cache_users.cached(timeout=return_ttl(name='short'))
+    @memoize(cache=cache_users, timeout=return_ttl(name='short'))
     @use_context
     @handle_view_errors
     def get_active_users(self) -> tuple:
@@ -237,18 +187,7 @@ class UserView:
         users_list: dict_list_type = [user.to_dict() for user in UserModel.query(UserModel.is_active == True).fetch()]
         return jsonify({'status': True, 'payload': users_list, 'message': 'successfully retrieved active users'}), 200
 
-    @cache_users.cached(timeout=return_ttl(name='short'))
-    @use_context
-    @handle_view_errors
-    async def get_active_users_async(self) -> tuple:
-        """
-            return a list of all users
-        :return:
-        """
-        users_list: dict_list_type = [user.to_dict() for user in UserModel.query(UserModel.is_active == True).fetch_async().get_result()]
-        return jsonify({'status': True, 'payload': users_list, 'message': 'successfully retrieved active users'}), 200
-
-    @cache_users.cached(timeout=return_ttl(name='short'))
+    @memoize(cache=cache_users, timeout=return_ttl(name='short'))
     @use_context
     @handle_view_errors
     def get_in_active_users(self) -> tuple:
@@ -259,43 +198,36 @@ class UserView:
         users_list: dict_list_type = [user.to_dict() for user in UserModel.query(UserModel.is_active == False).fetch()]
         return jsonify({'status': True, 'payload': users_list, 'message': 'successfully retrieved active users'}), 200
 
-    @cache_users.cached(timeout=return_ttl(name='short'))
-    @use_context
-    @handle_view_errors
-    async def get_in_active_users_async(self) -> tuple:
-        """
-            return a list of non active users
-        :return:
-        """
-        users_list: dict_list_type = [user.to_dict() for user in UserModel.query(UserModel.is_active == False).fetch_async().get_result()]
-        return jsonify({'status': True, 'payload': users_list, 'message': 'successfully retrieved active users'}), 200
-
-
-    @cache_users.cached(timeout=return_ttl(name='short'))
+    @memoize(cache=cache_users, timeout=return_ttl(name='short'))
     @use_context
     @handle_view_errors
-    def get_all_users(self) -> tuple:
+    def get_all_users(self, limit: typing.Union[int, None] = None,
+                      cursor: typing.Union[str, None] = None, fields: fields_type = None) -> tuple:
         """
-            get a list of all users
+            get one page of users, cursor is the cursor returned with the previous page
+            fields limits every user to the fields named, e.g. "uid,email"
         :return:
         """
-        users_list: dict_list_type = [user.to_dict() for user in UserModel.query().fetch()]
-        message: str = 'successfully retrieved active users'
-        return jsonify({'status': True, 'payload': users_list, 'message': message}), 200
+        message: typing.Union[str, None] = page_error(limit=limit, cursor=cursor)
+        message = message or fields_error(model=UserModel, fields=fields)
+        if message is not None:
+            return jsonify({'status': False, 'message': message}), 500
+        selection: FieldSelection = FieldSelection(model=UserModel, fields=fields)
+        users, next_cursor = fetch_page(query=selection.query(), limit=limit, cursor=cursor)
+        users_list: dict_list_type = selection.records(users)
+        message = 'successfully retrieved active users'
+        return jsonify({'status': True, 'payload': users_list, 'cursor': next_cursor,
+                        'message': message}), 200
 
-    @cache_users.cached(timeout=return_ttl(name='short'))
-    @use_context
     @handle_view_errors
-    async def get_all_users_async(self) -> tuple:
+    def export_users(self, compress: bool = False) -> tuple:
         """
-            get a list of all users
-        :return:
+            streams every user as newline delimited json, password hashes are never exported
         """
-        users_list: dict_list_type = [user.to_dict() for user in UserModel.query().fetch_async().get_result()]
-        message: str = 'successfully retrieved active users'
-        return jsonify({'status': True, 'payload': users_list, 'message': message}), 200
+        return export_response(model=UserModel, name='users', compress=compress,
+                               exclude=['password']), 200
 
-    @cache_users.cached(timeout=return_ttl(name='medium'))
+    @memoize(cache=cache_users, timeout=return_ttl(name='medium'), tags=UserCacheTags.user)
     @use_context
     @handle_view_errors
     def get_user(self, uid:  typing.Union[str, None] = None, cell:  typing.Union[str, None] = None,
@@ -308,7 +240,7 @@ class UserView:
         :return:
         """
         if (uid is not None) and (uid != ""):
-            user_instance: UserModel = UserModel.query(UserModel.uid == uid).get()
+            user_instance: UserModel = UserModel.get_by_natural_id(uid)
             if isinstance(user_instance, UserModel):
                 message: str = 'successfully retrieved user by uid'
                 return jsonify({'status': True, 'payload': user_instance.to_dict(), 'message': message}), 200
@@ -327,38 +259,21 @@ class UserView:
 
         return jsonify({'status': False, 'message': 'to retrieve a user either submit an email, cell or user id'}), 500
 
-    @cache_users.cached(timeout=return_ttl(name='medium'))
     @use_context
     @handle_view_errors
-    async def get_user_async(self, uid:  typing.Union[str, None] = None, cell:  typing.Union[str, None] = None,
-                             email:  typing.Union[str, None] = None) -> tuple:
+    def get_users_batch(self, uids: typing.List[str]) -> tuple:
         """
-            return a user either by uid, cell or email
-            :param uid:
-            :param cell:
-            :param email:
-            :return:
+            resolves many uids with one batch get, payload separates found users from missing uids
         """
-        if (uid is not None) and (uid != ""):
-            user_instance: UserModel = UserModel.query(UserModel.uid == uid).get_async().get_result()
-            if isinstance(user_instance, UserModel):
-                message: str = 'successfully retrieved user by uid'
-                return jsonify({'status': True, 'payload': user_instance.to_dict(), 'message': message}), 200
-
-        if (cell is not None) and (cell != ""):
-            user_instance: UserModel = UserModel.query(UserModel.cell == cell).get_async().get_result()
-            if isinstance(user_instance, UserModel):
-                message: str = 'successfully retrieved user by cell'
-                return jsonify({'status': True, 'payload': user_instance.to_dict(), 'message': message}), 200
-
-        if (email is not None) and (email != ""):
-            user_instance: UserModel = UserModel.query(UserModel.email == email).get_async().get_result()
-            if isinstance(user_instance, UserModel):
-                message: str = 'successfully retrieved user by email'
-                return jsonify({'status': True, 'payload': user_instance.to_dict(), 'message': message}), 200
-
-        return jsonify({'status': False, 'message': 'to retrieve a user either submit an email, cell or user id'}), 500
-
+        message: typing.Union[str, None] = batch_ids_error(ids=uids, limit=self._batch_limit,
+                                                           name='uids')
+        if message is not None:
+            return jsonify({'status': False, 'message': message}), 500
+        found, missing = get_multi_cached(cache=cache_users, model=UserModel, natural_ids=uids,
+                                          tags=lambda uid: UserCacheTags.user(uid=uid),
+                                          timeout=return_ttl(name='medium'))
+        return jsonify({'status': True, 'payload': {'found': found, 'missing': missing},
+                        'message': 'successfully retrieved users'}), 200
     @use_context
     @handle_view_errors
     def check_password(self, uid: typing.Union[str, None], password:  typing.Union[str, None]) -> tuple:
@@ -367,24 +282,7 @@ class UserView:
         if (password is None) or (password == ""):
             return jsonify({'status': False, 'message': 'please submit password'}), 500
 
-        user_instance: UserModel = UserModel.query(UserModel.uid == uid).get()
-        if isinstance(user_instance, UserModel):
-            if check_password_hash(password=password, pwhash=user_instance.password) is True:
-                return jsonify({'status': True, 'message': 'passwords match'}), 200
-            else:
-                return jsonify({'status': False, 'message': 'passwords do not match'}), 200
-        else:
-            return jsonify({'status': False, 'message': 'user not found'}), 200
-
-    @use_context
-    @handle_view_errors
-    async def check_password_async(self, uid: typing.Union[str, None], password:  typing.Union[str, None]) -> tuple:
-        if (uid is None) or (uid == ""):
-            return jsonify({'status': False, 'message': 'please submit user id'}), 500
-        if (password is None) or (password == ""):
-            return jsonify({'status': False, 'message': 'please submit password'}), 500
-
-        user_instance: UserModel = UserModel.query(UserModel.uid == uid).get_async().get_result()
+        user_instance: UserModel = UserModel.get_by_natural_id(uid)
         if isinstance(user_instance, UserModel):
             if check_password_hash(password=password, pwhash=user_instance.password) is True:
                 return jsonify({'status': True, 'message': 'passwords match'}), 200
@@ -398,25 +296,12 @@ class UserView:
     def deactivate_user(self, uid: typing.Union[str, None]) -> tuple:
         if (uid is None) or (uid == ""):
             return jsonify({'status': False, 'message': 'please submit user id'}), 500
-        user_instance: UserModel = UserModel.query(UserModel.uid == uid).get()
+        user_instance: UserModel = UserModel.get_by_natural_id(uid)
         if isinstance(user_instance, UserModel):
             if user_instance.set_is_active(is_active=False) is True:
                 user_instance.put()
-                return jsonify({'status': True, 'message': 'user deactivated'}), 200
-            else:
-                return jsonify({'status': False, 'message': 'could not de-activate user'}), 200
-        else:
-            return jsonify({'status': False, 'message': 'user not found'}), 200
-
-    @use_context
-    @handle_view_errors
-    async def deactivate_user_async(self, uid: typing.Union[str, None]) -> tuple:
-        if (uid is None) or (uid == ""):
-            return jsonify({'status': False, 'message': 'please submit user id'}), 500
-        user_instance: UserModel = UserModel.query(UserModel.uid == uid).get_async().get_result()
-        if isinstance(user_instance, UserModel):
-            if user_instance.set_is_active(is_active=False) is True:
-                key = user_instance.put_async().get_result()
+                invalidate_tags(cache=cache_users,
+                                tags=UserCacheTags.user_instance(user_instance=user_instance))
                 return jsonify({'status': True, 'message': 'user deactivated'}), 200
             else:
                 return jsonify({'status': False, 'message': 'could not de-activate user'}), 200
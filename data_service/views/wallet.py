@@ -2,9 +2,12 @@ import typing
 from flask import jsonify, current_app
 from data_service.config.exceptions import DataServiceError
 from data_service.main import cache_stocks
+from data_service.cache.memoize import memoize
 from data_service.store.mixins import AmountMixin
 from data_service.store.wallet import WalletModel, WalletValidator
 from data_service.utils.utils import return_ttl, end_of_month
+from data_service.utils.pagination import page_error, fetch_page
+from data_service.utils.export import export_response
 from data_service.config.exception_handlers import handle_view_errors
 from data_service.config.use_context import use_context
 
@@ -22,12 +25,6 @@ class Validator(WalletValidator):
             return True
         return False
 
-    @staticmethod
-    async def is_uid_none_async(uid: typing.Union[None, str]) -> bool:
-        if (uid is None) or (uid == ''):
-            return True
-        return False
-
     def can_add_wallet(self, uid: typing.Union[None, str] = None) -> bool:
         if not(self.is_uid_none(uid=uid)):
             wallet_exist: typing.Union[bool, None] = self.wallet_exist(uid=uid)
@@ -36,14 +33,6 @@ class Validator(WalletValidator):
             raise DataServiceError(status=500, description='Unable to verify wallet data')
         return False
 
-    async def can_add_wallet_async(self, uid: typing.Union[None, str] = None) -> bool:
-        if not(self.is_uid_none(uid=uid)):
-            wallet_exist: typing.Union[bool, None] = await self.wallet_exist_async(uid=uid)
-            if isinstance(wallet_exist, bool):
-                return not wallet_exist
-            raise DataServiceError(status=500, description='Unable to verify wallet data')
-        return False
-
     def can_update_wallet(self, uid: typing.Union[None, str] = None) -> bool:
         if not(self.is_uid_none(uid=uid)):
             wallet_exist: typing.Union[bool, None] = self.wallet_exist(uid=uid)
@@ -52,14 +41,6 @@ class Validator(WalletValidator):
             raise DataServiceError(status=500, description='Unable to verify wallet data')
         return False
 
-    async def can_update_wallet_async(self, uid: typing.Union[None, str] = None) -> bool:
-        if not(self.is_uid_none(uid=uid)):
-            wallet_exist: typing.Union[bool, None] = await self.wallet_exist_async(uid=uid)
-            if isinstance(wallet_exist, bool):
-                return wallet_exist
-            raise DataServiceError(status=500, description='Unable to verify wallet data')
-        return False
-
     def can_reset_wallet(self, uid: typing.Union[None, str]) -> bool:
         if not(self.is_uid_none(uid=uid)):
             wallet_exist: typing.Union[bool, None] = self.wallet_exist(uid=uid)
@@ -68,14 +49,6 @@ class Validator(WalletValidator):
             raise DataServiceError(status=500, description='Unable to verify wallet data')
         return False
 
-    async def can_reset_wallet_async(self, uid: typing.Union[None, str]) -> bool:
-        if not(self.is_uid_none(uid=uid)):
-            wallet_exist: typing.Union[bool, None] = await self.wallet_exist_async(uid=uid)
-            if isinstance(wallet_exist, bool):
-                return wallet_exist
-            raise DataServiceError(status=500, description='Unable to verify wallet data')
-        return False
-
 
 # noinspection DuplicatedCode
 class WalletView(Validator):
@@ -106,40 +79,12 @@ class WalletView(Validator):
                             'payload': wallet_instance.to_dict()}), 200
         return jsonify({'status': False, 'message': 'Unable to create wallet'}), 500
 
-    @use_context
-    @handle_view_errors
-    async def create_wallet_async(self, uid: typing.Union[str, None], currency: typing.Union[str, None],
-                                  paypal_address: typing.Union[str, None]) -> tuple:
-        if await self.can_add_wallet_async(uid=uid) is True:
-            wallet_instance: WalletModel = WalletModel()
-            amount_instance: AmountMixin = AmountMixin()
-            amount_instance.amount = 0
-            amount_instance.currency = currency
-            wallet_instance.uid = uid
-            wallet_instance.available_funds = amount_instance
-            wallet_instance.paypal_address = paypal_address
-            key = wallet_instance.put_async(retries=self._max_retries, timeout=self._max_timeout).get_result()
-            if key is None:
-                raise DataServiceError(status=500, description="An Error occurred creating Wallet")
-            return jsonify({'status': True, 'message': 'successfully created wallet',
-                            'payload': wallet_instance.to_dict()}), 200
-        return jsonify({'status': False, 'message': 'Unable to create wallet'}), 500
-
-    @cache_stocks.cached(timeout=return_ttl(name='medium'), unless=end_of_month)
+    @memoize(cache=cache_stocks, timeout=return_ttl(name='medium'), unless=end_of_month)
     @use_context
     @handle_view_errors
     def get_wallet(self, uid: typing.Union[str, None]) -> tuple:
         if not(self.is_uid_none(uid=uid)):
-            wallet_instance: WalletModel = WalletModel.query(WalletModel.uid == uid).get()
-            return jsonify({'status': True, 'payload': wallet_instance.to_dict(), 'message': 'wallet found'}), 200
-        return jsonify({'status': False, 'message': 'uid cannot be None'}), 500
-
-    @cache_stocks.cached(timeout=return_ttl(name='medium'), unless=end_of_month)
-    @use_context
-    @handle_view_errors
-    async def get_wallet_async(self, uid: typing.Union[str, None]) -> tuple:
-        if not(self.is_uid_none(uid=uid)):
-            wallet_instance: WalletModel = WalletModel.query(WalletModel.uid == uid).get_async().get_result()
+            wallet_instance: WalletModel = WalletModel.get_by_natural_id(uid)
             return jsonify({'status': True, 'payload': wallet_instance.to_dict(), 'message': 'wallet found'}), 200
         return jsonify({'status': False, 'message': 'uid cannot be None'}), 500
 
@@ -153,7 +98,7 @@ class WalletView(Validator):
         paypal_address: typing.Union[str, None] = wallet_data.get("paypal_address")
 
         if self.can_update_wallet(uid=uid) is True:
-            wall_instance: WalletModel = WalletModel.query(WalletModel.uid == uid).get()
+            wall_instance: WalletModel = WalletModel.get_by_natural_id(uid)
             # No need to test for wallet availability as can update returned True
             wall_instance.uid = uid
             amount_instance: AmountMixin = AmountMixin(amount=available_funds, currency=currency)
@@ -167,37 +112,13 @@ class WalletView(Validator):
                             'message': 'successfully updated wallet'}), 200
         return jsonify({'status': False, 'message': 'Unable to update wallet'}), 500
 
-    @use_context
-    @handle_view_errors
-    async def update_wallet_async(self, wallet_data: dict) -> tuple:
-
-        uid: typing.Union[str, None] = wallet_data.get("uid")
-        available_funds: typing.Union[int, None] = wallet_data.get("available_funds")
-        currency: typing.Union[str, None] = wallet_data.get('currency')
-        paypal_address: typing.Union[str, None] = wallet_data.get("paypal_address")
-
-        if await self.can_update_wallet_async(uid=uid) is True:
-            wall_instance: WalletModel = WalletModel.query(WalletModel.uid == uid).get_async().get_result()
-            # No need to test for wallet availability as can update returned True
-            wall_instance.uid = uid
-            amount_instance: AmountMixin = AmountMixin(amount=available_funds, currency=currency)
-            wall_instance.available_funds = amount_instance
-            wall_instance.paypal_address = paypal_address
-            key = wall_instance.put_async(retries=self._max_retries, timeout=self._max_timeout).get_result()
-            if key is None:
-                message: str = "Database error while updating wallet"
-                raise DataServiceError(status=500, description=message)
-            return jsonify({'status': True, 'payload': wall_instance.to_dict(),
-                            'message': 'successfully updated wallet'}), 200
-        return jsonify({'status': False, 'message': 'Unable to update wallet'}), 500
-
     @use_context
     @handle_view_errors
     def reset_wallet(self, wallet_data: dict) -> tuple:
         uid: typing.Union[str, None] = wallet_data.get('uid')
         currency: typing.Union[str, None] = wallet_data.get('currency')
         if self.can_reset_wallet(uid=uid) is True:
-            wallet_instance: WalletModel = WalletModel.query(WalletModel.uid == uid).get()
+            wallet_instance: WalletModel = WalletModel.get_by_natural_id(uid)
             amount_instance: AmountMixin = AmountMixin(amount=0, currency=currency)
             wallet_instance.available_funds = amount_instance
             key = wallet_instance.put(retries=self._max_retries, timeout=self._max_timeout)
@@ -209,42 +130,27 @@ class WalletView(Validator):
                             'message': 'wallet is rest'}), 200
         return jsonify({'status': False, 'message': 'Unable to reset wallet'}), 500
 
+    @memoize(cache=cache_stocks, timeout=return_ttl(name='medium'), unless=end_of_month)
     @use_context
     @handle_view_errors
-    async def reset_wallet_async(self, wallet_data: dict) -> tuple:
-        uid: typing.Union[str, None] = wallet_data.get('uid')
-        currency: typing.Union[str, None] = wallet_data.get('currency')
-        if await self.can_reset_wallet_async(uid=uid) is True:
-            wallet_instance: WalletModel = WalletModel.query(WalletModel.uid == uid).get_async().get_result()
-            amount_instance: AmountMixin = AmountMixin(amount=0, currency=currency)
-            wallet_instance.available_funds = amount_instance
-            key = wallet_instance.put_async(retries=self._max_retries, timeout=self._max_timeout).get_result()
-            if key is None:
-                message: str = "Database error while resetting wallet"
-                raise DataServiceError(status=500, description=message)
-            return jsonify({'status': True, 'payload': wallet_instance.to_dict(),
-                            'message': 'wallet is rest'}), 200
-        return jsonify({'status': False, 'message': 'Unable to reset wallet'}), 500
-
-    @cache_stocks.cached(timeout=return_ttl(name='medium'), unless=end_of_month)
-    @use_context
-    @handle_view_errors
-    def return_all_wallets(self) -> tuple:
-        wallet_list: typing.List[WalletModel] = WalletModel.query().fetch()
+    def return_all_wallets(self, limit: typing.Union[int, None] = None,
+                           cursor: typing.Union[str, None] = None) -> tuple:
+        message: typing.Union[str, None] = page_error(limit=limit, cursor=cursor)
+        if message is not None:
+            return jsonify({'status': False, 'message': message}), 500
+        wallet_list, next_cursor = fetch_page(query=WalletModel.query(), limit=limit, cursor=cursor)
         payload: typing.List[dict] = [wallet.to_dict() for wallet in wallet_list]
         return jsonify({'status': True,
                         'payload': payload,
+                        'cursor': next_cursor,
                         'message': 'wallets returned'}), 200
 
-    @cache_stocks.cached(timeout=return_ttl(name='medium'), unless=end_of_month)
-    @use_context
     @handle_view_errors
-    async def return_all_wallets_async(self) -> tuple:
-        wallet_list: typing.List[WalletModel] = WalletModel.query().fetch_async().get_result()
-        payload: typing.List[dict] = [wallet.to_dict() for wallet in wallet_list]
-        return jsonify({'status': True,
-                        'payload': payload,
-                        'message': 'wallets returned'}), 200
+    def export_wallets(self, compress: bool = False) -> tuple:
+        """
+            streams every wallet as newline delimited json
+        """
+        return export_response(model=WalletModel, name='wallets', compress=compress), 200
 
     @use_context
     @handle_view_errors
@@ -257,22 +163,11 @@ class WalletView(Validator):
         payload: typing.List[dict] = [wallet.to_dict() for wallet in wallet_list]
         return jsonify({'status': True, 'payload': payload, 'message': 'wallets returned'}), 200
 
-    @use_context
-    @handle_view_errors
-    async def return_wallets_by_balance_async(self, lower_bound: int, higher_bound: int) -> tuple:
-        # if either lower_bound and higher_bound are not int then exit
-        if not(isinstance(lower_bound, int) or isinstance(higher_bound, int)):
-            return jsonify({'status': False, 'message': "specify lower bound and higher bound"}), 500
-        wallet_list: typing.List[WalletModel] = WalletModel.query(WalletModel.available_funds > lower_bound,
-                                                                  WalletModel.available_funds < higher_bound).fetch_async().get_result()
-        payload: typing.List[dict] = [wallet.to_dict() for wallet in wallet_list]
-        return jsonify({'status': True, 'payload': payload, 'message': 'wallets returned'}), 200
-
     @use_context
     @handle_view_errors
     def wallet_transact(self, uid: str, add: int = None, sub: int = None) -> tuple:
         if self.can_update_wallet(uid=uid) is True:
-            wallet_instance: WalletModel = WalletModel.query(WalletModel.uid == uid).get()
+            wallet_instance: WalletModel = WalletModel.get_by_natural_id(uid)
             if isinstance(wallet_instance, WalletModel):
                 if add is not None:
                     wallet_instance.available_funds.amount += add
@@ -288,25 +183,4 @@ class WalletView(Validator):
         message: str = "Unable to find wallet"
         return jsonify({'status': False, 'message': message}), 500
 
-    @use_context
-    @handle_view_errors
-    async def wallet_transact_async(self, uid: str, add: int = None, sub: int = None) -> tuple:
-        if await self.can_update_wallet_async(uid=uid) is True:
-            wallet_instance: WalletModel = WalletModel.query(WalletModel.uid == uid).get_async().get_result()
-            if isinstance(wallet_instance, WalletModel):
-                if isinstance(add, int):
-                    wallet_instance.available_funds.amount += add
-                if isinstance(sub, int):
-                    wallet_instance.available_funds.amount -= sub
-                key = wallet_instance.put_async().get_result()
-                if key is None:
-                    message: str = "General error updating database"
-                    raise DataServiceError(status=500, description=message)
-                message: str = "Successfully created transaction"
-                return jsonify({'status': True, 'payload': wallet_instance.to_dict(),
-                                'message': message}), 200
-        message: str = "Unable to find wallet"
-        return jsonify({'status': False, 'message': message}), 500
-
-
     # TODO add wallet_withdrawals
\ No newline at end of file
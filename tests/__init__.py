@@ -1,3 +1,10 @@
+import os
+# tests run against the in-memory datastore of data_service.store.memory,
+# no credentials or network needed
+os.environ.setdefault('DATASTORE_BACKEND', 'memory')
+# nor are tasks queued, google.auth gives up on credentials without probing the metadata server
+os.environ.setdefault('NO_GCE_CHECK', 'true')
+
 from flask import current_app
 from data_service.config import Config
 from data_service.main import create_app
@@ -0,0 +1,84 @@
+import asyncio
+import threading
+import typing
+from data_service.asgi import ASGIApp, wsgi_environ
+
+
+def wsgi_app(environ: dict, start_response: typing.Callable) -> typing.Iterable[bytes]:
+    body: bytes = environ['wsgi.input'].read()
+    start_response('200 OK', [('Content-Type', 'text/plain'), ('X-Path', environ['PATH_INFO'])])
+    return [b'echo:', body, b'', b':done']
+
+
+def http_scope(path: str = '/api/v1/stocks/item/stock') -> dict:
+    return {'type': 'http', 'method': 'POST', 'path': path, 'query_string': b'gzip=true',
+            'http_version': '1.1',
+            'headers': [(b'content-type', b'application/json'), (b'x-auth-token', b'token')]}
+
+
+def serve(app: ASGIApp, scope: dict, body: bytes) -> typing.List[dict]:
+    messages: typing.List[dict] = []
+    received: typing.List[dict] = [{'type': 'http.request', 'body': body[:2], 'more_body': True},
+                                   {'type': 'http.request', 'body': body[2:]}]
+
+    async def receive() -> dict:
+        return received.pop(0)
+
+    async def send(message: dict) -> None:
+        messages.append(message)
+
+    asyncio.run(app(scope, receive, send))
+    return messages
+
+
+def test_wsgi_environ():
+    environ: dict = wsgi_environ(scope=http_scope(), body=b'{}')
+    assert environ['PATH_INFO'] == '/api/v1/stocks/item/stock'
+    assert environ['QUERY_STRING'] == 'gzip=true'
+    assert environ['CONTENT_TYPE'] == 'application/json' and environ['HTTP_X_AUTH_TOKEN'] == 'token'
+    assert environ['wsgi.input'].read() == b'{}'
+
+
+def test_asgi_app():
+    app: ASGIApp = ASGIApp(wsgi_app=wsgi_app, threads=2, backlog=0)
+    messages: typing.List[dict] = serve(app=app, scope=http_scope(), body=b'{"a": 1}')
+    assert messages[0]['status'] == 200
+    assert (b'x-path', b'/api/v1/stocks/item/stock') in messages[0]['headers']
+    # every chunk is sent as it is produced, empty chunks are skipped, the last one ends the body
+    assert [message['body'] for message in messages[1:]] == [b'echo:', b'{"a": 1}', b':done']
+    assert [message['more_body'] for message in messages[1:]] == [True, True, False]
+    assert app.pending == 0
+
+
+def test_asgi_app_busy():
+    app: ASGIApp = ASGIApp(wsgi_app=wsgi_app, threads=1, backlog=1)
+    app.pending = 2
+    messages: typing.List[dict] = serve(app=app, scope=http_scope(), body=b'{}')
+    assert messages[0]['status'] == 503 and (b'retry-after', b'1') in messages[0]['headers']
+    assert app.pending == 2
+
+
+def test_asgi_app_threads():
+    """
+        requests run side by side on the worker threads
+    """
+    barrier: threading.Barrier = threading.Barrier(2, timeout=5)
+
+    def waiting_app(environ: dict, start_response: typing.Callable) -> typing.Iterable[bytes]:
+        barrier.wait()
+        start_response('200 OK', [])
+        return [b'ok']
+
+    app: ASGIApp = ASGIApp(wsgi_app=waiting_app, threads=2, backlog=0)
+
+    async def both() -> list:
+        async def receive() -> dict:
+            return {'type': 'http.request', 'body': b''}
+
+        async def send(message: dict) -> None:
+            pass
+        return await asyncio.gather(app(http_scope(), receive, send),
+                                    app(http_scope(), receive, send))
+
+    asyncio.run(both())
+    assert barrier.broken is False
@@ -0,0 +1,78 @@
+from data_service.main import cache_stocks, cache_users
+from data_service.cache.backends import TwoTierCache, serialize, deserialize
+from data_service.cache.local_redis import LocalRedis
+from .. import test_app
+
+
+def make_worker(server: LocalRedis, key_prefix: str = "stocks:",
+                l1_threshold: int = 100) -> TwoTierCache:
+    """
+        one TwoTierCache per simulated worker, all sharing the same L2 server
+    """
+    return TwoTierCache(client=server, key_prefix=key_prefix, default_timeout=60,
+                        l1_threshold=l1_threshold, l1_timeout=60)
+
+
+def test_l2_shared_between_workers():
+    server: LocalRedis = LocalRedis()
+    first_worker: TwoTierCache = make_worker(server=server)
+    second_worker: TwoTierCache = make_worker(server=server)
+    first_worker.set('stock', {'stock_id': 'first'})
+    assert second_worker.get('stock') == {'stock_id': 'first'}
+    assert second_worker.get_many('stock', 'missing') == [{'stock_id': 'first'}, None]
+    assert second_worker.add('stock', 'other') is False
+
+
+def test_invalidation_reaches_every_l1():
+    server: LocalRedis = LocalRedis()
+    first_worker: TwoTierCache = make_worker(server=server)
+    second_worker: TwoTierCache = make_worker(server=server)
+    first_worker.set('stock', 'old')
+    # fills second worker's L1
+    assert second_worker.get('stock') == 'old'
+    first_worker.set('stock', 'new')
+    assert second_worker.get('stock') == 'new'
+    first_worker.delete('stock')
+    assert second_worker.get('stock') is None
+    second_worker.set_many({'stock': 'one', 'broker': 'two'})
+    assert first_worker.get_many('stock', 'broker') == ['one', 'two']
+    second_worker.clear()
+    assert first_worker.get('stock') is None
+
+
+def test_namespaces_are_isolated():
+    server: LocalRedis = LocalRedis()
+    stocks: TwoTierCache = make_worker(server=server, key_prefix="stocks:")
+    users: TwoTierCache = make_worker(server=server, key_prefix="users:")
+    stocks.set('key', 'stock value')
+    users.set('key', 'user value')
+    assert stocks.get('key') == 'stock value'
+    assert users.get('key') == 'user value'
+    users.clear()
+    assert users.get('key') is None
+    assert stocks.get('key') == 'stock value'
+
+
+def test_l1_is_bounded():
+    server: LocalRedis = LocalRedis()
+    worker: TwoTierCache = make_worker(server=server, l1_threshold=2)
+    for key in ('first', 'second', 'third'):
+        worker.set(key, key)
+    assert len(worker.l1) == 2
+    # evicted from L1 but still served from L2
+    assert worker.get('first') == 'first'
+
+
+def test_values_are_compressed():
+    value: dict = {'payload': ['volume data'] * 500}
+    data: bytes = serialize(value)
+    assert data[:1] == b'z'
+    assert len(data) < len(str(value))
+    assert deserialize(data) == value
+    assert deserialize(serialize('small')) == 'small'
+
+
+def test_app_caches_use_two_tiers():
+    with test_app().app_context():
+        assert isinstance(cache_stocks.cache, TwoTierCache)
+        assert cache_stocks.cache.key_prefix != cache_users.cache.key_prefix
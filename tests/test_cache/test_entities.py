@@ -0,0 +1,85 @@
+import typing
+from data_service.main import cache_stocks
+from data_service.cache.entities import get_multi_cached
+from data_service.cache.invalidation import invalidate_tags
+from data_service.store.stocks import Stock
+from data_service.views.stocks import StockView
+from .. import test_app
+# noinspection PyUnresolvedReferences
+from pytest_mock import mocker
+
+stored_ids: typing.List[str] = ['first', 'second', 'third']
+
+
+class StockMultiGetMock:
+    """
+        stands in for Stock.get_multi_by_natural_id, records the ids each batch get was asked for
+    """
+    batches: typing.List[typing.List[str]] = []
+
+    @staticmethod
+    def get_multi_by_natural_id(
+            natural_ids: typing.List[str]) -> typing.List[typing.Union[Stock, None]]:
+        StockMultiGetMock.batches.append(list(natural_ids))
+        return [Stock(stock_id=stock_id, stock_code=stock_id, stock_name=stock_id, symbol=stock_id)
+                if stock_id in stored_ids else None for stock_id in natural_ids]
+
+    @staticmethod
+    def _get_kind() -> str:
+        return 'Stock'
+
+
+def stock_tags(stock_id: str) -> typing.List[str]:
+    return ['stock:id:{}'.format(stock_id)]
+
+
+def get_stocks(stock_ids: typing.List[str]) -> typing.Tuple[typing.List[dict], typing.List[str]]:
+    return get_multi_cached(cache=cache_stocks, model=StockMultiGetMock, natural_ids=stock_ids,
+                            tags=stock_tags, timeout=60)
+
+
+def test_found_and_missing():
+    with test_app().app_context():
+        cache_stocks.clear()
+        StockMultiGetMock.batches = []
+        found, missing = get_stocks(stock_ids=['second', 'missing', 'first', 'second', ''])
+        assert [stock['stock_id'] for stock in found] == ['second', 'first']
+        assert missing == ['missing']
+        assert StockMultiGetMock.batches == [
+            ['second', 'missing', 'first']], "ids were not fetched in one batch"
+
+
+def test_entities_are_cached_and_invalidated():
+    with test_app().app_context():
+        cache_stocks.clear()
+        StockMultiGetMock.batches = []
+        get_stocks(stock_ids=['first', 'second'])
+        found, missing = get_stocks(stock_ids=['first', 'second', 'third'])
+        assert [stock['stock_id'] for stock in found] == ['first', 'second', 'third']
+        assert StockMultiGetMock.batches == [['first', 'second'], ['third']]
+
+        invalidate_tags(cache=cache_stocks, tags=stock_tags('second'))
+        get_stocks(stock_ids=['first', 'second', 'third'])
+        assert StockMultiGetMock.batches[-1] == ['second']
+
+
+# noinspection PyShadowingNames
+def test_get_stocks_batch(mocker):
+    mocker.patch('data_service.config.use_context.context_module.get_context',
+                 return_value=object())
+    mocker.patch('data_service.store.stocks.Stock.get_multi_by_natural_id',
+                 side_effect=StockMultiGetMock.get_multi_by_natural_id)
+    with test_app().app_context():
+        cache_stocks.clear()
+        stock_view: StockView = StockView()
+        response, status = stock_view.get_stocks_batch(stock_ids=['first', 'missing'])
+        assert status == 200
+        payload: dict = response.get_json()['payload']
+        assert [stock['stock_id'] for stock in payload['found']] == ['first']
+        assert payload['missing'] == ['missing']
+
+        response, status = stock_view.get_stocks_batch(stock_ids='first')
+        assert status == 500
+        response, status = stock_view.get_stocks_batch(
+            stock_ids=['id'] * (stock_view._batch_limit + 1))
+        assert status == 500
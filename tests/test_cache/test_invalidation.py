@@ -0,0 +1,157 @@
+import typing
+from datetime import date
+from flask import jsonify
+from data_service.main import cache_stocks
+from data_service.cache.memoize import memoize
+from data_service.cache.invalidation import invalidate_tags, tag_versions
+from data_service.store.stocks import BuyVolumeModel
+from data_service.views.stocks import StockView
+from .. import test_app
+# noinspection PyUnresolvedReferences
+from pytest_mock import mocker
+
+stock_id: str = 'stock_x'
+other_stock_id: str = 'stock_y'
+day: date = date(2021, 3, 15)
+other_day: date = date(2021, 3, 16)
+transaction_id: str = 'transaction_x'
+
+
+class QueryMock:
+    """
+        counts datastore reads, every cached miss results in one query
+    """
+    queries: int = 0
+
+    def __init__(self, *args, **kwargs):
+        QueryMock.queries += 1
+
+    @staticmethod
+    def buy_volume() -> BuyVolumeModel:
+        return BuyVolumeModel(stock_id=stock_id, date_created=day, transaction_id=transaction_id,
+                              buy_volume=10,
+                              buy_value=10, buy_ave_price=10, buy_market_val_percent=10,
+                              buy_trade_count=10)
+
+    def order(self, *orders) -> 'QueryMock':
+        return self
+
+    def fetch(self, limit: typing.Union[int, None] = None) -> typing.List[BuyVolumeModel]:
+        return [self.buy_volume()]
+
+    def fetch_page(self, page_size: int, start_cursor=None) -> tuple:
+        return [self.buy_volume()], None, False
+
+    def get(self) -> BuyVolumeModel:
+        return self.buy_volume()
+
+
+def buy_data() -> dict:
+    return {'stock_id': stock_id, 'date_created': day.strftime('%Y-%m-%d'), 'buy_volume': 20,
+            'buy_value': 20, 'buy_ave_price': 20, 'buy_market_val_percent': 20,
+            'buy_trade_count': 20, 'transaction_id': transaction_id}
+
+
+def cached_reads(stock_view: StockView) -> typing.Dict[str, typing.Callable]:
+    return {
+        'get_buy_volume': lambda: stock_view.get_buy_volume(transaction_id=transaction_id),
+        'get_day_buy_volumes': lambda: stock_view.get_day_buy_volumes(date_created=day),
+        'get_daily_buy_volumes_by_stock': lambda: stock_view.get_daily_buy_volumes_by_stock(
+            stock_id=stock_id),
+        'get_day_buy_volumes_other_day': lambda: stock_view.get_day_buy_volumes(
+            date_created=other_day),
+        'get_daily_buy_volumes_other_stock': lambda: stock_view.get_daily_buy_volumes_by_stock(
+            stock_id=other_stock_id),
+        'get_daily_sell_volumes_by_stock': lambda: stock_view.get_daily_sell_volumes_by_stock(
+            stock_id=stock_id),
+    }
+
+
+def reads_hitting_datastore(reads: typing.Dict[str, typing.Callable]) -> typing.List[str]:
+    missed: typing.List[str] = []
+    for name, read in reads.items():
+        queries: int = QueryMock.queries
+        read()
+        if QueryMock.queries > queries:
+            missed.append(name)
+    return missed
+
+
+# noinspection PyShadowingNames
+def test_invalidate_tags_evicts_dependent_reads():
+    calls: typing.Dict[str, int] = {'first': 0, 'second': 0}
+
+    @memoize(cache=cache_stocks, timeout=60, tags=lambda name: ['name:{}'.format(name)])
+    def read(name: str) -> tuple:
+        calls[name] += 1
+        return jsonify({'status': True, 'payload': name}), 200
+
+    with test_app().app_context():
+        cache_stocks.clear()
+        read(name='first')
+        read(name='second')
+        invalidate_tags(cache=cache_stocks, tags=['name:first'])
+        read(name='first')
+        read(name='second')
+        assert calls == {'first': 2, 'second': 1}
+
+
+def test_tag_versions_survive_eviction():
+    with test_app().app_context():
+        cache_stocks.clear()
+        version: str = tag_versions(cache=cache_stocks, tags=['stocks'])[0]
+        assert tag_versions(cache=cache_stocks, tags=['stocks']) == [version]
+        cache_stocks.clear()
+        # an evicted tag never comes back with a version entries were stored under
+        assert tag_versions(cache=cache_stocks, tags=['stocks']) != [version]
+
+
+# noinspection PyShadowingNames
+def test_update_buy_volume_invalidates_dependent_reads(mocker):
+    mocker.patch('data_service.config.use_context.context_module.get_context',
+                 return_value=object())
+    mocker.patch('google.cloud.ndb.Model.put', return_value='key')
+    mocker.patch('google.cloud.ndb.Model.query', side_effect=QueryMock)
+    # volumes are fetched by key, a key get counts as a read as well
+    mocker.patch('data_service.store.stocks.BuyVolumeModel.get_by_natural_id',
+                 side_effect=lambda natural_id: QueryMock().get())
+    mocker.patch('data_service.views.stocks.queue_volume_history', return_value=1)
+
+    with test_app().app_context():
+        cache_stocks.clear()
+        stock_view: StockView = StockView()
+        reads: typing.Dict[str, typing.Callable] = cached_reads(stock_view=stock_view)
+        for name in ('get_buy_volume', 'get_day_buy_volumes', 'get_daily_buy_volumes_by_stock',
+                     'get_daily_sell_volumes_by_stock'):
+            mocker.patch.object(getattr(StockView, name).memoized, 'unless', None)
+
+        assert len(reads_hitting_datastore(reads)) == len(reads)
+        assert reads_hitting_datastore(reads) == [], "reads were not cached"
+
+        response, status = stock_view.update_buy_volume(buy_data=buy_data())
+        assert status == 200, response.get_json()['message']
+
+        assert reads_hitting_datastore(reads) == ['get_buy_volume', 'get_day_buy_volumes',
+                                                  'get_daily_buy_volumes_by_stock']
+
+
+# noinspection PyShadowingNames
+def test_create_stock_invalidates_stock_list(mocker):
+    mocker.patch('data_service.config.use_context.context_module.get_context',
+                 return_value=object())
+    mocker.patch('google.cloud.ndb.Model.put', return_value='key')
+    mocker.patch('google.cloud.ndb.Model.query', side_effect=QueryMock)
+    mocker.patch('data_service.views.stocks.StockView.can_add_stock', return_value=True)
+    mocker.patch.object(StockView.get_all_stocks.memoized, 'unless', None)
+    mocker.patch.object(StockView.get_all_brokers.memoized, 'unless', None)
+
+    with test_app().app_context():
+        cache_stocks.clear()
+        stock_view: StockView = StockView()
+        reads: typing.Dict[str, typing.Callable] = {'get_all_stocks': stock_view.get_all_stocks,
+                                                    'get_all_brokers': stock_view.get_all_brokers}
+        reads_hitting_datastore(reads)
+        response, status = stock_view.create_stock_data(stock_data={
+            'stock_id': stock_id, 'stock_code': 'code', 'stock_name': 'name', 'symbol': 'symbol'})
+        assert status == 200, response.get_json()['message']
+        assert reads_hitting_datastore(reads) == ['get_all_stocks']
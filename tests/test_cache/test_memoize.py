@@ -0,0 +1,100 @@
+import asyncio
+from datetime import date
+from flask import jsonify
+from data_service.main import cache_stocks
+from data_service.cache.memoize import memoize, cache_statistics
+from .. import test_app
+
+
+class ViewMock:
+    calls: int = 0
+
+    @memoize(cache=cache_stocks, timeout=60)
+    def get_stock(self, stock_id: str = None, date_created: date = None) -> tuple:
+        ViewMock.calls += 1
+        return jsonify({'status': True, 'payload': {'stock_id': stock_id}, 'message': 'found'}), 200
+
+    @memoize(cache=cache_stocks, timeout=60)
+    def get_missing(self, stock_id: str = None) -> tuple:
+        ViewMock.calls += 1
+        return jsonify({'status': False, 'message': 'not found'}), 500
+
+    @memoize(cache=cache_stocks, timeout=60)
+    async def get_stock_async(self, stock_id: str = None) -> tuple:
+        ViewMock.calls += 1
+        return jsonify({'status': True, 'payload': {'stock_id': stock_id}, 'message': 'found'}), 200
+
+    @memoize(cache=cache_stocks, timeout=60, unless=lambda: True)
+    def get_uncached(self, stock_id: str = None) -> tuple:
+        ViewMock.calls += 1
+        return jsonify({'status': True, 'payload': {'stock_id': stock_id}, 'message': 'found'}), 200
+
+
+def test_memoize_keys_on_arguments():
+    with test_app().app_context():
+        cache_stocks.clear()
+        ViewMock.calls = 0
+        response, status = ViewMock().get_stock(stock_id='first')
+        assert status == 200
+        assert response.get_json()['payload']['stock_id'] == 'first'
+        response, status = ViewMock().get_stock(stock_id='second')
+        assert response.get_json()['payload']['stock_id'] == 'second', \
+            "different stock ids share an entry"
+        assert ViewMock.calls == 2
+
+        # a new instance, positional arguments and explicit defaults all resolve to the same entry
+        response, status = ViewMock().get_stock('first', None)
+        assert status == 200
+        assert response.get_json()['payload']['stock_id'] == 'first'
+        assert ViewMock.calls == 2, "equal arguments missed the cache"
+
+        ViewMock().get_stock(stock_id='first', date_created=date(2021, 1, 4))
+        assert ViewMock.calls == 3
+
+
+def test_memoize_skips_error_responses():
+    with test_app().app_context():
+        cache_stocks.clear()
+        ViewMock.calls = 0
+        for _ in range(3):
+            response, status = ViewMock().get_missing(stock_id='missing')
+            assert status == 500
+        assert ViewMock.calls == 3, "error responses were cached"
+
+
+def test_memoize_async_variant():
+    with test_app().app_context():
+        cache_stocks.clear()
+        ViewMock.calls = 0
+        for _ in range(2):
+            response, status = asyncio.run(ViewMock().get_stock_async(stock_id='first'))
+            assert status == 200
+            assert response.get_json()['payload']['stock_id'] == 'first'
+        assert ViewMock.calls == 1, "async variant not cached"
+
+
+def test_memoize_unless_and_invalidate():
+    with test_app().app_context():
+        cache_stocks.clear()
+        ViewMock.calls = 0
+        ViewMock().get_uncached(stock_id='first')
+        ViewMock().get_uncached(stock_id='first')
+        assert ViewMock.calls == 2, "unless did not bypass the cache"
+
+        ViewMock().get_stock(stock_id='first')
+        ViewMock.get_stock.invalidate(stock_id='first')
+        ViewMock().get_stock(stock_id='first')
+        assert ViewMock.calls == 4, "invalidate did not evict the entry"
+
+
+def test_memoize_statistics():
+    with test_app().app_context():
+        cache_stocks.clear()
+        ViewMock.get_stock.memoized.stats.reset()
+        ViewMock().get_stock(stock_id='first')
+        ViewMock().get_stock(stock_id='first')
+        ViewMock().get_stock(stock_id='first')
+        info: dict = ViewMock.get_stock.cache_info()
+        assert info['hits'] == 2 and info['misses'] == 1
+        assert info['hit_rate'] == round(2 / 3, 4)
+        assert cache_statistics()[ViewMock.get_stock.memoized.name] == info
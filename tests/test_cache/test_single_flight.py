@@ -0,0 +1,112 @@
+import threading
+import time
+import typing
+from flask import Flask, current_app, jsonify
+from data_service.main import cache_stocks
+from data_service.cache.memoize import memoize
+from data_service.cache.single_flight import LEASE_PREFIX
+from .. import test_app
+
+
+class LoaderMock:
+    """
+        a slow full-kind query, counts how often it actually runs
+    """
+    calls: int = 0
+    version: str = 'first'
+
+    @memoize(cache=cache_stocks, timeout=60)
+    def get_all(self) -> tuple:
+        LoaderMock.calls += 1
+        time.sleep(0.2)
+        return jsonify({'status': True, 'payload': LoaderMock.version}), 200
+
+    @memoize(cache=cache_stocks, timeout=60, stale_ttl=60)
+    def get_all_stale(self) -> tuple:
+        LoaderMock.calls += 1
+        return jsonify({'status': True, 'payload': LoaderMock.version}), 200
+
+
+def worker_app() -> Flask:
+    """
+        the app itself rather than the current_app proxy, so it can be used from other threads
+    """
+    with test_app().app_context():
+        return current_app._get_current_object()
+
+
+def test_concurrent_misses_load_once():
+    app: Flask = worker_app()
+    with app.app_context():
+        cache_stocks.clear()
+    LoaderMock.calls = 0
+    LoaderMock.get_all.memoized.stats.reset()
+    payloads: typing.List[str] = []
+
+    def request() -> None:
+        with app.app_context():
+            response, status = LoaderMock().get_all()
+            assert status == 200
+            payloads.append(response.get_json()['payload'])
+
+    threads: typing.List[threading.Thread] = [threading.Thread(target=request) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert LoaderMock.calls == 1, "concurrent misses were not coalesced"
+    assert payloads == ['first'] * 8
+    assert LoaderMock.get_all.cache_info()['coalesced'] == 7
+
+
+def test_lease_held_by_another_instance():
+    app: Flask = worker_app()
+    with app.app_context():
+        cache_stocks.clear()
+        LoaderMock.calls = 0
+        key: str = LoaderMock.get_all.memoized.key_for()
+        # another instance holds the lease and is loading the entry
+        cache_stocks.add("{}{}".format(LEASE_PREFIX, key), 'other instance', timeout=30)
+
+    def other_instance_stores() -> None:
+        time.sleep(0.1)
+        with app.app_context():
+            LoaderMock.version = 'loaded elsewhere'
+            LoaderMock.get_all.memoized.store(key=key,
+                                              result=LoaderMock.get_all.uncached(LoaderMock()))
+            LoaderMock.version = 'first'
+
+    loader: threading.Thread = threading.Thread(target=other_instance_stores)
+    loader.start()
+    with app.app_context():
+        response, status = LoaderMock().get_all()
+    loader.join()
+    assert response.get_json()['payload'] == 'loaded elsewhere'
+    assert LoaderMock.calls == 1, "loaded again while another instance held the lease"
+
+
+def test_stale_while_revalidate():
+    with test_app().app_context():
+        cache_stocks.clear()
+        LoaderMock.calls = 0
+        LoaderMock.version = 'first'
+        LoaderMock().get_all_stale()
+        key: str = LoaderMock.get_all_stale.memoized.key_for()
+        fresh_until, packed = cache_stocks.get(key)
+        # expire the entry without dropping it
+        cache_stocks.set(key, (time.time() - 1, packed), timeout=60)
+
+        LoaderMock.version = 'second'
+        response, status = LoaderMock().get_all_stale()
+        assert response.get_json()['payload'] == 'first', \
+            "expired entry was not served while refreshing"
+        for _ in range(50):
+            if LoaderMock.calls == 2 and cache_stocks.get(key)[0] > time.time():
+                break
+            time.sleep(0.02)
+        assert LoaderMock.calls == 2
+        response, status = LoaderMock().get_all_stale()
+        assert response.get_json()['payload'] == 'second'
+        assert LoaderMock.calls == 2
+        assert LoaderMock.get_all_stale.cache_info()['stale'] == 1
+        LoaderMock.version = 'first'
@@ -0,0 +1,30 @@
+import asyncio
+import pytest
+from google.api_core.exceptions import RetryError
+from data_service.config.exception_handlers import handle_view_errors
+from data_service.config.exceptions import RequestError
+
+
+@handle_view_errors
+def view(error: Exception) -> tuple:
+    raise error
+
+
+@handle_view_errors
+async def view_async(error: Exception) -> tuple:
+    await asyncio.sleep(0)
+    raise error
+
+
+def test_handle_view_errors():
+    assert view(error=ValueError('bad stock_id')) == ({'status': False, 'message': 'bad stock_id'},
+                                                      500)
+    with pytest.raises(RequestError):
+        view(error=RetryError('deadline exceeded', cause=None))
+
+
+def test_handle_view_errors_coroutines():
+    response, status = asyncio.run(view_async(error=ValueError('bad stock_id')))
+    assert response == {'status': False, 'message': 'bad stock_id'} and status == 500
+    with pytest.raises(RequestError):
+        asyncio.run(view_async(error=RetryError('deadline exceeded', cause=None)))
@@ -0,0 +1,136 @@
+import json
+import logging
+import typing
+import pytest
+from flask import Flask, jsonify
+from google.cloud.datastore_v1.types import datastore as datastore_pb2
+from google.cloud.datastore_v1.types import entity as entity_pb2
+from google.cloud.datastore_v1.types import query as query_pb2
+from google.cloud.ndb import _datastore_api, tasklets
+from data_service.config import instrumentation
+from data_service.config.instrumentation import (DatastoreStats, DatastoreBudgetExceeded,
+                                                 instrumented_make_call,
+                                                 recording, record_view_error, route_stats,
+                                                 reset_route_stats)
+# noinspection PyUnresolvedReferences
+from pytest_mock import mocker
+
+lookup_request = datastore_pb2.LookupRequest(keys=[entity_pb2.Key(), entity_pb2.Key()])
+lookup_response = datastore_pb2.LookupResponse(
+    found=[query_pb2.EntityResult(entity=entity_pb2.Entity())])
+query_request = datastore_pb2.RunQueryRequest()
+query_response = datastore_pb2.RunQueryResponse(batch=query_pb2.QueryResultBatch(
+    entity_results=[query_pb2.EntityResult(entity=entity_pb2.Entity()) for _ in range(3)]))
+commit_request = datastore_pb2.CommitRequest(
+    mutations=[datastore_pb2.Mutation(upsert=entity_pb2.Entity()),
+               datastore_pb2.Mutation(upsert=entity_pb2.Entity()),
+               datastore_pb2.Mutation(delete=entity_pb2.Key())])
+responses: typing.Dict[str, typing.Any] = {'lookup': lookup_response, 'run_query': query_response,
+                                           'commit': datastore_pb2.CommitResponse()}
+
+
+def answered_call(rpc_name: str, rpc_request: typing.Any, *args, **kwargs) -> tasklets.Future:
+    future: tasklets.Future = tasklets.Future()
+    future.set_result(responses[rpc_name])
+    return future
+
+
+def test_record() -> None:
+    stats: DatastoreStats = DatastoreStats()
+    stats.record(rpc_name='lookup', rpc_request=lookup_request, response=lookup_response,
+                 elapsed_ms=2.0)
+    stats.record(rpc_name='run_query', rpc_request=query_request, response=query_response,
+                 elapsed_ms=3.0)
+    stats.record(rpc_name='run_query', rpc_request=query_request, response=None, elapsed_ms=1.0)
+    stats.record(rpc_name='commit', rpc_request=commit_request,
+                 response=datastore_pb2.CommitResponse(), elapsed_ms=4.0)
+
+    assert (stats.rpcs, stats.queries, stats.gets, stats.puts, stats.deletes) == (4, 2, 2, 2, 1)
+    assert stats.entities == 4, "entities returned by the lookup and the query"
+    assert stats.errors == 1
+    assert stats.bytes > 0
+    assert stats.rpc_counts == {'lookup': 1, 'run_query': 2, 'commit': 1}
+    assert stats.total_ms == 10.0
+    assert stats.server_timing(duration_ms=12.5) == (
+        'app;dur=12.500, datastore;dur=10.000;desc="4 rpcs", ds-commit;dur=4.000;desc="1", '
+        'ds-lookup;dur=2.000;desc="1", ds-run_query;dur=4.000;desc="2"')
+
+
+# noinspection PyShadowingNames
+def test_instrumented_make_call(mocker) -> None:
+    mocker.patch.object(instrumentation, '_make_call', side_effect=answered_call)
+    # calls made outside a recording are not counted
+    instrumented_make_call('lookup', lookup_request)
+    with recording() as stats:
+        with recording() as nested_stats:
+            instrumented_make_call('lookup', lookup_request)
+        instrumented_make_call('run_query', query_request)
+    assert nested_stats is stats, "nested recordings keep their own stats"
+    assert (stats.rpcs, stats.gets, stats.queries, stats.entities) == (2, 2, 1, 4)
+
+
+def test_install() -> None:
+    instrumentation.install()
+    instrumentation.install()
+    assert _datastore_api.make_call is instrumented_make_call
+    assert instrumentation._make_call is not instrumented_make_call
+
+
+def budget_app(budget: int, testing: bool) -> Flask:
+    app: Flask = Flask(__name__)
+    app.config.update(DATASTORE_RPC_BUDGET=budget, DATASTORE_RPC_BUDGETS={'/unlimited': 0},
+                      TESTING=testing)
+    instrumentation.init_app(app=app)
+
+    def lookups():
+        with recording():
+            for _ in range(3):
+                instrumented_make_call('lookup', lookup_request)
+            record_view_error(ValueError("bad stock_id"))
+        return jsonify({'status': True}), 200
+
+    app.add_url_rule('/lookups', view_func=lookups, methods=['POST'])
+    app.add_url_rule('/unlimited', endpoint='unlimited', view_func=lookups, methods=['POST'])
+    return app
+
+
+# noinspection PyShadowingNames
+def test_report_request(mocker, caplog) -> None:
+    mocker.patch.object(instrumentation, '_make_call', side_effect=answered_call)
+    reset_route_stats()
+    client = budget_app(budget=0, testing=True).test_client()
+    with caplog.at_level(logging.INFO, logger='data_service.datastore'):
+        response = client.post('/lookups')
+        client.post('/lookups')
+
+    server_timing: str = response.headers['Server-Timing']
+    assert server_timing.startswith('app;dur=')
+    assert 'datastore;dur=' in server_timing and 'desc="3 rpcs"' in server_timing
+    assert 'ds-lookup;dur=' in server_timing
+
+    records: typing.List[dict] = [json.loads(record.message) for record in caplog.records
+                                  if record.message[0] == '{']
+    assert records[0]['route'] == 'POST /lookups'
+    assert records[0]['status'] == 200
+    assert (records[0]['rpcs'], records[0]['gets'], records[0]['entities']) == (3, 6, 3)
+    assert records[0]['view_errors'] == ['ValueError: bad stock_id']
+
+    totals: dict = route_stats()['POST /lookups']
+    assert (totals['requests'], totals['rpcs'], totals['max_rpcs'],
+            totals['over_budget']) == (2, 6, 3, 0)
+    reset_route_stats()
+
+
+# noinspection PyShadowingNames
+def test_budget(mocker, caplog) -> None:
+    mocker.patch.object(instrumentation, '_make_call', side_effect=answered_call)
+    with pytest.raises(DatastoreBudgetExceeded):
+        budget_app(budget=2, testing=True).test_client().post('/lookups')
+    assert budget_app(budget=2, testing=True).test_client().post('/unlimited').status_code == 200
+
+    with caplog.at_level(logging.WARNING, logger='data_service.datastore'):
+        response = budget_app(budget=2, testing=False).test_client().post('/lookups')
+    assert response.status_code == 200, "budgets only warn outside of tests"
+    assert "POST /lookups made 3 datastore RPCs, its budget is 2" in caplog.text
+    assert route_stats()['POST /lookups']['over_budget'] >= 1
+    reset_route_stats()
@@ -0,0 +1,146 @@
+import asyncio
+import contextlib
+import threading
+from flask import current_app
+from data_service.config import use_context as use_context_module
+from data_service.config.use_context import use_context, get_client
+from .. import test_app
+# noinspection PyUnresolvedReferences
+from pytest_mock import mocker
+
+
+class ClientMock:
+    """
+        stands in for ndb.Client, records how many contexts were opened
+    """
+    open_context: bool = False
+
+    def __init__(self, namespace=None, project=None):
+        self.namespace = namespace
+        self.project = project
+        self.contexts_opened: int = 0
+
+    @contextlib.contextmanager
+    def context(self):
+        self.contexts_opened += 1
+        ClientMock.open_context = True
+        try:
+            yield self
+        finally:
+            ClientMock.open_context = False
+
+
+def get_context_mock(raise_context_error=True):
+    return True if ClientMock.open_context else None
+
+
+# noinspection PyShadowingNames
+def test_get_client_reuses_client(mocker):
+    use_context_module._reset_clients()
+    client_class = mocker.patch('data_service.config.use_context.ndb.Client',
+                                side_effect=ClientMock)
+    first_client = get_client(project='project', namespace='main')
+    second_client = get_client(project='project', namespace='main')
+    assert first_client is second_client, "client not reused for the same project and namespace"
+    assert client_class.call_count == 1, "more than one client created"
+
+    other_client = get_client(project='project', namespace='other')
+    assert other_client is not first_client, "namespaces are sharing a client"
+    assert client_class.call_count == 2
+
+    use_context_module._reset_clients()
+    mocker.stopall()
+
+
+# noinspection PyShadowingNames
+def test_get_client_across_threads(mocker):
+    use_context_module._reset_clients()
+    client_class = mocker.patch('data_service.config.use_context.ndb.Client',
+                                side_effect=ClientMock)
+    clients: list = []
+    threads = [threading.Thread(target=lambda: clients.append(get_client(project='project')))
+               for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert client_class.call_count == 1, "each thread created its own client"
+    assert all(client is clients[0] for client in clients)
+
+    use_context_module._reset_clients()
+    mocker.stopall()
+
+
+# noinspection PyShadowingNames
+def test_use_context_nested_calls(mocker):
+    use_context_module._reset_clients()
+    mocker.patch('data_service.config.use_context.ndb.Client', side_effect=ClientMock)
+    mocker.patch('data_service.config.use_context.context_module.get_context',
+                 side_effect=get_context_mock)
+    mocker.patch.dict(test_app().config, {'DATASTORE_BACKEND': 'datastore'})
+
+    @use_context
+    def inner() -> bool:
+        return ClientMock.open_context
+
+    @use_context
+    def outer() -> bool:
+        return inner()
+
+    with test_app().app_context():
+        assert outer() is True, "nested call ran outside of a context"
+        assert outer() is True
+        client: ClientMock = get_client(project=test_app().config.get('PROJECT'))
+        assert client.contexts_opened == 2, "nested call opened its own context"
+
+    use_context_module._reset_clients()
+    mocker.stopall()
+
+
+# noinspection PyShadowingNames
+def test_use_context_coroutines(mocker):
+    use_context_module._reset_clients()
+    mocker.patch('data_service.config.use_context.ndb.Client', side_effect=ClientMock)
+    mocker.patch('data_service.config.use_context.context_module.get_context',
+                 side_effect=get_context_mock)
+    mocker.patch.dict(test_app().config, {'DATASTORE_BACKEND': 'datastore'})
+
+    @use_context
+    async def view_async() -> bool:
+        await asyncio.sleep(0)
+        return ClientMock.open_context
+
+    with test_app().app_context():
+        assert asyncio.run(view_async()) is True, "coroutine ran after its context was closed"
+        assert ClientMock.open_context is False
+
+    use_context_module._reset_clients()
+    mocker.stopall()
+
+
+# noinspection PyShadowingNames
+def test_use_context_outside_of_app_context(mocker):
+    use_context_module._reset_clients()
+    # the standalone app is created by the first call, on the backend the tests run on
+    mocker.patch.object(use_context_module, '_standalone_app', None)
+
+    @use_context
+    def standalone() -> bool:
+        return bool(current_app)
+
+    def worker() -> None:
+        # a new thread starts outside of every app context,
+        # the test app's context is pushed in this one
+        results.append(bool(current_app))
+        results.extend(standalone() for _ in range(3))
+        results.append(bool(current_app))
+
+    results: list = []
+    thread = threading.Thread(target=worker)
+    thread.start()
+    thread.join()
+    assert results[1:4] == [True] * 3, "the standalone app context was not open during the calls"
+    assert results[0] is False and results[4] is False, "the standalone app context was left pushed"
+
+    use_context_module._reset_clients()
+    mocker.stopall()
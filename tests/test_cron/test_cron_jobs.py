@@ -0,0 +1,169 @@
+import datetime
+import pandas as pd
+from google.cloud import ndb
+from data_service.config.use_context import datastore_context
+from data_service.cron.eod_close_data import exchange_close_data_calls
+from data_service.cron.operational_jobs.operational_jobs import cron_finalize_affiliate_payments
+from data_service.main import cache_stocks
+from data_service.store.affiliates import Affiliates, EarningsData
+from data_service.store.history import record_volumes
+from data_service.store.memory import memory_datastore
+from data_service.store.mixins import AmountMixin
+from data_service.store.settings import ExchangeDataModel
+from data_service.store.stocks import (Stock, StockPriceData, BuyVolumeModel, SellVolumeModel,
+                                       NetVolumeModel)
+from data_service.store.wallet import WalletModel
+from data_service.views.market import MarketSummaryView
+from .. import test_app
+# noinspection PyUnresolvedReferences
+from pytest_mock import mocker
+
+
+def php(amount: int) -> AmountMixin:
+    return AmountMixin(amount=amount, currency='PHP')
+
+
+def affiliate(uid: str, earned: int, on_hold: bool = False, currency: str = 'PHP') -> list:
+    total_earned: AmountMixin = AmountMixin(amount=earned, currency=currency)
+    earnings: EarningsData = EarningsData(affiliate_id='affiliate-{}'.format(uid), on_hold=on_hold,
+                                          total_earned=total_earned)
+    return [Affiliates(affiliate_id='affiliate-{}'.format(uid), uid=uid), earnings,
+            WalletModel(uid=uid, available_funds=php(100),
+                        paypal_address='{}@example.com'.format(uid))]
+
+
+def test_finalize_affiliate_payments():
+    memory_datastore.clear()
+    with test_app().app_context():
+        with datastore_context():
+            ndb.put_multi(
+                affiliate('paid-out', earned=50) + affiliate('held', earned=70, on_hold=True) +
+                affiliate('in-usd', earned=30, currency='USD') +
+                [Affiliates(affiliate_id='affiliate-no-earnings', uid='no-earnings')])
+
+        cron_finalize_affiliate_payments()
+
+        with datastore_context():
+            assert WalletModel.get_by_natural_id('paid-out').available_funds.amount == 150
+            assert WalletModel.get_by_natural_id('held').available_funds.amount == 100
+            # earnings in another currency than the wallet's are left unpaid
+            assert WalletModel.get_by_natural_id('in-usd').available_funds.amount == 100
+            paid: list = EarningsData.query(EarningsData.is_paid == True).fetch()
+            assert [earnings.affiliate_id for earnings in paid] == ['affiliate-paid-out']
+
+        # paid earnings are not paid twice
+        cron_finalize_affiliate_payments()
+        with datastore_context():
+            assert WalletModel.get_by_natural_id('paid-out').available_funds.amount == 150
+    memory_datastore.clear()
+
+
+# noinspection PyShadowingNames
+def test_call_close_data_apis(mocker):
+    memory_datastore.clear()
+    cache_stocks.clear()
+    day: datetime.date = datetime.date(2021, 3, 15)
+
+    async def eod_data(symbol: str, exchange: str, *args, **kwargs) -> pd.DataFrame:
+        assert exchange == 'PSE'
+        return pd.DataFrame({'Open': [10.5], 'High': [11.0], 'Low': [10.0], 'Close': [10.75],
+                             'Adjusted_close': [10.75], 'Volume': [1500.0]},
+                            index=pd.DatetimeIndex([day]))
+
+    mocker.patch.object(exchange_close_data_calls, 'get_eod_data_async', side_effect=eod_data)
+    with test_app().app_context():
+        with datastore_context():
+            tickers: list = [
+                {'stock_id': 'stock-{}'.format(n), 'symbol': 'S{}'.format(n), 'stock_name': 'stock'}
+                for n in range(3)]
+            ndb.put_multi(
+                [Stock(stock_id=ticker['stock_id'], stock_code=ticker['symbol'], stock_name='stock',
+                       symbol=ticker['symbol']) for ticker in tickers] +
+                [ExchangeDataModel(exchange_id='exchange-pse', exchange_name='pse',
+                                   exchange_type='fiat', exchange_tickers_list=tickers)])
+
+        assert exchange_close_data_calls.cron_call_close_data_apis() == ('OK', 200)
+
+        with datastore_context():
+            prices: list = StockPriceData.query().fetch()
+            assert sorted(price.stock_id for price in prices) == ['stock-0', 'stock-1', 'stock-2']
+            assert all(price.date_created == day and price.price_close == 1075 for price in prices)
+    memory_datastore.clear()
+    cache_stocks.clear()
+
+
+def write_volumes(volumes: list) -> None:
+    # as the write paths do, the volumes are saved then recorded in the history
+    ndb.put_multi(volumes)
+    for model in (BuyVolumeModel, SellVolumeModel):
+        record_volumes(model=model, volumes=[volume.to_dict() for volume in volumes
+                                             if isinstance(volume, model)])
+
+
+def test_perform_net_calculations(monkeypatch):
+    memory_datastore.clear()
+    cache_stocks.clear()
+    days: list = [datetime.date(2021, 3, 15), datetime.date(2021, 3, 16)]
+    with test_app().app_context():
+        with datastore_context():
+            write_volumes(
+                [BuyVolumeModel(stock_id='stock-{}'.format(n % 2), broker_id='broker-{}'.format(n),
+                                date_created=day, buy_volume=10, buy_value=100)
+                 for day in days for n in range(4)] +
+                [SellVolumeModel(stock_id='stock-{}'.format(n % 3), broker_id='broker-{}'.format(n),
+                                 date_created=day, sell_volume=5, sell_value=70)
+                 for day in days for n in range(3)])
+
+        # stocks 0 and 1 bought twice, stocks 0, 1 and 2 sold once, on each day
+        assert exchange_close_data_calls.cron_perform_net_calculations() == \
+            {'2021-03-15': 3, '2021-03-16': 3}
+        response, status = MarketSummaryView().get_net_totals(date_created='2021-03-15')
+        assert status == 200 and [(total['stock_id'], total['net_volume'], total['net_value'],
+                                   total['total_volume'], total['total_value'])
+                                  for total in response.get_json()['payload']] == [
+            ('stock-0', 15, 130, 25, 270), ('stock-1', 15, 130, 25, 270),
+            ('stock-2', -5, -70, 5, 70)]
+        with datastore_context():
+            # the per broker net volumes are left alone, totals are kept in their own kind
+            assert NetVolumeModel.query().fetch() == []
+
+        # nothing was written since the last run
+        assert exchange_close_data_calls.cron_perform_net_calculations() == {}
+
+        # only the day written to is calculated again,
+        # and only the stock whose numbers changed is written
+        with datastore_context():
+            write_volumes(
+                [SellVolumeModel(stock_id='stock-2', broker_id='broker-9', date_created=days[1],
+                                 sell_volume=1, sell_value=10)])
+        assert exchange_close_data_calls.cron_perform_net_calculations() == {'2021-03-16': 1}
+        response, status = MarketSummaryView().get_net_totals(date_created=days[1])
+        assert response.get_json()['payload'][2]['net_value'] == -80, \
+            "the cached totals of the day were evicted"
+
+        # a day given is calculated whatever the watermark, calculating it again writes nothing
+        assert exchange_close_data_calls.cron_perform_net_calculations(
+            date_created='2021-03-15') == {
+            '2021-03-15': 0}
+
+        # the total of a stock no longer traded on the day is deleted
+        with datastore_context():
+            ndb.delete_multi(SellVolumeModel.query(SellVolumeModel.stock_id == 'stock-2').fetch(
+                keys_only=True))
+        assert exchange_close_data_calls.cron_perform_net_calculations(date_created=days[1]) == {
+            '2021-03-16': 1}
+        response, status = MarketSummaryView().get_net_totals(date_created=days[1])
+        assert [total['stock_id'] for total in response.get_json()['payload']] == [
+            'stock-0', 'stock-1']
+
+        monkeypatch.setenv('AUTH_PROJECTS', 'project')
+        monkeypatch.setenv('SECRET', 'secret')
+        headers: dict = {'X-PROJECT-NAME': 'project', 'x-auth-token': 'secret'}
+        response = test_app().test_client().get('/cron/perform-net-calculations?date=15 march',
+                                                headers=headers)
+        assert response.status_code == 500 and response.get_json()['status'] is False
+        response = test_app().test_client().get('/cron/perform-net-calculations?date=2021-03-15',
+                                                headers=headers)
+        assert response.status_code == 200
+    memory_datastore.clear()
+    cache_stocks.clear()
@@ -0,0 +1,138 @@
+import datetime
+import typing
+from google.auth.credentials import AnonymousCredentials
+from google.cloud import ndb
+from data_service.config.use_context import datastore_context
+from data_service.cron.operational_jobs.rekey_entities import (rekeyed_copy, rekey_batch,
+                                                               rekey_entities_step, rekeyed_kinds)
+from data_service.store.memory import memory_datastore
+from data_service.store.stocks import Stock, Broker, BuyVolumeModel
+from .. import test_app
+# noinspection PyUnresolvedReferences
+from pytest_mock import mocker
+
+client: ndb.Client = ndb.Client(project='test-project', credentials=AnonymousCredentials())
+
+
+def legacy_stock(stock_id: str, legacy_id: int) -> Stock:
+    stock: Stock = Stock(stock_id=stock_id, stock_code='ABC', stock_name='ABC Limited',
+                         symbol='ABC')
+    stock.key = ndb.Key('Stock', legacy_id)
+    return stock
+
+
+def test_rekeyed_copy():
+    with client.context():
+        legacy: Stock = legacy_stock(stock_id='stock-id', legacy_id=1)
+        copy: Stock = rekeyed_copy(entity=legacy)
+        assert copy.key == ndb.Key('Stock', 'stock-id')
+        assert copy.to_dict() == legacy.to_dict()
+        # already on its natural key
+        assert rekeyed_copy(entity=copy) is None
+        no_natural_id: Stock = Stock()
+        no_natural_id.key = ndb.Key('Stock', 2)
+        assert rekeyed_copy(entity=no_natural_id) is None
+
+
+# noinspection PyShadowingNames
+def test_rekey_batch(mocker):
+    with client.context():
+        moved: Stock = legacy_stock(stock_id='moved', legacy_id=1)
+        rewritten: Stock = legacy_stock(stock_id='rewritten', legacy_id=2)
+        done: Stock = rekeyed_copy(entity=legacy_stock(stock_id='done', legacy_id=3))
+        # 'rewritten' was already written under its natural key after the switch
+        mocker.patch('google.cloud.ndb.get_multi', return_value=[None, Stock(stock_id='rewritten')])
+        put_multi_mock = mocker.patch('google.cloud.ndb.put_multi')
+        delete_multi_mock = mocker.patch('google.cloud.ndb.delete_multi')
+
+        assert rekey_batch(entities=[moved, rewritten, done]) == (2, 1)
+        copies = put_multi_mock.call_args[0][0]
+        assert [copy.key for copy in copies] == [ndb.Key('Stock', 'moved')]
+        delete_multi_mock.assert_called_once_with([ndb.Key('Stock', 1), ndb.Key('Stock', 2)])
+
+        put_multi_mock.reset_mock()
+        assert rekey_batch(entities=[done]) == (0, 1)
+        put_multi_mock.assert_not_called()
+
+
+# noinspection PyShadowingNames
+def test_rekey_buy_volumes(mocker):
+    with client.context():
+        legacy = []
+        for legacy_id in (1, 2):
+            # every legacy buy volume shares the transaction id of the model default
+            volume: BuyVolumeModel = BuyVolumeModel(stock_id='stock',
+                                                    date_created=datetime.date(2021, 3, 15),
+                                                    transaction_id='shared')
+            volume.key = ndb.Key('BuyVolumeModel', legacy_id)
+            legacy.append(volume)
+        mocker.patch('google.cloud.ndb.get_multi', return_value=[None])
+        put_multi_mock = mocker.patch('google.cloud.ndb.put_multi')
+        mocker.patch('google.cloud.ndb.delete_multi')
+
+        assert rekey_batch(entities=legacy) == (2, 0)
+        copies = put_multi_mock.call_args[0][0]
+        assert [copy.key for copy in copies] == [
+            ndb.Key('BuyVolumeModel', 'PSE|stock|2021-03-15||buy')]
+
+
+# noinspection PyShadowingNames
+def test_rekey_entities_in_steps(mocker):
+    memory_datastore.clear()
+    create_task = mocker.patch('data_service.cron.operational_jobs.rekey_entities.create_task',
+                               return_value='task')
+    with test_app().app_context():
+        with datastore_context():
+            broker: Broker = Broker(broker_id='broker', broker_code='B', broker_name='broker')
+            broker.key = ndb.Key('Broker', 1)
+            # the stocks are on their natural keys already, the memory backend's cursors are
+            # positions which the entities moved by a page would shift
+            ndb.put_multi([Stock(stock_id='stock-{}'.format(n), stock_code='S', stock_name='stock',
+                                 symbol='S') for n in range(5)] + [broker])
+
+        # every step rekeys one page and queues the next, the cursor of the kind carried along
+        steps: typing.List[dict] = [{'kind': 'Stock', 'cursor': None}]
+        counts: typing.Dict[str, typing.List[tuple]] = {}
+        while steps[-1] is not None:
+            step: dict = rekey_entities_step(batch_size=2, **steps[-1])
+            assert step['queued']
+            counts.setdefault(step['kind'], []).append((step['rekeyed'], step['skipped']))
+            steps.append(step['next'])
+        assert counts['Stock'] == [(0, 2), (0, 2), (0, 1)] and counts['Broker'] == [(1, 0)]
+        assert [step['kind'] for step in steps[:4]] == ['Stock'] * 3 + ['Broker']
+        assert steps[1]['cursor'] is not None and steps[3]['cursor'] is None
+        assert len(steps) == len(rekeyed_kinds) + 3
+        assert [call.kwargs['payload'] for call in create_task.call_args_list] == steps[1:-1]
+
+        with datastore_context():
+            assert sorted(key.id() for key in Stock.query().fetch(keys_only=True)) == [
+                'stock-{}'.format(n) for n in range(5)]
+            assert Broker.query().fetch(keys_only=True) == [ndb.Key('Broker', 'broker')]
+
+        # a step whose next page was not queued answers 500 so its task runs it again
+        mocker.patch('data_service.cron.operational_jobs.rekey_entities.create_task',
+                     return_value=None)
+        response = test_app().test_client().post('/task/stock/rekey-entities',
+                                                 json={'kind': 'Stock', 'cursor': None})
+        assert response.status_code == 500
+        assert response.get_json()['payload']['next'] == {'kind': 'Broker', 'cursor': None}
+        response = test_app().test_client().post('/task/stock/rekey-entities',
+                                                 json={'kind': 'Stocks', 'cursor': None})
+        assert response.status_code == 500
+    memory_datastore.clear()
+
+
+# noinspection PyShadowingNames
+def test_rekey_entities_route(monkeypatch, mocker):
+    memory_datastore.clear()
+    monkeypatch.setenv('AUTH_PROJECTS', 'project')
+    monkeypatch.setenv('SECRET', 'secret')
+    mocker.patch('data_service.cron.operational_jobs.rekey_entities.create_task',
+                 return_value='task')
+    headers: dict = {'X-PROJECT-NAME': 'project', 'x-auth-token': 'secret'}
+    response = test_app().test_client().get('/cron/rekey-entities', headers=headers)
+    assert response.status_code == 405
+    # the cron rekeys the first page and queues the rest
+    response = test_app().test_client().post('/cron/rekey-entities', headers=headers)
+    assert response.status_code == 200
+    assert response.get_json()['payload']['next'] == {'kind': 'Broker', 'cursor': None}
@@ -0,0 +1,65 @@
+import os
+import typing
+import datetime
+from data_service.loaders.transactions import TransactionsLoader, LocalStore, load_file
+from data_service.store.stocks import BuyVolumeModel, NetVolumeModel, Stock, Broker, TransactionIds
+
+HEADER: str = "id,stock_id,broker_id,stock_code,stock_name,broker_code,date," \
+              "buy_volume,buy_value,buy_ave_price,buy_market_val_percent,buy_trade_count," \
+              "sell_volume,sell_value,sell_ave_price,sell_market_val_percent,sell_trade_count," \
+              "net_volume,net_value,total_volume,total_value\n"
+ROWS: typing.List[str] = [
+    '1,154,111,2GO,"2GO Group, Inc.",ANSALDO,2020-01-02,0,0.0,0.0,0.0,0,500,5050.0,10.1,0.16,1,'
+    '-500,-5050.0,500,5050\n',
+    '2,154,115,2GO,"2GO Group, Inc.",SB-EQTY,2020-01-02,300000,2940000.0,9.8,98.81,1,'
+    '300000,2940000.0,9.8,98.81,1,0,0.0,600000,5880000\n',
+]
+
+
+def write_files(directory: str) -> None:
+    for index, row in enumerate(ROWS):
+        with open(os.path.join(directory, 'transactions_{}.csv'.format(index)), 'w') as csv_file:
+            csv_file.write(HEADER + row)
+
+
+def test_load_file(tmp_path):
+    write_files(str(tmp_path))
+    store: LocalStore = LocalStore()
+    day: datetime.date = datetime.date(2020, 1, 2)
+    result: dict = load_file(path=str(tmp_path / 'transactions_0.csv'), store=store)
+    assert result['rows'] == 1
+    assert list(result['stocks']) == ['154'] and list(result['brokers']) == ['111']
+
+    buy: BuyVolumeModel = store.entities[('BuyVolumeModel',
+                                          TransactionIds.volume_id('buy', '154', day, '111'))]
+    net: NetVolumeModel = store.entities[('NetVolumeModel',
+                                          TransactionIds.volume_id('net', '154', day, '111'))]
+    assert buy.stock_id == '154' and buy.broker_id == '111' and buy.buy_volume == 0
+    assert net.net_volume == -500 and net.net_value == -5050
+
+    # the same rows map to the same ids, loading again overwrites them
+    load_file(path=str(tmp_path / 'transactions_0.csv'), store=store)
+    assert len(store.entities) == 3
+
+
+def test_loader_resumes_from_checkpoint(tmp_path):
+    write_files(str(tmp_path))
+    checkpoint: str = str(tmp_path / 'checkpoint.json')
+    loader: TransactionsLoader = TransactionsLoader(directory=str(tmp_path),
+                                                    checkpoint_path=checkpoint, workers=1,
+                                                    dry_run=True)
+    summary: dict = loader.run(report=lambda line: None)
+    assert summary['files'] == 2 and summary['rows'] == 2
+    # one stock and two brokers, each written once
+    kinds: typing.List[str] = [kind for kind, _ in loader.store.entities]
+    assert kinds.count(Stock._get_kind()) == 1 and kinds.count(Broker._get_kind()) == 2
+    assert loader.store.entities[('Broker',
+                                  '111')].broker_name == 'ansaldo, godinez & company, inc.'
+
+    with open(os.path.join(str(tmp_path), 'transactions_2.csv'), 'w') as csv_file:
+        csv_file.write(HEADER + ROWS[0].replace('2020-01-02', '2020-01-03'))
+    loader = TransactionsLoader(directory=str(tmp_path), checkpoint_path=checkpoint, workers=1,
+                                dry_run=True)
+    summary = loader.run(report=lambda line: None)
+    assert summary['files'] == 1 and summary['skipped'] == 2
+    assert loader.store.rpcs == 0, "stocks and brokers already written were written again"
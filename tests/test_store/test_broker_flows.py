@@ -0,0 +1,116 @@
+import datetime
+import typing
+import numpy as np
+from data_service.cache.invalidation import invalidate_tags
+from data_service.config.instrumentation import install, recording
+from data_service.config.use_context import datastore_context
+from data_service.main import cache_stocks
+from data_service.store.broker_flows import (broker_positions, concentration, hhi,
+                                             read_broker_flows, top_brokers)
+from data_service.store.history import record_volumes
+from data_service.store.memory import memory_datastore
+from data_service.store.stocks import BuyVolumeModel, SellVolumeModel
+from data_service.views.broker_flows import BrokerFlowView
+from data_service.views.stocks import StockCacheTags
+from .. import test_app
+
+first_day: datetime.date = datetime.date(2021, 1, 28)
+
+
+def volume(model: typing.Type[BuyVolumeModel], day: int, broker_id: typing.Union[str, None],
+           amount: int) -> dict:
+    side: str = model.side
+    entity = model(stock_id='stock-1', date_created=first_day + datetime.timedelta(days=day),
+                   broker_id=broker_id,
+                   **{'{}_volume'.format(side): amount, '{}_value'.format(side): amount * 10})
+    entity.derive_transaction_id()
+    return entity.to_dict()
+
+
+def record_market() -> None:
+    # broker-a buys every day, broker-b sells every day,
+    # broker-c buys on the first days and sells after
+    record_volumes(model=BuyVolumeModel,
+                   volumes=[volume(BuyVolumeModel, day, 'broker-a', 100) for day in range(10)] +
+                   [volume(BuyVolumeModel, day, 'broker-c', 50) for day in range(3)] +
+                   [volume(BuyVolumeModel, 0, None, 1000)])
+    record_volumes(model=SellVolumeModel,
+                   volumes=[volume(SellVolumeModel, day, 'broker-b', 80) for day in range(10)] +
+                   [volume(SellVolumeModel, day, 'broker-c', 30) for day in range(3, 10)])
+
+
+def test_broker_flows() -> None:
+    install()
+    memory_datastore.clear()
+    with test_app().app_context():
+        with datastore_context():
+            record_market()
+        with datastore_context():
+            with recording() as stats:
+                flows = read_broker_flows(stock_id='stock-1')
+            assert stats.rpcs == 2, "one ancestor query a side, run together"
+
+            # rows without a broker are left out
+            positions: list = [(flow['broker_id'], flow['net_volume'], flow['net_value'])
+                               for flow in broker_positions(flows)]
+            assert positions == [('broker-a', 1000, 10000), ('broker-c', -60, -600),
+                                 ('broker-b', -800, -8000)]
+            assert top_brokers(flows, top=1) == {
+                'accumulating': [{'broker_id': 'broker-a', 'buy_volume': 1000, 'buy_value': 10000,
+                                  'sell_volume': 0, 'sell_value': 0, 'net_volume': 1000,
+                                  'net_value': 10000}],
+                'distributing': [{'broker_id': 'broker-b', 'buy_volume': 0, 'buy_value': 0,
+                                  'sell_volume': 800, 'sell_value': 8000, 'net_volume': -800,
+                                  'net_value': -8000}]}
+
+            # the window crosses into february, broker-c only bought in it
+            window = read_broker_flows(stock_id='stock-1', date_from=datetime.date(2021, 1, 29),
+                                       date_to=datetime.date(2021, 1, 30))
+            assert window.loc['broker-c', 'net_volume'] == 100
+            assert window.loc['broker-a', 'buy_volume'] == 200
+            assert read_broker_flows(stock_id='stock-2').empty
+
+    # 10000 traded value shared 50 / 30 / 20
+    assert hhi(np.array([5000, 3000, 2000])) == 3800.0
+    assert hhi(np.array([7])) == 10000.0 and hhi(np.array([])) == 0
+    assert concentration(flows)['brokers'] == 3 and concentration(flows)['buy_hhi'] == round(
+        ((10000 / 11500) ** 2 + (1500 / 11500) ** 2) * 10000, 2)
+    memory_datastore.clear()
+
+
+def test_broker_flow_view() -> None:
+    install()
+    memory_datastore.clear()
+    cache_stocks.clear()
+    view: BrokerFlowView = BrokerFlowView()
+    with test_app().app_context():
+        with datastore_context():
+            record_market()
+        response, status = view.get_top_brokers(stock_id='stock-1', date_from='2021-02-03',
+                                                date_to='2021-01-01')
+        assert status == 500 and response.get_json()['message'] == 'from cannot be after to'
+        response, status = view.get_top_brokers(stock_id='stock-1', top=0)
+        assert status == 500
+        response, status = view.get_broker_flows(stock_id='')
+        assert status == 500
+
+        response, status = view.get_top_brokers(stock_id='stock-1', date_from='2021-02-01', top='1')
+        assert status == 200
+        assert response.get_json()['payload']['distributing'][0]['broker_id'] == 'broker-b'
+        response, status = view.get_broker_concentration(stock_id='stock-1')
+        assert status == 200 and response.get_json()['payload']['brokers'] == 3
+
+        with recording() as stats:
+            view.get_broker_concentration(stock_id='stock-1')
+        assert stats.rpcs == 0, "each stock and window is cached"
+
+        # a write to the stock's sell volumes evicts every window of it
+        with datastore_context():
+            record_volumes(model=SellVolumeModel,
+                           volumes=[volume(SellVolumeModel, 0, 'broker-d', 5)])
+        invalidate_tags(cache=cache_stocks,
+                        tags=StockCacheTags.stock_volumes('sell_volume', stock_id='stock-1'))
+        response, status = view.get_broker_concentration(stock_id='stock-1')
+        assert response.get_json()['payload']['brokers'] == 4
+    memory_datastore.clear()
+    cache_stocks.clear()
@@ -0,0 +1,170 @@
+import datetime
+import typing
+from google.cloud import ndb
+from data_service.config.instrumentation import install, recording
+from data_service.config.use_context import datastore_context
+from data_service.cron.operational_jobs.volume_history import cron_build_volume_history
+from data_service.main import cache_stocks
+from data_service.store.history import HistorySelection, VolumeHistory, history_key, record_volumes
+from data_service.store.memory import memory_datastore
+from data_service.store.stocks import BuyVolumeModel, NetVolumeModel
+from data_service.views.stocks import StockView
+from .. import test_app
+from .test_memory import memory_client
+
+
+def buy_volume(stock_id: str, date_created: datetime.date, broker_id: str, buy_volume: int) -> dict:
+    volume: BuyVolumeModel = BuyVolumeModel(stock_id=stock_id, date_created=date_created,
+                                            broker_id=broker_id,
+                                            buy_volume=buy_volume, buy_value=buy_volume * 10,
+                                            buy_ave_price=10,
+                                            buy_market_val_percent=1, buy_trade_count=3)
+    volume.derive_transaction_id()
+    return volume.to_dict()
+
+
+def trading_days(first: datetime.date, count: int) -> typing.List[datetime.date]:
+    return [first + datetime.timedelta(days=n) for n in range(count)]
+
+
+def read(stock_id: str, **selection) -> typing.List[dict]:
+    history: HistorySelection = HistorySelection(model=BuyVolumeModel, stock_id=stock_id,
+                                                 **selection)
+    return history.records(history.query().fetch())
+
+
+def test_record_and_read() -> None:
+    install()
+    days: typing.List[datetime.date] = trading_days(datetime.date(2021, 1, 20), 45)
+    volumes: typing.List[dict] = [buy_volume('stock-1', day, broker, n)
+                                  for n, day in enumerate(days)
+                                  for broker in ('broker-1', 'broker-2')]
+    custom: dict = dict(volumes[0], transaction_id='custom-id', broker_id=None)
+    with memory_client().context():
+        # january, february and march of one stock
+        assert record_volumes(model=BuyVolumeModel, volumes=volumes + [custom]) == 3
+        ndb.get_context().clear_cache()
+
+        with recording() as stats:
+            records: typing.List[dict] = read('stock-1')
+        assert stats.rpcs == 1, "a stock's history is one query"
+        assert sorted(records, key=lambda record: record['transaction_id']) == \
+            sorted(volumes + [custom], key=lambda volume: volume['transaction_id'])
+        assert [record['date_created'] for record in records] == \
+            sorted(volume['date_created'] for volume in volumes + [custom])
+
+        february: typing.List[dict] = read('stock-1', fields='date_created,buy_volume',
+                                           date_from=datetime.date(2021, 2, 1),
+                                           date_to=datetime.date(2021, 2, 3))
+        assert february == [{'date_created': day, 'buy_volume': n} for n, day in enumerate(days)
+                            if datetime.date(2021, 2, 1) <= day <= datetime.date(2021, 2, 3)
+                            for _ in range(2)]
+        assert read('stock-2') == []
+
+        bucket: VolumeHistory = history_key('buy', 'stock-1', datetime.date(2021, 1, 1)).get()
+        columns = bucket.columns()
+        # decoded in place, only the custom id is stored, the others are derived from their rows
+        assert not columns.flags.writeable and columns.base is not None
+        assert [transaction_id for transaction_id in bucket.stored_ids()
+                if transaction_id] == ['custom-id']
+
+
+def test_record_again_replaces_and_moves() -> None:
+    day: datetime.date = datetime.date(2021, 3, 1)
+    with memory_client().context():
+        first: dict = buy_volume('stock-1', day, 'broker-1', 100)
+        record_volumes(model=BuyVolumeModel,
+                       volumes=[first, buy_volume('stock-1', day, 'broker-2', 5)])
+        record_volumes(model=BuyVolumeModel, volumes=[dict(first, buy_volume=200)])
+        assert sorted(record['buy_volume'] for record in read('stock-1')) == [5, 200]
+
+        # a volume moved to another stock leaves the history of the one it was on
+        moved: dict = dict(first, stock_id='stock-2')
+        record_volumes(model=BuyVolumeModel, volumes=[moved], removed=[first])
+        assert [record['buy_volume'] for record in read('stock-1')] == [5]
+        assert read('stock-2') == [moved]
+
+        record_volumes(model=BuyVolumeModel, volumes=[], removed=[moved])
+        ndb.get_context().clear_cache()
+        assert history_key('buy', 'stock-2', day).get() is None, "an emptied bucket is deleted"
+
+
+def test_daily_volumes_from_history() -> None:
+    memory_datastore.clear()
+    cache_stocks.clear()
+    app = test_app()
+    view: StockView = StockView()
+    days: typing.List[datetime.date] = trading_days(datetime.date(2021, 5, 25), 12)
+    with app.app_context():
+        for n, day in enumerate(days):
+            response, status = view.create_buy_model(buy_data=dict(
+                buy_volume('stock-1', day, 'broker-{}'.format(n % 3), n), date_created=str(day)))
+            assert status == 200, response.get_json()['message']
+        # saved before the history existed, the backfill records them
+        with datastore_context():
+            ndb.put_multi([NetVolumeModel(stock_id='stock-1', date_created=day,
+                                          broker_id='broker-1', net_volume=n,
+                                          net_value=n * 10, total_volume=n, total_value=n * 10)
+                           for n, day in enumerate(days)])
+        assert cron_build_volume_history()['NetVolumeModel'] == {'volumes': 12, 'buckets': 2}
+
+        for method in ('get_daily_buy_volumes_by_stock', 'get_daily_net_volumes_by_stock'):
+            read_volumes: typing.Callable = getattr(StockView, method).uncached
+            app.config['VOLUME_HISTORY_READS'] = False
+            response, status = read_volumes(view, stock_id='stock-1')
+            from_volumes: typing.List[dict] = response.get_json()['payload']
+            app.config['VOLUME_HISTORY_READS'] = True
+            response, status = read_volumes(view, stock_id='stock-1')
+            from_history: typing.List[dict] = response.get_json()['payload']
+            app.config['VOLUME_HISTORY_READS'] = False
+            assert status == 200 and len(from_history) == 12
+            key: typing.Callable = lambda record: record['transaction_id']
+            assert sorted(from_history, key=key) == sorted(from_volumes, key=key)
+    memory_datastore.clear()
+    cache_stocks.clear()
+
+
+def test_daily_volumes_window() -> None:
+    memory_datastore.clear()
+    cache_stocks.clear()
+    app = test_app()
+    view: StockView = StockView()
+    days: typing.List[datetime.date] = trading_days(datetime.date(2021, 6, 20), 20)
+    with app.app_context():
+        with datastore_context():
+            volumes: typing.List[BuyVolumeModel] = [
+                BuyVolumeModel(**buy_volume('stock-1', day, broker, n))
+                for n, day in enumerate(days)
+                for broker in ('broker-2', 'broker-1')]
+            ndb.put_multi(volumes)
+            record_volumes(model=BuyVolumeModel, volumes=[volume.to_dict() for volume in volumes])
+
+        window: dict = dict(stock_id='stock-1', date_from='2021-06-28',
+                            date_to=datetime.date(2021, 7, 2))
+        # the buy volume of a row is the number of its day
+        expected: typing.List[int] = [n for n, day in enumerate(days)
+                                      if datetime.date(2021, 6, 28) <= day <=
+                                      datetime.date(2021, 7, 2) for _ in range(2)]
+        for history_reads in (False, True):
+            app.config['VOLUME_HISTORY_READS'] = history_reads
+            read_volumes: typing.Callable = StockView.get_daily_buy_volumes_by_stock.uncached
+            response, status = read_volumes(view, **window)
+            assert status == 200
+            # dates come back in order, a window crossing a month reads both months
+            assert [record['buy_volume'] for record in response.get_json()['payload']] == expected
+            response, status = read_volumes(view, fields='date_created,buy_volume,buy_value',
+                                            limit=3, **window)
+            assert [record['buy_volume'] for record in response.get_json()['payload']] == [8, 8, 9]
+        app.config['VOLUME_HISTORY_READS'] = False
+
+        # every window is cached under its own key
+        first, _ = view.get_daily_buy_volumes_by_stock(stock_id='stock-1', date_to='2021-06-21')
+        second, _ = view.get_daily_buy_volumes_by_stock(stock_id='stock-1', date_from='2021-07-09')
+        assert len(first.get_json()['payload']) == 4 and len(second.get_json()['payload']) == 2
+
+        for bad_window in (dict(date_from='2021-07-02', date_to='2021-06-28'),
+                           dict(date_from='yesterday'), dict(limit=0)):
+            response, status = view.get_daily_buy_volumes_by_stock(stock_id='stock-1', **bad_window)
+            assert status == 500 and response.get_json()['status'] is False
+    memory_datastore.clear()
+    cache_stocks.clear()
@@ -0,0 +1,109 @@
+import typing
+from data_service.store.indexes import (INDEX_FILE, EQUALITY, INEQUALITY, QueryPattern,
+                                        composite_indexes, findings,
+                                        index_yaml, load_models, find_patterns, source_patterns)
+from data_service.store.stocks import BuyVolumeModel, Stock
+from data_service.store.users import UserModel
+
+models: dict = {'BuyVolumeModel': BuyVolumeModel, 'Stock': Stock, 'UserModel': UserModel}
+
+source: str = '''
+def lookups(stock_id, date_created, broker_id):
+    BuyVolumeModel.query(BuyVolumeModel.stock_id == stock_id,
+                         BuyVolumeModel.date_created == date_created).get()
+    BuyVolumeModel.query(BuyVolumeModel.stock_id == stock_id).filter(
+        BuyVolumeModel.date_created > date_created).order(-BuyVolumeModel.date_created).fetch()
+    UserModel.query(UserModel.uid == broker_id, projection=('email',)).fetch()
+    Stock.query(Stock.key > broker_id).fetch()
+    ExistsCheck(model=Stock, field='stock_code', value=broker_id)
+    ExistsCheck(model=Stock, field='stock_id', value=broker_id)
+    FieldSelection(model=BuyVolumeModel, fields=None, broker_id=broker_id)
+    WindowSelection(model=BuyVolumeModel, window='date_created', date_from=date_created,
+                    stock_id=stock_id)
+'''
+
+
+def test_source_patterns() -> None:
+    patterns: typing.List[QueryPattern] = source_patterns(source=source, filename='views.py',
+                                                          models=models)
+    assert [(pattern.kind, pattern.location) for pattern in patterns] == [
+        ('BuyVolumeModel', 'views.py:3'), ('BuyVolumeModel', 'views.py:5'),
+        ('UserModel', 'views.py:7'),
+        ('Stock', 'views.py:8'), ('Stock', 'views.py:9'), ('BuyVolumeModel', 'views.py:11'),
+        ('BuyVolumeModel', 'views.py:12')]
+    assert patterns[0].filters == [('stock_id', EQUALITY), ('date_created', EQUALITY)]
+    assert patterns[1].filters == [('stock_id', EQUALITY), ('date_created', INEQUALITY)]
+    assert patterns[1].orders == [('date_created', 'desc')]
+    assert patterns[2].projection == ['email']
+    # key filters and natural id checks are key lookups which need no property index
+    assert patterns[3].properties == []
+    assert patterns[4].filters == [('stock_code', EQUALITY)]
+    assert patterns[5].filters == [('broker_id', EQUALITY)]
+    # a window is a range on its property, ordered on it
+    assert patterns[6].filters == [('stock_id', EQUALITY), ('date_created', INEQUALITY)]
+    assert patterns[6].composite() == (('stock_id', 'asc'), ('date_created', 'asc'))
+
+
+def test_composite() -> None:
+    assert QueryPattern(kind='Stock', location='',
+                        filters=[('stock_code', EQUALITY)]).composite() is None
+    equalities: QueryPattern = QueryPattern(kind='BuyVolumeModel', location='',
+                                            filters=[('stock_id', EQUALITY),
+                                                     ('date_created', EQUALITY)])
+    assert equalities.composite() == (('date_created', 'asc'), ('stock_id', 'asc'))
+    sorted_range: QueryPattern = QueryPattern(kind='BuyVolumeModel', location='',
+                                              filters=[('stock_id', EQUALITY),
+                                                       ('date_created', INEQUALITY)],
+                                              orders=[('date_created', 'desc')])
+    assert sorted_range.composite() == (('stock_id', 'asc'), ('date_created', 'desc'))
+    projected: QueryPattern = QueryPattern(kind='UserModel', location='',
+                                           filters=[('uid', EQUALITY)],
+                                           projection=['names', 'surname'])
+    assert projected.composite() == (('uid', 'asc'), ('names', 'asc'), ('surname', 'asc'))
+
+
+def test_composite_indexes() -> None:
+    patterns: typing.List[QueryPattern] = [
+        QueryPattern(kind='BuyVolumeModel', location='',
+                     filters=[('stock_id', EQUALITY), ('date_created', EQUALITY)]),
+        QueryPattern(kind='BuyVolumeModel', location='',
+                     filters=[('date_created', EQUALITY), ('stock_id', EQUALITY)]),
+        QueryPattern(kind='UserModel', location='',
+                     filters=[('uid', EQUALITY), ('email', EQUALITY)]),
+        QueryPattern(kind='UserModel', location='', filters=[('email', EQUALITY)],
+                     projection=['uid', 'names'])]
+    # the equality only index of UserModel is served by the
+    # projection index starting with the same properties
+    assert composite_indexes(patterns) == [
+        ('BuyVolumeModel', (('date_created', 'asc'), ('stock_id', 'asc'))),
+        ('UserModel', (('email', 'asc'), ('uid', 'asc'), ('names', 'asc')))]
+
+
+def test_index_yaml() -> None:
+    manifest: str = index_yaml(
+        [('BuyVolumeModel', (('stock_id', 'asc'), ('date_created', 'desc')))])
+    assert manifest.splitlines()[1:] == ['indexes:', '', '- kind: BuyVolumeModel', '  properties:',
+                                         '  - name: stock_id', '  - name: date_created',
+                                         '    direction: desc']
+
+
+def test_findings() -> None:
+    patterns: typing.List[QueryPattern] = [
+        QueryPattern(kind='UserModel', location='views.py:1', filters=[('password', EQUALITY)]),
+        QueryPattern(kind='Stock', location='views.py:2', filters=[('stock_symbol', EQUALITY)])]
+    found: typing.Dict[str, typing.List[str]] = findings(patterns=patterns, models=models)
+    assert found['errors'] == ['views.py:1: UserModel.password is queried but not indexed',
+                               'views.py:2: Stock has no property stock_symbol']
+    assert 'Stock.stock_code is indexed but never queried' in found['unused']
+    assert 'Stock.stock_name is indexed but never queried' not in found['unused']
+
+
+def test_index_file_is_current() -> None:
+    """
+        index.yaml matches the queries of the service and every query can be served
+    """
+    all_models: dict = load_models()
+    patterns: typing.List[QueryPattern] = find_patterns(models=all_models)
+    with open(INDEX_FILE, encoding='utf-8') as index_file:
+        assert index_file.read() == index_yaml(composite_indexes(patterns))
+    assert findings(patterns=patterns, models=all_models)['errors'] == []
@@ -0,0 +1,155 @@
+import datetime
+import time
+import typing
+from google.cloud import ndb
+from data_service.config.instrumentation import install, recording
+from data_service.store import memory
+from data_service.store.memory import MemoryClient, MemoryDatastore
+from data_service.store.stocks import Stock, BuyVolumeModel
+
+
+def memory_client(latency: float = 0) -> MemoryClient:
+    return MemoryClient(project='test-project', namespace='main',
+                        datastore=MemoryDatastore(latency=latency))
+
+
+def volume(stock_id: str, day: int, buy_volume: int) -> BuyVolumeModel:
+    return BuyVolumeModel(transaction_id='{}-{}'.format(stock_id, day), stock_id=stock_id,
+                          broker_id='broker-1',
+                          date_created=datetime.date(2021, 1, day), buy_volume=buy_volume,
+                          buy_value=buy_volume * 10, buy_ave_price=10, buy_market_val_percent=1,
+                          buy_trade_count=1)
+
+
+def test_put_get_delete() -> None:
+    with memory_client().context():
+        stock: Stock = Stock(stock_id='stock-1', stock_code='TSLA', stock_name='Tesla',
+                             symbol='TSLA')
+        key: ndb.Key = stock.put()
+        ndb.get_context().clear_cache()
+        assert key.get() == stock
+        assert key.get().stock_name == 'tesla'
+
+        keys: typing.List[ndb.Key] = ndb.put_multi(
+            [Stock(stock_id='stock-{}'.format(n), stock_code='C{}'.format(n),
+                   stock_name='Stock', symbol='S') for n in range(2, 5)])
+        ndb.get_context().clear_cache()
+        found: list = ndb.get_multi(keys + [ndb.Key(Stock, 'missing')])
+        assert [entity.stock_code for entity in found[:3]] == ['C2', 'C3', 'C4']
+        assert found[3] is None
+
+        key.delete()
+        ndb.get_context().clear_cache()
+        assert key.get() is None
+
+
+def test_allocated_ids() -> None:
+    with memory_client().context():
+        first: ndb.Key = BuyVolumeModel(transaction_id='t-1', stock_id='s', broker_id='b').put()
+        second: ndb.Key = BuyVolumeModel(transaction_id='t-2', stock_id='s', broker_id='b').put()
+        assert first.id() and second.id() and first.id() != second.id()
+
+
+def test_queries() -> None:
+    with memory_client().context():
+        ndb.put_multi(
+            [volume(stock_id, day, buy_volume=day * n) for n, stock_id in enumerate(['a', 'b'], 1)
+             for day in range(1, 11)])
+
+        assert len(BuyVolumeModel.query(BuyVolumeModel.stock_id == 'a').fetch()) == 10
+        assert BuyVolumeModel.query().count() == 20
+        days: list = BuyVolumeModel.query(
+            BuyVolumeModel.stock_id == 'b',
+            BuyVolumeModel.date_created >= datetime.date(2021, 1, 8)).fetch()
+        assert sorted(entity.date_created.day for entity in days) == [8, 9, 10]
+
+        ordered: list = BuyVolumeModel.query(BuyVolumeModel.stock_id == 'b').order(
+            -BuyVolumeModel.buy_volume).fetch(3)
+        assert [entity.buy_volume for entity in ordered] == [20, 18, 16]
+        assert len(BuyVolumeModel.query(BuyVolumeModel.stock_id.IN(['a', 'b', 'c'])).fetch()) == 20
+        assert BuyVolumeModel.query(BuyVolumeModel.stock_id != 'a').count() == 10
+
+        keys: list = BuyVolumeModel.query(BuyVolumeModel.stock_id == 'a').fetch(keys_only=True)
+        assert all(isinstance(key, ndb.Key) for key in keys)
+        projected: list = BuyVolumeModel.query(BuyVolumeModel.stock_id == 'a',
+                                               projection=('buy_volume',)).order(
+                                                   BuyVolumeModel.buy_volume).fetch(2)
+        assert [entity.buy_volume for entity in projected] == [1, 2]
+
+
+def test_unindexed_properties_never_match() -> None:
+    with memory_client().context():
+        Stock(stock_id='stock-1', stock_code='TSLA', stock_name='Tesla', symbol='TSLA').put()
+        assert Stock.query(Stock.stock_code == 'TSLA').get() is not None
+        # stock_name is stored unindexed
+        assert Stock.query(ndb.GenericProperty('stock_name') == 'tesla').get() is None
+
+
+def test_fetch_page(monkeypatch) -> None:
+    monkeypatch.setattr(memory, 'BATCH_SIZE', 4)
+    with memory_client().context():
+        ndb.put_multi([volume('a', day, buy_volume=day) for day in range(1, 11)])
+        query: ndb.Query = BuyVolumeModel.query().order(BuyVolumeModel.buy_volume)
+        # more results than one batch are fetched with the end cursor of the batch before
+        assert [entity.buy_volume for entity in query.fetch()] == list(range(1, 11))
+
+        seen: typing.List[int] = []
+        cursor: typing.Any = None
+        more: bool = True
+        while more:
+            page, cursor, more = query.fetch_page(3, start_cursor=cursor)
+            seen.extend(entity.buy_volume for entity in page)
+        assert seen == list(range(1, 11))
+        assert [entity.buy_volume for entity in query.fetch(2, offset=5)] == [6, 7]
+
+
+def test_transaction() -> None:
+    with memory_client().context():
+        key: ndb.Key = Stock(stock_id='stock-1', stock_code='TSLA', stock_name='Tesla',
+                             symbol='TSLA').put()
+
+        @ndb.transactional()
+        def rename() -> None:
+            stock: Stock = key.get()
+            stock.symbol = 'TSL'
+            stock.put()
+
+        rename()
+        ndb.get_context().clear_cache()
+        assert key.get().symbol == 'TSL'
+
+
+def test_latency_overlaps() -> None:
+    latency: float = 0.05
+    install()
+    with memory_client(latency=latency).context(), recording() as stats:
+        ndb.put_multi(
+            [Stock(stock_id='stock-{}'.format(n), stock_code='C{}'.format(n), stock_name='Stock',
+                   symbol='S') for n in range(3)])
+        ndb.get_context().clear_cache()
+        started: float = time.perf_counter()
+        futures: list = [Stock.query(Stock.stock_code == 'C{}'.format(n)).get_async()
+                         for n in range(3)]
+        assert all(future.result() is not None for future in futures)
+        elapsed: float = time.perf_counter() - started
+    assert latency <= elapsed < latency * 2, \
+        "queries in flight together did not share their latency"
+    assert stats.rpcs == 4 and stats.queries == 3 and stats.puts == 3
+
+
+def test_ancestor_queries() -> None:
+    with memory_client().context():
+        parent: ndb.Key = ndb.Key(Stock, 'stock-1')
+        children: typing.List[BuyVolumeModel] = [volume('stock-1', day, buy_volume=day)
+                                                 for day in range(1, 4)]
+        for child in children:
+            child.key = ndb.Key(BuyVolumeModel, child.transaction_id, parent=parent)
+        ndb.put_multi(children + [volume('stock-2', 1, buy_volume=1)])
+
+        found: list = BuyVolumeModel.query(ancestor=parent).fetch()
+        assert [entity.buy_volume for entity in found] == [1, 2, 3]
+        ranged: list = BuyVolumeModel.query(
+            BuyVolumeModel.key >= ndb.Key(BuyVolumeModel, 'stock-1-2', parent=parent),
+            ancestor=parent).fetch()
+        assert [entity.buy_volume for entity in ranged] == [2, 3]
+        assert BuyVolumeModel.query(ancestor=ndb.Key(Stock, 'stock-2')).fetch() == []
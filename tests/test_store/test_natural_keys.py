@@ -0,0 +1,59 @@
+import typing
+from google.auth.credentials import AnonymousCredentials
+from google.cloud import ndb
+from data_service.store.stocks import Stock, Broker
+from data_service.store.users import UserModel
+# noinspection PyUnresolvedReferences
+from pytest_mock import mocker
+
+# keys are built offline, the client never talks to the datastore
+client: ndb.Client = ndb.Client(project='test-project', credentials=AnonymousCredentials())
+
+
+def test_natural_key():
+    with client.context():
+        assert Stock.natural_key('stock-id') == ndb.Key('Stock', 'stock-id')
+        assert UserModel.natural_key('uid') == ndb.Key('UserModel', 'uid')
+        assert Broker.natural_key('') is None
+        assert Broker.natural_key(None) is None
+
+
+def test_pre_put_hook_sets_key():
+    with client.context():
+        stock: Stock = Stock(stock_id='stock-id', stock_code='ABC', stock_name='ABC Limited',
+                             symbol='ABC')
+        stock._pre_put_hook()
+        assert stock.key == ndb.Key('Stock', 'stock-id')
+
+        # entities which already have a key keep it
+        legacy: Stock = Stock(stock_id='stock-id')
+        legacy.key = ndb.Key('Stock', 1234)
+        legacy._pre_put_hook()
+        assert legacy.key == ndb.Key('Stock', 1234)
+
+        broker: Broker = Broker()
+        broker._pre_put_hook()
+        assert broker.key is None
+
+
+# noinspection PyShadowingNames
+def test_get_by_natural_id(mocker):
+    stock: Stock = Stock(stock_id='stock-id')
+    get_mock = mocker.patch('google.cloud.ndb.Key.get', return_value=stock)
+    with client.context():
+        assert Stock.get_by_natural_id('stock-id') is stock
+        assert Stock.get_by_natural_id('') is None
+        assert Stock.get_by_natural_id_async('').get_result() is None
+    assert get_mock.call_count == 1
+
+
+# noinspection PyShadowingNames
+def test_get_multi_by_natural_id(mocker):
+    first: Stock = Stock(stock_id='first')
+    get_multi_mock = mocker.patch('google.cloud.ndb.get_multi', return_value=[first, None])
+    with client.context():
+        found: typing.List[typing.Union[Stock, None]] = Stock.get_multi_by_natural_id(
+            ['first', '', 'missing'])
+        assert found == [first, None, None]
+        get_multi_mock.assert_called_once_with(
+            [ndb.Key('Stock', 'first'), ndb.Key('Stock', 'missing')])
@@ -13,8 +13,9 @@ def test_buy_volume_instance():
 
 
 def test_transaction_id():
-    assert buy_volume_instance.transaction_id is not None, "Buy volume transaction_id initial value invalid"
-    assert isinstance(buy_volume_instance.transaction_id, str), "Buy volume default value is a wrong type"
+    # derived from the volume when it is saved, see test_volume_ids
+    assert buy_volume_instance.transaction_id is None, \
+        "Buy volume transaction_id initial value invalid"
 
     with raises(BadValueError):
         buy_volume_instance.transaction_id = 0
@@ -0,0 +1,56 @@
+import datetime
+from google.auth.credentials import AnonymousCredentials
+from google.cloud import ndb
+from data_service.store.stocks import BuyVolumeModel, NetVolumeModel, TransactionIds
+
+# keys are built offline, the client never talks to the datastore
+client: ndb.Client = ndb.Client(project='test-project', credentials=AnonymousCredentials())
+day: datetime.date = datetime.date(2021, 3, 15)
+
+
+def test_volume_id():
+    assert TransactionIds.volume_id('buy', 'stock', day, 'broker',
+                                    'PSE') == 'PSE|stock|2021-03-15|broker|buy'
+    assert TransactionIds.volume_id('net', 'stock', day) == 'PSE|stock|2021-03-15||net'
+
+
+def test_stock_range():
+    start, end = TransactionIds.stock_range('15', date_from=day, date_to=day
+                                            + datetime.timedelta(days=1))
+    inside = [TransactionIds.volume_id('buy', '15', day + datetime.timedelta(days=days), broker)
+              for days in (0, 1) for broker in ('', 'zz')]
+    outside = [TransactionIds.volume_id('buy', '15', day - datetime.timedelta(days=1)),
+               TransactionIds.volume_id('buy', '15', day + datetime.timedelta(days=2)),
+               TransactionIds.volume_id('buy', '154', day),
+               TransactionIds.volume_id('buy', '1', day)]
+    assert all(start <= volume_id < end for volume_id in inside)
+    assert not any(start <= volume_id < end for volume_id in outside)
+
+    start, end = TransactionIds.stock_range('15')
+    assert start <= TransactionIds.volume_id('buy', '15', datetime.date(1990, 1, 1)) < end
+
+
+def test_pre_put_hook_derives_key():
+    with client.context():
+        first: BuyVolumeModel = BuyVolumeModel(stock_id='stock', date_created=day,
+                                               broker_id='broker')
+        redelivered: BuyVolumeModel = BuyVolumeModel(stock_id='stock', date_created=day,
+                                                     broker_id='broker')
+        first._pre_put_hook()
+        redelivered._pre_put_hook()
+        assert first.transaction_id == 'PSE|stock|2021-03-15|broker|buy'
+        assert first.key == redelivered.key == ndb.Key('BuyVolumeModel', first.transaction_id)
+
+        # ids given by the caller are kept
+        net: NetVolumeModel = NetVolumeModel(stock_id='stock', date_created=day,
+                                             transaction_id='given')
+        net._pre_put_hook()
+        assert net.key == ndb.Key('NetVolumeModel', 'given')
+
+
+def test_query_stock_range():
+    with client.context():
+        query: ndb.Query = BuyVolumeModel.query_stock_range('stock', date_from=day)
+        bounds = {node._opsymbol: node._value.name for node in query.filters._nodes}
+        assert bounds == {'>=': 'PSE|stock|2021-03-15|', '<': 'PSE|stock|'
+                          + TransactionIds.upper_bound}
@@ -0,0 +1,124 @@
+import datetime
+import typing
+import pandas as pd
+from google.cloud import ndb
+from data_service.config.instrumentation import install, recording
+from data_service.config.use_context import datastore_context
+from data_service.cron.operational_jobs.market_summary import cron_summarize_market
+from data_service.main import cache_stocks
+from data_service.store.memory import memory_datastore
+from data_service.store.stocks import BuyVolumeModel, SellVolumeModel
+from data_service.store.net_volumes import day_net_totals
+from data_service.store.summaries import DailyMarketSummary, market_summary, read_day
+from data_service.views.market import MarketSummaryView
+from .. import test_app
+
+day: datetime.date = datetime.date(2021, 3, 15)
+
+
+def test_market_summary() -> None:
+    buys: pd.DataFrame = pd.DataFrame(
+        {'stock_id': ['a', 'a', 'b', 'c'], 'buy_volume': [10, 5, 1, 7],
+         'buy_value': [100, 50, 10, 70]})
+    sells: pd.DataFrame = pd.DataFrame(
+        {'stock_id': ['a', 'b', 'b', 'd'], 'sell_volume': [4, 2, 3, 6],
+         'sell_value': [40, 20, 30, 60]})
+    summary: DailyMarketSummary = market_summary(date_created=day, buys=buys, sells=sells, top=2)
+    assert (summary.summary_id, summary.volumes, summary.stocks_traded) == ('2021-03-15', 8, 4)
+    assert (summary.total_buy_value, summary.total_sell_value, summary.net_value) == (230, 150, 80)
+    assert (summary.total_buy_volume, summary.total_sell_volume, summary.net_volume) == (23, 15, 8)
+    # a: +110, b: -40, c: +70, d: -60
+    assert (summary.advancers, summary.decliners, summary.unchanged) == (2, 2, 0)
+    assert [(flow.stock_id, flow.net_value) for flow in summary.top_net_buyers] == \
+        [('a', 110), ('c', 70)]
+    assert [(flow.stock_id, flow.net_value) for flow in summary.top_net_sellers] == \
+        [('d', -60), ('b', -40)]
+    assert summary.top_net_sellers[0].to_dict() == {'stock_id': 'd', 'buy_volume': 0,
+                                                    'buy_value': 0,
+                                                    'sell_volume': 6, 'sell_value': 60,
+                                                    'net_volume': -6, 'net_value': -60}
+
+    empty: DailyMarketSummary = market_summary(date_created=day, buys=buys.iloc[:0],
+                                               sells=sells.iloc[:0])
+    assert (empty.stocks_traded, empty.net_value, empty.top_net_buyers) == (0, 0, [])
+
+
+def test_summarize_market_day() -> None:
+    install()
+    memory_datastore.clear()
+    cache_stocks.clear()
+    app = test_app()
+    view: MarketSummaryView = MarketSummaryView()
+    with app.app_context():
+        with datastore_context():
+            ndb.put_multi(
+                [BuyVolumeModel(stock_id='stock-{}'.format(n % 4), broker_id='broker-{}'.format(n),
+                                date_created=day, buy_volume=n, buy_value=n * 10)
+                 for n in range(12)] +
+                [SellVolumeModel(stock_id='stock-{}'.format(n % 3), broker_id='broker-{}'.format(n),
+                                 date_created=day, sell_volume=n, sell_value=n * 20)
+                 for n in range(6)])
+        response, status = view.get_market_summary(date_created=str(day))
+        assert status == 500, "a day not summarized yet"
+
+        queued_at: str = datetime.datetime.utcnow().isoformat()
+        response, status = view.summarize_market_day(date_created='2021-03-15', queued_at=queued_at)
+        summary: dict = response.get_json()['payload']
+        assert status == 200 and summary['volumes'] == 18 and summary['stocks_traded'] == 4
+        assert (summary['total_buy_value'], summary['total_sell_value']) == (660, 300)
+        # stocks 0 to 3 were bought for 120, 150,
+        # 180 and 210, stocks 0 to 2 sold for 60, 100 and 140
+        assert (summary['advancers'], summary['decliners']) == (4, 0)
+        assert [flow['stock_id'] for flow in summary['top_net_buyers']][:2] == \
+            ['stock-3', 'stock-0']
+
+        with recording() as stats:
+            response, status = view.get_market_summary(date_created='2021/03/15')
+        assert status == 200 and stats.rpcs == 1, "a summary is one key lookup"
+        assert response.get_json()['payload'] == summary
+
+        # the summary was computed after the task was queued,
+        # it already holds every volume written before
+        with datastore_context():
+            SellVolumeModel(stock_id='stock-0', broker_id='broker-x', date_created=day,
+                            sell_volume=100, sell_value=1000).put()
+        response, status = view.summarize_market_day(date_created=day, queued_at=queued_at)
+        assert response.get_json()['payload']['decliners'] == 0
+
+        # the cron summarizes the day again and the cached summary is evicted
+        summarized: dict = cron_summarize_market(days=2, today=day + datetime.timedelta(days=1))
+        assert summarized == {'2021-03-16': 0, '2021-03-15': 4}
+        response, status = view.get_market_summary(date_created=str(day))
+        assert response.get_json()['payload']['decliners'] == 1
+    memory_datastore.clear()
+    cache_stocks.clear()
+
+
+
+def test_stock_total_and_broker_rows() -> None:
+    def bought(stock_id: str, volume: int, broker_id: typing.Union[str, None] = None):
+        return BuyVolumeModel(stock_id=stock_id, broker_id=broker_id, date_created=day,
+                              buy_volume=volume, buy_value=volume * 10)
+
+    def sold(stock_id: str, volume: int, broker_id: typing.Union[str, None] = None):
+        return SellVolumeModel(stock_id=stock_id, broker_id=broker_id, date_created=day,
+                               sell_volume=volume, sell_value=volume * 10)
+
+    memory_datastore.clear()
+    app = test_app()
+    with app.app_context():
+        with datastore_context():
+            # stock-a has its total for the day and the rows of its brokers, stock-b only brokers
+            ndb.put_multi([bought('stock-a', 30), bought('stock-a', 10, 'broker-1'),
+                           bought('stock-a', 20, 'broker-2'), bought('stock-b', 5, 'broker-1'),
+                           bought('stock-b', 5, 'broker-2'), sold('stock-a', 4, 'broker-1'),
+                           sold('stock-a', 4)])
+            buys, sells = read_day(date_created=day)
+
+    summary: DailyMarketSummary = market_summary(date_created=day, buys=buys, sells=sells)
+    assert (summary.total_buy_volume, summary.total_buy_value) == (40, 400)
+    assert (summary.total_sell_volume, summary.total_sell_value) == (4, 40)
+    totals: dict = {total.stock_id: (total.net_value, total.total_value)
+                    for total in day_net_totals(date_created=day, buys=buys, sells=sells)}
+    assert totals == {'stock-a': (260, 340), 'stock-b': (100, 100)}
+    memory_datastore.clear()
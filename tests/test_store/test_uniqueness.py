@@ -0,0 +1,64 @@
+import typing
+from google.api_core.exceptions import RetryError
+from google.auth.credentials import AnonymousCredentials
+from google.cloud import ndb
+from google.cloud.ndb import _eventloop
+from data_service.store.stocks import Stock
+from data_service.store.uniqueness import ExistsCheck, exists_concurrently, exists
+# noinspection PyUnresolvedReferences
+from pytest_mock import mocker
+
+# the client never talks to the datastore, lookups are mocked
+client: ndb.Client = ndb.Client(project='test-project', credentials=AnonymousCredentials())
+taken_values: typing.Set[str] = {'TSLA'}
+
+
+class LookupMock:
+    """
+        lookups resolve from the event loop, events records when each was issued and answered
+    """
+    events: typing.List[str] = []
+
+    @staticmethod
+    def lookup_async(check: ExistsCheck) -> ndb.Future:
+        LookupMock.events.append('issue {}'.format(check.field))
+        future: ndb.Future = ndb.Future()
+
+        def answer() -> None:
+            LookupMock.events.append('answer {}'.format(check.field))
+            future.set_result('key' if check.value in taken_values else None)
+        _eventloop.call_soon(answer)
+        return future
+
+
+# noinspection PyShadowingNames
+def test_exists_concurrently(mocker):
+    mocker.patch.object(ExistsCheck, 'lookup_async', autospec=True,
+                        side_effect=LookupMock.lookup_async)
+    with client.context():
+        LookupMock.events = []
+        found: dict = exists_concurrently(
+            {'stock_id': ExistsCheck(model=Stock, field='stock_id', value='stock_x'),
+             'stock_code': ExistsCheck(model=Stock, field='stock_code', value='TSLA'),
+             'symbol': ExistsCheck(model=Stock, field='symbol', value=None)})
+        assert found == {'stock_id': False, 'stock_code': True, 'symbol': False}
+        # every lookup is in flight before the first one is answered,
+        # values which are not strings are not looked up
+        assert LookupMock.events == ['issue stock_id', 'issue stock_code', 'answer stock_id',
+                                     'answer stock_code']
+
+
+# noinspection PyShadowingNames
+def test_lookups(mocker):
+    get_async = mocker.patch('google.cloud.ndb.Key.get_async')
+    query = mocker.patch('google.cloud.ndb.Model.query')
+    with client.context():
+        ExistsCheck(model=Stock, field='stock_id', value='stock_x').lookup_async()
+        assert get_async.call_count == 1
+        ExistsCheck(model=Stock, field='symbol', value='TSLA').lookup_async()
+        query.return_value.get_async.assert_called_once_with(keys_only=True)
+
+        failed: ndb.Future = ndb.Future()
+        failed.set_exception(RetryError('deadline exceeded', cause=None))
+        query.return_value.get_async.return_value = failed
+        assert exists(model=Stock, field='symbol', value='TSLA') is None
@@ -0,0 +1,46 @@
+from data_service.utils.async_views import async_views, event_loop
+from .. import test_app
+
+
+class ViewMock:
+    """
+        a view with a sync method, its async variant and a method without one
+    """
+    def __init__(self):
+        self.name: str = 'view'
+
+    @staticmethod
+    def get_stock(stock_id: str) -> tuple:
+        return {'served_by': 'sync', 'stock_id': stock_id}, 200
+
+    @staticmethod
+    async def get_stock_async(stock_id: str) -> tuple:
+        return {'served_by': 'async', 'stock_id': stock_id}, 200
+
+    @staticmethod
+    def get_broker(broker_id: str) -> tuple:
+        return {'served_by': 'sync', 'broker_id': broker_id}, 200
+
+    @staticmethod
+    def get_broker_async(broker_id: str) -> tuple:
+        # a wrapper rejecting the input answers without creating a coroutine
+        return {'status': False, 'message': 'broker_id is required'}, 500
+
+
+def test_async_views():
+    app = test_app()
+    with app.app_context():
+        view: ViewMock = async_views(ViewMock())
+        app.config['ASYNC_VIEWS'] = False
+        assert view.get_stock(stock_id='stock_x')[0]['served_by'] == 'sync'
+
+        app.config['ASYNC_VIEWS'] = True
+        try:
+            assert view.get_stock(stock_id='stock_x') == (
+                {'served_by': 'async', 'stock_id': 'stock_x'}, 200)
+            assert view.get_broker(broker_id='')[1] == 500
+            assert view.name == 'view'
+            # the loop is kept for the next request served by this thread
+            assert event_loop() is event_loop()
+        finally:
+            app.config['ASYNC_VIEWS'] = False
@@ -0,0 +1,77 @@
+import gzip
+import json
+import typing
+from google.cloud import ndb
+from data_service.config.use_context import datastore_context
+from data_service.store.memory import memory_datastore
+from data_service.store.stocks import Stock
+from data_service.store.users import UserModel
+from data_service.views.users import UserView
+from data_service.views.stocks import StockView
+from .. import test_app
+
+user_count: int = 7
+
+
+def read_lines(chunks: typing.Iterable[bytes]) -> typing.List[dict]:
+    return [json.loads(line) for line in b"".join(chunks).splitlines()]
+
+
+def test_export_users():
+    memory_datastore.clear()
+    app = test_app()
+    batch_size: int = app.config['EXPORT_BATCH_SIZE']
+    app.config['EXPORT_BATCH_SIZE'] = 3
+    with app.test_request_context():
+        with datastore_context():
+            ndb.put_multi([UserModel(uid='uid_{}'.format(index), names='name', password='hash',
+                                     email='user_{}@example.com'.format(index))
+                           for index in range(user_count)])
+
+        response, status = UserView().export_users()
+        assert status == 200
+        assert response.mimetype == 'application/x-ndjson'
+
+        chunks: typing.Iterator[bytes] = iter(response.response)
+        first_chunk: bytes = next(chunks)
+        assert len(first_chunk.splitlines()) == 3, "every chunk holds one page of users"
+        lines: typing.List[dict] = read_lines([first_chunk] + list(chunks))
+        assert sorted(line['uid'] for line in lines) == ['uid_{}'.format(index)
+                                                         for index in range(user_count)]
+        assert all('password' not in line for line in lines)
+
+        response, status = UserView().export_users(compress=True)
+        assert response.headers['Content-Encoding'] == 'gzip'
+        plain: bytes = gzip.decompress(b"".join(response.response))
+        assert len(plain.splitlines()) == user_count
+
+        response, status = StockView().export(path='prices')
+        assert status == 500
+    app.config['EXPORT_BATCH_SIZE'] = batch_size
+    memory_datastore.clear()
+
+
+def test_export_route(monkeypatch):
+    memory_datastore.clear()
+    monkeypatch.setenv('AUTH_PROJECTS', 'project')
+    monkeypatch.setenv('SECRET', 'secret')
+    app = test_app()
+    with app.app_context():
+        with datastore_context():
+            ndb.put_multi([Stock(stock_id='stock-{}'.format(index), stock_code='S{}'.format(index),
+                                 stock_name='stock', symbol='S{}'.format(index))
+                           for index in range(5)])
+
+    response = app.test_client().get('/api/v1/stocks/export/stocks',
+                                     headers={'X-PROJECT-NAME': 'project',
+                                              'x-auth-token': 'secret'})
+    assert response.status_code == 200
+    assert sorted(line['stock_id'] for line in read_lines([response.get_data()])) == [
+        'stock-{}'.format(index) for index in range(5)]
+
+    # an empty kind streams nothing
+    response = app.test_client().get('/api/v1/stocks/export/brokers',
+                                     headers={'X-PROJECT-NAME': 'project',
+                                              'x-auth-token': 'secret'})
+    assert response.status_code == 200 and response.get_data() == b""
+    memory_datastore.clear()
@@ -0,0 +1,107 @@
+import typing
+from datetime import date
+from data_service.main import cache_stocks
+from data_service.store.stocks import BuyVolumeModel
+from data_service.store.users import UserModel
+from data_service.utils.fields import (FieldSelection, WindowSelection, fields_error, parse_fields,
+                                       window_error)
+from data_service.views.stocks import StockView
+from .. import test_app
+# noinspection PyUnresolvedReferences
+from pytest_mock import mocker
+
+day: date = date(2021, 3, 15)
+
+
+class ProjectionQueryMock:
+    """
+        records the projection of every query, returns the buy volumes of the day
+    """
+    projections: list = []
+
+    def __init__(self, *args, **kwargs):
+        self.projection: typing.Union[tuple, None] = kwargs.get('projection')
+        ProjectionQueryMock.projections.append(self.projection)
+
+    def fetch(self) -> typing.List[BuyVolumeModel]:
+        if self.projection:
+            return [BuyVolumeModel(projection=self.projection, stock_id='stock_x', buy_volume=10,
+                                   buy_value=20)]
+        return [BuyVolumeModel(transaction_id='transaction_x', stock_id='stock_x', date_created=day,
+                               buy_volume=10, buy_value=20, buy_ave_price=2)]
+
+
+def test_parse_fields():
+    assert parse_fields(None) is None
+    assert parse_fields(" stock_id, buy_volume,stock_id,") == ['stock_id', 'buy_volume']
+    assert parse_fields(['uid', 'address.city']) == ['uid', 'address.city']
+    assert fields_error(model=UserModel, fields="uid,address.city") is None
+    assert fields_error(model=UserModel,
+                        fields="uid,address.planet,age") == "unknown fields: address.planet, age"
+    assert fields_error(model=UserModel, fields={'uid': True}) is not None
+
+
+def test_field_selection():
+    selection: FieldSelection = FieldSelection(model=BuyVolumeModel,
+                                               fields="date_created,buy_volume,buy_value",
+                                               stock_id='stock_x')
+    assert selection.projection == ('date_created', 'buy_volume', 'buy_value')
+    # the filtered property is not projected, its value comes from the filter
+    selection = FieldSelection(model=BuyVolumeModel,
+                               fields="stock_id,buy_value,buy_volume,date_created",
+                               date_created=day)
+    assert selection.projection == ('stock_id', 'buy_volume', 'buy_value')
+    assert FieldSelection(model=BuyVolumeModel, fields="stock_id,buy_ave_price",
+                          date_created=day).projection is None
+    assert FieldSelection(model=UserModel, fields="email,uid").projection == ('uid', 'email')
+
+    user: UserModel = UserModel(uid='uid_x', email='user@example.com', password='hash')
+    selection: FieldSelection = FieldSelection(model=UserModel, fields="uid,address.city")
+    assert selection.records([user]) == [{'uid': 'uid_x', 'address': None}]
+
+
+def test_window_selection():
+    assert window_error(date_from='2021-03-01', date_to=day, limit=30) is None
+    assert window_error(date_from=None, date_to="") is None
+    assert window_error(date_from=day, date_to='2021-03-01') == "from cannot be after to"
+    assert window_error(date_from='15 march', date_to=None) is not None
+    assert window_error(date_from=None, date_to=None, limit=-1) is not None
+
+    selection: WindowSelection = WindowSelection(model=BuyVolumeModel, window='date_created',
+                                                 fields="date_created,buy_volume,buy_value",
+                                                 date_from='2021-03-01',
+                                                 limit="30", stock_id='stock_x')
+    assert (selection.date_from, selection.date_to, selection.fetch_limit) == \
+        (date(2021, 3, 1), None, 30)
+    assert selection.projection == ('date_created', 'buy_volume', 'buy_value')
+    # the query is ordered on the window, a projection without it cannot serve it
+    assert FieldSelection(model=BuyVolumeModel, fields="stock_id,buy_volume,buy_value",
+                          date_created=day).projection
+    assert WindowSelection(model=BuyVolumeModel, window='transaction_id',
+                           fields="stock_id,buy_volume,buy_value",
+                           date_created=day).projection is None
+
+
+# noinspection PyShadowingNames
+def test_get_day_buy_volumes_fields(mocker):
+    mocker.patch('data_service.config.use_context.context_module.get_context',
+                 return_value=object())
+    mocker.patch('google.cloud.ndb.Model.query', side_effect=ProjectionQueryMock)
+    mocker.patch.object(StockView.get_day_buy_volumes.memoized, 'unless', None)
+    with test_app().app_context():
+        cache_stocks.clear()
+        ProjectionQueryMock.projections = []
+        response, status = StockView().get_day_buy_volumes(date_created=day,
+                                                           fields="stock_id,buy_volume,buy_value")
+        assert status == 200
+        assert response.get_json()['payload'] == [
+            {'stock_id': 'stock_x', 'buy_volume': 10, 'buy_value': 20}]
+
+        response, status = StockView().get_day_buy_volumes(date_created=day,
+                                                           fields="stock_id,buy_ave_price")
+        assert response.get_json()['payload'] == [{'stock_id': 'stock_x', 'buy_ave_price': 2}]
+        assert ProjectionQueryMock.projections == [('stock_id', 'buy_volume', 'buy_value'), None]
+
+        response, status = StockView().get_day_buy_volumes(date_created=day,
+                                                           fields="stock_id,price")
+        assert status == 500
@@ -0,0 +1,78 @@
+import typing
+from google.cloud import ndb
+from data_service.config import Config
+from data_service.main import cache_stocks
+from data_service.store.stocks import Stock
+from data_service.utils.pagination import page_limit, page_error, fetch_page
+from data_service.views.stocks import StockView
+from .. import test_app
+# noinspection PyUnresolvedReferences
+from pytest_mock import mocker
+
+stock_ids: typing.List[str] = ['stock_{}'.format(index) for index in range(5)]
+
+
+class PagedQueryMock:
+    """
+        serves stock_ids a page at a time, cursors are offsets, records every page read
+    """
+    pages: typing.List[tuple] = []
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    @staticmethod
+    def fetch_page(page_size: int, start_cursor: typing.Union[ndb.Cursor, None] = None) -> tuple:
+        start: int = int(start_cursor.cursor) if start_cursor else 0
+        PagedQueryMock.pages.append((page_size, start))
+        end: int = start + page_size
+        stocks: typing.List[Stock] = [
+            Stock(stock_id=stock_id, stock_code=stock_id, stock_name=stock_id,
+                  symbol=stock_id) for stock_id in stock_ids[start:end]]
+        return stocks, ndb.Cursor(cursor=str(end).encode('utf-8')), end < len(stock_ids)
+
+
+def test_page_limit():
+    assert page_limit(None) == Config.PAGE_SIZE
+    assert page_limit(10) == 10
+    assert page_limit('10') == 10
+    assert page_limit(0) is None
+    assert page_limit(Config.MAX_PAGE_SIZE + 1) is None
+    assert page_limit(True) is None
+    assert page_error(limit='ten', cursor=None) is not None
+    assert page_error(limit=10, cursor='not a cursor') == "cursor is not valid"
+    assert page_error(limit=10, cursor=None) is None
+
+
+def test_fetch_page():
+    PagedQueryMock.pages = []
+    stocks, cursor = fetch_page(query=PagedQueryMock(), limit=2)
+    assert [stock.stock_id for stock in stocks] == stock_ids[:2]
+    stocks, cursor = fetch_page(query=PagedQueryMock(), limit=3, cursor=cursor)
+    assert [stock.stock_id for stock in stocks] == stock_ids[2:]
+    assert cursor is None, "the last page returned a cursor"
+    assert PagedQueryMock.pages == [(2, 0), (3, 2)]
+
+
+# noinspection PyShadowingNames
+def test_get_all_stocks_pages_are_cached(mocker):
+    mocker.patch('data_service.config.use_context.context_module.get_context',
+                 return_value=object())
+    mocker.patch('google.cloud.ndb.Model.query', side_effect=PagedQueryMock)
+    mocker.patch.object(StockView.get_all_stocks.memoized, 'unless', None)
+    with test_app().app_context():
+        cache_stocks.clear()
+        PagedQueryMock.pages = []
+        stock_view: StockView = StockView()
+        response, status = stock_view.get_all_stocks(limit=2)
+        first_page: dict = response.get_json()
+        assert [stock['stock_id'] for stock in first_page['payload']] == stock_ids[:2]
+
+        response, status = stock_view.get_all_stocks(limit=2, cursor=first_page['cursor'])
+        assert [stock['stock_id'] for stock in response.get_json()['payload']] == stock_ids[2:4]
+        stock_view.get_all_stocks(limit=2)
+        stock_view.get_all_stocks(limit=2, cursor=first_page['cursor'])
+        assert PagedQueryMock.pages == [(2, 0), (2, 2)], "pages were not cached"
+
+        response, status = stock_view.get_all_stocks(limit=Config.MAX_PAGE_SIZE + 1)
+        assert status == 500
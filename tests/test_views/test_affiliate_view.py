@@ -31,6 +31,9 @@ class AffiliateQueryMock:
     def fetch(self) -> typing.List[Affiliates]:
         return [self.affiliate_instance for _ in range(self.results_range)]
 
+    def fetch_page(self, page_size: int, start_cursor=None) -> tuple:
+        return self.fetch()[:page_size], None, False
+
     def get(self) -> Affiliates:
         return self.affiliate_instance
 
@@ -43,6 +46,7 @@ class AffiliateQueryMock:
 def test_register_affiliate(mocker):
     mocker.patch('google.cloud.ndb.Model.put', return_value=create_id())
     mocker.patch('google.cloud.ndb.Model.query', return_value=AffiliateQueryMock())
+    mocker.patch('google.cloud.ndb.Key.get', return_value=AffiliateQueryMock().get())
     mocker.patch('data_service.store.affiliates.AffiliatesValidators.user_already_registered', return_value=False)
 
     with test_app().app_context():
@@ -77,6 +81,7 @@ def test_register_affiliate(mocker):
 def test_increment_decrement_total_recruits(mocker):
     mocker.patch('google.cloud.ndb.Model.put', return_value=create_id())
     mocker.patch('google.cloud.ndb.Model.query', return_value=AffiliateQueryMock())
+    mocker.patch('google.cloud.ndb.Key.get', return_value=AffiliateQueryMock().get())
 
     with test_app().app_context():
         affiliates_view_instance = AffiliatesView()
@@ -92,6 +97,7 @@ def test_increment_decrement_total_recruits(mocker):
 def test_delete_affiliate(mocker):
     mocker.patch('google.cloud.ndb.Model.put', return_value=create_id())
     mocker.patch('google.cloud.ndb.Model.query', return_value=AffiliateQueryMock())
+    mocker.patch('google.cloud.ndb.Key.get', return_value=AffiliateQueryMock().get())
 
     with test_app().app_context():
         affiliates_view_instance = AffiliatesView()
@@ -109,6 +115,7 @@ def test_delete_affiliate(mocker):
 def test_mark_active(mocker):
     mocker.patch('google.cloud.ndb.Model.put', return_value=create_id())
     mocker.patch('google.cloud.ndb.Model.query', return_value=AffiliateQueryMock())
+    mocker.patch('google.cloud.ndb.Key.get', return_value=AffiliateQueryMock().get())
 
     with test_app().app_context():
         affiliates_view_instance = AffiliatesView()
@@ -131,6 +138,7 @@ def test_mark_active(mocker):
 def test_get_affiliate(mocker):
     mocker.patch('google.cloud.ndb.Model.put', return_value=create_id())
     mocker.patch('google.cloud.ndb.Model.query', return_value=AffiliateQueryMock())
+    mocker.patch('google.cloud.ndb.Key.get', return_value=AffiliateQueryMock().get())
 
     with test_app().app_context():
         affiliates_view_instance = AffiliatesView()
@@ -147,6 +155,7 @@ def test_get_affiliate(mocker):
 def test_get_all_affiliate(mocker):
     mocker.patch('google.cloud.ndb.Model.put', return_value=create_id())
     mocker.patch('google.cloud.ndb.Model.query', return_value=AffiliateQueryMock())
+    mocker.patch('google.cloud.ndb.Key.get', return_value=AffiliateQueryMock().get())
     # TODo complete the test cases
     with test_app().app_context():
         affiliate_instance: AffiliatesView = AffiliatesView()
@@ -163,6 +172,7 @@ def test_get_all_affiliate(mocker):
 def test_active_affiliates(mocker):
     mocker.patch('google.cloud.ndb.Model.put', return_value=create_id())
     mocker.patch('google.cloud.ndb.Model.query', return_value=AffiliateQueryMock())
+    mocker.patch('google.cloud.ndb.Key.get', return_value=AffiliateQueryMock().get())
     with test_app().app_context():
         affiliate_instance: AffiliatesView = AffiliatesView()
         response, status = affiliate_instance.get_active_affiliates()
@@ -178,6 +188,7 @@ def test_active_affiliates(mocker):
 def test_inactive_affiliates(mocker):
     mocker.patch('google.cloud.ndb.Model.put', return_value=create_id())
     mocker.patch('google.cloud.ndb.Model.query', return_value=AffiliateQueryMock())
+    mocker.patch('google.cloud.ndb.Key.get', return_value=AffiliateQueryMock().get())
 
     with test_app().app_context():
         affiliate_instance: AffiliatesView = AffiliatesView()
@@ -193,6 +204,7 @@ def test_inactive_affiliates(mocker):
 def test_deleted_affiliates(mocker):
     mocker.patch('google.cloud.ndb.Model.put', return_value=create_id())
     mocker.patch('google.cloud.ndb.Model.query', return_value=AffiliateQueryMock())
+    mocker.patch('google.cloud.ndb.Key.get', return_value=AffiliateQueryMock().get())
 
     with test_app().app_context():
         affiliate_instance: AffiliatesView = AffiliatesView()
@@ -208,6 +220,7 @@ def test_deleted_affiliates(mocker):
 def test_undeleted_affiliates(mocker):
     mocker.patch('google.cloud.ndb.Model.put', return_value=create_id())
     mocker.patch('google.cloud.ndb.Model.query', return_value=AffiliateQueryMock())
+    mocker.patch('google.cloud.ndb.Key.get', return_value=AffiliateQueryMock().get())
 
     with test_app().app_context():
         affiliate_instance: AffiliatesView = AffiliatesView()
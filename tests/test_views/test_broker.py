@@ -37,20 +37,20 @@ broker_data_mock: dict = {
 def test_create_broker(mocker):
     mocker.patch('google.cloud.ndb.Model.put', return_value=create_id())
     mocker.patch('google.cloud.ndb.Model.query', return_value=BrokerQueryMock())
+    mocker.patch('google.cloud.ndb.Key.get', return_value=BrokerQueryMock().get())
 
     with test_app().app_context():
         stock_view_instance: StockView = StockView()
-        mocker.patch('data_service.views.stocks.StockView.broker_id_exist', return_value=False)
-        mocker.patch('data_service.views.stocks.StockView.broker_code_exist', return_value=False)
+        exists: str = 'data_service.views.stocks.exists_concurrently'
+        mocker.patch(exists, return_value={'broker_id': False, 'broker_code': False})
         response, status = stock_view_instance.create_broker_data(broker_data=broker_data_mock)
         assert status == 200, "Unable to create broker data"
 
-        mocker.patch('data_service.views.stocks.StockView.broker_code_exist', return_value=True)
+        mocker.patch(exists, return_value={'broker_id': False, 'broker_code': True})
         response, status = stock_view_instance.create_broker_data(broker_data=broker_data_mock)
         assert status == 500, "Creating duplicate brokers"
 
-        mocker.patch('data_service.views.stocks.StockView.broker_code_exist', return_value=False)
-        mocker.patch('data_service.views.stocks.StockView.broker_id_exist', return_value=True)
+        mocker.patch(exists, return_value={'broker_id': True, 'broker_code': False})
         response, status = stock_view_instance.create_broker_data(broker_data=broker_data_mock)
         assert status == 500, "Creating duplicate brokers"
 
@@ -61,6 +61,7 @@ def test_create_broker(mocker):
 def test_update_broker_data(mocker):
     mocker.patch('google.cloud.ndb.Model.put', return_value=create_id())
     mocker.patch('google.cloud.ndb.Model.query', return_value=BrokerQueryMock())
+    mocker.patch('google.cloud.ndb.Key.get', return_value=BrokerQueryMock().get())
     
     with test_app().app_context():
         stock_view_instance: StockView = StockView()
@@ -0,0 +1,100 @@
+import typing
+from datetime import date
+from google.cloud import ndb
+from data_service.main import cache_stocks
+from data_service.views.bulk_volumes import (BulkVolumeView, validate_volume_rows, volume_specs,
+                                             PUT_CHUNK_SIZE)
+from .. import test_app
+# noinspection PyUnresolvedReferences
+from pytest_mock import mocker
+
+
+def buy_row(**values) -> dict:
+    row: dict = {'stock_id': 'stock_x', 'date_created': '2021-03-15', 'buy_volume': 10,
+                 'buy_value': 20,
+                 'buy_ave_price': 2, 'buy_market_val_percent': 5, 'buy_trade_count': 3}
+    row.update(values)
+    return row
+
+
+class PutMultiMock:
+    """
+        records the size of each put_multi_async call,
+        fails the entities of chunks listed in failing
+    """
+    calls: typing.List[int] = []
+    failing: typing.List[int] = []
+
+    @staticmethod
+    def put_multi_async(entities: list, *args, **kwargs) -> typing.List[ndb.Future]:
+        chunk: int = len(PutMultiMock.calls)
+        PutMultiMock.calls.append(len(entities))
+        futures: typing.List[ndb.Future] = []
+        for _ in entities:
+            future: ndb.Future = ndb.Future()
+            if chunk in PutMultiMock.failing:
+                future.set_exception(RuntimeError('commit failed'))
+            else:
+                future.set_result('key')
+            futures.append(future)
+        return futures
+
+
+def test_validate_volume_rows():
+    rows: list = [buy_row(), buy_row(stock_id=''), buy_row(buy_volume=-1),
+                  buy_row(buy_market_val_percent=101),
+                  buy_row(date_created='15th March'), buy_row(buy_value='30'), 'not a row',
+                  buy_row(buy_value=2.5), buy_row(date_created='2021/03/16')]
+    frame, errors = validate_volume_rows(rows=rows, spec=volume_specs['buy-volumes'])
+    assert [bool(row_errors) for row_errors in errors] == [False, True, True, True, True, False,
+                                                           True, True, False]
+    assert errors[1] == ["stock id is required"]
+    assert frame.loc[5, 'buy_value'] == 30
+    assert frame.loc[8, 'date_created'] == date(2021, 3, 16)
+
+    frame, errors = validate_volume_rows(
+        rows=[{'stock_id': 'stock_x', 'date_created': '2021-03-15', 'net_volume': 1,
+               'net_value': 1, 'total_value': 1, 'total_volume': 1}],
+        spec=volume_specs['net-volumes'])
+    assert errors == [["transaction id is required"]]
+
+
+# noinspection PyShadowingNames
+def test_create_volumes_bulk(mocker):
+    mocker.patch('data_service.config.use_context.context_module.get_context',
+                 return_value=object())
+    mocker.patch('google.cloud.ndb.put_multi_async', side_effect=PutMultiMock.put_multi_async)
+    record_volume_history = mocker.patch('data_service.views.bulk_volumes.record_volume_history',
+                                         return_value=1)
+    queue_market_summaries = mocker.patch('data_service.views.bulk_volumes.queue_market_summaries',
+                                          return_value=1)
+    PutMultiMock.calls, PutMultiMock.failing = [], [1]
+    rows: list = [buy_row(stock_id='stock_{}'.format(index))
+                  for index in range(PUT_CHUNK_SIZE + 10)]
+    rows[3] = buy_row(buy_volume='many')
+
+    with test_app().app_context():
+        cache_stocks.clear()
+        response, status = BulkVolumeView().create_volumes_bulk(path='buy-volumes', rows=rows)
+        assert status == 200
+        payload: dict = response.get_json()['payload']
+        assert PutMultiMock.calls == [PUT_CHUNK_SIZE, 9]
+        assert payload['written'] == PUT_CHUNK_SIZE
+        assert payload['results'][3]['status'] is False
+        # rows of the failed second chunk are reported, not dropped
+        assert payload['results'][-1] == {'row': len(rows) - 1, 'status': False,
+                                          'errors': ['unable to save row: commit failed']}
+        transaction_ids: typing.Set[str] = {result['transaction_id']
+                                            for result in payload['results'] if result['status']}
+        assert len(transaction_ids) == PUT_CHUNK_SIZE, "rows share a transaction id"
+        # only the rows written are recorded in the volume history
+        recorded: typing.List[dict] = record_volume_history.call_args.kwargs['volumes']
+        assert {volume['transaction_id'] for volume in recorded} == transaction_ids
+        # the day written is summarized again
+        assert set(queue_market_summaries.call_args.kwargs['dates']) == {date(2021, 3, 15)}
+
+        view: BulkVolumeView = BulkVolumeView()
+        response, status = view.create_volumes_bulk(path='buy-volumes', rows=[buy_row()] * 2001)
+        assert status == 500
+        response, status = view.create_volumes_bulk(path='price-volumes', rows=[buy_row()])
+        assert status == 500
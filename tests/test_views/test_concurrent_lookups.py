@@ -0,0 +1,87 @@
+import typing
+from datetime import date
+from google.auth.credentials import AnonymousCredentials
+from google.cloud import ndb
+from google.cloud.ndb import _eventloop
+from data_service.store.stocks import Stock, Broker, StockModel
+from data_service.views.stocks import StockView
+from data_service.views.stock_price import CatchStockPriceDataErrors
+# noinspection PyUnresolvedReferences
+from pytest_mock import mocker
+
+# the client never talks to the datastore, lookups are mocked
+client: ndb.Client = ndb.Client(project='test-project', credentials=AnonymousCredentials())
+
+
+class LookupMock:
+    """
+        gets and queries resolve from the event loop,
+        events records when each was issued and answered
+    """
+    events: typing.List[str] = []
+
+    @staticmethod
+    def resolve_later(name: str, result: typing.Any) -> ndb.Future:
+        LookupMock.events.append('issue {}'.format(name))
+        future: ndb.Future = ndb.Future()
+
+        def answer() -> None:
+            LookupMock.events.append('answer {}'.format(name))
+            future.set_result(result)
+        _eventloop.call_soon(answer)
+        return future
+
+    @staticmethod
+    def get_async(key: ndb.Key, **options) -> ndb.Future:
+        model = {'Stock': Stock, 'Broker': Broker, 'StockModel': StockModel}[key.kind()]
+        return LookupMock.resolve_later(name=key.kind(), result=model())
+
+    @staticmethod
+    def query_get_async(query: ndb.Query, **options) -> ndb.Future:
+        return LookupMock.resolve_later(name='query {}'.format(query.kind), result=None)
+
+
+# noinspection PyShadowingNames
+def test_stock_and_broker_lookups(mocker):
+    mocker.patch.object(ndb.Key, 'get_async', autospec=True, side_effect=LookupMock.get_async)
+    with client.context():
+        LookupMock.events = []
+        stock, broker = StockView.stock_and_broker_tasklet(stock_id='stock_x',
+                                                           broker_id='broker_x').result()
+        assert isinstance(stock, Stock) and isinstance(broker, Broker)
+        assert LookupMock.events == ['issue Stock', 'issue Broker', 'answer Stock', 'answer Broker']
+
+        LookupMock.events = []
+        stock, broker = StockView.stock_and_broker_tasklet(stock_id=None,
+                                                           broker_id='broker_x').result()
+        assert stock is None and isinstance(broker, Broker)
+
+
+# noinspection PyShadowingNames
+def test_stock_model_lookups(mocker):
+    mocker.patch.object(ndb.Key, 'get_async', autospec=True, side_effect=LookupMock.get_async)
+    mocker.patch.object(ndb.Query, 'get_async', autospec=True,
+                        side_effect=LookupMock.query_get_async)
+    with client.context():
+        LookupMock.events = []
+        stock_model, stock, broker = StockView.stock_model_parts_tasklet(
+            transaction_id='transaction_x', stock_code='TSLA', broker_code='BRK').result()
+        assert isinstance(stock_model, StockModel)
+        assert stock is None and broker is None
+        assert LookupMock.events[:3] == ['issue StockModel', 'issue query Stock',
+                                         'issue query Broker']
+
+
+# noinspection PyShadowingNames
+def test_price_lookups(mocker):
+    mocker.patch.object(ndb.Key, 'get_async', autospec=True, side_effect=LookupMock.get_async)
+    mocker.patch.object(ndb.Query, 'get_async', autospec=True,
+                        side_effect=LookupMock.query_get_async)
+    with client.context():
+        LookupMock.events = []
+        found: tuple = CatchStockPriceDataErrors.price_lookups_tasklet(
+            stock_id='stock_x', date_created=date(2021, 1, 4)).result()
+        assert found == (True, False)
+        assert LookupMock.events[:2] == ['issue Stock', 'issue query StockPriceData']
+        assert CatchStockPriceDataErrors.price_lookups_tasklet(
+            stock_id=None, date_created=None).result() == (None, None)
@@ -0,0 +1,115 @@
+import datetime
+import typing
+from google.api_core import exceptions as core_exceptions
+from google.cloud import ndb
+from data_service.config.use_context import datastore_context
+from data_service.main import cache_stocks
+from data_service.store.history import (StaleBucket, VolumeHistory, days_recorded_since,
+                                        history_key, replace_bucket)
+from data_service.store.memory import memory_datastore
+from data_service.store.stocks import BuyVolumeModel
+from data_service.views.history import VolumeHistoryView, record_volume_history
+from data_service.views.stocks import StockView
+from ..test_store.test_history import buy_volume
+from .. import test_app
+# noinspection PyUnresolvedReferences
+from pytest import raises
+# noinspection PyUnresolvedReferences
+from pytest_mock import mocker
+
+day: datetime.date = datetime.date(2021, 4, 6)
+
+
+# noinspection PyShadowingNames
+def test_single_row_writes_queue_one_rebuild(mocker):
+    memory_datastore.clear()
+    cache_stocks.clear()
+    create_task = mocker.patch('data_service.views.history.create_task', return_value='task')
+    app = test_app()
+    with app.app_context():
+        for broker in ('broker-1', 'broker-2', 'broker-3'):
+            response, status = StockView().create_buy_model(buy_data=dict(
+                buy_volume('stock-1', day, broker, 100), date_created=str(day)))
+            assert status == 200, response.get_json()['message']
+
+        payloads: typing.List[dict] = [call.kwargs['payload']
+                                       for call in create_task.call_args_list]
+        assert [(payload['side'], payload['stock_id'], payload['month'])
+                for payload in payloads] == [('buy', 'stock-1', '2021-04-01')] * 3
+        with datastore_context():
+            assert history_key('buy', 'stock-1', day).get() is None, "the write wrote the history"
+            assert days_recorded_since(None, sides=('buy',)) == [day]
+
+        # the first task rebuilds the bucket from every broker's row, the later ones find it current
+        messages: typing.List[str] = []
+        for payload in payloads:
+            response, status = VolumeHistoryView().rebuild_volume_history(**payload)
+            assert status == 200
+            messages.append(response.get_json()['message'])
+        assert messages == ['buy volume history of stock-1 2021-04-01 rebuilt'] + \
+            ['buy volume history of stock-1 2021-04-01 is current'] * 2
+        with datastore_context():
+            bucket: VolumeHistory = history_key('buy', 'stock-1', day).get()
+            assert sorted(record['broker_id'] for record in bucket.records()) == [
+                'broker-1', 'broker-2', 'broker-3']
+
+    mocker.stopall()
+    memory_datastore.clear()
+    cache_stocks.clear()
+
+
+# noinspection PyShadowingNames
+def test_history_never_fails_a_write(mocker):
+    memory_datastore.clear()
+    cache_stocks.clear()
+    app = test_app()
+    with app.app_context():
+        # a task which cannot be queued is rebuilt straight away
+        mocker.patch('data_service.views.history.create_task', return_value=None)
+        response, status = StockView().create_buy_model(buy_data=dict(
+            buy_volume('stock-1', day, 'broker-1', 100), date_created=str(day)))
+        assert status == 200
+        with datastore_context():
+            assert len(history_key('buy', 'stock-1', day).get().records()) == 1
+
+        # a rebuild which fails is logged, the volume is saved
+        mocker.patch('data_service.views.history.rebuild_bucket', side_effect=StaleBucket('busy'))
+        response, status = StockView().create_buy_model(buy_data=dict(
+            buy_volume('stock-1', day, 'broker-2', 100), date_created=str(day)))
+        assert status == 200
+        with datastore_context():
+            assert len(BuyVolumeModel.query().fetch()) == 2
+
+        # a bulk merge which lost to concurrent writes queues its buckets
+        mocker.patch('data_service.views.history.record_volumes',
+                     side_effect=core_exceptions.Aborted('contention'))
+        create_task = mocker.patch('data_service.views.history.create_task', return_value='task')
+        with datastore_context():
+            assert record_volume_history(model=BuyVolumeModel, volumes=[
+                buy_volume('stock-1', day, 'broker-3', 1),
+                buy_volume('stock-2', day, 'broker-3', 1)]) == 0
+        assert sorted(call.kwargs['payload']['stock_id']
+                      for call in create_task.call_args_list) == ['stock-1', 'stock-2']
+
+    mocker.stopall()
+    memory_datastore.clear()
+    cache_stocks.clear()
+
+
+def test_stale_bucket_is_not_overwritten():
+    memory_datastore.clear()
+    app = test_app()
+    with app.app_context():
+        with datastore_context():
+            key: ndb.Key = history_key('buy', 'stock-1', day)
+            read_at: datetime.datetime = datetime.datetime.utcnow()
+            # written after the rebuild read its volumes
+            replace_bucket(key, [buy_volume('stock-1', day, 'broker-1', 1)], read_at=read_at)
+            with raises(StaleBucket):
+                earlier: datetime.datetime = read_at - datetime.timedelta(seconds=1)
+                ndb.transaction(lambda: replace_bucket(key, [], read_at=earlier))
+
+        response, status = VolumeHistoryView().rebuild_volume_history(
+            side='shares', stock_id='stock-1', month='2021-04-01')
+        assert status == 500
+    memory_datastore.clear()
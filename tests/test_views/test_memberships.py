@@ -73,6 +73,7 @@ membership_mock_data: dict = {
 def test_create_membership(mocker):
     mocker.patch('google.cloud.ndb.Model.put', return_value=create_id())
     mocker.patch('google.cloud.ndb.Model.query', return_value=MembershipsQueryMock())
+    mocker.patch('google.cloud.ndb.Key.get', return_value=MembershipsQueryMock().get())
 
     with test_app().app_context():
         membership_view_instance: MembershipsView = MembershipsView()
@@ -102,6 +103,7 @@ def test_create_membership(mocker):
 def test_update_membership(mocker):
     mocker.patch('google.cloud.ndb.Model.put', return_value=create_id())
     mocker.patch('google.cloud.ndb.Model.query', return_value=MembershipsQueryMock())
+    mocker.patch('google.cloud.ndb.Key.get', return_value=MembershipsQueryMock().get())
 
     with test_app().app_context():
         membership_view_instance: MembershipsView = MembershipsView()
@@ -125,6 +127,7 @@ def test_update_membership(mocker):
 def test_set_membership_status(mocker):
     mocker.patch('google.cloud.ndb.Model.put', return_value=create_id())
     mocker.patch('google.cloud.ndb.Model.query', return_value=MembershipsQueryMock())
+    mocker.patch('google.cloud.ndb.Key.get', return_value=MembershipsQueryMock().get())
 
     with test_app().app_context():
         membership_view_instance: MembershipsView = MembershipsView()
@@ -143,6 +146,7 @@ def test_change_membership(mocker):
     membership_query_mock_instance = MembershipsQueryMock()
     membership_query_mock_instance.membership_instance.plan_id = membership_mock_data['plan_id']
     mocker.patch('google.cloud.ndb.Model.query', return_value=membership_query_mock_instance)
+    mocker.patch('google.cloud.ndb.Key.get', return_value=membership_query_mock_instance.get())
     with test_app().app_context():
         membership_view_instance: MembershipsView = MembershipsView()
         uid: str = membership_mock_data['uid']
@@ -160,6 +164,7 @@ def test_change_membership(mocker):
 def test_send_welcome_email(mocker):
     mocker.patch('google.cloud.ndb.Model.put', return_value=create_id())
     mocker.patch('google.cloud.ndb.Model.query', return_value=MembershipsQueryMock())
+    mocker.patch('google.cloud.ndb.Key.get', return_value=MembershipsQueryMock().get())
 
     with test_app().app_context():
         membership_view_instance: MembershipsView = MembershipsView()
@@ -175,6 +180,7 @@ def test_send_welcome_email(mocker):
 def test_plan_members_payment_status(mocker):
     mocker.patch('google.cloud.ndb.Model.put', return_value=create_id())
     mocker.patch('google.cloud.ndb.Model.query', return_value=MembershipsQueryMock())
+    mocker.patch('google.cloud.ndb.Key.get', return_value=MembershipsQueryMock().get())
 
     with test_app().app_context():
         membership_view_instance: MembershipsView = MembershipsView()
@@ -192,6 +198,7 @@ def test_plan_members_payment_status(mocker):
 def test_return_plan_members(mocker):
     mocker.patch('google.cloud.ndb.Model.put', return_value=create_id())
     mocker.patch('google.cloud.ndb.Model.query', return_value=MembershipsQueryMock())
+    mocker.patch('google.cloud.ndb.Key.get', return_value=MembershipsQueryMock().get())
 
     with test_app().app_context():
         membership_view_instance: MembershipsView = MembershipsView()
@@ -206,6 +213,7 @@ def test_return_plan_members(mocker):
 def test_is_member_off(mocker):
     mocker.patch('google.cloud.ndb.Model.put', return_value=create_id())
     mocker.patch('google.cloud.ndb.Model.query', return_value=MembershipsQueryMock())
+    mocker.patch('google.cloud.ndb.Key.get', return_value=MembershipsQueryMock().get())
 
     with test_app().app_context():
         membership_view_instance: MembershipsView = MembershipsView()
@@ -220,6 +228,7 @@ def test_is_member_off(mocker):
 def test_payment_amount(mocker):
     mocker.patch('google.cloud.ndb.Model.put', return_value=create_id())
     mocker.patch('google.cloud.ndb.Model.query', return_value=MembershipsQueryMock())
+    mocker.patch('google.cloud.ndb.Key.get', return_value=MembershipsQueryMock().get())
     with test_app().app_context():
         membership_view_instance: MembershipsView = MembershipsView()
         uid: str = membership_mock_data['uid']
@@ -236,6 +245,7 @@ def test_payment_amount(mocker):
 def test_set_payment_status(mocker):
     mocker.patch('google.cloud.ndb.Model.put', return_value=create_id())
     mocker.patch('google.cloud.ndb.Model.query', return_value=MembershipsQueryMock())
+    mocker.patch('google.cloud.ndb.Key.get', return_value=MembershipsQueryMock().get())
 
     with test_app().app_context():
         membership_view_instance: MembershipsView = MembershipsView()
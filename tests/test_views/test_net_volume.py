@@ -1,8 +1,11 @@
 import typing
-from datetime import datetime
+from datetime import datetime, date
 from random import randint, choice
 from google.cloud import ndb
 from data_service.config.stocks import currency_symbols
+from data_service.config.use_context import datastore_context
+from data_service.main import cache_stocks
+from data_service.store.memory import memory_datastore
 from data_service.views.stocks import StockView
 from data_service.store.stocks import NetVolumeModel
 from data_service.utils.utils import create_id
@@ -52,3 +55,28 @@ def test_net_volume(mocker):
 
     mocker.stopall()
 
+
+# noinspection PyShadowingNames
+def test_net_volume_without_transaction_id(mocker):
+    memory_datastore.clear()
+    cache_stocks.clear()
+    mocker.patch('data_service.views.history.create_task', return_value='task')
+    net_volume_data: dict = dict(net_volume_data_mock, stock_id='stock-1', broker_id='broker-1',
+                                 date_created=str(date(2021, 4, 6)))
+    del net_volume_data['transaction_id']
+    with test_app().app_context():
+        for net_volume in (10, 20):
+            response, status = StockView().create_net_volume(
+                net_volume_data=dict(net_volume_data, net_volume=net_volume))
+            assert status == 200, response.get_json()['message']
+
+        with datastore_context():
+            volumes: typing.List[NetVolumeModel] = NetVolumeModel.query_stock_range(
+                'stock-1', date_from=date(2021, 4, 6)).fetch()
+        # writing the same volume again overwrote it
+        assert [(volume.transaction_id, volume.net_volume) for volume in volumes] == [
+            ('PSE|stock-1|2021-04-06|broker-1|net', 20)]
+
+    mocker.stopall()
+    memory_datastore.clear()
+    cache_stocks.clear()
@@ -2,6 +2,9 @@ import typing
 from datetime import datetime
 from random import randint
 from google.cloud import ndb
+from data_service.config.use_context import datastore_context
+from data_service.main import cache_stocks
+from data_service.store.memory import memory_datastore
 from data_service.views.stocks import StockView
 from data_service.store.stocks import Stock
 from data_service.utils.utils import create_id
@@ -38,30 +41,24 @@ stock_data_mock: dict = {
 def test_create_stock_data(mocker):
     mocker.patch('google.cloud.ndb.Model.put', return_value=create_id())
     mocker.patch('google.cloud.ndb.Model.query', return_value=StockQueryMock())
+    mocker.patch('google.cloud.ndb.Key.get', return_value=StockQueryMock().get())
 
     with test_app().app_context():
         stock_view_instance: StockView = StockView()
-        mocker.patch('data_service.views.stocks.StockView.stock_id_exist', return_value=False)
-        mocker.patch('data_service.views.stocks.StockView.stock_code_exist', return_value=False)
-        mocker.patch('data_service.views.stocks.StockView.symbol_exist', return_value=False)
+        exists: str = 'data_service.views.stocks.exists_concurrently'
+        mocker.patch(exists, return_value={'stock_id': False, 'stock_code': False, 'symbol': False})
         response, status = stock_view_instance.create_stock_data(stock_data=stock_data_mock)
         assert status == 200, "unable to create stock data"
 
-        mocker.patch('data_service.views.stocks.StockView.stock_id_exist', return_value=True)
-        mocker.patch('data_service.views.stocks.StockView.stock_code_exist', return_value=False)
-        mocker.patch('data_service.views.stocks.StockView.symbol_exist', return_value=False)
+        mocker.patch(exists, return_value={'stock_id': True, 'stock_code': False, 'symbol': False})
         response, status = stock_view_instance.create_stock_data(stock_data=stock_data_mock)
         assert status == 500, "Creating stock duplicates by stock_id"
 
-        mocker.patch('data_service.views.stocks.StockView.stock_id_exist', return_value=False)
-        mocker.patch('data_service.views.stocks.StockView.stock_code_exist', return_value=True)
-        mocker.patch('data_service.views.stocks.StockView.symbol_exist', return_value=False)
+        mocker.patch(exists, return_value={'stock_id': False, 'stock_code': True, 'symbol': False})
         response, status = stock_view_instance.create_stock_data(stock_data=stock_data_mock)
         assert status == 500, "Creating stock duplicates by stock_code"
 
-        mocker.patch('data_service.views.stocks.StockView.stock_id_exist', return_value=False)
-        mocker.patch('data_service.views.stocks.StockView.stock_code_exist', return_value=False)
-        mocker.patch('data_service.views.stocks.StockView.symbol_exist', return_value=True)
+        mocker.patch(exists, return_value={'stock_id': False, 'stock_code': False, 'symbol': True})
         response, status = stock_view_instance.create_stock_data(stock_data=stock_data_mock)
         assert status == 500, "Creating stock duplicates by symbol"
 
@@ -72,6 +69,7 @@ def test_create_stock_data(mocker):
 def test_update_stock_data(mocker):
     mocker.patch('google.cloud.ndb.Model.put', return_value=create_id())
     mocker.patch('google.cloud.ndb.Model.query', return_value=StockQueryMock())
+    mocker.patch('google.cloud.ndb.Key.get', return_value=StockQueryMock().get())
 
     with test_app().app_context():
         stock_view_instance: StockView = StockView()
@@ -80,3 +78,18 @@ def test_update_stock_data(mocker):
 
     mocker.stopall()
 
+
+
+def test_get_stock_data_by_symbol():
+    memory_datastore.clear()
+    cache_stocks.clear()
+    with test_app().app_context():
+        with datastore_context():
+            Stock(stock_id='stock-1', stock_code='TSLA', stock_name='TESLA', symbol='TSLA').put()
+        stock_view: StockView = StockView()
+        response, status = StockView.get_stock_data.uncached(stock_view, symbol='TSLA')
+        assert status == 200 and response.get_json()['payload']['stock_id'] == 'stock-1'
+        response, status = StockView.get_stock_data.uncached(stock_view, symbol='NONE')
+        assert status == 500 and response.get_json()['message'] == 'Stock not found'
+    memory_datastore.clear()
+    cache_stocks.clear()